@@ -0,0 +1,125 @@
+"""
+Benchmark (latência simulada, sem banco): loader classic (7 queries em sequência) vs loader
+async (utils.async_loader: 3 níveis, queries de cada nível em paralelo).
+
+As 8 tabelas vêm do dataset sintético do bench_money; cada query custa --rtt ms de round-trip
+(time.sleep no cursor do classic, asyncio.sleep no fetch do async) mais a filtragem/hidratação
+reais. Reporta latência p50/p95 por batch e confere que os 7 maps são idênticos.
+Contra o banco de verdade (psycopg 3 instalado): benchmarks/bench_loaders.py.
+
+Uso: python3 benchmarks/bench_async_loader.py -n 2000 -b 100 --rtt 2
+"""
+import sys
+import os
+import re
+import time
+import asyncio
+import random
+import argparse
+import statistics
+from dataclasses import fields
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_money import synthetic_related
+from benchmarks.bench_loaders import MAP_NAMES, _normalize, percentile
+from models.hydration import hydrate_all
+from utils.async_loader import RELATED_QUERIES, load_related_async
+from utils.etl_common import batch_load_related_data
+
+# tabela -> coluna do filtro ANY(%s)
+FILTER_COLUMN = {
+    "entidade": "id_entidade", "fornecedor": "id_fornecedor", "empenho": "id_contrato",
+    "liquidacao_nota_fiscal": "id_empenho", "pagamento": "id_empenho", "nfe": "chave_nfe", "nfe_pagamento": "chave_nfe",
+}
+
+
+def build_tables(related):
+    """Linhas por valor da coluna de filtro, nas colunas de HYDRATION_COLUMNS de cada model."""
+    objs = {"entidade": related[0].values(), "fornecedor": related[1].values(),
+            "empenho": [o for v in related[2].values() for o in v],
+            "liquidacao_nota_fiscal": [o for v in related[3].values() for o in v],
+            "nfe": related[4].values(), "pagamento": [o for v in related[5].values() for o in v],
+            "nfe_pagamento": [o for v in related[6].values() for o in v]}
+    tables = {}
+    for table, items in objs.items():
+        model = RELATED_QUERIES[table][1]
+        cols = tuple(c if isinstance(c, str) else c[0] for c in model.HYDRATION_COLUMNS)
+        key = cols.index(FILTER_COLUMN[table])
+        index = {}
+        for obj in items:
+            row = tuple(getattr(obj, f.name) for f in fields(obj))
+            index.setdefault(row[key], []).append(row)
+        tables[table] = ([(c,) for c in cols], index)
+    return tables
+
+
+def select(tables, table, ids):
+    description, index = tables[table]
+    return description, [row for id_ in dict.fromkeys(ids) for row in index.get(id_, ())]
+
+
+class LatencyCursor:
+    def __init__(self, tables, rtt: float):
+        self.tables, self.rtt = tables, rtt
+
+    def execute(self, query, params=None):
+        time.sleep(self.rtt)
+        self.description, self._rows = select(self.tables, re.search(r"FROM (\w+)", query).group(1), params[0])
+
+    def fetchall(self):
+        return self._rows
+
+
+def latency_fetch(tables, rtt: float):
+    async def fetch(table, ids):
+        await asyncio.sleep(rtt)
+        description, rows = select(tables, table, ids)
+        return hydrate_all(rows, RELATED_QUERIES[table][1].compile_hydrator(description))
+    return fetch
+
+
+def run(n: int, batch_size: int, rtt_ms: float):
+    contratos, related = synthetic_related(random.Random(42), n)
+    tables = build_tables(related)
+    rtt = rtt_ms / 1000
+    cursor, fetch = LatencyCursor(tables, rtt), latency_fetch(tables, rtt)
+    timings = {"classic": [], "async": []}
+    mismatches = 0
+
+    loop = asyncio.new_event_loop()
+    try:
+        for start in range(0, n, batch_size):
+            batch = contratos[start:start + batch_size]
+            t0 = time.perf_counter()
+            classic = batch_load_related_data(cursor, batch)
+            timings["classic"].append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            assincrono = loop.run_until_complete(load_related_async(fetch, batch))
+            timings["async"].append(time.perf_counter() - t0)
+            for map_name, a, b in zip(MAP_NAMES, _normalize(classic), _normalize(assincrono)):
+                if a != b:
+                    mismatches += 1
+                    print(f"  ⚠️  Batch {start // batch_size + 1}: map '{map_name}' diverge")
+    finally:
+        loop.close()
+
+    print(f"\n📊 Loader classic vs async - {n:,} contratos sintéticos, batches de {batch_size}, RTT {rtt_ms} ms")
+    print(f"   {'loader':<10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, values in timings.items():
+        print(f"   {name:<10} {percentile(values, 50)*1000:>10.1f} {percentile(values, 95)*1000:>10.1f}")
+    speedup = statistics.median(timings["classic"]) / statistics.median(timings["async"])
+    print(f"   ⚡ Speedup (p50 por batch): {speedup:.2f}x   "
+          f"{'✅ Maps idênticos' if mismatches == 0 else f'❌ {mismatches} divergências'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=2_000)
+    p.add_argument("--batch", "-b", type=int, default=100)
+    p.add_argument("--rtt", type=float, default=2.0, help="Round-trip simulado por query, em ms (default: 2)")
+    args = p.parse_args()
+    run(args.contracts, args.batch, args.rtt)
@@ -0,0 +1,88 @@
+"""
+Benchmark: hidratação tuple -> model.
+
+Compara o caminho antigo (Model.from_row(dict(zip(cols, row)))) com o hydrator
+pré-compilado por tabela (Model.compile_hydrator(cursor.description)) sobre linhas
+sintéticas de liquidacao_nota_fiscal (e contrato), conferindo que os objetos
+gerados são idênticos.
+
+Não precisa de banco. Uso: python3 benchmarks/bench_hydration.py -n 1000000
+"""
+import sys
+import os
+import time
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.hydration import hydrate_all
+
+LIQ_DESCRIPTION = [("id_liquidacao_empenhonotafiscal",), ("chave_danfe",), ("data_emissao",), ("valor",), ("id_empenho",)]
+CONTRATO_DESCRIPTION = [("id_contrato",), ("valor",), ("data",), ("objeto",), ("id_entidade",), ("id_fornecedor",)]
+
+
+def liquidacao_rows(n: int):
+    base = date(2024, 1, 1)
+    return [
+        (i, f"{i:044d}", base + timedelta(days=i % 365), Decimal(i % 100000) / 100, f"2024NE{i // 4:08d}")
+        for i in range(1, n + 1)
+    ]
+
+
+def contrato_rows(n: int):
+    base = date(2024, 1, 1)
+    return [
+        (i, Decimal(i % 1000000) / 100, base + timedelta(days=i % 365), f"Objeto {i}", i % 50 + 1, i % 500 + 1)
+        for i in range(1, n + 1)
+    ]
+
+
+def legacy(rows, description, factory):
+    cols = [d[0] for d in description]
+    out = []
+    for row in rows:
+        res = factory(dict(zip(cols, row)))
+        if res.is_ok:
+            out.append(res.value)
+    return out
+
+
+def timed(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(n: int = 1_000_000, repeat: int = 3):
+    cases = (
+        ("liquidacao_nota_fiscal", liquidacao_rows(n), LIQ_DESCRIPTION, LiquidacaoNotaFiscal),
+        ("contrato", contrato_rows(n), CONTRATO_DESCRIPTION, Contrato),
+    )
+    factories = {LiquidacaoNotaFiscal: LiquidacaoNotaFiscal.from_row, Contrato: Contrato.create}
+
+    print(f"\n📊 Hidratação - {n:,} linhas, melhor de {repeat}")
+    print(f"   {'tabela':<24} {'from_row (s)':>12} {'compilado (s)':>14} {'speedup':>8}")
+    for table, rows, description, model in cases:
+        t_old, old = timed(lambda: legacy(rows, description, factories[model]), repeat)
+        t_new, new = timed(lambda: hydrate_all(rows, model.compile_hydrator(description)), repeat)
+        status = "✅" if old == new else "❌ objetos divergem"
+        print(f"   {table:<24} {t_old:>12.2f} {t_new:>14.2f} {t_old / t_new:>7.2f}x {status}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", "-n", type=int, default=1_000_000)
+    p.add_argument("--repeat", "-r", type=int, default=3)
+    args = p.parse_args()
+    run_benchmark(args.rows, args.repeat)
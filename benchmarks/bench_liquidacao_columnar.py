@@ -0,0 +1,93 @@
+"""
+Benchmark: validação de Liquidação escalar (Valida por contrato) vs engine colunar
+(liquidacao_columnar.valida_batch), sobre LiquidacaoTransactions sintéticas.
+
+Confere que os Results são idênticos e reporta contratos/s de cada caminho.
+Não precisa de banco. Uso: python3 benchmarks/bench_liquidacao_columnar.py -n 20000 -b 1000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction, ItemLiquidacao
+from clientside.domains.liquidação import Valida
+from clientside.domains.liquidacao_columnar import valida_batch
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def synthetic_ctx(rng: random.Random, id_contrato: int, anomaly_rate: float) -> LiquidacaoTransaction:
+    data_contrato = date(2023, 1, 1) + timedelta(days=rng.randint(0, 60))
+    contrato = Contrato(id_contrato, Money.from_cents(rng.randint(10**6, 10**8)), data_contrato, "Obj", 1, 2)
+    empenhos, liqs, by_nfe = {}, {}, {}
+    for e in range(rng.randint(1, 4)):
+        id_emp = f"{id_contrato}NE{e}"
+        data_emp = data_contrato + timedelta(days=rng.randint(0, 30))
+        emp = Empenho(id_emp, 2023, data_emp, "111", "Forn", Money.from_cents(10**7), 1, id_contrato)
+        empenhos[id_emp] = emp
+        inner = {}
+        for l in range(rng.randint(1, 6)):
+            id_liq = id_contrato * 1000 + e * 100 + l
+            valor = Money.from_cents(rng.randint(100, 1500000))
+            data_liq = data_emp + timedelta(days=rng.randint(1, 60))
+            if rng.random() < anomaly_rate:
+                data_liq = data_emp - timedelta(days=1)  # liquidação anterior ao empenho
+            chave = f"K{id_contrato}-{e}-{l}"
+            liq = LiquidacaoNotaFiscal(id_liq, chave, data_liq, valor, id_emp)
+            nfe = Nfe(id_liq, chave, str(l), data_liq - timedelta(days=rng.randint(0, 3)), "111", valor)
+            inner[str(id_liq)] = ItemLiquidacao(liq, nfe)
+            by_nfe.setdefault(chave, []).append(inner[str(id_liq)])
+        liqs[id_emp] = inner
+    emp_tx = EmpenhoTransaction(ENT, FORN, contrato, empenhos)
+    return LiquidacaoTransaction(emp_tx, liqs, by_nfe)
+
+
+def run_benchmark(n: int = 20_000, batch_size: int = 1_000, anomaly_rate: float = 0.02, seed: int = 42):
+    rng = random.Random(seed)
+    ctxs = [synthetic_ctx(rng, i, anomaly_rate) for i in range(1, n + 1)]
+    batches = [ctxs[i:i + batch_size] for i in range(0, n, batch_size)]
+
+    t0 = time.perf_counter()
+    scalar = [Valida(ctx) for ctx in ctxs]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    columnar = [res for batch in batches for res in valida_batch(batch)]
+    t_columnar = time.perf_counter() - t0
+
+    same = all(
+        (a.is_ok, a.value if a.is_ok else a.error) == (b.is_ok, b.value if b.is_ok else b.error)
+        for a, b in zip(scalar, columnar)
+    )
+    n_err = sum(r.is_err for r in scalar)
+    print(f"\n📊 Liquidação - {n:,} contratos ({n_err:,} com erro), batches de {batch_size}")
+    print(f"   scalar:   {t_scalar:6.2f}s ({n / t_scalar:,.0f} contratos/s)")
+    print(f"   columnar: {t_columnar:6.2f}s ({n / t_columnar:,.0f} contratos/s)")
+    print(f"   ⚡ Speedup: {t_scalar / t_columnar:.2f}x   {'✅ Results idênticos' if same else '❌ Results divergem'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=20_000)
+    p.add_argument("--batch", "-b", type=int, default=1_000)
+    p.add_argument("--anomaly-rate", type=float, default=0.02)
+    args = p.parse_args()
+    run_benchmark(args.contracts, args.batch, args.anomaly_rate)
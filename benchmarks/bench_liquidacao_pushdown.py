@@ -0,0 +1,75 @@
+"""
+Benchmark: regras de Liquidação no banco (utils/liquidacao_pushdown, 1 query set-based) vs
+caminho Python (loader classic + build_from_batch + validate_batch, batch a batch).
+
+Banco: o stand-in SQLite de benchmarks/synthetic.py (dialeto "sqlite"), com anomalias injetadas.
+Reporta contratos/s de cada caminho e confere a paridade violação a violação (check_parity).
+Não precisa de Postgres. Uso: python3 benchmarks/bench_liquidacao_pushdown.py -n 20000 -b 500
+"""
+import sys
+import os
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic import SqliteCursor, SyntheticConfig, SyntheticDataset, load_sqlite
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from utils.etl_common import batch_load_contratos, batch_load_related_data
+from utils.liquidacao_pushdown import check_parity, print_parity, run_pushdown
+from views.etl_fullpipe import validate_batch
+
+
+def python_path(cursor, batch_size: int) -> int:
+    """Contratos reprovados na Liquidação pelo caminho Python (fail-fast do fullpipe)."""
+    reprovados, after_id = 0, 0
+    while True:
+        contratos, after_id = batch_load_contratos(cursor, after_id, batch_size)
+        if after_id is None:
+            return reprovados
+        entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = \
+            batch_load_related_data(cursor, contratos)
+        txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+        reprovados += sum(l == "✗" for _, l, _, _ in
+                          validate_batch(txs, liquidacoes, nfes, pagamentos, nfe_pagamentos=nfe_pagamentos))
+
+
+def run_benchmark(n: int = 20_000, batch_size: int = 500, anomaly_rate: float = 0.05, seed: int = 42):
+    config = SyntheticConfig(contratos=n, fornecedores=max(n // 20, 10), nfe_reuse=0.1,
+                             anomaly_rate=anomaly_rate, seed=seed)
+    conn = load_sqlite(SyntheticDataset(config))
+    cursor = SqliteCursor(conn)
+    try:
+        t0 = time.perf_counter()
+        pushdown = run_pushdown(cursor, dialect="sqlite")
+        t_pushdown = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        reprovados = python_path(cursor, batch_size)
+        t_python = time.perf_counter() - t0
+
+        report = check_parity(cursor, pushdown, batch_size)
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\n📊 Liquidação - {n:,} contratos, batches de {batch_size} (SQLite stand-in)")
+    print(f"   python:    {t_python:6.2f}s ({n / t_python:,.0f} contratos/s, {reprovados:,} reprovados na L)")
+    print(f"   push-down: {t_pushdown:6.2f}s ({n / t_pushdown:,.0f} contratos/s, {len(pushdown):,} com violação)")
+    print(f"   ⚡ Speedup: {t_python / t_pushdown:.2f}x")
+    print_parity(report)
+    return report.ok
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=20_000)
+    p.add_argument("--batch", "-b", type=int, default=500)
+    p.add_argument("--anomaly-rate", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+    if not run_benchmark(args.contracts, args.batch, args.anomaly_rate, args.seed):
+        sys.exit(1)
@@ -0,0 +1,102 @@
+"""
+Benchmark: batch_load_related_data (classic, 7 round-trips) vs
+batch_load_related_data_joined (1 round-trip, CTE + json_agg) vs
+batch_load_related_data_async (3 níveis de queries em paralelo, psycopg 3).
+
+Roda contra o banco configurado no .env. Para cada batch de contratos executa os
+loaders de forma alternada (repeat vezes), confere que os 7 maps de cada um são
+idênticos aos do classic e reporta latência p50/p95 por loader.
+--loaders: subconjunto (ex.: sem async quando psycopg 3 não está instalado).
+
+Uso: python3 benchmarks/bench_loaders.py -b 100 -n 20 -r 3
+     python3 benchmarks/bench_loaders.py --loaders classic joined
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from db_connection import get_db_connection
+from utils.etl_common import stream_contratos, RELATED_LOADERS
+from utils.async_loader import close_async_loader
+
+MAP_NAMES = ("entidades", "fornecedores", "empenhos", "liquidacoes", "nfes", "pagamentos", "nfe_pagamentos")
+
+
+def _normalize(related):
+    """Listas dos maps ordenadas por repr: a ordem das linhas não é garantida por nenhum dos loaders."""
+    out = []
+    for m in related:
+        out.append({k: sorted(v, key=repr) if isinstance(v, list) else v for k, v in m.items()})
+    return out
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_benchmark(batch_size: int = 100, n_batches: int = 20, repeat: int = 3, loaders=None):
+    loaders = {name: RELATED_LOADERS[name] for name in (loaders or RELATED_LOADERS)}
+    loaders.setdefault("classic", RELATED_LOADERS["classic"])
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    timings = {name: [] for name in loaders}
+    mismatches = 0
+    batches = 0
+
+    for contratos in stream_contratos(conn, batch_size):
+        if batches >= n_batches:
+            break
+        batches += 1
+        results = {}
+        for _ in range(repeat):
+            for name, loader in loaders.items():
+                t0 = time.perf_counter()
+                results[name] = loader(cursor, contratos)
+                timings[name].append(time.perf_counter() - t0)
+
+        classic = _normalize(results["classic"])
+        for name in loaders:
+            if name == "classic":
+                continue
+            for map_name, a, b in zip(MAP_NAMES, classic, _normalize(results[name])):
+                if a != b:
+                    mismatches += 1
+                    print(f"  ⚠️  Batch {batches}: {name} - map '{map_name}' diverge ({len(a)} vs {len(b)} chaves)")
+
+    cursor.close()
+    conn.close()
+    close_async_loader()
+
+    print(f"\n📊 Loaders - {batches} batches x {repeat} repetições (batch size {batch_size})")
+    print(f"   {'loader':<10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'média (ms)':>11}")
+    for name, values in timings.items():
+        if not values:
+            continue
+        print(f"   {name:<10} {percentile(values, 50)*1000:>10.1f} {percentile(values, 95)*1000:>10.1f} "
+              f"{statistics.mean(values)*1000:>11.1f}")
+    if timings["classic"]:
+        print()
+        for name, values in timings.items():
+            if name != "classic" and values:
+                speedup = statistics.median(timings["classic"]) / statistics.median(values)
+                print(f"   ⚡ Speedup (p50 classic / p50 {name}): {speedup:.2f}x")
+    print(f"   {'✅ Maps idênticos' if mismatches == 0 else f'❌ {mismatches} divergências'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--batch", "-b", type=int, default=100)
+    p.add_argument("--batches", "-n", type=int, default=20)
+    p.add_argument("--repeat", "-r", type=int, default=3)
+    p.add_argument("--loaders", nargs="+", choices=sorted(RELATED_LOADERS), default=None)
+    args = p.parse_args()
+    run_benchmark(args.batch, args.batches, args.repeat, args.loaders)
@@ -0,0 +1,81 @@
+"""
+Benchmark: memória por entidade dos models.
+
+Compara cada model (slotted) com um clone "antes" gerado em runtime: mesmo
+conjunto de campos, @dataclass comum com __dict__ por instância. Os valores das
+linhas são alocados antes da medição, então o número reportado é o custo do
+objeto em si (header + slots/__dict__), que é o que se multiplica ao manter
+todos os grafos de contrato em memória.
+
+Não precisa de banco. Uso: python3 benchmarks/bench_memory.py -n 200000
+"""
+import sys
+import os
+import argparse
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+
+SAMPLE_ROWS = {
+    Contrato: lambda i: (i, Decimal("1000.00"), date(2024, 1, 1), f"Objeto {i}", 1, 2),
+    Entidade: lambda i: (i, f"Entidade {i}", "SP", "São Paulo", f"{i:014d}"),
+    Fornecedor: lambda i: (i, f"Fornecedor {i}", f"{i:014d}"),
+    Empenho: lambda i: (f"2024NE{i:06d}", 2024, date(2024, 1, 5), f"{i:014d}", "Credor", Decimal("10.00"), 1, i),
+    LiquidacaoNotaFiscal: lambda i: (i, f"{i:044d}", date(2024, 2, 1), Decimal("5.00"), f"2024NE{i:06d}"),
+    Nfe: lambda i: (i, f"{i:044d}", str(i), datetime(2024, 1, 30), f"{i:014d}", Decimal("5.00")),
+    Pagamento: lambda i: (str(i), f"2024NE{i:06d}", date(2024, 3, 1), Decimal("5.00")),
+    NfePagamento: lambda i: (str(i), f"{i:044d}", "PIX", Decimal("5.00")),
+}
+
+
+def dict_based_clone(model):
+    """Mesmo schema do model, mas @dataclass sem slots (layout anterior)."""
+    return make_dataclass(model.__name__, [(f.name, f.type) for f in fields(model)])
+
+
+def bytes_per_instance(cls, rows) -> float:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        objs = [cls(*row) for row in rows]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Desconta o próprio list (8 bytes por ponteiro + header)
+    return (after - before - sys.getsizeof(objs)) / len(objs)
+
+
+def run_benchmark(n: int = 200_000):
+    print(f"\n📊 Memória por entidade - {n:,} instâncias por model")
+    print(f"   {'model':<22} {'antes (B)':>10} {'depois (B)':>11} {'redução':>8}")
+    total_before = total_after = 0.0
+    for model, make_row in SAMPLE_ROWS.items():
+        rows = [make_row(i) for i in range(1, n + 1)]
+        before = bytes_per_instance(dict_based_clone(model), rows)
+        after = bytes_per_instance(model, rows)
+        total_before += before
+        total_after += after
+        print(f"   {model.__name__:<22} {before:>10.0f} {after:>11.0f} {1 - after / before:>7.0%}")
+    print(f"   {'(soma)':<22} {total_before:>10.0f} {total_after:>11.0f} {1 - total_after / total_before:>7.0%}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--instances", "-n", type=int, default=200_000)
+    args = p.parse_args()
+    run_benchmark(args.instances)
@@ -0,0 +1,150 @@
+"""
+Benchmark/paridade: validação com valores Money (centavos int, hidratação atual) vs Decimal puro.
+
+Sintético (padrão, sem banco): gera o mesmo dataset nas duas representações, roda a cadeia
+Empenho → Liquidação → Pagamento (views.etl_fullpipe.validate_batch) e compara tempo e outcomes.
+
+--db: percorre o banco INTEIRO (keyset streaming), valida cada batch como hidratado (Money) e
+uma cópia com os valores convertidos de volta para Decimal; reporta divergências.
+
+Uso: python3 benchmarks/bench_money.py -n 20000
+     python3 benchmarks/bench_money.py --db -b 500
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from dataclasses import replace
+from decimal import Decimal
+from datetime import date, timedelta
+from collections import defaultdict
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from views.etl_fullpipe import validate_batch
+
+DOC = "111"
+# Campo monetário de cada model
+MONEY_FIELDS = {Contrato: "valor", Empenho: "valor", LiquidacaoNotaFiscal: "valor", Nfe: "valor_total_nfe", Pagamento: "valor",
+                NfePagamento: "valor_pagamento"}
+
+
+def synthetic_related(rng: random.Random, n: int, anomaly_rate: float = 0.05):
+    """Contratos + 7 maps no formato dos loaders, com valores Money (como a hidratação entrega)."""
+    ent, forn = Entidade(1, "Prefeitura", "SP", "SP", "0001"), Fornecedor(2, "Forn", DOC)
+    contratos, empenhos, liquidacoes, nfes, pagamentos = [], defaultdict(list), defaultdict(list), {}, defaultdict(list)
+    nfe_pagamentos = {}
+    for c in range(1, n + 1):
+        data_contrato = date(2023, 1, 1) + timedelta(days=rng.randint(0, 60))
+        contratos.append(Contrato(c, Money.from_cents(rng.randint(10**7, 10**8)), data_contrato, "Obj", 1, 2))
+        for e in range(rng.randint(1, 3)):
+            id_emp = f"{c}NE{e}"
+            data_emp = data_contrato + timedelta(days=rng.randint(0, 10))
+            emp_cents = rng.randint(10**6, 10**7)
+            empenhos[c].append(Empenho(id_emp, 2023, data_emp, DOC, "Forn", Money.from_cents(emp_cents), 1, c))
+            liq_total = 0
+            for l in range(rng.randint(1, 5)):
+                cents = rng.randint(100, emp_cents // 6)
+                liq_total += cents
+                chave = f"K{c}-{e}-{l}"
+                data_liq = data_emp + timedelta(days=rng.randint(1, 30))
+                liquidacoes[id_emp].append(LiquidacaoNotaFiscal(c * 100 + e * 10 + l, chave, data_liq, Money.from_cents(cents), id_emp))
+                nfes[chave] = Nfe(c * 100 + e * 10 + l, chave, str(l), data_liq, DOC, Money.from_cents(cents))
+                nfe_pagamentos[chave] = [NfePagamento(f"NP-{chave}", chave, "01", Money.from_cents(cents))]
+            for k in range(rng.randint(0, 4)):
+                cents = liq_total if rng.random() < anomaly_rate else rng.randint(1, max(1, liq_total // 5))
+                pagamentos[id_emp].append(Pagamento(f"{id_emp}P{k}", id_emp, data_emp + timedelta(days=40), Money.from_cents(cents)))
+    return contratos, ({1: ent}, {2: forn}, dict(empenhos), dict(liquidacoes), nfes, dict(pagamentos), nfe_pagamentos)
+
+
+def as_decimal(obj):
+    """Cópia do model com o valor monetário como Decimal puro (caminho anterior ao Money)."""
+    field = MONEY_FIELDS[type(obj)]
+    valor = getattr(obj, field)
+    return replace(obj, **{field: Decimal(valor)}) if type(valor) is Money else obj
+
+
+def decimal_copy(contratos, related):
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+    def lists(m):
+        return {k: [as_decimal(o) for o in v] for k, v in m.items()}
+    return [as_decimal(c) for c in contratos], (
+        entidades, fornecedores, lists(empenhos), lists(liquidacoes),
+        {k: as_decimal(v) for k, v in nfes.items()}, lists(pagamentos), lists(nfe_pagamentos),
+    )
+
+
+def validate(contratos, related):
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+    txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+    return validate_batch(txs, liquidacoes, nfes, pagamentos, nfe_pagamentos=nfe_pagamentos)
+
+
+def run_synthetic(n: int, batch_size: int):
+    rng = random.Random(42)
+    batches = []
+    for start in range(0, n, batch_size):
+        batch = synthetic_related(rng, min(batch_size, n - start))
+        batches.append((batch, decimal_copy(*batch)))
+
+    timings, outcomes = {}, {}
+    for name, idx in (("decimal", 1), ("money", 0)):
+        t0 = time.perf_counter()
+        outcomes[name] = [o for pair in batches for o in validate(*pair[idx])]
+        timings[name] = time.perf_counter() - t0
+
+    same = outcomes["money"] == outcomes["decimal"]
+    n_err = sum(1 for *_, err in outcomes["decimal"] if err)
+    print(f"\n📊 Money vs Decimal - {n:,} contratos sintéticos ({n_err:,} com erro), batches de {batch_size}")
+    for name, t in timings.items():
+        print(f"   {name:<8} {t:6.2f}s ({n / t:,.0f} contratos/s)")
+    print(f"   ⚡ Speedup: {timings['decimal'] / timings['money']:.2f}x   "
+          f"{'✅ Outcomes idênticos' if same else '❌ Outcomes divergem'}")
+
+
+def run_db(batch_size: int):
+    from db_connection import get_db_connection
+    from utils.etl_common import stream_contratos, batch_load_related_data
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    total = mismatches = 0
+    for contratos in stream_contratos(conn, batch_size):
+        related = batch_load_related_data(cursor, contratos)
+        money = validate(contratos, related)
+        decimal = validate(*decimal_copy(contratos, related))
+        for contrato, a, b in zip(contratos, money, decimal):
+            if a != b:
+                mismatches += 1
+                print(f"  ⚠️  Contrato {contrato.id_contrato}: money={a} decimal={b}")
+        total += len(contratos)
+    cursor.close()
+    conn.close()
+    print(f"\n📊 Money vs Decimal - banco inteiro: {total:,} contratos")
+    print(f"   {'✅ Outcomes idênticos' if mismatches == 0 else f'❌ {mismatches} divergências'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=20_000)
+    p.add_argument("--batch", "-b", type=int, default=1_000)
+    p.add_argument("--db", action="store_true", help="Paridade sobre o banco inteiro (usa o .env)")
+    args = p.parse_args()
+    if args.db:
+        run_db(args.batch)
+    else:
+        run_synthetic(args.contracts, args.batch)
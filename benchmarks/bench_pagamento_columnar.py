@@ -0,0 +1,98 @@
+"""
+Benchmark: validação de Pagamento escalar (Valida por contrato) vs engine colunar
+(pagamento_columnar.valida_batch), sobre PaymentTransactions sintéticas.
+
+Confere que os Results são idênticos e reporta contratos/s de cada caminho.
+Não precisa de banco. Uso: python3 benchmarks/bench_pagamento_columnar.py -n 20000 -b 1000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import date, timedelta
+from decimal import Decimal
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.pagamento import Pagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction, ItemLiquidacao
+from clientside.transaction.transaction_pagamento import PaymentTransaction, PagamentoItem
+from clientside.domains.pagamento import Valida
+from clientside.domains.pagamento_columnar import valida_batch
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def synthetic_tx(rng: random.Random, id_contrato: int, anomaly_rate: float) -> PaymentTransaction:
+    data_contrato = date(2023, 1, 1) + timedelta(days=rng.randint(0, 60))
+    contrato = Contrato(id_contrato, Money.from_cents(rng.randint(10**6, 10**8)), data_contrato, "Obj", 1, 2)
+    empenhos, liqs, pags = {}, {}, {}
+    for e in range(rng.randint(1, 4)):
+        id_emp = f"{id_contrato}NE{e}"
+        data_emp = data_contrato + timedelta(days=rng.randint(0, 30))
+        empenhos[id_emp] = Empenho(id_emp, 2023, data_emp, "111", "Forn", Money.from_cents(10**7), 1, id_contrato)
+        inner = {}
+        for l in range(rng.randint(1, 5)):
+            liq = LiquidacaoNotaFiscal(id_contrato * 1000 + e * 100 + l, f"K{id_contrato}-{e}-{l}",
+                                       data_emp + timedelta(days=rng.randint(1, 60)),
+                                       Money.from_cents(rng.randint(100, 200000)), id_emp)
+            inner[str(liq.id_liquidacao_empenhonotafiscal)] = ItemLiquidacao(liq, None)
+        liqs[id_emp] = inner
+        teto = sum(i.liquidacao.valor for i in inner.values())
+        min_liq = min(i.liquidacao.data_emissao for i in inner.values())
+        items = []
+        for k in range(rng.randint(0, 4)):
+            valor = to_money((teto / 5).quantize(Decimal("0.01")))
+            if rng.random() < anomaly_rate:
+                valor = to_money(teto)  # estoura Σ(pagamentos) ≤ Σ(liquidações)
+            pag = Pagamento(f"{id_emp}-P{k}", id_emp, min_liq + timedelta(days=rng.randint(0, 90)), valor)
+            items.append(PagamentoItem(pag.id_pagamento, pag, ()))
+        if items:
+            pags[id_emp] = tuple(items)
+    emp_tx = EmpenhoTransaction(ENT, FORN, contrato, empenhos)
+    return PaymentTransaction(LiquidacaoTransaction(emp_tx, liqs, {}), pags)
+
+
+def run_benchmark(n: int = 20_000, batch_size: int = 1_000, anomaly_rate: float = 0.05, seed: int = 42):
+    rng = random.Random(seed)
+    txs = [synthetic_tx(rng, i, anomaly_rate) for i in range(1, n + 1)]
+    batches = [txs[i:i + batch_size] for i in range(0, n, batch_size)]
+
+    t0 = time.perf_counter()
+    scalar = [Valida(tx) for tx in txs]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    columnar = [res for batch in batches for res in valida_batch(batch)]
+    t_columnar = time.perf_counter() - t0
+
+    same = all(
+        (a.is_ok, a.value if a.is_ok else a.error) == (b.is_ok, b.value if b.is_ok else b.error)
+        for a, b in zip(scalar, columnar)
+    )
+    n_err = sum(r.is_err for r in scalar)
+    print(f"\n📊 Pagamento - {n:,} contratos ({n_err:,} com erro), batches de {batch_size}")
+    print(f"   scalar:   {t_scalar:6.2f}s ({n / t_scalar:,.0f} contratos/s)")
+    print(f"   columnar: {t_columnar:6.2f}s ({n / t_columnar:,.0f} contratos/s)")
+    print(f"   ⚡ Speedup: {t_scalar / t_columnar:.2f}x   {'✅ Results idênticos' if same else '❌ Results divergem'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=20_000)
+    p.add_argument("--batch", "-b", type=int, default=1_000)
+    p.add_argument("--anomaly-rate", type=float, default=0.05)
+    args = p.parse_args()
+    run_benchmark(args.contracts, args.batch, args.anomaly_rate)
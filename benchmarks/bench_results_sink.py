@@ -0,0 +1,124 @@
+"""
+Benchmark/paridade: saída por contrato do fullpipe - log formatado (log_contrato_estrutura +
+linha de status) vs --quiet com o sink de resultados (utils.results_sink).
+
+Os outcomes são calculados uma vez sobre o dataset sintético do bench_money; cada modo só
+emite a saída. O log vai para --log-to (default /dev/null: mede só a formatação; um terminal
+real é mais lento). Paridade: o JSONL relido (ou a tabela SQLite, página a página) tem os
+mesmos (id, E, L, P, erro) dos outcomes. Com --format sqlite mede também as leituras do
+dashboard (ResultsTable: resumo, página filtrada, lookup).
+
+Uso: python3 benchmarks/bench_results_sink.py -n 20000
+     python3 benchmarks/bench_results_sink.py -n 20000 --format parquet   (requer pyarrow)
+     python3 benchmarks/bench_results_sink.py -n 200000 --format sqlite
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_money import synthetic_related, validate
+from utils.results_sink import ResultsTable, open_sink, contract_result, read_jsonl
+from views.etl_fullpipe import log_contrato_estrutura
+
+
+def emit_log(batches, stream):
+    with redirect_stdout(stream):
+        for contratos, related, outcomes in batches:
+            entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, _ = related
+            for i, (contrato, (e, l, p, err)) in enumerate(zip(contratos, outcomes), 1):
+                log_contrato_estrutura(contrato, entidades.get(contrato.id_entidade),
+                                       fornecedores.get(contrato.id_fornecedor),
+                                       empenhos.get(contrato.id_contrato, []), liquidacoes, nfes, pagamentos)
+                print(f"  ▶ [{i:4d}/{len(contratos)}] C{contrato.id_contrato:4d} | E:{e} L:{l} P:{p}")
+
+
+def global_id(batch_index: int, batch_size: int, contrato) -> int:
+    """synthetic_related numera os contratos de 1 em cada batch: id único no dataset (a tabela SQLite é por id)."""
+    return batch_index * batch_size + contrato.id_contrato
+
+
+def emit_sink(batches, path, fmt, batch_size):
+    with open_sink(path, fmt) as sink:
+        for b, (contratos, related, outcomes) in enumerate(batches):
+            for contrato, outcome in zip(contratos, outcomes):
+                row = contract_result(contrato, outcome, related)
+                sink.write((global_id(b, batch_size, contrato), *row[1:]))
+    return sink.rows
+
+
+def read_table(path: str, page_size: int = 50):
+    """Todas as linhas por páginas keyset + latência (ms) das leituras do dashboard."""
+    with ResultsTable(path) as table:
+        lido, after_id = [], 0
+        while True:
+            rows = table.page(after_id, 1000)
+            if not rows:
+                break
+            lido.extend((r["id_contrato"], r["emp"], r["liq"], r["pag"], r["erro"]) for r in rows)
+            after_id = rows[-1]["id_contrato"]
+        meio = lido[len(lido) // 2][0]
+        latencias = {}
+        for nome, fn in (("resumo", table.summary),
+                         ("top erros", lambda: table.top_errors(10)),
+                         ("página erros", lambda: table.page(meio, page_size, situacao="erro")),
+                         ("contagem erros", lambda: table.count("erro")),
+                         ("lookup", lambda: table.get(meio))):
+            t0 = time.perf_counter()
+            fn()
+            latencias[nome] = (time.perf_counter() - t0) * 1000
+    return lido, latencias
+
+
+def run(n: int, batch_size: int, fmt: str, log_to: str):
+    rng = random.Random(42)
+    batches = []
+    for start in range(0, n, batch_size):
+        contratos, related = synthetic_related(rng, min(batch_size, n - start))
+        batches.append((contratos, related, validate(contratos, related)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3" if fmt == "sqlite" else f"results.{fmt}")
+        with open(log_to, "w", encoding="utf-8") as stream:
+            t0 = time.perf_counter()
+            emit_log(batches, stream)
+            t_log = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        rows = emit_sink(batches, path, fmt, batch_size)
+        t_sink = time.perf_counter() - t0
+        size = os.path.getsize(path)
+        same, latencias = None, {}
+        esperado = [(global_id(b, batch_size, c), *o) for b, (contratos, _, outcomes) in enumerate(batches)
+                    for c, o in zip(contratos, outcomes)]
+        if fmt == "jsonl":
+            lido = [(r["id_contrato"], r["emp"], r["liq"], r["pag"], r["erro"]) for r in read_jsonl(path)]
+            same = lido == esperado
+        elif fmt == "sqlite":
+            lido, latencias = read_table(path)
+            same = lido == esperado
+
+    print(f"\n📊 Saída por contrato - {n:,} contratos sintéticos, batches de {batch_size}")
+    print(f"   {'log':<12} {t_log:6.2f}s ({n / t_log:,.0f} contratos/s) -> {log_to}")
+    print(f"   {'sink ' + fmt:<12} {t_sink:6.2f}s ({n / t_sink:,.0f} contratos/s), {rows:,} linhas, {size / 1e6:.1f} MB")
+    print(f"   ⚡ Speedup: {t_log / t_sink:.2f}x"
+          + ("" if same is None else f"   {'✅ Resultados idênticos' if same else '❌ Resultados divergem'}"))
+    if latencias:
+        print("   🖥️  Leituras do dashboard: " + ", ".join(f"{nome} {ms:.1f}ms" for nome, ms in latencias.items()))
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--contracts", "-n", type=int, default=20_000)
+    p.add_argument("--batch", "-b", type=int, default=1_000)
+    p.add_argument("--format", choices=("jsonl", "parquet", "sqlite"), default="jsonl")
+    p.add_argument("--log-to", default=os.devnull, help="Destino do log formatado (default: /dev/null)")
+    args = p.parse_args()
+    run(args.contracts, args.batch, args.format, args.log_to)
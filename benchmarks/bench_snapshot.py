@@ -0,0 +1,123 @@
+"""
+Benchmark/paridade: leitura do grafo via snapshot colunar mapeado (utils.snapshot) vs banco.
+
+Sintético (padrão, sem banco): grava o dataset de bench_money num snapshot temporário, reabre
+(mmap) e mede contratos + 7 maps por batch; confere igualdade com os maps de origem.
+
+--db: mesmos batches do banco INTEIRO pelo loader do fullpipe e pelo snapshot em --snapshot
+(precisa estar atualizado: make snapshot); reporta tempo de cada lado e divergências.
+
+Uso: python3 benchmarks/bench_snapshot.py -n 20000
+     python3 benchmarks/bench_snapshot.py --db -b 500
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.bench_money import synthetic_related
+from utils.snapshot import Snapshot, SnapshotWriter, DEFAULT_PATH
+
+
+def restrict(related, contratos):
+    """Maps de origem restritos a um batch (o que o loader do banco devolveria)."""
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+    emps = {c.id_contrato: empenhos[c.id_contrato] for c in contratos if c.id_contrato in empenhos}
+    ids = [e.id_empenho for lst in emps.values() for e in lst]
+    liqs = {i: liquidacoes[i] for i in ids if i in liquidacoes}
+    chaves = {l.chave_danfe for lst in liqs.values() for l in lst}
+    return (
+        {c.id_entidade: entidades[c.id_entidade] for c in contratos if c.id_entidade in entidades},
+        {c.id_fornecedor: fornecedores[c.id_fornecedor] for c in contratos if c.id_fornecedor in fornecedores},
+        emps, liqs, {k: v for k, v in nfes.items() if k in chaves},
+        {i: pagamentos[i] for i in ids if i in pagamentos},
+        {k: v for k, v in nfe_pagamentos.items() if k in chaves and k in nfes},
+    )
+
+
+def disk_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def run_synthetic(n: int, batch_size: int):
+    contratos, related = synthetic_related(random.Random(42), n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshot")
+        t0 = time.perf_counter()
+        writer = SnapshotWriter()
+        for start in range(0, n, batch_size):
+            batch = contratos[start:start + batch_size]
+            writer.add_batch(batch, restrict(related, batch))
+        writer.save(path, {})
+        t_dump = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        snapshot = Snapshot(path)
+        for batch in snapshot.iter_contratos(batch_size):
+            snapshot.load_related(None, batch)
+        t_load = time.perf_counter() - t0
+
+        batches = list(snapshot.iter_contratos(batch_size))
+        same = [c for b in batches for c in b] == contratos and all(
+            snapshot.load_related(None, batch) == restrict(related, batch) for batch in batches)
+        print(f"\n📊 Snapshot colunar - {n:,} contratos sintéticos, batches de {batch_size}")
+        print(f"   Tamanho:  {disk_size(path) / 2**20:.1f} MiB")
+        print(f"   Dump:     {t_dump:6.2f}s")
+        print(f"   Leitura:  {t_load:6.2f}s ({n / t_load:,.0f} contratos/s, contratos + 7 maps)")
+        print(f"   {'✅ Grafo idêntico à origem' if same else '❌ Grafo diverge da origem'}")
+
+
+def run_db(batch_size: int, path: str, loader: str):
+    from db_connection import get_db_connection
+    from utils.etl_common import stream_contratos, RELATED_LOADERS
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    snapshot = Snapshot.open(path, cursor)
+    t_db = t_snap = 0.0
+    total = diverge = 0
+    try:
+        stream = stream_contratos(conn, batch_size)
+        while True:
+            t0 = time.perf_counter()
+            contratos = next(stream, None)
+            if contratos is None:
+                break
+            from_db = RELATED_LOADERS[loader](cursor, contratos)
+            t_db += time.perf_counter() - t0
+            ids = [c.id_contrato for c in contratos]
+            t0 = time.perf_counter()
+            snap_contratos = next(snapshot.iter_contratos(len(ids), after_id=ids[0] - 1, until_id=ids[-1]))
+            from_snap = snapshot.load_related(None, snap_contratos)
+            t_snap += time.perf_counter() - t0
+            total += len(contratos)
+            diverge += (snap_contratos != contratos) or (from_snap != from_db)
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"\n📊 Snapshot vs banco ({loader}) - {total:,} contratos, batches de {batch_size}")
+    print(f"   banco     {t_db:6.2f}s ({total / t_db:,.0f} contratos/s)")
+    print(f"   snapshot  {t_snap:6.2f}s ({total / t_snap:,.0f} contratos/s)")
+    print(f"   ⚡ Speedup: {t_db / t_snap:.2f}x   "
+          f"{'✅ Batches idênticos' if not diverge else f'❌ {diverge} batch(es) divergem'}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Snapshot colunar (mmap) vs banco")
+    p.add_argument("-n", type=int, default=20000, help="Contratos sintéticos (default: 20000)")
+    p.add_argument("--batch", "-b", type=int, default=500)
+    p.add_argument("--db", action="store_true", help="Compara com o banco inteiro em vez do dataset sintético")
+    p.add_argument("--snapshot", default=DEFAULT_PATH, help=f"Snapshot do modo --db (default: {DEFAULT_PATH})")
+    p.add_argument("--loader", choices=("classic", "joined"), default="classic")
+    args = p.parse_args()
+    if args.db:
+        run_db(args.batch, args.snapshot, args.loader)
+    else:
+        run_synthetic(args.n, args.batch)
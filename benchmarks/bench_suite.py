@@ -0,0 +1,394 @@
+"""
+Suite do hot path: dataset sintético determinístico (benchmarks/synthetic.py) -> loader classic
+real (utils.etl_common.batch_load_related_data) -> EmpenhoTransaction.build_from_batch ->
+validate_batch (Valida de Empenho, Liquidação e Pagamento), em 10k/100k/1M contratos.
+
+Backends (sem Postgres):
+    memory   o loader consulta um MemoryCursor com o chunk de contratos corrente indexado
+             (mede hidratação + build + Valida; o dataset nunca fica inteiro em memória)
+    sqlite   o dataset inteiro é carregado num SQLite em arquivo temporário e o pipeline
+             pagina por keyset (batch_load_contratos) e roda as 7 queries via SqliteCursor
+Cada tamanho roda num processo novo (spawn): o pico de RSS é do tamanho medido, não dos
+anteriores. Por tamanho: tempo de geração, extract / build / valida, contratos/s, pico de RSS
+(e de tracemalloc com --tracemalloc), erros por estágio, anomalias detectadas e um digest dos
+outcomes (sha1 de id + status + erro, determinístico pela seed).
+
+Escala multi-processo (--workers 1 2 4): em vez da suíte, cada tamanho vira um SQLite em
+arquivo e o fullpipe paralelo real (compute_shards + run_shard em workers spawn, como
+--workers do etl_fullpipe) roda com cada número de workers; reporta contratos/s, speedup e
+eficiência sobre 1 worker e confere que os contadores mergeados são os mesmos. O tempo
+inclui a subida dos processos (spawn), como num run real.
+
+Regressão: --save grava os resultados em JSON; --compare falha (exit 1) se, num tamanho
+presente na baseline com a mesma config, o throughput cair mais que --tolerance, o pico de
+RSS subir mais que --tolerance ou o digest mudar (outcomes diferentes).
+
+Uso: python3 benchmarks/bench_suite.py                           # 10k, 100k e 1M em memória
+     python3 benchmarks/bench_suite.py -s 10k 100k --backend sqlite
+     python3 benchmarks/bench_suite.py -s 100k --hot-fornecedor 10000 --nfe-reuse 0.05
+     python3 benchmarks/bench_suite.py -s 100k --save .bench/baseline.json
+     python3 benchmarks/bench_suite.py -s 100k --compare .bench/baseline.json --tolerance 0.15
+     python3 benchmarks/bench_suite.py -s 100k --workers 1 2 4
+"""
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic import (
+    ANOMALIES, ANOMALY_STAGE, MemoryCursor, SqliteConnection, SqliteCursor, SyntheticConfig, SyntheticDataset,
+    hydrate_contratos, load_sqlite,
+)
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.domains.pagamento import set_nfe_pagamento_check
+from clientside.domains.subdomains.nfe_index import GlobalNfeIndex
+from utils.dimension_cache import DimensionCache
+from utils.etl_common import batch_load_contratos, batch_load_related_data
+from views.etl_fullpipe import compute_shards, run_shard, validate_batch
+
+BACKENDS = ("memory", "sqlite")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Opções que mudam o que é medido: baselines só são comparadas com a mesma combinação
+CONFIG_KEYS = ("backend", "batch", "pag_engine", "dim_cache", "nfe_index", "nfe_pagamento_check",
+               "entidades", "fornecedores", "zipf_s", "hot_fornecedor", "nfe_reuse", "anomaly_rate", "seed")
+
+
+def parse_size(text: str) -> int:
+    """10000, 10k, 100K, 1M."""
+    text = text.strip().lower().replace("_", "")
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def _rss_mb() -> float:
+    """Pico de RSS do processo (ru_maxrss: KB no Linux, bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _memory_batches(dataset: SyntheticDataset, batch_size: int, timings: Counter):
+    """(cursor, linhas de contrato do batch) chunk a chunk; geração + indexação contam em 'gerar'."""
+    cursor = MemoryCursor()
+    chunk_size = batch_size * max(1, -(-10_000 // batch_size))
+    chunks = dataset.iter_chunks(chunk_size)
+    while True:
+        cursor.release_chunk()
+        t0 = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is not None:
+            cursor.load_chunk(chunk)
+        timings["gerar"] += time.perf_counter() - t0
+        if chunk is None:
+            return
+        rows = chunk["contrato"]
+        del chunk
+        for start in range(0, len(rows), batch_size):
+            t0 = time.perf_counter()
+            contratos = hydrate_contratos(rows[start:start + batch_size])
+            timings["extract"] += time.perf_counter() - t0
+            yield cursor, contratos
+        del rows
+
+
+def _sqlite_batches(dataset: SyntheticDataset, batch_size: int, timings: Counter, path: str):
+    t0 = time.perf_counter()
+    conn = load_sqlite(dataset, path)
+    timings["gerar"] += time.perf_counter() - t0
+    cursor = SqliteCursor(conn)
+    after_id = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            contratos, last_id = batch_load_contratos(cursor, after_id, batch_size)
+            timings["extract"] += time.perf_counter() - t0
+            if last_id is None:
+                return
+            after_id = last_id
+            yield cursor, contratos
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _config(n: int, opts: dict) -> SyntheticConfig:
+    return SyntheticConfig(contratos=n, **{k: opts[k] for k in (
+        "entidades", "fornecedores", "zipf_s", "hot_fornecedor", "nfe_reuse", "anomaly_rate", "seed")})
+
+
+def run_size(n: int, opts: dict) -> dict:
+    """Um tamanho, no processo atual: gera, extrai, valida e mede."""
+    set_nfe_pagamento_check(opts["nfe_pagamento_check"])
+    dataset = SyntheticDataset(_config(n, opts))
+    dimensions = DimensionCache() if opts["dim_cache"] else None
+    index = GlobalNfeIndex() if opts["nfe_index"] else None
+    rss_base = _rss_mb()
+    if opts["tracemalloc"]:
+        tracemalloc.start()
+
+    timings: Counter = Counter()
+    estagios: Counter = Counter()
+    outcomes_por_id = {}
+    digest = hashlib.sha1()
+    alertas = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        if opts["backend"] == "sqlite":
+            batches = _sqlite_batches(dataset, opts["batch"], timings, os.path.join(tmp, "bench.sqlite3"))
+        else:
+            batches = _memory_batches(dataset, opts["batch"], timings)
+        for cursor, contratos in batches:
+            t0 = time.perf_counter()
+            related = batch_load_related_data(cursor, contratos, dimensions)
+            t1 = time.perf_counter()
+            entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+            txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+            t2 = time.perf_counter()
+            outcomes = validate_batch(txs, liquidacoes, nfes, pagamentos, opts["pag_engine"], nfe_pagamentos)
+            t3 = time.perf_counter()
+            if index is not None:
+                alertas += len(index.add_batch(contratos, related))
+                timings["indice"] += time.perf_counter() - t3
+            timings["extract"] += t1 - t0
+            timings["build"] += t2 - t1
+            timings["valida"] += t3 - t2
+            for contrato, (e, l, p, err) in zip(contratos, outcomes):
+                stage = next((s for s, v in zip("ELP", (e, l, p)) if v in ("✗", "B")), None)
+                estagios[stage or "ok"] += 1
+                if contrato.id_contrato in dataset.anomalous:
+                    outcomes_por_id[contrato.id_contrato] = stage
+                digest.update(f"{contrato.id_contrato}|{e}|{l}|{p}|{err}\n".encode())
+
+    trace_peak = None
+    if opts["tracemalloc"]:
+        trace_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    # Anomalias que esta configuração consegue ver: as do Valida (a de NfePagamento só com a
+    # regra ligada) e, com o índice global, o reúso excedente (um alerta por NFe)
+    detectaveis = {kind for kind, stage in ANOMALY_STAGE.items() if stage is not None}
+    if not opts["nfe_pagamento_check"]:
+        detectaveis.discard("nfe_pagamento_divergente")
+    detectadas = sum(1 for c, kind in dataset.anomalous.items()
+                     if kind in detectaveis and outcomes_por_id.get(c) == ANOMALY_STAGE[kind])
+    if index is not None:
+        detectaveis.add("nfe_reuso_excedente")
+        detectadas += min(alertas, dataset.injected["nfe_reuso_excedente"])
+    pipeline_s = timings["extract"] + timings["build"] + timings["valida"]
+    return {
+        "contratos": n,
+        "linhas": sum(v for k, v in dataset.stats.items() if k != "nfe_reusadas"),
+        "gerar_s": timings["gerar"],
+        "extract_s": timings["extract"],
+        "build_s": timings["build"],
+        "valida_s": timings["valida"],
+        "indice_s": timings["indice"],
+        "contratos_s": n / pipeline_s if pipeline_s else 0.0,
+        "rss_pico_mb": _rss_mb(),
+        "rss_base_mb": rss_base,
+        "tracemalloc_pico_mb": trace_peak,
+        "estagios": dict(estagios),
+        "anomalias": sum(dataset.injected.values()),
+        "detectaveis": sum(dataset.injected[kind] for kind in detectaveis),
+        "detectadas": detectadas,
+        "nfe_reusadas": dataset.stats["nfe_reusadas"],
+        "maior_fornecedor": dataset.contratos_por_fornecedor.most_common(1)[0][1] if n else 0,
+        "alertas_nfe": alertas if index is not None else None,
+        "digest": digest.hexdigest()[:16],
+    }
+
+
+def run_isolated(n: int, opts: dict) -> dict:
+    """run_size num processo spawn novo (pico de RSS isolado por tamanho)."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_size, (n, opts))
+
+
+def _init_worker(path: str, nfe_pagamento_check: bool):
+    """Worker spawn do --workers: o get_db_connection do fullpipe passa a servir o SQLite em arquivo."""
+    import views.etl_fullpipe as fullpipe
+    fullpipe.get_db_connection = partial(SqliteConnection, path)
+    set_nfe_pagamento_check(nfe_pagamento_check)
+
+
+def run_workers(n: int, opts: dict, workers: list, shards_per_worker: int = 4) -> list:
+    """Fullpipe paralelo sobre o mesmo SQLite com cada número de workers: tempo e contadores mergeados."""
+    out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        load_sqlite(SyntheticDataset(_config(n, opts)), path).close()
+        conn = SqliteConnection(path)
+        cursor = conn.cursor()
+        try:
+            for w in workers:
+                shards = compute_shards(cursor, w * shards_per_worker)
+                shard_fn = partial(run_shard, batch_size=opts["batch"], pag_engine=opts["pag_engine"])
+                t0 = time.perf_counter()
+                with ProcessPoolExecutor(max_workers=w, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_worker,
+                                         initargs=(path, opts["nfe_pagamento_check"])) as executor:
+                    parts = list(executor.map(shard_fn, shards))
+                elapsed = time.perf_counter() - t0
+                stats: Counter = Counter()
+                for part in parts:
+                    stats.update(part["stats"])
+                processed = sum(part["processed"] for part in parts)
+                out.append({"contratos": n, "workers": w, "shards": len(shards), "tempo_s": elapsed,
+                            "contratos_s": processed / elapsed, "processados": processed, "stats": dict(stats)})
+        finally:
+            cursor.close()
+            conn.close()
+    return out
+
+
+def print_workers(results):
+    print(f"\n📊 Fullpipe paralelo (SQLite em arquivo, spawn) - {os.cpu_count()} CPUs nesta máquina")
+    print(f"   {'contratos':>10} {'workers':>8} {'shards':>7} {'tempo(s)':>9} {'contratos/s':>12} "
+          f"{'speedup':>8} {'eficiência':>11}")
+    base = {}
+    for r in results:
+        base.setdefault(r["contratos"], r)
+        ref = base[r["contratos"]]
+        speedup = r["contratos_s"] / ref["contratos_s"]
+        print(f"   {r['contratos']:>10,} {r['workers']:>8} {r['shards']:>7} {r['tempo_s']:>9.2f} "
+              f"{r['contratos_s']:>12,.0f} {speedup:>7.2f}x {speedup * ref['workers'] / r['workers']:>10.0%}")
+    same = all(r["stats"] == base[r["contratos"]]["stats"] and r["processados"] == r["contratos"] for r in results)
+    print(f"   {'✅ Contadores mergeados idênticos entre os números de workers' if same else '❌ Contadores divergem'}")
+    return same
+
+
+def print_results(results, opts: dict):
+    print(f"\n📊 Suite do hot path - backend {opts['backend']}, batches de {opts['batch']}, "
+          f"pag-engine {opts['pag_engine']}, seed {opts['seed']}")
+    print(f"   fornecedores {opts['fornecedores']:,} (zipf {opts['zipf_s']}"
+          f"{', quente: ' + format(opts['hot_fornecedor'], ',') + ' contratos' if opts['hot_fornecedor'] else ''}), "
+          f"reúso de NFe {opts['nfe_reuse']:.0%}, anomalias {opts['anomaly_rate']:.0%}")
+    print(f"   {'contratos':>10} {'linhas':>11} {'gerar(s)':>9} {'extract(s)':>10} {'build(s)':>9} "
+          f"{'valida(s)':>9} {'contratos/s':>12} {'RSS pico(MB)':>13} {'erros E/L/P':>17} {'anomalias':>13} {'digest':>17}")
+    for r in results:
+        est = r["estagios"]
+        erros = f"{est.get('E', 0)}/{est.get('L', 0)}/{est.get('P', 0)}"
+        print(f"   {r['contratos']:>10,} {r['linhas']:>11,} {r['gerar_s']:>9.2f} {r['extract_s']:>10.2f} "
+              f"{r['build_s']:>9.2f} {r['valida_s']:>9.2f} {r['contratos_s']:>12,.0f} {r['rss_pico_mb']:>13.1f} "
+              f"{erros:>17} {str(r['detectadas']) + '/' + str(r['detectaveis']):>13} {r['digest']:>17}")
+    for r in results:
+        extras = [f"anomalias injetadas: {r['anomalias']:,} ({r['detectaveis']:,} detectáveis nesta config)",
+                  f"maior fornecedor: {r['maior_fornecedor']:,} contratos", f"NFes reusadas: {r['nfe_reusadas']:,}"]
+        if r["alertas_nfe"] is not None:
+            extras.append(f"alertas do índice de NFe: {r['alertas_nfe']:,} ({r['indice_s']:.2f}s)")
+        if r["tracemalloc_pico_mb"] is not None:
+            extras.append(f"tracemalloc pico: {r['tracemalloc_pico_mb']:.1f} MB")
+        print(f"   {r['contratos']:>10,}: " + " | ".join(extras))
+
+
+def compare(results, baseline: dict, opts: dict, tolerance: float) -> int:
+    """Regressões contra a baseline (0 = nenhuma); tamanhos/config ausentes são ignorados."""
+    config = {k: opts[k] for k in CONFIG_KEYS}
+    if baseline.get("config") != config:
+        diff = sorted(k for k in CONFIG_KEYS if baseline.get("config", {}).get(k) != config[k])
+        print(f"\n   ⚠️  Baseline com outra config ({', '.join(diff)}): comparação ignorada")
+        return 0
+    print(f"\n   Comparação com a baseline (tolerância {tolerance:.0%}):")
+    regressions = 0
+    for r in results:
+        base = baseline["results"].get(str(r["contratos"]))
+        if base is None:
+            continue
+        problems = []
+        if r["contratos_s"] < base["contratos_s"] * (1 - tolerance):
+            problems.append(f"throughput {base['contratos_s']:,.0f} -> {r['contratos_s']:,.0f} contratos/s")
+        if r["rss_pico_mb"] > base["rss_pico_mb"] * (1 + tolerance):
+            problems.append(f"RSS pico {base['rss_pico_mb']:.1f} -> {r['rss_pico_mb']:.1f} MB")
+        if r["digest"] != base["digest"]:
+            problems.append(f"outcomes mudaram (digest {base['digest']} -> {r['digest']})")
+        regressions += bool(problems)
+        status = "❌ " + "; ".join(problems) if problems else \
+            f"✅ {r['contratos_s'] / base['contratos_s']:.2f}x throughput, outcomes idênticos"
+        print(f"   {r['contratos']:>10,}: {status}")
+    return regressions
+
+
+def save(results, opts: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {"config": {k: opts[k] for k in CONFIG_KEYS},
+            "results": {str(r["contratos"]): r for r in results}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"\n   💾 Baseline gravada em {path}")
+
+
+def main(argv=None) -> int:
+    defaults = SyntheticConfig()
+    p = argparse.ArgumentParser(description="Throughput e memória do hot path sobre dados sintéticos")
+    p.add_argument("--sizes", "-s", nargs="+", type=parse_size, default=list(DEFAULT_SIZES),
+                   help="Contratos por execução (ex.: 10k 100k 1M)")
+    p.add_argument("--backend", choices=BACKENDS, default="memory")
+    p.add_argument("--batch", "-b", type=int, default=1_000)
+    p.add_argument("--pag-engine", choices=("scalar", "columnar"), default="scalar")
+    p.add_argument("--dim-cache", action="store_true", help="DimensionCache entre batches (como --dim-cache do fullpipe)")
+    p.add_argument("--nfe-index", action="store_true", help="Alimenta o GlobalNfeIndex (reúso entre contratos)")
+    p.add_argument("--nfe-pagamento-check", action="store_true", help="Liga a regra Σ NfePagamento = NFe.valor_total")
+    p.add_argument("--entidades", type=int, default=defaults.entidades)
+    p.add_argument("--fornecedores", type=int, default=defaults.fornecedores)
+    p.add_argument("--zipf", dest="zipf_s", type=float, default=defaults.zipf_s,
+                   help="Expoente do skew de contratos por fornecedor (0 = uniforme)")
+    p.add_argument("--hot-fornecedor", type=int, default=defaults.hot_fornecedor,
+                   help="Contratos do fornecedor quente (ex.: 10000)")
+    p.add_argument("--nfe-reuse", type=float, default=defaults.nfe_reuse,
+                   help="Fração das liquidações sobre NFe de outro contrato")
+    p.add_argument("--anomaly-rate", type=float, default=defaults.anomaly_rate,
+                   help=f"Fração dos contratos com anomalia injetada ({len(ANOMALIES)} tipos)")
+    p.add_argument("--seed", type=int, default=defaults.seed)
+    p.add_argument("--tracemalloc", action="store_true", help="Pico de alocações Python (mais lento)")
+    p.add_argument("--inline", action="store_true", help="Todos os tamanhos no processo atual (sem spawn)")
+    p.add_argument("--save", metavar="JSON", help="Grava os resultados como baseline")
+    p.add_argument("--compare", metavar="JSON", help="Compara com a baseline; exit 1 em regressão")
+    p.add_argument("--tolerance", type=float, default=0.2)
+    p.add_argument("--workers", "-w", nargs="+", type=int, default=None,
+                   help="Escala do fullpipe paralelo (ex.: 1 2 4) em vez da suíte")
+    args = p.parse_args(argv)
+
+    opts = {k: v for k, v in vars(args).items()
+            if k not in ("sizes", "inline", "save", "compare", "tolerance", "workers")}
+    for n in args.sizes:
+        if args.hot_fornecedor > n:
+            p.error(f"--hot-fornecedor {args.hot_fornecedor} maior que o tamanho {n}")
+
+    if args.workers:
+        if args.save or args.compare:
+            p.error("--workers não grava nem compara baseline")
+        escala = []
+        for n in args.sizes:
+            print(f"  ▶ {n:,} contratos, workers {' '.join(map(str, args.workers))}...", flush=True)
+            escala.extend(run_workers(n, opts, args.workers))
+        return 0 if print_workers(escala) else 1
+
+    results = []
+    for n in args.sizes:
+        print(f"  ▶ {n:,} contratos ({args.backend})...", flush=True)
+        results.append(run_size(n, opts) if args.inline else run_isolated(n, opts))
+    print_results(results, opts)
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), opts, args.tolerance)
+    if args.save:
+        save(results, opts, args.save)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,549 @@
+"""
+Gerador sintético determinístico das 8 tabelas + stand-ins de banco (sem Postgres).
+
+SyntheticDataset(config) gera, com seed fixa, as linhas de contrato, entidade, fornecedor,
+empenho, liquidacao_nota_fiscal, nfe, pagamento e nfe_pagamento nas colunas de
+HYDRATION_COLUMNS de cada model (os mesmos tipos que o psycopg2 entrega: Decimal, date,
+datetime). Cardinalidades configuráveis:
+    - fornecedores com skew Zipf (zipf_s) e, opcionalmente, um fornecedor "quente" com
+      hot_fornecedor contratos (ex.: 10k contratos do mesmo CNPJ);
+    - empenhos por contrato, liquidações e pagamentos por empenho (intervalos);
+    - nfe_reuse: fração das liquidações que liquidam parcialmente uma NFe já emitida para
+      outro contrato do mesmo fornecedor (reúso legítimo, dentro do saldo da NFe);
+    - anomaly_rate: fração dos contratos com UMA anomalia injetada (ANOMALIES), sorteada
+      entre config.anomalies. Todas violam uma regra do Valida, exceto nfe_reuso_excedente
+      (sobre-liquidação entre contratos), que só o GlobalNfeIndex enxerga.
+Sem anomalias, todo contrato passa pelos três estágios (E/L/P ok).
+
+As linhas saem em chunks de contratos (iter_chunks), para 1M de contratos não precisar do
+dataset inteiro em memória. Stand-ins:
+    MemoryCursor   responde às queries "= ANY(%s)" do loader classic a partir de um chunk
+    SqliteCursor   adapta as queries do pipeline (%s, = ANY(%s)) para um banco SQLite
+                   carregado com load_sqlite(); batch_load_contratos (keyset) roda igual
+Os dois alimentam o loader real (utils.etl_common.batch_load_related_data).
+"""
+import sys
+import os
+import re
+import json
+import random
+import sqlite3
+from bisect import bisect_left
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from models.hydration import hydrate_all
+
+MODELS = {
+    "contrato": Contrato, "entidade": Entidade, "fornecedor": Fornecedor, "empenho": Empenho,
+    "liquidacao_nota_fiscal": LiquidacaoNotaFiscal, "nfe": Nfe, "pagamento": Pagamento,
+    "nfe_pagamento": NfePagamento,
+}
+TABLES = tuple(MODELS)
+# tabela -> nomes de coluna (primeiro alias de HYDRATION_COLUMNS), na ordem das tuplas geradas
+COLUMNS = {table: tuple(c if isinstance(c, str) else c[0] for c in model.HYDRATION_COLUMNS)
+           for table, model in MODELS.items()}
+# tabela -> coluna indexada (filtro "= ANY(%s)" do loader classic / PK do contrato)
+FILTER_COLUMN = {
+    "contrato": "id_contrato", "entidade": "id_entidade", "fornecedor": "id_fornecedor",
+    "empenho": "id_contrato", "liquidacao_nota_fiscal": "id_empenho", "pagamento": "id_empenho",
+    "nfe": "chave_nfe", "nfe_pagamento": "chave_nfe",
+}
+
+ANOMALIES = (
+    "empenho_excede_contrato",      # regra_valor_total_empenhado
+    "empenho_antes_contrato",       # regra_temporal_empenho
+    "credor_divergente",            # regra_fornecedor_consistente
+    "liquidacao_excede_empenho",    # check_aggregate_rules
+    "liquidacao_sem_nfe",           # check_nfe_rules (NFe não encontrada)
+    "nfe_cnpj_divergente",          # check_nfe_rules (CNPJ do emitente)
+    "nfe_sobre_liquidada",          # check_nfe_limit (dentro do contrato)
+    "pagamento_excede_liquidacao",  # check_pagamento_not_exceeds_liquidacao
+    "pagamento_antes_liquidacao",   # check_pagamento_date_after_liquidacao
+    "nfe_pagamento_divergente",     # check_nfe_pagamento_consistente (só com NFE_PAGAMENTO_CHECK)
+    "nfe_reuso_excedente",          # GlobalNfeIndex (sobre-liquidação entre contratos)
+)
+# Estágio que falha com cada anomalia (None: nenhum estágio do Valida rejeita)
+ANOMALY_STAGE = {
+    "empenho_excede_contrato": "E", "empenho_antes_contrato": "E", "credor_divergente": "E",
+    "liquidacao_excede_empenho": "L", "liquidacao_sem_nfe": "L", "nfe_cnpj_divergente": "L",
+    "nfe_sobre_liquidada": "L", "pagamento_excede_liquidacao": "P", "pagamento_antes_liquidacao": "P",
+    "nfe_pagamento_divergente": "P", "nfe_reuso_excedente": None,
+}
+
+BASE_DATE = date(2023, 1, 1)
+REUSE_POOL = 8        # NFes recentes por fornecedor candidatas a reúso
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    contratos: int = 10_000
+    entidades: int = 100
+    fornecedores: int = 5_000
+    zipf_s: float = 1.1                          # skew de contratos por fornecedor (0 = uniforme)
+    hot_fornecedor: int = 0                      # contratos do fornecedor 1 (0 = só Zipf)
+    empenhos: Tuple[int, int] = (1, 3)           # por contrato
+    liquidacoes: Tuple[int, int] = (1, 4)        # por empenho
+    pagamentos: Tuple[int, int] = (0, 3)         # por empenho
+    nfe_reuse: float = 0.02
+    anomaly_rate: float = 0.05
+    anomalies: Tuple[str, ...] = ANOMALIES
+    seed: int = 42
+
+    def __post_init__(self):
+        unknown = set(self.anomalies) - set(ANOMALIES)
+        if unknown:
+            raise ValueError(f"Anomalias desconhecidas: {', '.join(sorted(unknown))} (use {', '.join(ANOMALIES)})")
+        if self.hot_fornecedor > self.contratos:
+            raise ValueError("hot_fornecedor maior que o número de contratos")
+
+
+def _dec(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def _documento(id_fornecedor: int) -> str:
+    return f"{id_fornecedor:014d}"
+
+
+def _nome_fornecedor(id_fornecedor: int) -> str:
+    return f"FORNECEDOR {id_fornecedor} LTDA"
+
+
+class _NfeEmitida:
+    """NFe do pool de reúso: linhas, data, saldo ainda não liquidado e chunk em que saiu."""
+    __slots__ = ("row", "pagamentos", "data", "saldo", "chunk")
+
+    def __init__(self, row, pagamentos, data, saldo, chunk):
+        self.row, self.pagamentos, self.data, self.saldo, self.chunk = row, pagamentos, data, saldo, chunk
+
+
+class SyntheticDataset:
+    """
+    Dataset das 8 tabelas gerado sob demanda. Mesma config (seed) -> mesmas linhas,
+    independentemente do tamanho do chunk. injected conta as anomalias efetivamente
+    injetadas; stats, linhas por tabela, NFes reusadas e contratos do maior fornecedor.
+    """
+
+    def __init__(self, config: SyntheticConfig = SyntheticConfig()):
+        self.config = config
+        self.injected: Counter = Counter()
+        self.anomalous: Dict[int, str] = {}
+        self.stats: Counter = Counter()
+        self.contratos_por_fornecedor: Counter = Counter()
+
+    # ── dimensões ───────────────────────────────────────────────────────────
+
+    def entidade_rows(self) -> List[tuple]:
+        return [(i, f"PREFEITURA MUNICIPAL {i}", "SP", f"MUNICIPIO {i}", f"{10**13 + i:014d}")
+                for i in range(1, self.config.entidades + 1)]
+
+    def fornecedor_rows(self) -> List[tuple]:
+        return [(i, _nome_fornecedor(i), _documento(i)) for i in range(1, self.config.fornecedores + 1)]
+
+    def _fornecedor_sampler(self, rng: random.Random):
+        """Fornecedor do contrato: o quente com prob. hot/contratos, senão Zipf sobre os demais."""
+        cfg = self.config
+        first = 2 if cfg.hot_fornecedor else 1
+        ids = range(first, cfg.fornecedores + 1)
+        acc, cum = 0.0, []
+        for rank in range(1, len(ids) + 1):
+            acc += 1.0 / rank ** cfg.zipf_s
+            cum.append(acc)
+        hot_p = cfg.hot_fornecedor / cfg.contratos if cfg.contratos else 0.0
+
+        def sample() -> int:
+            if hot_p and rng.random() < hot_p:
+                return 1
+            return ids[bisect_left(cum, rng.random() * acc)]
+        return sample
+
+    # ── fatos ───────────────────────────────────────────────────────────────
+
+    def iter_chunks(self, chunk_contratos: int = 10_000) -> Iterator[Dict[str, List[tuple]]]:
+        """
+        Chunks {tabela: linhas} com chunk_contratos contratos cada (entidade/fornecedor só no
+        primeiro). "nfe_ref"/"nfe_pagamento_ref": NFes de chunks anteriores reusadas neste
+        chunk - já emitidas, servem só aos stand-ins que indexam um chunk por vez.
+        """
+        cfg = self.config
+        rng = random.Random(cfg.seed)
+        fornecedor_de = self._fornecedor_sampler(rng)
+        pools: Dict[int, deque] = {}
+        ids = {"liq": 0, "nfe": 0}
+        self.injected.clear()
+        self.anomalous.clear()
+        self.stats.clear()
+        self.contratos_por_fornecedor.clear()
+
+        chunk = self._new_chunk()
+        chunk["entidade"], chunk["fornecedor"] = self.entidade_rows(), self.fornecedor_rows()
+        refs = set()
+        chunk_num = 0
+        for c in range(1, cfg.contratos + 1):
+            self._gen_contrato(c, rng, fornecedor_de(), pools, ids, chunk, refs, chunk_num)
+            if c % chunk_contratos == 0 or c == cfg.contratos:
+                for table in TABLES:
+                    self.stats[table] += len(chunk[table])
+                yield chunk
+                chunk = self._new_chunk()
+                refs = set()
+                chunk_num += 1
+
+    @staticmethod
+    def _new_chunk() -> Dict[str, List[tuple]]:
+        chunk = {table: [] for table in TABLES}
+        chunk["nfe_ref"], chunk["nfe_pagamento_ref"] = [], []
+        return chunk
+
+    def _gen_contrato(self, c: int, rng: random.Random, id_fornecedor: int, pools, ids, chunk, refs, chunk_num):
+        cfg = self.config
+        self.contratos_por_fornecedor[id_fornecedor] += 1
+        kind = rng.choice(cfg.anomalies) if cfg.anomalies and rng.random() < cfg.anomaly_rate else None
+        applied = None
+
+        id_entidade = rng.randint(1, cfg.entidades)
+        documento, credor = _documento(id_fornecedor), _nome_fornecedor(id_fornecedor)
+        data_contrato = BASE_DATE + timedelta(days=rng.randint(0, 365))
+        n_emp = rng.randint(*cfg.empenhos)
+        valor_contrato = rng.randint(10**7, 10**8)
+        share = valor_contrato // n_emp
+        emp_total = 0
+        pool = pools.setdefault(id_fornecedor, deque(maxlen=REUSE_POOL))
+
+        for e in range(n_emp):
+            id_emp = f"{c}NE{e}"
+            data_emp = data_contrato + timedelta(days=rng.randint(0, 10))
+            emp_cents = rng.randint(share * 3 // 10, share * 9 // 10)
+            emp_total += emp_cents
+            doc_credor = documento
+            if e == 0 and kind == "empenho_antes_contrato":
+                data_emp, applied = data_contrato - timedelta(days=rng.randint(1, 30)), kind
+            if e == 0 and kind == "credor_divergente":
+                doc_credor, applied = _documento(id_fornecedor + cfg.fornecedores), kind
+            chunk["empenho"].append((id_emp, data_emp.year, data_emp, doc_credor, credor, _dec(emp_cents),
+                                     id_entidade, c))
+
+            n_liq = rng.randint(*cfg.liquidacoes)
+            liq_total, min_liq = 0, None
+            for l in range(n_liq):
+                liq_cents = rng.randint(100, max(100, emp_cents * 9 // (10 * n_liq)))
+                first = e == 0 and l == 0
+                if first and kind == "liquidacao_excede_empenho":
+                    liq_cents, applied = emp_cents + 1, kind
+                ids["liq"] += 1
+                reused = None
+                if not (first and kind) and pool and rng.random() < cfg.nfe_reuse:
+                    reused = self._pick_reuse(pool, data_emp, liq_cents, sys.maxsize)
+                if first and kind == "nfe_reuso_excedente" and pool:
+                    # Liquida um pouco além do saldo: dentro do empenho e da NFe, mas a soma
+                    # entre os contratos passa do valor da NFe
+                    cap = emp_cents * 9 // (10 * n_liq)
+                    reused = self._pick_reuse(pool, data_emp, 0, cap - 1)
+                    if reused is not None:
+                        folga = min(10**4, cap - reused.saldo, int(reused.row[5] * 100) - reused.saldo)
+                        liq_cents, applied = reused.saldo + rng.randint(1, folga), kind
+
+                if reused is not None:
+                    data_liq = reused.data.date() + timedelta(days=rng.randint(0, 3))
+                    reused.saldo -= liq_cents
+                    chave = reused.row[1]
+                    self.stats["nfe_reusadas"] += 1
+                    if reused.chunk != chunk_num and chave not in refs:
+                        refs.add(chave)
+                        chunk["nfe_ref"].append(reused.row)
+                        chunk["nfe_pagamento_ref"].extend(reused.pagamentos)
+                else:
+                    data_liq = data_emp + timedelta(days=rng.randint(1, 30))
+                    ids["nfe"] += 1
+                    id_nfe = ids["nfe"]
+                    chave = f"{id_nfe:044d}"
+                    nfe_cents = liq_cents + rng.randint(0, liq_cents)
+                    cnpj = documento
+                    if first and kind == "nfe_cnpj_divergente":
+                        cnpj, applied = _documento(id_fornecedor + cfg.fornecedores), kind
+                    if first and kind == "nfe_sobre_liquidada":
+                        nfe_cents, applied = liq_cents - 1, kind
+                    data_nfe = data_liq - timedelta(days=rng.randint(0, min(3, (data_liq - data_emp).days)))
+                    nfe_row = (id_nfe, chave, str(id_nfe % 10**9), datetime.combine(data_nfe, time(rng.randint(8, 18))),
+                               cnpj, _dec(nfe_cents))
+                    pags = self._nfe_pagamentos(rng, id_nfe, chave, nfe_cents)
+                    if first and kind == "nfe_pagamento_divergente":
+                        row = pags[0]
+                        pags[0], applied = (row[0], row[1], row[2], row[3] - Decimal("0.01")), kind
+                    if first and kind == "liquidacao_sem_nfe":
+                        applied = kind
+                    else:
+                        chunk["nfe"].append(nfe_row)
+                        chunk["nfe_pagamento"].extend(pags)
+                        if not (first and kind):   # NFe de anomalia não entra no pool de reúso
+                            pool.append(_NfeEmitida(nfe_row, pags, nfe_row[3], nfe_cents - liq_cents, chunk_num))
+
+                liq_total += liq_cents
+                min_liq = data_liq if min_liq is None else min(min_liq, data_liq)
+                chunk["liquidacao_nota_fiscal"].append((ids["liq"], chave, data_liq, _dec(liq_cents), id_emp))
+
+            n_pag = rng.randint(*cfg.pagamentos)
+            if e == 0 and kind in ("pagamento_excede_liquidacao", "pagamento_antes_liquidacao", "nfe_pagamento_divergente"):
+                n_pag = max(n_pag, 1)
+            for k in range(n_pag):
+                pag_cents = rng.randint(1, max(1, liq_total * 9 // (10 * n_pag)))
+                data_pag = data_emp + timedelta(days=rng.randint(40, 70))
+                if e == 0 and k == 0 and kind == "pagamento_excede_liquidacao":
+                    pag_cents, applied = liq_total + 1, kind
+                if e == 0 and k == 0 and kind == "pagamento_antes_liquidacao":
+                    data_pag, applied = min_liq - timedelta(days=1), kind
+                chunk["pagamento"].append((f"{id_emp}P{k}", id_emp, data_pag, _dec(pag_cents)))
+
+        if kind == "empenho_excede_contrato":
+            valor_contrato, applied = emp_total - 1, kind
+        chunk["contrato"].append((c, _dec(valor_contrato), data_contrato, f"Objeto do contrato {c}",
+                                  id_entidade, id_fornecedor))
+        if applied:
+            self.injected[applied] += 1
+            self.anomalous[c] = applied
+
+    @staticmethod
+    def _pick_reuse(pool: deque, data_emp: date, saldo_min: int, saldo_max: int) -> Optional[_NfeEmitida]:
+        """NFe do fornecedor liquidável por este empenho: emitida até 30 dias após ele, saldo no intervalo."""
+        limite = data_emp + timedelta(days=30)
+        for nfe in pool:
+            if saldo_min <= nfe.saldo <= saldo_max and data_emp <= nfe.data.date() <= limite:
+                return nfe
+        return None
+
+    @staticmethod
+    def _nfe_pagamentos(rng: random.Random, id_nfe: int, chave: str, nfe_cents: int) -> List[tuple]:
+        if nfe_cents > 1 and rng.random() < 0.3:
+            parte = rng.randint(1, nfe_cents - 1)
+            return [(f"{id_nfe}-1", chave, "01", _dec(parte)), (f"{id_nfe}-2", chave, "03", _dec(nfe_cents - parte))]
+        return [(f"{id_nfe}-1", chave, "01", _dec(nfe_cents))]
+
+
+def description(table: str) -> List[tuple]:
+    return [(c,) for c in COLUMNS[table]]
+
+
+def hydrate_contratos(rows: List[tuple]) -> List[Contrato]:
+    return hydrate_all(rows, Contrato.compile_hydrator(description("contrato")))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STAND-IN EM MEMÓRIA (um chunk indexado)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_ANY = re.compile(r"FROM (\w+) WHERE (\w+) = ANY\(%s\)")
+
+
+class MemoryCursor:
+    """
+    Cursor falso para as 7 queries "WHERE col = ANY(%s)" do loader classic, sobre as linhas
+    de um chunk indexadas pela coluna do filtro (dimensões persistem entre chunks).
+    """
+
+    def __init__(self):
+        self.index: Dict[str, Dict[object, List[tuple]]] = {}
+        self.description = None
+        self._rows: List[tuple] = []
+
+    def load_chunk(self, chunk: Dict[str, List[tuple]]):
+        for table in TABLES:
+            rows = chunk[table]
+            if table == "nfe":
+                rows = rows + chunk["nfe_ref"]
+            elif table == "nfe_pagamento":
+                rows = rows + chunk["nfe_pagamento_ref"]
+            if table in ("entidade", "fornecedor") and not rows:
+                continue
+            key = COLUMNS[table].index(FILTER_COLUMN[table])
+            index: Dict[object, List[tuple]] = {}
+            for row in rows:
+                index.setdefault(row[key], []).append(row)
+            self.index[table] = index
+
+    def release_chunk(self):
+        """Solta os fatos do chunk (antes de gerar o próximo: um chunk em memória por vez)."""
+        self.index = {t: self.index[t] for t in ("entidade", "fornecedor") if t in self.index}
+        self._rows = []
+
+    def execute(self, query, params=None):
+        m = _ANY.search(query)
+        if m is None:
+            raise ValueError(f"MemoryCursor só responde a '= ANY(%s)': {query}")
+        table = m.group(1)
+        index = self.index.get(table, {})
+        self.description = description(table)
+        self._rows = [row for id_ in dict.fromkeys(params[0]) for row in index.get(id_, ())]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STAND-IN SQLITE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Tipos SQLite: dinheiro como TEXT (afinidade NUMERIC viraria REAL); datas em ISO
+_MONEY_COLUMNS = {"valor", "valor_total_nfe", "valor_pagamento"}
+_DATE_COLUMNS = {"data", "data_empenho", "data_emissao", "datapagamentoempenho"}
+_TIMESTAMP_COLUMNS = {"data_hora_emissao"}
+_INT_COLUMNS = {"id_contrato", "id_entidade", "id_fornecedor", "ano", "id_liquidacao_empenhonotafiscal"}
+_INT_ID_TABLES = {"nfe"}   # id int só na nfe (nfe_pagamento.id é texto)
+
+
+def _sqlite_type(table: str, column: str) -> str:
+    if column in _INT_COLUMNS or (column == "id" and table in _INT_ID_TABLES):
+        return "INTEGER"
+    return "TEXT"
+
+
+def _converter(column: str):
+    if column in _MONEY_COLUMNS:
+        return Decimal
+    if column in _DATE_COLUMNS:
+        return date.fromisoformat
+    if column in _TIMESTAMP_COLUMNS:
+        return datetime.fromisoformat
+    return None
+
+
+def _to_sqlite(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):   # datetime também (subclasse de date)
+        return value.isoformat()
+    return value
+
+
+def create_sqlite(path: str = ":memory:") -> sqlite3.Connection:
+    """Banco SQLite com as 8 tabelas e índices nas colunas de filtro do loader."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    for table in TABLES:
+        cols = ", ".join(f"{c} {_sqlite_type(table, c)}" for c in COLUMNS[table])
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE TABLE {table} ({cols})")
+    return conn
+
+
+def insert_chunk(conn: sqlite3.Connection, chunk: Dict[str, List[tuple]]):
+    for table in TABLES:
+        rows = chunk[table]
+        if rows:
+            marks = ", ".join("?" * len(COLUMNS[table]))
+            conn.executemany(f"INSERT INTO {table} VALUES ({marks})",
+                             ([_to_sqlite(v) for v in row] for row in rows))
+
+
+def create_indexes(conn: sqlite3.Connection):
+    for table in TABLES:
+        col = FILTER_COLUMN[table]
+        unique = "UNIQUE " if table in ("contrato", "entidade", "fornecedor", "nfe") else ""
+        conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS ix_{table}_{col} ON {table} ({col})")
+    conn.commit()
+
+
+def load_sqlite(dataset: SyntheticDataset, path: str = ":memory:", chunk_contratos: int = 10_000) -> sqlite3.Connection:
+    """Gera o dataset inteiro no SQLite (índices criados depois da carga)."""
+    conn = create_sqlite(path)
+    for chunk in dataset.iter_chunks(chunk_contratos):
+        insert_chunk(conn, chunk)
+    create_indexes(conn)
+    return conn
+
+
+class SqliteCursor:
+    """
+    Cursor no formato do psycopg2 sobre o SQLite: "%s" -> "?", "col = ANY(%s)" -> IN sobre
+    json_each (sem limite de parâmetros) e conversão de volta para Decimal/date/datetime,
+    como o driver do Postgres entrega.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._cur = conn.cursor()
+        self._queries: Dict[str, str] = {}
+        self._converters: Dict[str, list] = {}
+        self.description = None
+
+    def _translate(self, query: str) -> str:
+        sql = self._queries.get(query)
+        if sql is None:
+            sql = re.sub(r"(\w+) = ANY\(%s\)", r"\1 IN (SELECT value FROM json_each(?))", query)
+            sql = self._queries[query] = sql.replace("%s", "?")
+        return sql
+
+    def execute(self, query, params=()):
+        params = [json.dumps(p) if isinstance(p, list) else p for p in params or ()]
+        self._cur.execute(self._translate(query), params)
+        self.description = self._cur.description
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        if not rows or self.description is None:
+            return rows
+        key = tuple(d[0] for d in self.description)
+        convs = self._converters.get(key)
+        if convs is None:
+            convs = self._converters[key] = [(i, f) for i, c in enumerate(key) if (f := _converter(c)) is not None]
+        if not convs:
+            return rows
+        out = []
+        for row in rows:
+            row = list(row)
+            for i, f in convs:
+                if row[i] is not None:
+                    row[i] = f(row[i])
+            out.append(tuple(row))
+        return out
+
+    def fetchone(self):
+        rows = self._cur.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cur.close()
+
+
+class SqliteConnection:
+    """
+    Conexão no formato do psycopg2 (cursor() / commit() / close()) sobre o SQLite: o que o
+    get_db_connection do fullpipe devolve nos testes e nos workers do bench (--workers).
+    path: arquivo aberto e fechado por esta conexão; ou uma sqlite3.Connection já aberta
+    (ex.: ":memory:" de load_sqlite), que close() não fecha.
+    """
+
+    def __init__(self, target):
+        self._owned = not isinstance(target, sqlite3.Connection)
+        self._conn = sqlite3.connect(target) if self._owned else target
+
+    def cursor(self, name: Optional[str] = None) -> SqliteCursor:
+        if name is not None:
+            raise ValueError("Cursor nomeado (server-side) não existe no SQLite")
+        return SqliteCursor(self._conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        if self._owned:
+            self._conn.close()
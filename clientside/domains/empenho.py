@@ -4,8 +4,11 @@ from clientside.transaction.empenho_transaction import EmpenhoTransaction as Emp
 from models.entidade import Entidade
 from models.fornecedor import Fornecedor
 from result import Result
+from clientside.domains.subdomains.financial_utils import add_money, money_exceeds
+from clientside.domains.subdomains.violations import Violation, coletar
+from clientside.domains.subdomains.rule_registry import register
 
-##aparentemente esse modulo emite validações duplicadas em objetos internos que se auto validam. corrigir se houver tempo !
+#fail-fast por custo: RULE_ORDER=adaptive roda primeiro as regras que mais rejeitam por µs (subdomains/rule_registry.py)
 #se houver tempo aprimorar failfast validations pra validar contratos com invalidações mais estritas mais rapidos
 def regra_entidade_valida(ctx: EmpenhoContext) -> Result[EmpenhoContext]:
     entidade: Entidade | None = ctx.entidade
@@ -43,7 +46,7 @@ def regra_entidade_valida(ctx: EmpenhoContext) -> Result[EmpenhoContext]:
     if entidade is None:
         return Result.err("Entidade é obrigatória para empenho")
 
-    res = entidade.validate()
+    res = ctx.validar_dimensao(entidade)
     if res.is_err:
         return Result.err(res.error)
         
@@ -56,7 +59,7 @@ def regra_fornecedor_valido(ctx: EmpenhoContext) -> Result[EmpenhoContext]:
     if fornecedor is None:
         return Result.err("Fornecedor é obrigatório para empenho")
 
-    res = fornecedor.validate()
+    res = ctx.validar_dimensao(fornecedor)
     if res.is_err:
         return Result.err(res.error)
 
@@ -117,9 +120,14 @@ def regra_valor_total_empenhado(ctx: EmpenhoContext) -> Result[EmpenhoContext]:
     """
     O domínio não permite estourar o valor do contrato.
     """
-    total_empenhado = sum(emp.valor for emp in ctx.empenhos.values() if emp.valor is not None)
+    total_empenhado = 0
+    for emp in ctx.empenhos.values():
+        if emp.valor is not None:
+            total_empenhado = add_money(total_empenhado, emp.valor)
 
-    if total_empenhado > ctx.contrato.valor:
+    if money_exceeds(total_empenhado, ctx.contrato.valor):
+        # A mensagem mostra a soma crua (sem quantizar): recalculada como antes, só no erro
+        total_empenhado = sum(emp.valor for emp in ctx.empenhos.values() if emp.valor is not None)
         return Result.err(
             f"Total empenhado ({total_empenhado}) excede valor do contrato ({ctx.contrato.valor})"
         )
@@ -182,12 +190,14 @@ EMPENHO_CONTEXT_RULES: List[
     regra_nome_fornecedor_consistente,
 ]
 
+# Ordem de execução (fixed / adaptive) e medição por regra: ver subdomains/rule_registry.py
+EMPENHO_RULES_REGISTRY = register("empenho", EMPENHO_CONTEXT_RULES)
 
 
 def executar_empenho_rules(ctx: EmpenhoContext) -> Result[EmpenhoContext]:
-    result: Result[EmpenhoContext] = Result.ok(ctx)
+    return EMPENHO_RULES_REGISTRY.run(ctx)
 
-    for regra in EMPENHO_CONTEXT_RULES:
-        result = result.bind(regra)
 
-    return result
+def coletar_empenho_violacoes(ctx: EmpenhoContext) -> List[Violation]:
+    """Modo acumulativo: todas as EMPENHO_CONTEXT_RULES, sem parar na primeira violação."""
+    return coletar("empenho", EMPENHO_CONTEXT_RULES, ctx)
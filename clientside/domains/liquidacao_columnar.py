@@ -0,0 +1,311 @@
+"""
+Engine Colunar - Liquidação
+
+Valida um BATCH de LiquidacaoTransaction sobre arrays (NumPy):
+    - valores em centavos int64, datas como ordinal (date.toordinal(), 0 = sem data)
+    - CNPJ emitente da NFe / documento do fornecedor codificados em int (igualdade por código)
+    - soma corrente por empenho via cumsum segmentado (sem re-quantizar a cada item)
+
+Mesma semântica do caminho por objeto (liquidação.Valida):
+    - por empenho, o PRIMEIRO item que viola (limite acumulado → datas → NFe, nessa ordem);
+    - o contrato falha no primeiro empenho violado (ordem de empenho_transaction.empenhos)
+      ou, se nenhum, no limite agregado por NFe (check_nfe_aggregate_limit);
+    - o texto do erro é gerado pela própria regra escalar aplicada só ao item sinalizado;
+    - contratos com valores sem representação exata em centavos caem no caminho escalar.
+"""
+import sys
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction as LiquidacaoContext, ItemLiquidacao
+from clientside.domains.liquidação import (
+    Valida,
+    LiquidacaoAccumulator,
+    check_aggregate_rules,
+    check_liquidation_dates,
+    check_nfe_rules,
+    check_nfe_aggregate_limit,
+    update_acc,
+)
+from clientside.domains.subdomains.columnar_utils import Inexact, to_cents, limit_cents
+
+# Motivo da violação no item sinalizado (ordem de checagem do single-pass escalar)
+AGREGADO, DATAS, NFE = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class LiquidacaoViolation:
+    """Primeiro item violado de um empenho."""
+    id_empenho: str
+    id_liquidacao: str
+    error: str
+
+
+def _ordinal(d) -> int:
+    """Ordinal da data (datetime -> .date(), como dates_match_predicate); 0 = sem data."""
+    if not d:
+        return 0
+    return (d.date() if hasattr(d, "date") else d).toordinal()
+
+
+@dataclass
+class LiquidacaoColumns:
+    """
+    Batch de liquidação em layout colunar.
+    Índices: c = contrato, g = grupo (empenho com itens), k = grupo NFe (items_by_nfe).
+    Itens ficam contíguos por grupo, na ordem do caminho escalar.
+    """
+    n_contratos: int
+    contrato_dia: np.ndarray         # ordinal, 0 = None
+    contrato_forn: np.ndarray        # código do fornecedor.documento
+    grupo_contrato: np.ndarray       # -> c
+    grupo_limite: np.ndarray         # centavos de quantize_money(empenho.valor)
+    grupo_emp_dia: np.ndarray        # ordinal, 0 = None
+    grupo_inicio: np.ndarray         # índice do primeiro item do grupo
+    item_grupo: np.ndarray           # -> g
+    item_valor: np.ndarray           # centavos
+    item_liq_dia: np.ndarray         # ordinal, 0 = None
+    item_tem_nfe: np.ndarray         # bool
+    item_nfe_cnpj: np.ndarray        # código do nfe.cnpj_emitente (-1 sem NFe)
+    item_nfe_dia: np.ndarray         # ordinal, 0 = None / sem NFe
+    nfe_contrato: np.ndarray         # -> c, por grupo NFe
+    nfe_limite: np.ndarray           # centavos de quantize_money(nfe.valor_total_nfe)
+    nfe_ativo: np.ndarray            # bool: items[0].nfe presente
+    nfe_item_grupo: np.ndarray       # -> k, por item de items_by_nfe
+    nfe_item_valor: np.ndarray       # centavos
+
+
+def build_liquidacao_columns(ctxs: Sequence[LiquidacaoContext]) -> Tuple[LiquidacaoColumns, List[int], list]:
+    """
+    Single-pass sobre o batch montando as colunas.
+    Retorna (colunas, contratos em fallback escalar, referências (c, empenho, itens) por grupo g).
+    """
+    contrato_dia, contrato_forn = [], []
+    grupo_contrato, grupo_limite, grupo_emp_dia, grupo_inicio = [], [], [], []
+    item_grupo, item_valor, item_liq_dia, item_tem_nfe, item_nfe_cnpj, item_nfe_dia = [], [], [], [], [], []
+    nfe_contrato, nfe_limite, nfe_ativo, nfe_item_grupo, nfe_item_valor = [], [], [], [], []
+    linhas = (grupo_contrato, grupo_limite, grupo_emp_dia, grupo_inicio,
+              item_grupo, item_valor, item_liq_dia, item_tem_nfe, item_nfe_cnpj, item_nfe_dia,
+              nfe_contrato, nfe_limite, nfe_ativo, nfe_item_grupo, nfe_item_valor)
+    grupos_ref: list = []
+    cnpj_codes: Dict[Optional[str], int] = {}
+    fallback: List[int] = []
+
+    for c, ctx in enumerate(ctxs):
+        emp_tx = ctx.empenho_transaction
+        marca = [len(col) for col in linhas]
+        n_grupos = len(grupos_ref)
+        contrato_dia.append(_ordinal(emp_tx.contrato.data))
+        contrato_forn.append(cnpj_codes.setdefault(emp_tx.fornecedor.documento, len(cnpj_codes)))
+        try:
+            if not isinstance(ctx.itens_liquidados, dict):
+                raise Inexact
+            for empenho in emp_tx.empenhos.values():
+                itens_dict = ctx.itens_liquidados.get(empenho.id_empenho)
+                if not itens_dict:
+                    continue
+                g = len(grupo_contrato)
+                grupo_contrato.append(c)
+                grupo_limite.append(limit_cents(empenho.valor))
+                grupo_emp_dia.append(_ordinal(empenho.data_empenho))
+                grupo_inicio.append(len(item_grupo))
+                grupos_ref.append((c, empenho, itens_dict))
+                for item in itens_dict.values():
+                    liq, nfe = item.liquidacao, item.nfe
+                    item_grupo.append(g)
+                    item_valor.append(to_cents(liq.valor))
+                    item_liq_dia.append(_ordinal(liq.data_emissao))
+                    item_tem_nfe.append(bool(nfe))
+                    if nfe:
+                        item_nfe_cnpj.append(cnpj_codes.setdefault(nfe.cnpj_emitente, len(cnpj_codes)))
+                        item_nfe_dia.append(_ordinal(nfe.data_hora_emissao))
+                    else:
+                        item_nfe_cnpj.append(-1)
+                        item_nfe_dia.append(0)
+
+            for items in ctx.items_by_nfe.values():
+                if not items:
+                    continue
+                k = len(nfe_contrato)
+                nfe = items[0].nfe
+                nfe_contrato.append(c)
+                nfe_ativo.append(bool(nfe))
+                nfe_limite.append(limit_cents(nfe.valor_total_nfe) if nfe else 0)
+                for item in items:
+                    nfe_item_grupo.append(k)
+                    nfe_item_valor.append(to_cents(item.liquidacao.valor))
+        except Inexact:
+            for col, n in zip(linhas, marca):
+                del col[n:]
+            del grupos_ref[n_grupos:]
+            fallback.append(c)
+
+    def ints(values):
+        return np.array(values, dtype=np.int64)
+
+    cols = LiquidacaoColumns(
+        n_contratos=len(ctxs),
+        contrato_dia=ints(contrato_dia),
+        contrato_forn=ints(contrato_forn),
+        grupo_contrato=ints(grupo_contrato),
+        grupo_limite=ints(grupo_limite),
+        grupo_emp_dia=ints(grupo_emp_dia),
+        grupo_inicio=ints(grupo_inicio),
+        item_grupo=ints(item_grupo),
+        item_valor=ints(item_valor),
+        item_liq_dia=ints(item_liq_dia),
+        item_tem_nfe=np.array(item_tem_nfe, dtype=bool),
+        item_nfe_cnpj=ints(item_nfe_cnpj),
+        item_nfe_dia=ints(item_nfe_dia),
+        nfe_contrato=ints(nfe_contrato),
+        nfe_limite=ints(nfe_limite),
+        nfe_ativo=np.array(nfe_ativo, dtype=bool),
+        nfe_item_grupo=ints(nfe_item_grupo),
+        nfe_item_valor=ints(nfe_item_valor),
+    )
+    return cols, fallback, grupos_ref
+
+
+def _item_masks(cols: LiquidacaoColumns) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(soma corrente por item, falha agregado, falha datas, falha NFe) - uma entrada por item."""
+    g = cols.item_grupo
+    c = cols.grupo_contrato[g]
+
+    # Soma corrente segmentada: cumsum global menos o acumulado antes do início do grupo
+    cumsum = np.cumsum(cols.item_valor)
+    antes = np.concatenate(([0], cumsum))[cols.grupo_inicio]
+    corrente = cumsum - antes[g]
+    falha_agregado = corrente > cols.grupo_limite[g]
+
+    liq = cols.item_liq_dia
+    emp = cols.grupo_emp_dia[g]
+    contrato = cols.contrato_dia[c]
+    tem_liq, tem_emp, tem_contrato = liq > 0, emp > 0, contrato > 0
+    falha_datas = (tem_liq & tem_emp & (liq < emp)) | (tem_liq & tem_contrato & (liq < contrato))
+
+    nfe = cols.item_nfe_dia
+    tem_nfe_dia = cols.item_tem_nfe & (nfe > 0)
+    falha_nfe = (
+        ~cols.item_tem_nfe
+        | (cols.item_nfe_cnpj != cols.contrato_forn[c])
+        | (tem_nfe_dia & tem_liq & (nfe > liq))
+        | (tem_nfe_dia & tem_emp & (nfe < emp))
+        | (tem_nfe_dia & tem_contrato & (nfe < contrato))
+    )
+    return corrente, falha_agregado, falha_datas, falha_nfe
+
+
+def first_violations(cols: LiquidacaoColumns) -> Dict[int, Tuple[int, int, int]]:
+    """
+    Primeiro item violado por grupo (empenho):
+    {g: (índice do item, motivo AGREGADO/DATAS/NFE, soma corrente em centavos até o item)}.
+    """
+    corrente, falha_agregado, falha_datas, falha_nfe = _item_masks(cols)
+    falha = falha_agregado | falha_datas | falha_nfe
+    idx = np.flatnonzero(falha)
+    grupos, pos = np.unique(cols.item_grupo[idx], return_index=True)
+    primeiros = idx[pos]
+    motivos = np.where(falha_agregado[primeiros], AGREGADO, np.where(falha_datas[primeiros], DATAS, NFE))
+    return {
+        int(g): (int(i), int(m), int(s))
+        for g, i, m, s in zip(grupos, primeiros, motivos, corrente[primeiros])
+    }
+
+
+def _render(ctx: LiquidacaoContext, empenho, item: ItemLiquidacao, motivo: int, corrente_cents: int) -> Result[None]:
+    """Mensagem do item sinalizado gerada pela regra escalar correspondente."""
+    emp_tx = ctx.empenho_transaction
+    if motivo == AGREGADO:
+        return check_aggregate_rules(LiquidacaoAccumulator(total_valor=corrente_cents), empenho)
+    if motivo == DATAS:
+        return check_liquidation_dates(item.liquidacao, empenho, emp_tx.contrato)
+    return check_nfe_rules(item.nfe, item.liquidacao, emp_tx.fornecedor, emp_tx.contrato, empenho)
+
+
+def _scalar_first_violation(ctx: LiquidacaoContext, empenho, itens_dict) -> Optional[LiquidacaoViolation]:
+    """Mesmo loop de _validate_empenho_rules_single_pass, devolvendo também o item."""
+    emp_tx = ctx.empenho_transaction
+    acc = LiquidacaoAccumulator()
+    for id_liq, item in itens_dict.items():
+        update_acc(acc, item)
+        for res in (
+            check_aggregate_rules(acc, empenho),
+            check_liquidation_dates(item.liquidacao, empenho, emp_tx.contrato),
+            check_nfe_rules(item.nfe, item.liquidacao, emp_tx.fornecedor, emp_tx.contrato, empenho),
+        ):
+            if res.is_err:
+                return LiquidacaoViolation(empenho.id_empenho, id_liq, res.error)
+    return None
+
+
+def flag_batch(ctxs: Sequence[LiquidacaoContext]) -> List[List[LiquidacaoViolation]]:
+    """
+    Para cada contrato do batch, a lista (ordem dos empenhos) do primeiro item violado de
+    cada empenho, com o mesmo texto de erro do caminho por objeto.
+    """
+    return _flag(ctxs, *build_liquidacao_columns(ctxs))
+
+
+def _flag(ctxs, cols: LiquidacaoColumns, fallback: List[int], grupos_ref: list) -> List[List[LiquidacaoViolation]]:
+    flags: List[List[LiquidacaoViolation]] = [[] for _ in ctxs]
+
+    violacoes = first_violations(cols)
+    for g in sorted(violacoes):
+        i, motivo, corrente = violacoes[g]
+        c, empenho, itens_dict = grupos_ref[g]
+        id_liq, item = list(itens_dict.items())[i - int(cols.grupo_inicio[g])]
+        res = _render(ctxs[c], empenho, item, motivo, corrente)
+        if res.is_err:
+            flags[c].append(LiquidacaoViolation(empenho.id_empenho, id_liq, res.error))
+        else:
+            # Divergência (não esperada) entre máscara e regra: resolve pelo loop escalar
+            v = _scalar_first_violation(ctxs[c], empenho, itens_dict)
+            if v:
+                flags[c].append(v)
+
+    for c in fallback:
+        ctx = ctxs[c]
+        for empenho in ctx.empenho_transaction.empenhos.values():
+            itens_dict = ctx.itens_liquidados.get(empenho.id_empenho)
+            if itens_dict:
+                v = _scalar_first_violation(ctx, empenho, itens_dict)
+                if v:
+                    flags[c].append(v)
+    return flags
+
+
+def valida_batch(ctxs: Sequence[LiquidacaoContext]) -> List[Result[LiquidacaoContext]]:
+    """Equivalente vetorial de [liquidação.Valida(ctx) for ctx in ctxs]."""
+    if not ctxs:
+        return []
+    cols, fallback, grupos_ref = build_liquidacao_columns(ctxs)
+    flags = _flag(ctxs, cols, fallback, grupos_ref)
+
+    # Limite agregado por NFe (regra final do Valida, só para quem passou pelos empenhos)
+    soma_nfe = np.zeros(len(cols.nfe_contrato), dtype=np.int64)
+    np.add.at(soma_nfe, cols.nfe_item_grupo, cols.nfe_item_valor)
+    falha_nfe = cols.nfe_ativo & (soma_nfe > cols.nfe_limite)
+    contratos_nfe = set(cols.nfe_contrato[falha_nfe].tolist())
+
+    fallback_set = set(fallback)
+    results: List[Result[LiquidacaoContext]] = []
+    for c, ctx in enumerate(ctxs):
+        if c in fallback_set:
+            results.append(Valida(ctx))
+        elif flags[c]:
+            results.append(Result.err(flags[c][0].error))
+        elif c in contratos_nfe:
+            res = check_nfe_aggregate_limit(ctx)
+            results.append(Result.err(res.error) if res.is_err else Valida(ctx))
+        else:
+            results.append(Result.ok(ctx))
+    return results
@@ -1,4 +1,4 @@
-from typing import List, Callable, Optional, Dict, Any
+from typing import List, Callable, Optional, Dict, Any, Union
 import sys
 import os
 
@@ -19,7 +19,9 @@ from decimal import Decimal
 from datetime import date
 from dataclasses import dataclass, field
 from clientside.domains.subdomains.nfe_integrity import check_integrity_nfe_liquidacao, check_nfe_pagamento_consistency
-from clientside.domains.subdomains.financial_utils import quantize_money, sums_match_limit
+from clientside.domains.subdomains.financial_utils import quantize_money, add_money, money_total, money_match_limit
+from clientside.domains.subdomains.violations import Violation, avaliar, nao_avaliavel
+from utils.instrumentation import spanned, spans_enabled
 
 #ainda na duvidas se implemento esse código de um jeito horrivel de ler usando O(n) ou se mudo
 #pra algo mais declarativo usando O(n-r)
@@ -31,7 +33,7 @@ from clientside.domains.subdomains.financial_utils import quantize_money, sums_m
 
 @dataclass
 class LiquidacaoAccumulator:
-    total_valor: Decimal = Decimal(0)
+    total_valor: Union[int, Decimal] = 0  # centavos int enquanto as liquidações forem Money (ver add_money)
     has_nfe: bool = False
     min_data_liq: Optional[date] = None
 
@@ -56,7 +58,7 @@ def dates_match_predicate(d1, d2, predicate: Callable[[date, date], bool]) -> bo
 
 def update_acc(acc: LiquidacaoAccumulator, item: ItemLiquidacao):
     """Atualiza o acumulador com os dados do item."""
-    acc.total_valor += item.liquidacao.valor
+    acc.total_valor = add_money(acc.total_valor, item.liquidacao.valor)
     if item.nfe:
         acc.has_nfe = True
 
@@ -73,12 +75,13 @@ def check_liquidation_dates(liq: LiquidacaoNotaFiscal, empenho: Empenho, contrat
     
     return Result.ok(None)
 
+# (nome, predicado(data_nfe, alvo), alvo(liq, empenho)) - construída uma vez no import
+NFE_DATE_RULES = [
+    ("NFe <= Liquidação", lambda nfe_date, liq_date: nfe_date <= liq_date, lambda liq, empenho: liq.data_emissao),
+    ("NFe >= Empenho", lambda nfe_date, emp_date: nfe_date >= emp_date, lambda liq, empenho: empenho.data_empenho),
+]
+
 def check_nfe_rules(nfe: Optional[Nfe], liq: LiquidacaoNotaFiscal, fornecedor: Fornecedor, contrato: Contrato, empenho: Empenho) -> Result[None]:
-    
-    NFE_DATE_RULES = [
-    ("NFe <= Liquidação", lambda nfe_date, liq_date: nfe_date <= liq_date),
-    ("NFe >= Empenho", lambda nfe_date, emp_date: nfe_date >= emp_date),
-    ]
 
     if not nfe: 
         return Result.err(f"Liquidação ({liq.id_liquidacao_empenhonotafiscal}) sem NFe associada ou não encontrada. Regra: Obrigatório.")
@@ -92,13 +95,8 @@ def check_nfe_rules(nfe: Optional[Nfe], liq: LiquidacaoNotaFiscal, fornecedor: F
         d_nfe = nfe.data_hora_emissao.date() if hasattr(nfe.data_hora_emissao, "date") else nfe.data_hora_emissao
 
         # Check explicit rules from configuration
-        targets = {
-            "NFe <= Liquidação": liq.data_emissao,
-            "NFe >= Empenho": empenho.data_empenho
-        }
-        
-        for rule_name, validator in NFE_DATE_RULES:
-            target_date = targets.get(rule_name)
+        for rule_name, validator, target in NFE_DATE_RULES:
+            target_date = target(liq, empenho)
             if target_date:
                 if not dates_match_predicate(d_nfe, target_date, validator):
                      return Result.err(f"Violação Regra {rule_name}: NFe ({d_nfe}) vs Alvo ({target_date})")
@@ -112,12 +110,14 @@ def check_nfe_rules(nfe: Optional[Nfe], liq: LiquidacaoNotaFiscal, fornecedor: F
 
 def check_aggregate_rules(acc: LiquidacaoAccumulator, empenho: Empenho) -> Result[None]:
     
-    if not sums_match_limit(acc.total_valor, empenho.valor):
-        return Result.err(f"Soma Liquidações ({quantize_money(acc.total_valor)}) excede Valor Empenho ({empenho.valor}) - ID Emp: {empenho.id_empenho}")
+    if not money_match_limit(acc.total_valor, empenho.valor):
+        return Result.err(f"Soma Liquidações ({quantize_money(money_total(acc.total_valor))}) excede Valor Empenho ({empenho.valor}) - ID Emp: {empenho.id_empenho}")
     return Result.ok(None)
 
-def _validate_empenho_rules_single_pass(context_data: LiquidacaoContext, empenho_obj: Empenho, liquidacao_items: List[ItemLiquidacao]) -> Result[None]:
+def _validate_empenho_rules_single_pass(context_data: LiquidacaoContext, empenho_obj: Empenho, liquidacao_items: List[ItemLiquidacao],
+                                        rules: Optional[tuple] = None) -> Result[None]:
    ## Valida regras utilizando padrão acc e pure functions
+    _, check_aggregate_rules, check_liquidation_dates, check_nfe_rules, _ = rules or LIQUIDACAO_RULES
     
     contrato = context_data.empenho_transaction.contrato
     fornecedor_obj = context_data.empenho_transaction.fornecedor
@@ -154,22 +154,57 @@ def check_nfe_aggregate_limit(ctx: LiquidacaoContext) -> Result[None]:
     items_by_nfe = ctx.items_by_nfe
     
     for chave_danfe, items in items_by_nfe.items():
-        if not items: continue
-        
-        # Assume que todos items com mesma chave apontam para mesma NFe (consistência já validada)
-        nfe = items[0].nfe
-        if not nfe: continue
-        
-        total_liquidado_nfe = sum((item.liquidacao.valor for item in items), Decimal(0))
-        
-        # Valida Soma Liquidações <= NFe (com precisão estrita)
-        if not sums_match_limit(total_liquidado_nfe, nfe.valor_total_nfe):
-             return Result.err(
-                 f"Soma das Liquidações ({quantize_money(total_liquidado_nfe)}) excede valor da NFe {chave_danfe} ({nfe.valor_total_nfe})"
-             )
+        res = check_nfe_limit(chave_danfe, items)
+        if res.is_err:
+            return res
              
     return Result.ok(None)
 
+
+def check_nfe_limit(chave_danfe: str, items: List[ItemLiquidacao]) -> Result[None]:
+    """Soma das liquidações de uma chave DANFE <= valor da NFe."""
+    if not items:
+        return Result.ok(None)
+    
+    # Assume que todos items com mesma chave apontam para mesma NFe (consistência já validada)
+    nfe = items[0].nfe
+    if not nfe:
+        return Result.ok(None)
+    
+    total_liquidado_nfe = 0
+    for item in items:
+        total_liquidado_nfe = add_money(total_liquidado_nfe, item.liquidacao.valor)
+    
+    # Valida Soma Liquidações <= NFe (com precisão estrita)
+    if not money_match_limit(total_liquidado_nfe, nfe.valor_total_nfe):
+        return Result.err(
+            f"Soma das Liquidações ({quantize_money(money_total(total_liquidado_nfe))}) excede valor da NFe {chave_danfe} ({nfe.valor_total_nfe})"
+        )
+    return Result.ok(None)
+
+# Regras do Valida, na ordem de avaliação: integridade, por item (limite do empenho, datas, NFe)
+# e limite agregado por NFe
+LIQUIDACAO_RULES = (
+    check_integrity_nfe_liquidacao,
+    check_aggregate_rules,
+    check_liquidation_dates,
+    check_nfe_rules,
+    check_nfe_aggregate_limit,
+)
+
+_SPANNED_RULES: Dict[bool, tuple] = {False: LIQUIDACAO_RULES}
+
+
+def liquidacao_rules() -> tuple:
+    """LIQUIDACAO_RULES; com os spans ligados, cada regra envolvida por spanned() (rule.liquidacao.<regra>)."""
+    enabled = spans_enabled()
+    rules = _SPANNED_RULES.get(enabled)
+    if rules is None:
+        rules = _SPANNED_RULES[enabled] = tuple(spanned(f"rule.liquidacao.{rule.__name__}", rule)
+                                                for rule in LIQUIDACAO_RULES)
+    return rules
+
+
 def Valida(ctx: LiquidacaoContext) -> Result[LiquidacaoContext]:
     """
     Roda validações: 
@@ -177,7 +212,9 @@ def Valida(ctx: LiquidacaoContext) -> Result[LiquidacaoContext]:
     2. Itera sobre a estrutura já agrupada por empenho (Normalizada) e aplica validações.
     3. Checa regras agregadas por NFe (Liquidação Parcial).
     """
-    check_res = check_integrity_nfe_liquidacao(ctx)
+    rules = liquidacao_rules()
+    check_integrity, _, _, _, check_nfe_aggregate = rules
+    check_res = check_integrity(ctx)
     if check_res.is_err:
         return Result.err(check_res.error)
 
@@ -189,13 +226,54 @@ def Valida(ctx: LiquidacaoContext) -> Result[LiquidacaoContext]:
             
             # Chama Validação Otimizada Single-Pass
             # Passa objeto empenho direto, sem re-lookup
-            res = _validate_empenho_rules_single_pass(ctx, empenho, itens)
+            res = _validate_empenho_rules_single_pass(ctx, empenho, itens, rules)
             if res.is_err:
                 return Result.err(res.error)
     
     # Validação Agregada de NFe (Liquidação Parcial)
-    res_nfe = check_nfe_aggregate_limit(ctx)
+    res_nfe = check_nfe_aggregate(ctx)
     if res_nfe.is_err:
         return Result.err(res_nfe.error)
                 
     return Result.ok(ctx)
+
+
+def coletar_liquidacao_violacoes(ctx: LiquidacaoContext) -> List[Violation]:
+    """
+    Modo acumulativo do Valida: mesma ordem de avaliação (integridade, itens por empenho,
+    limite por NFe), sem parar na primeira violação. O limite do empenho é reportado uma vez,
+    no item em que a soma corrente o ultrapassa (mesma mensagem do caminho fail-fast).
+    """
+    violacoes = [v for v in (avaliar("liquidacao", check_integrity_nfe_liquidacao, ctx),) if v]
+    contrato = ctx.empenho_transaction.contrato
+    fornecedor = ctx.empenho_transaction.fornecedor
+
+    for empenho in ctx.empenho_transaction.empenhos.values():
+        itens_dict = ctx.itens_liquidados.get(empenho.id_empenho)
+        if not itens_dict:
+            continue
+        acc = LiquidacaoAccumulator()
+        limite_pendente = True  # False depois que o limite do empenho foi reportado
+        for id_liq, item in itens_dict.items():
+            if limite_pendente:
+                try:
+                    update_acc(acc, item)
+                except Exception as exc:
+                    v = nao_avaliavel("liquidacao", check_aggregate_rules.__name__, exc, id_liq)
+                else:
+                    v = avaliar("liquidacao", check_aggregate_rules, acc, empenho, ref=id_liq)
+                if v:
+                    violacoes.append(v)
+                    limite_pendente = False
+            for v in (
+                avaliar("liquidacao", check_liquidation_dates, item.liquidacao, empenho, contrato, ref=id_liq),
+                avaliar("liquidacao", check_nfe_rules, item.nfe, item.liquidacao, fornecedor, contrato, empenho, ref=id_liq),
+            ):
+                if v:
+                    violacoes.append(v)
+
+    for chave_danfe, items in ctx.items_by_nfe.items():
+        v = avaliar("liquidacao", check_nfe_limit, chave_danfe, items, ref=chave_danfe)
+        if v:
+            violacoes.append(v)
+    return violacoes
@@ -15,13 +15,14 @@ Regras implementadas:
 7. Data Pagamento ≤ Hoje (não futuro)
 8. Data Pagamento ≥ Contrato.data
 9. Data Pagamento ≥ min(Empenho.data) 
+10. Σ(NfePagamento.valor) = NFe.valor_total (opcional: NFE_PAGAMENTO_CHECK=1 / set_nfe_pagamento_check)
 """
 import sys
 import os
 from typing import Dict, Optional, List, FrozenSet
 from decimal import Decimal
 from datetime import date, datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../../"))
@@ -31,7 +32,14 @@ if project_root not in sys.path:
 from result import Result
 from clientside.transaction.transaction_pagamento import PaymentTransaction, PagamentoItem
 from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction, ItemLiquidacao
-from clientside.domains.subdomains.financial_utils import quantize_money, sums_match_limit
+from clientside.domains.subdomains.financial_utils import (
+    quantize_money, add_money, money_total, money_match_limit, money_is_positive,
+)
+from clientside.domains.subdomains.violations import Violation, coletar, nao_avaliavel
+from clientside.domains.subdomains.rule_registry import register
+from clientside.domains.subdomains.nfe_integrity import check_nfe_pagamento_sum
+from models.nfe import Nfe
+from models.nfe_pagamento import NfePagamento
 
 
 ##!! priorizing
@@ -60,6 +68,10 @@ class PaymentValidationFragment:
     all_pagamento_ids: List[str]
     all_pagamento_valores: List[Decimal]
 
+    # NfePagamentos pré-carregados (PagamentoItem.nfe_pagamentos) por chave, e as NFes com algum
+    nfe_pagamentos_por_chave: Dict[str, List[NfePagamento]] = field(default_factory=dict)
+    nfes_com_pagamento: Dict[str, Nfe] = field(default_factory=dict)
+
 
 
 def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragment:
@@ -74,19 +86,20 @@ def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragme
     min_data_liq: Dict[str, date] = {}
     has_nfe: set = set()
     
+    # Somas via add_money: centavos int enquanto os valores forem Money (totais saem como Money)
     for id_emp, inner in liq_tx.itens_liquidados.items():
-        soma = Decimal(0)
+        soma = 0
         min_d = None
         
         for item in inner.values():
-            soma += item.liquidacao.valor
+            soma = add_money(soma, item.liquidacao.valor)
             d = item.liquidacao.data_emissao
             if d and (min_d is None or d < min_d):
                 min_d = d
             if item.nfe:
                 has_nfe.add(id_emp)
         
-        tot_liq[id_emp] = soma
+        tot_liq[id_emp] = money_total(soma)
         if min_d:
             min_data_liq[id_emp] = min_d
 
@@ -96,16 +109,20 @@ def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragme
     all_pag_ids: List[str] = []
     all_pag_valores: List[Decimal] = []
     max_data_pag: Optional[date] = None
-    total_pago_global = Decimal(0)
+    total_pago_global = 0
+    # itens do mesmo empenho compartilham a tupla de NfePagamentos: dedup por id
+    nfe_pags: Dict[str, Dict[str, NfePagamento]] = {}
     
     for id_emp, items in tx.pagamentos_por_empenho.items():
-        soma_p = Decimal(0)
+        soma_p = 0
         min_d_p = None
         
         for pag_item in items:
+            for np_ in pag_item.nfe_pagamentos:
+                nfe_pags.setdefault(np_.chave_nfe, {})[np_.id] = np_
             valor = pag_item.pagamento.valor
-            soma_p += valor
-            total_pago_global += valor
+            soma_p = add_money(soma_p, valor)
+            total_pago_global = add_money(total_pago_global, valor)
             all_pag_ids.append(pag_item.id_pagamento)
             all_pag_valores.append(valor)
             
@@ -116,11 +133,18 @@ def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragme
                 if max_data_pag is None or d_p > max_data_pag:
                     max_data_pag = d_p
         
-        tot_pago[id_emp] = soma_p
+        tot_pago[id_emp] = money_total(soma_p)
         if min_d_p:
             min_data_pag[id_emp] = min_d_p
 
 
+    nfes_com_pag: Dict[str, Nfe] = {}
+    if nfe_pags:
+        for inner in liq_tx.itens_liquidados.values():
+            for item in inner.values():
+                if item.nfe and item.nfe.chave_nfe in nfe_pags:
+                    nfes_com_pag[item.nfe.chave_nfe] = item.nfe
+
     min_data_emp: Optional[date] = None
     for emp in emp_tx.empenhos.values():
         if emp.data_empenho:
@@ -130,7 +154,7 @@ def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragme
     return PaymentValidationFragment(
         total_liquidado_por_empenho=tot_liq,
         total_pago_por_empenho=tot_pago,
-        total_pago_global=total_pago_global,
+        total_pago_global=money_total(total_pago_global),
         valor_contrato=emp_tx.contrato.valor,
         min_data_liquidacao_por_empenho=min_data_liq,
         min_data_pagamento_por_empenho=min_data_pag,
@@ -139,7 +163,9 @@ def build_validation_fragment(tx: PaymentTransaction) -> PaymentValidationFragme
         min_data_empenho=min_data_emp,
         empenhos_com_nfe=frozenset(has_nfe),
         all_pagamento_ids=all_pag_ids,
-        all_pagamento_valores=all_pag_valores
+        all_pagamento_valores=all_pag_valores,
+        nfe_pagamentos_por_chave={chave: list(pags.values()) for chave, pags in nfe_pags.items()},
+        nfes_com_pagamento=nfes_com_pag
     )
 
 
@@ -173,7 +199,7 @@ def check_pagamento_not_exceeds_liquidacao(frag: PaymentValidationFragment) -> R
     for id_empenho, total_pago in frag.total_pago_por_empenho.items():
         total_liq = frag.total_liquidado_por_empenho.get(id_empenho, Decimal(0))
         
-        if not sums_match_limit(total_pago, total_liq):
+        if not money_match_limit(total_pago, total_liq):
             return Result.err(
                 f"[FRAUDE?] Pagamentos ({quantize_money(total_pago)}) excedem "
                 f"Liquidações ({quantize_money(total_liq)}) - Empenho: {id_empenho}"
@@ -183,7 +209,7 @@ def check_pagamento_not_exceeds_liquidacao(frag: PaymentValidationFragment) -> R
 
 def check_total_pago_not_exceeds_contrato(frag: PaymentValidationFragment) -> Result[None]:
     """Regra 5: Σ(Pagamentos) ≤ Contrato.valor (global)."""
-    if not sums_match_limit(frag.total_pago_global, frag.valor_contrato):
+    if not money_match_limit(frag.total_pago_global, frag.valor_contrato):
         return Result.err(
             f"[FRAUDE?] Total Pago ({quantize_money(frag.total_pago_global)}) excede "
             f"Valor do Contrato ({quantize_money(frag.valor_contrato)})"
@@ -194,7 +220,7 @@ def check_total_pago_not_exceeds_contrato(frag: PaymentValidationFragment) -> Re
 def check_pagamento_valor_positivo(frag: PaymentValidationFragment) -> Result[None]:
     """Regra 6: Todo Pagamento.valor > 0."""
     for i, valor in enumerate(frag.all_pagamento_valores):
-        if valor <= Decimal(0):
+        if not money_is_positive(valor):
             pag_id = frag.all_pagamento_ids[i] if i < len(frag.all_pagamento_ids) else "?"
             return Result.err(
                 f"[INVÁLIDO] Pagamento {pag_id} com valor não-positivo: {valor}"
@@ -252,6 +278,14 @@ def check_pagamento_date_after_empenho(frag: PaymentValidationFragment) -> Resul
 
 
 
+def check_nfe_pagamento_consistente(frag: PaymentValidationFragment) -> Result[None]:
+    """Regra 10: Σ(NfePagamento.valor) = NFe.valor_total, sobre os NfePagamentos do batch (sem query)."""
+    for chave, nfe in frag.nfes_com_pagamento.items():
+        res = check_nfe_pagamento_sum(nfe, frag.nfe_pagamentos_por_chave[chave])
+        if res.is_err:
+            return res
+    return Result.ok(None)
+
 
 PAGAMENTO_VALIDATION_RULES = [
     # Integridade
@@ -266,8 +300,30 @@ PAGAMENTO_VALIDATION_RULES = [
     check_pagamento_date_not_future,
     check_pagamento_date_after_contrato,
     check_pagamento_date_after_empenho,
+    # NFe (opcional)
+    check_nfe_pagamento_consistente,
 ]
 
+# Ordem de execução (fixed / adaptive) e medição por regra: ver subdomains/rule_registry.py.
+# Regra 10 é opcional (desligada por padrão): só tem o que checar com o 7º map do loader
+# (nfe_pagamento) e não tem equivalente no engine colunar (ligada, o batch cai no Valida escalar).
+PAGAMENTO_RULES_REGISTRY = register(
+    "pagamento", PAGAMENTO_VALIDATION_RULES,
+    optional=(check_nfe_pagamento_consistente.__name__,),
+    enabled=(check_nfe_pagamento_consistente.__name__,)
+    if os.getenv("NFE_PAGAMENTO_CHECK", "") not in ("", "0") else (),
+)
+
+
+def nfe_pagamento_check_enabled() -> bool:
+    return PAGAMENTO_RULES_REGISTRY.is_enabled(check_nfe_pagamento_consistente.__name__)
+
+
+def set_nfe_pagamento_check(enabled: bool):
+    """Liga/desliga a Regra 10 no registry e exporta no ambiente (workers spawn herdam)."""
+    os.environ["NFE_PAGAMENTO_CHECK"] = "1" if enabled else ""
+    PAGAMENTO_RULES_REGISTRY.enable(check_nfe_pagamento_consistente.__name__, enabled)
+
 
 def apply_rules(frag: PaymentValidationFragment, rules: list) -> Result[None]:
     """
@@ -295,9 +351,18 @@ def Valida(tx: PaymentTransaction) -> Result[PaymentTransaction]:
     """
     fragment = build_validation_fragment(tx)
     
-    validation_result = apply_rules(fragment, PAGAMENTO_VALIDATION_RULES)
+    validation_result = PAGAMENTO_RULES_REGISTRY.run(fragment)
     
     if validation_result.is_err:
         return Result.err(validation_result.error)
     
     return Result.ok(tx)
+
+
+def coletar_pagamento_violacoes(tx: PaymentTransaction) -> List[Violation]:
+    """Modo acumulativo: todas as regras ativas do registry sobre o mesmo fragmento."""
+    try:
+        fragment = build_validation_fragment(tx)
+    except Exception as exc:
+        return [nao_avaliavel("pagamento", build_validation_fragment.__name__, exc)]
+    return coletar("pagamento", PAGAMENTO_RULES_REGISTRY.active, fragment)
@@ -0,0 +1,335 @@
+"""
+Engine Colunar - Pagamento
+
+Valida um BATCH de PaymentTransaction de uma vez, sobre arrays (NumPy):
+    - dinheiro em int64 (centavos), datas em datetime64[D]
+    - agregados por empenho/contrato via reduções group-by (np.add.at / np.minimum.at / bincount)
+    - cada regra 1-9 vira uma máscara booleana por contrato
+
+Semântica idêntica a pagamento.Valida:
+    - as regras ativas do registry são avaliadas na ordem declarada (primeira que falha vence);
+      com o registry em adaptive-fast, na ordem aprendida (registry.order()), como o escalar;
+    - a mensagem de erro é renderizada pela própria regra escalar, apenas para os contratos
+      que falharam, então o texto é o mesmo por construção;
+    - contratos que não cabem exatamente no modelo colunar (valor None/fracionário abaixo do
+      centavo, datas que não são date puro, contrato sem data) caem no Valida escalar.
+
+A montagem das colunas ainda percorre os objetos uma vez (a entrada são transactions);
+o ganho vem de trocar as N somas/comparações Decimal por regra por reduções em int64.
+
+Com o registry medindo (RULE_STATS / modos adaptive) cada máscara alimenta as estatísticas da
+regra em PAGAMENTO_RULES_REGISTRY: chamadas = contratos avaliados no colunar, falhas = contratos
+da máscara, custo = tempo da máscara (os contratos do fallback são medidos pelo Valida escalar).
+"""
+import sys
+import os
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from clientside.transaction.transaction_pagamento import PaymentTransaction
+from clientside.domains.subdomains.columnar_utils import Inexact, to_cents, limit_cents
+from clientside.domains.pagamento import (
+    PAGAMENTO_RULES_REGISTRY,
+    Valida,
+    build_validation_fragment,
+    check_pagamento_requires_liquidacao,
+    check_pagamento_ids_unique,
+    check_pagamento_not_exceeds_liquidacao,
+    check_total_pago_not_exceeds_contrato,
+    check_pagamento_valor_positivo,
+    check_pagamento_date_after_liquidacao,
+    check_pagamento_date_not_future,
+    check_pagamento_date_after_contrato,
+    check_pagamento_date_after_empenho,
+)
+
+# Sentinelas para reduções sobre datetime64[D] vistos como int64 (NaT = INT64_MIN)
+_NAT = np.iinfo(np.int64).min
+_NO_MIN = np.iinfo(np.int64).max
+_NO_MAX = np.iinfo(np.int64).min
+
+
+# date.toordinal() de 1970-01-01: converte date -> dias desde a época do datetime64 sem np.array(object)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day(d) -> int:
+    if d is None:
+        return _NAT
+    if type(d) is not date:
+        raise Inexact
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+@dataclass
+class PaymentColumns:
+    """
+    Batch de pagamento em layout colunar.
+    Índices: c = contrato (posição no batch), g = grupo (contrato, empenho com pagamento).
+    Grupos e linhas seguem a ordem de iteração dos dicts, como no caminho escalar.
+    """
+    n_contratos: int
+    # por contrato
+    valor_contrato: np.ndarray       # int64 centavos
+    data_contrato: np.ndarray        # datetime64[D]
+    # por empenho do contrato
+    emp_contrato: np.ndarray         # int64 -> c
+    emp_data: np.ndarray             # datetime64[D]
+    # por grupo (empenho com pagamento)
+    grupo_contrato: np.ndarray       # int64 -> c
+    grupo_tem_liquidacao: np.ndarray # bool
+    # por pagamento
+    pag_grupo: np.ndarray            # int64 -> g
+    pag_contrato: np.ndarray         # int64 -> c
+    pag_valor: np.ndarray            # int64 centavos
+    pag_data: np.ndarray             # datetime64[D]
+    pag_id: np.ndarray               # int64 (código do id_pagamento no batch)
+    # por liquidação de empenho com pagamento
+    liq_grupo: np.ndarray            # int64 -> g
+    liq_valor: np.ndarray            # int64 centavos
+    liq_data: np.ndarray             # datetime64[D]
+
+
+def build_payment_columns(txs: Sequence[PaymentTransaction]) -> Tuple[PaymentColumns, List[int]]:
+    """
+    Single-pass sobre o batch montando as colunas.
+    Retorna (colunas, índices dos contratos que precisam do caminho escalar).
+    Contratos em fallback mantêm sua posição c, mas não contribuem linhas.
+
+    Só as liquidações de empenhos COM pagamento viram linhas: as demais não participam
+    de nenhuma regra de pagamento (o escalar as soma, mas nunca consulta o resultado).
+    """
+    valor_contrato, data_contrato = [], []
+    emp_contrato, emp_data = [], []
+    grupo_contrato, grupo_tem_liq = [], []
+    pag_grupo, pag_contrato, pag_valor, pag_data, pag_id = [], [], [], [], []
+    liq_grupo, liq_valor, liq_data = [], [], []
+    linhas = (emp_contrato, emp_data, grupo_contrato, grupo_tem_liq,
+              pag_grupo, pag_contrato, pag_valor, pag_data, pag_id, liq_grupo, liq_valor, liq_data)
+    id_codes: Dict[str, int] = {}
+    fallback: List[int] = []
+
+    for c, tx in enumerate(txs):
+        liq_tx = tx.liquidacao_transaction
+        emp_tx = liq_tx.empenho_transaction
+        itens_liquidados = liq_tx.itens_liquidados
+        marca = [len(col) for col in linhas]
+        try:
+            valor_contrato.append(limit_cents(emp_tx.contrato.valor))
+            data_contrato.append(_day(emp_tx.contrato.data))
+            if data_contrato[-1] == _NAT:
+                raise Inexact
+            for emp in emp_tx.empenhos.values():
+                emp_contrato.append(c)
+                emp_data.append(_day(emp.data_empenho))
+
+            for id_emp, items in tx.pagamentos_por_empenho.items():
+                g = len(grupo_contrato)
+                grupo_contrato.append(c)
+                inner = itens_liquidados.get(id_emp)
+                grupo_tem_liq.append(inner is not None)
+                for item in items:
+                    pag = item.pagamento
+                    pag_grupo.append(g)
+                    pag_contrato.append(c)
+                    pag_valor.append(to_cents(pag.valor))
+                    pag_data.append(_day(pag.data_pagamento_emp))
+                    pag_id.append(id_codes.setdefault(item.id_pagamento, len(id_codes)))
+                if inner:
+                    for item in inner.values():
+                        liq = item.liquidacao
+                        liq_grupo.append(g)
+                        liq_valor.append(to_cents(liq.valor))
+                        liq_data.append(_day(liq.data_emissao))
+        except Inexact:
+            for col, n in zip(linhas, marca):
+                del col[n:]
+            fallback.append(c)
+            del valor_contrato[c:], data_contrato[c:]
+            valor_contrato.append(0)
+            data_contrato.append(_NAT)
+
+    def ints(values):
+        return np.array(values, dtype=np.int64)
+
+    def days(values):
+        return ints(values).view("datetime64[D]")
+
+    cols = PaymentColumns(
+        n_contratos=len(txs),
+        valor_contrato=ints(valor_contrato),
+        data_contrato=days(data_contrato),
+        emp_contrato=ints(emp_contrato),
+        emp_data=days(emp_data),
+        grupo_contrato=ints(grupo_contrato),
+        grupo_tem_liquidacao=np.array(grupo_tem_liq, dtype=bool),
+        pag_grupo=ints(pag_grupo),
+        pag_contrato=ints(pag_contrato),
+        pag_valor=ints(pag_valor),
+        pag_data=days(pag_data),
+        pag_id=ints(pag_id),
+        liq_grupo=ints(liq_grupo),
+        liq_valor=ints(liq_valor),
+        liq_data=days(liq_data),
+    )
+    return cols, fallback
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AGREGADOS (group-by) - equivalentes vetoriais do PaymentValidationFragment
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _Aggregates:
+    def __init__(self, cols: PaymentColumns):
+        n_grupos = len(cols.grupo_contrato)
+        C = cols.n_contratos
+
+        pag_dia = cols.pag_data.view(np.int64)
+        liq_dia = cols.liq_data.view(np.int64)
+        emp_dia = cols.emp_data.view(np.int64)
+
+        self.total_pago_grupo = np.zeros(n_grupos, dtype=np.int64)
+        np.add.at(self.total_pago_grupo, cols.pag_grupo, cols.pag_valor)
+        self.total_liq_grupo = np.zeros(n_grupos, dtype=np.int64)
+        np.add.at(self.total_liq_grupo, cols.liq_grupo, cols.liq_valor)
+        self.total_pago_contrato = np.zeros(C, dtype=np.int64)
+        np.add.at(self.total_pago_contrato, cols.pag_contrato, cols.pag_valor)
+
+        self.min_pag_grupo = np.full(n_grupos, _NO_MIN, dtype=np.int64)
+        np.minimum.at(self.min_pag_grupo, cols.pag_grupo, np.where(pag_dia == _NAT, _NO_MIN, pag_dia))
+        self.min_liq_grupo = np.full(n_grupos, _NO_MIN, dtype=np.int64)
+        np.minimum.at(self.min_liq_grupo, cols.liq_grupo, np.where(liq_dia == _NAT, _NO_MIN, liq_dia))
+        self.max_pag_contrato = np.full(C, _NO_MAX, dtype=np.int64)
+        np.maximum.at(self.max_pag_contrato, cols.pag_contrato, pag_dia)  # NaT == INT64_MIN == _NO_MAX
+        self.min_emp_contrato = np.full(C, _NO_MIN, dtype=np.int64)
+        np.minimum.at(self.min_emp_contrato, cols.emp_contrato, np.where(emp_dia == _NAT, _NO_MIN, emp_dia))
+
+        self.grupo_tem_pag_datado = self.min_pag_grupo != _NO_MIN
+
+
+def _any_per_contrato(cols: PaymentColumns, owner: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    return np.bincount(owner[mask], minlength=cols.n_contratos) > 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REGRAS VETORIAIS - uma máscara (n_contratos,) por regra escalar
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _requires_liquidacao(cols, agg, today):
+    return _any_per_contrato(cols, cols.grupo_contrato, ~cols.grupo_tem_liquidacao)
+
+
+def _ids_unique(cols, agg, today):
+    if len(cols.pag_id) < 2:
+        return np.zeros(cols.n_contratos, dtype=bool)
+    keys = np.sort(cols.pag_contrato * (int(cols.pag_id.max()) + 1) + cols.pag_id)
+    dup = keys[1:] == keys[:-1]
+    out = np.zeros(cols.n_contratos, dtype=bool)
+    out[keys[1:][dup] // (int(cols.pag_id.max()) + 1)] = True
+    return out
+
+
+def _not_exceeds_liquidacao(cols, agg, today):
+    return _any_per_contrato(cols, cols.grupo_contrato, agg.total_pago_grupo > agg.total_liq_grupo)
+
+
+def _total_not_exceeds_contrato(cols, agg, today):
+    return agg.total_pago_contrato > cols.valor_contrato
+
+
+def _valor_positivo(cols, agg, today):
+    return _any_per_contrato(cols, cols.pag_contrato, cols.pag_valor <= 0)
+
+
+def _date_after_liquidacao(cols, agg, today):
+    mask = agg.grupo_tem_pag_datado & (agg.min_liq_grupo != _NO_MIN) & (agg.min_pag_grupo < agg.min_liq_grupo)
+    return _any_per_contrato(cols, cols.grupo_contrato, mask)
+
+
+def _date_not_future(cols, agg, today):
+    return (agg.max_pag_contrato != _NO_MAX) & (agg.max_pag_contrato > today)
+
+
+def _date_after_contrato(cols, agg, today):
+    data_contrato = cols.data_contrato.view(np.int64)[cols.grupo_contrato]
+    mask = agg.grupo_tem_pag_datado & (agg.min_pag_grupo < data_contrato)
+    return _any_per_contrato(cols, cols.grupo_contrato, mask)
+
+
+def _date_after_empenho(cols, agg, today):
+    min_emp = agg.min_emp_contrato[cols.grupo_contrato]
+    mask = agg.grupo_tem_pag_datado & (min_emp != _NO_MIN) & (agg.min_pag_grupo < min_emp)
+    return _any_per_contrato(cols, cols.grupo_contrato, mask)
+
+
+COLUMNAR_RULES: Dict[Callable, Callable] = {
+    check_pagamento_requires_liquidacao: _requires_liquidacao,
+    check_pagamento_ids_unique: _ids_unique,
+    check_pagamento_not_exceeds_liquidacao: _not_exceeds_liquidacao,
+    check_total_pago_not_exceeds_contrato: _total_not_exceeds_contrato,
+    check_pagamento_valor_positivo: _valor_positivo,
+    check_pagamento_date_after_liquidacao: _date_after_liquidacao,
+    check_pagamento_date_not_future: _date_not_future,
+    check_pagamento_date_after_contrato: _date_after_contrato,
+    check_pagamento_date_after_empenho: _date_after_empenho,
+}
+
+
+def valida_batch(txs: Sequence[PaymentTransaction], rules: Optional[list] = None) -> List[Result[PaymentTransaction]]:
+    """
+    Equivalente vetorial de [pagamento.Valida(tx) for tx in txs].
+
+    rules: lista de regras escalares (default: as ativas de PAGAMENTO_VALIDATION_RULES, via
+    PAGAMENTO_RULES_REGISTRY: modo e estatísticas do registry); regras sem equivalente
+    colunar fazem o batch inteiro cair no caminho escalar.
+    """
+    registry = PAGAMENTO_RULES_REGISTRY if rules is None else None
+    rules = registry.active if registry is not None else rules
+    if not txs:
+        return []
+    if any(rule not in COLUMNAR_RULES for rule in rules):
+        return [Valida(tx) for tx in txs]
+
+    cols, fallback = build_payment_columns(txs)
+    agg = _Aggregates(cols)
+    today_day = np.datetime64(date.today(), "D").view(np.int64)
+
+    profile = registry is not None and registry.profile
+    if profile:
+        colunar = np.ones(cols.n_contratos, dtype=bool)
+        colunar[list(fallback)] = False
+        avaliados = int(colunar.sum())
+    masks = []
+    for rule in rules:
+        start = time.perf_counter_ns()
+        violated = COLUMNAR_RULES[rule](cols, agg, today_day)
+        if profile:
+            registry.merge({rule.__name__: (avaliados, int((violated & colunar).sum()),
+                                            time.perf_counter_ns() - start)})
+        masks.append(violated)
+
+    # Primeira regra violada por contrato (ordem da lista = ordem do circuit-break escalar)
+    order = registry.order() if registry is not None and registry.mode == "adaptive-fast" else range(len(rules))
+    first_rule = np.full(cols.n_contratos, -1, dtype=np.int64)
+    for i in order:
+        first_rule[(first_rule == -1) & masks[i]] = i
+
+    results: List[Result[PaymentTransaction]] = [Result.ok(tx) for tx in txs]
+    for c in np.flatnonzero(first_rule >= 0).tolist():
+        tx = txs[c]
+        res = rules[first_rule[c]](build_validation_fragment(tx))
+        # Renderização pela regra escalar; divergência (não esperada) resolve pelo caminho escalar completo
+        results[c] = Result.err(res.error) if res.is_err else Valida(tx)
+    for c in fallback:
+        results[c] = Valida(txs[c])
+    return results
@@ -0,0 +1,45 @@
+"""
+Subdomínio: conversões para os engines colunares (pagamento_columnar / liquidacao_columnar).
+
+Os engines só trabalham com valores que têm representação EXATA em int64:
+    - parcelas somadas (liquidações, pagamentos): Decimal com no máximo 2 casas -> centavos;
+    - limites comparados via sums_match_limit: quantize_money(limite) -> centavos
+      (mesma quantização do caminho escalar, inclusive None -> 0.00).
+Qualquer outra coisa levanta Inexact e o contrato é validado pelo caminho escalar.
+Valores hidratados como Money já trazem os centavos exatos (.cents) e não são reconvertidos.
+"""
+from decimal import Decimal
+
+from models.money import Money
+from clientside.domains.subdomains.financial_utils import quantize_money
+
+
+class Inexact(Exception):
+    """Valor sem representação exata em centavos: contrato vai para o caminho escalar."""
+
+
+def to_cents(valor) -> int:
+    """Parcela de soma -> centavos int, exigindo exatidão (a soma escalar não é quantizada parcela a parcela)."""
+    if type(valor) is Money:
+        return valor.cents
+    if type(valor) is int:
+        return valor * 100
+    if type(valor) is not Decimal:
+        raise Inexact
+    scaled = valor.scaleb(2)
+    try:
+        cents = int(scaled)
+    except (ValueError, OverflowError):  # NaN / Infinity
+        raise Inexact
+    if cents != scaled:
+        raise Inexact
+    return cents
+
+
+def limit_cents(valor) -> int:
+    """Limite de sums_match_limit -> centavos int, após a mesma quantize_money do escalar."""
+    if type(valor) is Money:
+        return valor.cents
+    if valor is not None and (type(valor) is not Decimal or not valor.is_finite()):
+        raise Inexact
+    return int(quantize_money(valor).scaleb(2))
@@ -1,6 +1,8 @@
 
 from decimal import Decimal, ROUND_HALF_UP
 
+from models.money import Money
+
 def quantize_money(value: Decimal) -> Decimal:
     """
     Padroniza o valor monetário para 2 casas decimais usando arredondamento padrão.
@@ -23,3 +25,43 @@ def values_match(val1: Decimal, val2: Decimal) -> bool:
     Verifica igualdade estrita entre valores monetários.
     """
     return quantize_money(val1) == quantize_money(val2)
+
+
+# Caminho int (Money): somas e limites em centavos nativos, sem quantize por item.
+# Uma soma começa como int 0 (centavos) e permanece int enquanto as parcelas forem Money;
+# na primeira parcela que não for, vira Decimal e segue exatamente como sum() faria.
+
+def add_money(total, valor):
+    """Acumula valor em total (centavos int enquanto possível, Decimal a partir daí)."""
+    if type(total) is int:
+        if type(valor) is Money:
+            return total + valor.cents
+        total = Decimal(total).scaleb(-2)
+    return total + valor
+
+def money_total(total) -> Decimal:
+    """Total de add_money como Decimal (Money quando ainda em centavos)."""
+    return Money.from_cents(total) if type(total) is int else total
+
+def money_match_limit(total, limit) -> bool:
+    """
+    sums_match_limit para totais de add_money (ou Money): compara centavos int quando o
+    limite também é exato (Money, ou None == 0.00); senão, quantiza como antes.
+    """
+    cents = total if type(total) is int else (total.cents if type(total) is Money else None)
+    if cents is not None:
+        if type(limit) is Money:
+            return cents <= limit.cents
+        if limit is None:
+            return cents <= 0
+    return sums_match_limit(money_total(total), limit)
+
+def money_exceeds(total, limit) -> bool:
+    """total (de add_money) > limit, sem quantizar (como sum() > limite): centavos int se ambos exatos."""
+    if type(total) is int and type(limit) is Money:
+        return total > limit.cents
+    return money_total(total) > limit
+
+def money_is_positive(valor) -> bool:
+    """valor > 0, pelos centavos quando Money."""
+    return (valor.cents if type(valor) is Money else valor) > 0
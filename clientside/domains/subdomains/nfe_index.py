@@ -0,0 +1,142 @@
+"""
+Subdomínio: índice global de NFe (reúso entre contratos) construído durante o pipeline
+
+LiquidacaoTransaction.items_by_nfe só enxerga as liquidações de UM contrato: uma NFe
+liquidada parcialmente por vários contratos, somando mais que o seu valor, passa por
+check_nfe_aggregate_limit em todos eles. O GlobalNfeIndex acumula, batch a batch, por
+chave_danfe: valor da NFe, soma liquidada, contratos e fornecedores (documento) que a usaram,
+e emite um alerta na primeira vez que a chave fica
+    - sobre-liquidada entre contratos (soma de 2+ contratos > valor da NFe), ou
+    - usada por fornecedores diferentes.
+Cada motivo é emitido uma vez por chave, no batch em que a condição aparece (mesma passada,
+sem a junção de routines/check_nfe_reuse.py).
+
+Memória: entrada compacta (__slots__) por chave, no máximo MAX_REFS contratos/fornecedores
+guardados por entrada (a contagem segue exata). Com max_keys, o índice fica limitado:
+ao estourar, o índice desce a 90% de max_keys tirando primeiro as chaves usadas por um só
+contrato (a grande maioria), em ordem de inserção; o resumo conta as evicções (reúso
+posterior dessas chaves não é visto).
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from clientside.domains.subdomains.financial_utils import add_money, money_total, money_match_limit, quantize_money
+
+MAX_REFS = 8
+
+
+class NfeUso:
+    """Uso acumulado de uma chave DANFE."""
+    __slots__ = ("valor_nfe", "total", "contratos", "n_contratos", "fornecedores", "alertas")
+
+    def __init__(self, valor_nfe):
+        self.valor_nfe = valor_nfe
+        self.total = 0               # add_money: centavos int enquanto Money
+        self.contratos: Tuple[int, ...] = ()
+        self.n_contratos = 0
+        self.fornecedores: Tuple[str, ...] = ()
+        self.alertas: Tuple[str, ...] = ()   # motivos já emitidos
+
+
+@dataclass(frozen=True)
+class NfeReuseAlert:
+    chave_danfe: str
+    motivo: str                      # "sobre-liquidada" | "fornecedores distintos"
+    contratos: Tuple[int, ...]
+    n_contratos: int
+    fornecedores: Tuple[str, ...]
+    total_liquidado: object
+    valor_nfe: object
+
+    def mensagem(self) -> str:
+        contratos = ", ".join(map(str, self.contratos)) + ("..." if self.n_contratos > len(self.contratos) else "")
+        if self.motivo == "sobre-liquidada":
+            return (f"NFe {self.chave_danfe} liquidada em {self.n_contratos} contratos ({contratos}): "
+                    f"soma {quantize_money(money_total(self.total_liquidado))} excede valor da NFe ({self.valor_nfe})")
+        return (f"NFe {self.chave_danfe} usada por fornecedores distintos {list(self.fornecedores)} "
+                f"em {self.n_contratos} contratos ({contratos})")
+
+
+class GlobalNfeIndex:
+    """Índice chave_danfe -> NfeUso alimentado com os maps de cada batch do loader."""
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys
+        self.entries: "OrderedDict[str, NfeUso]" = OrderedDict()
+        self.evicted = 0
+        self.alerts = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add_batch(self, contratos, related) -> List[NfeReuseAlert]:
+        """Acumula as liquidações dos contratos do batch; retorna os alertas novos."""
+        _, fornecedores, empenhos, liquidacoes, nfes, _, _ = related
+        tocadas: Dict[str, NfeUso] = {}
+        for contrato in contratos:
+            fornecedor = fornecedores.get(contrato.id_fornecedor)
+            documento = fornecedor.documento if fornecedor else None
+            # soma por chave dentro do contrato (o limite intra-contrato é do check_nfe_aggregate_limit)
+            por_chave: Dict[str, object] = {}
+            for emp in empenhos.get(contrato.id_contrato, ()):
+                for liq in liquidacoes.get(emp.id_empenho, ()):
+                    if liq.chave_danfe and liq.valor is not None:
+                        por_chave[liq.chave_danfe] = add_money(por_chave.get(liq.chave_danfe, 0), liq.valor)
+            for chave, valor in por_chave.items():
+                uso = self.entries.get(chave)
+                if uso is None:
+                    nfe = nfes.get(chave)
+                    uso = self.entries[chave] = NfeUso(nfe.valor_total_nfe if nfe else None)
+                uso.total = add_money(uso.total, money_total(valor))
+                uso.n_contratos += 1
+                if len(uso.contratos) < MAX_REFS:
+                    uso.contratos += (contrato.id_contrato,)
+                if documento is not None and documento not in uso.fornecedores and len(uso.fornecedores) < MAX_REFS:
+                    uso.fornecedores += (documento,)
+                tocadas[chave] = uso
+
+        novos = [alert for chave, uso in tocadas.items() for alert in self._check(chave, uso)]
+        self.alerts += len(novos)
+        self._evict()
+        return novos
+
+    def _check(self, chave: str, uso: NfeUso) -> List[NfeReuseAlert]:
+        if uso.n_contratos < 2:
+            return []
+        motivos = []
+        if ("sobre-liquidada" not in uso.alertas and uso.valor_nfe is not None
+                and not money_match_limit(uso.total, uso.valor_nfe)):
+            motivos.append("sobre-liquidada")
+        if "fornecedores distintos" not in uso.alertas and len(uso.fornecedores) > 1:
+            motivos.append("fornecedores distintos")
+        uso.alertas += tuple(motivos)
+        return [NfeReuseAlert(chave, motivo, uso.contratos, uso.n_contratos, uso.fornecedores, uso.total, uso.valor_nfe)
+                for motivo in motivos]
+
+    def _evict(self):
+        if self.max_keys is None or len(self.entries) <= self.max_keys:
+            return
+        excesso = len(self.entries) - int(self.max_keys * 0.9)
+        self.evicted += excesso
+        for chave in [c for c, uso in self.entries.items() if uso.n_contratos == 1][:excesso]:
+            del self.entries[chave]
+            excesso -= 1
+        for _ in range(excesso):
+            self.entries.popitem(last=False)
+
+    def compartilhadas(self) -> int:
+        """Chaves hoje no índice usadas por 2+ contratos."""
+        return sum(1 for uso in self.entries.values() if uso.n_contratos > 1)
+
+
+def print_nfe_alerts(alerts: List[NfeReuseAlert]):
+    for alert in alerts:
+        icon = "🚨" if alert.motivo == "sobre-liquidada" else "⚠️ "
+        print(f"  {icon} {alert.mensagem()}")
+
+
+def print_nfe_index_summary(index: GlobalNfeIndex):
+    print(f"\n  🧾 ÍNDICE GLOBAL DE NFe:")
+    print(f"     Chaves indexadas: {len(index)} | compartilhadas por 2+ contratos: {index.compartilhadas()}")
+    print(f"     Alertas de reúso: {index.alerts}" + (f" | chaves descartadas (max_keys): {index.evicted}" if index.evicted else ""))
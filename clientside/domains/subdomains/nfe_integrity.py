@@ -4,7 +4,7 @@ Unifica regras de:
 1. Integridade Física (Relação com Liquidação)
 2. Consistência Interna (Valores e Pagamentos)
 """
-from typing import List, Callable, Any, Dict, Set, Optional
+from typing import List, Callable, Any, Dict, Set, Optional, Sequence
 from decimal import Decimal
 from result import Result
 import sys
@@ -13,6 +13,7 @@ import os
 # --- Imports de Contexto (Transactions/Models)
 from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction as LiquidacaoContext, ItemLiquidacao
 from models.nfe import Nfe
+from clientside.domains.subdomains.financial_utils import add_money, money_total
 
 # --- Functional Integrity Helper ---
 
@@ -81,33 +82,43 @@ def check_integrity_nfe_liquidacao(ctx: LiquidacaoContext) -> Result[None]:
 
 # --- 2. Validações de Consistência Interna (NFe Values) ---
 
-def check_nfe_pagamento_consistency(nfe: Optional[Nfe]) -> Result[None]:
+def check_nfe_pagamento_sum(nfe: Optional[Nfe], nfe_pags: Sequence[Any]) -> Result[None]:
     """
-    Valida consistência entre NFe e seus NfePagamentos (se existirem).
-    sum(NfePagamento.valor_pagamento) == Nfe.valor_total_nfe
+    Valida consistência entre NFe e seus NfePagamentos já carregados (sem acesso ao banco).
+    sum(NfePagamento.valor_pagamento) == Nfe.valor_total_nfe; NFe sem NfePagamentos passa.
     """
-    if not nfe:
-        return Result.ok(None)
-    
-    from models.nfe_pagamento import NfePagamento
-    
-    nfe_pags_result = NfePagamento.get_by_FK_chave_nfe(nfe.chave_nfe)
-    if nfe_pags_result.is_err:
-        return Result.ok(None)
-    
-    nfe_pags = nfe_pags_result.value
-    if not nfe_pags:
+    if not nfe or not nfe_pags:
         return Result.ok(None)
-    
-    soma_nfe_pag = sum((np.valor_pagamento for np in nfe_pags), Decimal(0))
-    
-    # Importante: Usar comparador financeiro seguro se disponível, ou Decimal direto
-    # Pela consistência com o resto do projeto, mantemos Decimal direto aqui ou
-    # poderíamos importar financial_utils. Vamos manter simples como estava.
+
+    soma = 0
+    for np_ in nfe_pags:
+        soma = add_money(soma, np_.valor_pagamento)
+    soma_nfe_pag = money_total(soma)
+
     if soma_nfe_pag != nfe.valor_total_nfe:
         return Result.err(
             f"[FRAUDE!] Soma NfePagamentos ({soma_nfe_pag}) ≠ NFe.valor_total ({nfe.valor_total_nfe}) "
             f"- NFe: {nfe.chave_nfe}"
         )
-    
+
     return Result.ok(None)
+
+
+def check_nfe_pagamento_consistency(nfe: Optional[Nfe], nfe_pags: Optional[Sequence[Any]] = None) -> Result[None]:
+    """
+    Valida consistência entre NFe e seus NfePagamentos (se existirem).
+    nfe_pags: NfePagamentos pré-carregados (loader do batch). Sem eles, busca no banco por NFe
+    (uma conexão por chamada - no pipeline use a regra de batch do Pagamento).
+    """
+    if not nfe:
+        return Result.ok(None)
+
+    if nfe_pags is None:
+        from models.nfe_pagamento import NfePagamento
+
+        nfe_pags_result = NfePagamento.get_by_FK_chave_nfe(nfe.chave_nfe)
+        if nfe_pags_result.is_err:
+            return Result.ok(None)
+        nfe_pags = nfe_pags_result.value
+
+    return check_nfe_pagamento_sum(nfe, nfe_pags)
@@ -0,0 +1,255 @@
+"""
+Subdomínio: registro de regras fail-fast com custo/taxa de rejeição medidos
+
+Cada lista de regras (EMPENHO_CONTEXT_RULES, PAGAMENTO_VALIDATION_RULES) é executada por um
+RuleRegistry. Modos (env RULE_ORDER ou configure()):
+    fixed          ordem declarada, sem medição (padrão; mesmo loop de antes)
+    adaptive       regras com maior rejeição por unidade de custo primeiro; ao achar uma
+                   violação, as regras ANTERIORES na ordem declarada que ainda não rodaram são
+                   avaliadas, e o erro reportado é o mesmo do modo fixed
+    adaptive-fast  idem, mas reporta a primeira violação encontrada (pode diferir do fixed)
+RULE_STATS=1 liga a medição também no modo fixed (tempo e taxa de falha de toda chamada).
+Regras opcionais (register(..., optional=...)) ficam na lista declarada, que é estática, mas
+só executam quando o nome está no conjunto enabled do registry (configure(enabled=...)):
+`active` é a lista efetivamente executada, e ligar/desligar recomeça a ordem adaptativa.
+Com os spans ligados (utils.instrumentation), cada chamada medida também entra no
+histograma rule.<registry>.<regra> (p50/p95/p99).
+Nos modos adaptive só 1 a cada sample_every execuções é cronometrada: as regras custam
+poucos µs e cronometrar todas as chamadas custaria mais do que a reordenação economiza.
+
+As regras são funções puras (arg) -> Result: a ordem de execução não altera o agregado.
+Uma regra que levanta exceção fora da ordem declarada (ex.: dado ausente que uma regra
+anterior rejeitaria) faz o registry refazer a avaliação na ordem declarada.
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from result import Result
+from utils.instrumentation import SPANS
+
+RULE_MODES = ("fixed", "adaptive", "adaptive-fast")
+
+
+@dataclass
+class RuleStats:
+    calls: int = 0
+    failures: int = 0
+    total_ns: int = 0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.calls if self.calls else 0.0
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.calls if self.calls else 0.0
+
+    @property
+    def score(self) -> float:
+        """Rejeições esperadas por µs (taxa com suavização de Laplace; regra nunca medida vai primeiro)."""
+        if not self.calls:
+            return float("inf")
+        return ((self.failures + 1) / (self.calls + 2)) / max(self.mean_ns / 1000, 1e-3)
+
+
+class RuleRegistry:
+    """Executa uma lista de regras fail-fast medindo custo e rejeição de cada uma."""
+
+    def __init__(self, name: str, rules: List[Callable[..., Result]], mode: str = "fixed",
+                 profile: bool = False, reorder_every: int = 256, sample_every: int = 16,
+                 optional: Iterable[str] = (), enabled: Iterable[str] = ()):
+        self.name = name
+        self.rules = tuple(rules)
+        self.optional: FrozenSet[str] = frozenset(optional)
+        unknown = self.optional - {rule.__name__ for rule in self.rules}
+        if unknown:
+            raise ValueError(f"Regras opcionais fora da lista de {name}: {', '.join(sorted(unknown))}")
+        self.enabled: FrozenSet[str] = frozenset()
+        self.reorder_every = reorder_every
+        self.sample_every = sample_every
+        self.stats: Dict[str, RuleStats] = {}
+        self.configure(mode, profile, enabled)
+
+    def configure(self, mode: str = "fixed", profile: bool = False, enabled: Optional[Iterable[str]] = None):
+        """Modo e medição; enabled: regras opcionais ligadas (None mantém o conjunto atual)."""
+        if mode not in RULE_MODES:
+            raise ValueError(f"Modo de regras inválido: {mode} (use {', '.join(RULE_MODES)})")
+        if enabled is not None:
+            enabled = frozenset(enabled)
+            if enabled - self.optional:
+                raise ValueError(f"Regras não opcionais em {self.name}: {', '.join(sorted(enabled - self.optional))}")
+            self.enabled = enabled
+        self.mode = mode
+        self._profile = profile
+        self.profile = profile or mode != "fixed"
+        self.active = [rule for rule in self.rules
+                       if rule.__name__ not in self.optional or rule.__name__ in self.enabled]
+        self._order: List[int] = []
+        self._runs = 0
+
+    def enable(self, rule_name: str, on: bool = True):
+        """Liga/desliga uma regra opcional, mantendo modo e medição."""
+        enabled = self.enabled | {rule_name} if on else self.enabled - {rule_name}
+        self.configure(self.mode, self._profile, enabled)
+
+    def is_enabled(self, rule_name: str) -> bool:
+        return any(rule.__name__ == rule_name for rule in self.active)
+
+    def reset(self):
+        self.stats.clear()
+        self._order = []
+        self._runs = 0
+
+    # ── execução ────────────────────────────────────────────────────────────
+
+    def run(self, arg) -> Result:
+        """Result.err da violação reportada, ou Result.ok(arg) se todas as regras passarem."""
+        if not self.profile:
+            for rule in self.active:
+                res = rule(arg)
+                if res.is_err:
+                    return res
+            return Result.ok(arg)
+        if self.mode == "fixed":
+            return self._run_declared(arg)
+        try:
+            return self._run_adaptive(arg)
+        except Exception:
+            return self._run_declared(arg)
+
+    def _timed(self, rule, arg) -> Result:
+        start = time.perf_counter_ns()
+        res = rule(arg)
+        elapsed = time.perf_counter_ns() - start
+        st = self.stats.get(rule.__name__)
+        if st is None:
+            st = self.stats[rule.__name__] = RuleStats()
+        if SPANS.enabled:
+            SPANS.record(f"rule.{self.name}.{rule.__name__}", elapsed)
+        st.calls += 1
+        st.total_ns += elapsed
+        if res.is_err:
+            st.failures += 1
+        return res
+
+    def _run_declared(self, arg) -> Result:
+        for rule in self.active:
+            res = self._timed(rule, arg)
+            if res.is_err:
+                return res
+        return Result.ok(arg)
+
+    def order(self) -> List[int]:
+        """Índices em active em ordem de execução adaptativa, recalculada a cada reorder_every runs."""
+        if len(self._order) != len(self.active) or self._runs % self.reorder_every == 0:
+            empty = RuleStats()
+            self._order = sorted(range(len(self.active)),
+                                 key=lambda i: -self.stats.get(self.active[i].__name__, empty).score)
+        self._runs += 1
+        return self._order
+
+    def _run_adaptive(self, arg) -> Result:
+        rules = self.active
+        call = self._timed if self._runs % self.sample_every == 0 else _call
+        order = self.order()
+        for pos, i in enumerate(order):
+            res = call(rules[i], arg)
+            if res.is_err:
+                if self.mode == "adaptive-fast":
+                    return res
+                # Mesmo erro do modo fixed: a primeira violação na ordem declarada
+                done = set(order[:pos + 1])
+                for j in range(i):
+                    if j not in done:
+                        earlier = call(rules[j], arg)
+                        if earlier.is_err:
+                            return earlier
+                return res
+        return Result.ok(arg)
+
+    # ── relatório ───────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Tuple[int, int, int]]:
+        return {name: (st.calls, st.failures, st.total_ns) for name, st in self.stats.items()}
+
+    def merge(self, snapshot: Dict[str, Tuple[int, int, int]]):
+        for name, (calls, failures, total_ns) in snapshot.items():
+            st = self.stats.setdefault(name, RuleStats())
+            st.calls += calls
+            st.failures += failures
+            st.total_ns += total_ns
+
+
+def _call(rule, arg) -> Result:
+    return rule(arg)
+
+
+REGISTRIES: Dict[str, RuleRegistry] = {}
+
+
+def register(name: str, rules: List[Callable[..., Result]], optional: Iterable[str] = (),
+             enabled: Iterable[str] = ()) -> RuleRegistry:
+    """
+    Cria o registry de uma lista de regras com o modo do ambiente (RULE_ORDER / RULE_STATS).
+    optional: nomes de regras desligadas salvo quando em enabled (ver RuleRegistry.enable).
+    """
+    registry = RuleRegistry(name, rules, mode=os.getenv("RULE_ORDER", "fixed"),
+                            profile=os.getenv("RULE_STATS", "") not in ("", "0"),
+                            optional=optional, enabled=enabled)
+    REGISTRIES[name] = registry
+    return registry
+
+
+def configure(mode: str = "fixed", profile: bool = False):
+    """Aplica o modo a todos os registries do processo e exporta no ambiente (workers spawn herdam)."""
+    if mode not in RULE_MODES:
+        raise ValueError(f"Modo de regras inválido: {mode} (use {', '.join(RULE_MODES)})")
+    os.environ["RULE_ORDER"] = mode
+    os.environ["RULE_STATS"] = "1" if profile else ""
+    for registry in REGISTRIES.values():
+        registry.configure(mode, profile)
+
+
+def reports_first_found() -> bool:
+    """Algum registry em adaptive-fast: o erro reportado depende da ordem aprendida (pode diferir do fixed)."""
+    return any(r.mode == "adaptive-fast" for r in REGISTRIES.values())
+
+
+def profiling_enabled() -> bool:
+    return any(r.profile for r in REGISTRIES.values())
+
+
+def snapshot_all() -> Dict[str, Dict[str, Tuple[int, int, int]]]:
+    return {name: r.snapshot() for name, r in REGISTRIES.items()}
+
+
+def diff_all(after: Dict[str, Dict[str, Tuple[int, int, int]]],
+             before: Dict[str, Dict[str, Tuple[int, int, int]]]) -> Dict[str, Dict[str, Tuple[int, int, int]]]:
+    """Contadores acumulados entre dois snapshot_all() (um worker processa vários shards)."""
+    out = {}
+    for name, stats in after.items():
+        prev = before.get(name, {})
+        out[name] = {rule: tuple(a - b for a, b in zip(vals, prev.get(rule, (0, 0, 0))))
+                     for rule, vals in stats.items()}
+    return out
+
+
+def merge_all(snapshot: Dict[str, Dict[str, Tuple[int, int, int]]]):
+    for name, stats in snapshot.items():
+        if name in REGISTRIES:
+            REGISTRIES[name].merge(stats)
+
+
+def print_rule_stats(registries: Sequence[RuleRegistry] = None):
+    """Tabela por regra: chamadas, taxa de rejeição, custo médio e score (ordem adaptativa)."""
+    for registry in registries or REGISTRIES.values():
+        if not registry.stats:
+            continue
+        print(f"\n  ⏱️  REGRAS {registry.name.upper()} (modo {registry.mode}):")
+        print(f"     {'regra':<42} {'medidas':>9} {'rejeição':>9} {'µs/chamada':>11} {'score':>10}")
+        ranked = sorted(registry.stats.items(), key=lambda kv: -kv[1].score)
+        for name, st in ranked:
+            print(f"     {name:<42} {st.calls:>9} {100 * st.failure_rate:>8.2f}% "
+                  f"{st.mean_ns / 1000:>11.2f} {st.score:>10.2e}")
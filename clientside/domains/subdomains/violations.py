@@ -0,0 +1,41 @@
+"""
+Subdomínio: coleta de violações (modo acumulativo / continue-on-error)
+
+O caminho padrão dos domains para na primeira regra violada (Result.err). No modo
+acumulativo cada estágio avalia TODAS as suas regras sobre o agregado já construído e
+devolve a lista de Violation - mesmo texto do Result.err de cada regra.
+"""
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from result import Result
+
+
+@dataclass(frozen=True)
+class Violation:
+    estagio: str        # "empenho" | "liquidacao" | "pagamento"
+    regra: str          # nome da função de regra (ou "build" para falha de construção do agregado)
+    mensagem: str       # texto do Result.err
+    ref: str = ""       # empenho / liquidação / NFe quando a regra é avaliada por item
+
+
+def avaliar(estagio: str, regra: Callable[..., Result], *args, ref: str = "") -> Optional[Violation]:
+    """
+    Roda uma regra e converte Result.err em Violation. Uma exceção (dado ausente que outra
+    regra já acusou, ex.: fornecedor None) vira violação "não avaliável" em vez de abortar
+    a coleta do contrato.
+    """
+    try:
+        res = regra(*args)
+    except Exception as exc:
+        return nao_avaliavel(estagio, regra.__name__, exc, ref)
+    return Violation(estagio, regra.__name__, res.error, ref) if res.is_err else None
+
+
+def nao_avaliavel(estagio: str, regra: str, exc: Exception, ref: str = "") -> Violation:
+    return Violation(estagio, regra, f"Regra não avaliável ({type(exc).__name__}: {exc})", ref)
+
+
+def coletar(estagio: str, regras: Iterable[Callable[..., Result]], *args) -> List[Violation]:
+    """Todas as regras sobre os mesmos argumentos, sem short-circuit."""
+    return [v for v in (avaliar(estagio, regra, *args) for regra in regras) if v is not None]
@@ -13,6 +13,7 @@ from models.fornecedor import Fornecedor
 from models.contrato import Contrato
 from models.empenho import Empenho
 from result import Result
+from clientside.transaction.entity_registry import EntityRegistry
 
 #se houver tempo aprimorar failfast validations pra validar contratos com invalidações mais estritas mais rapidos
 def carregar_entidade(contrato: Contrato) -> Result[Entidade]:
@@ -46,6 +47,12 @@ class EmpenhoTransaction:
     contrato: Contrato
     # Armazenamento otimizado para O(1) Access
     empenhos: Dict[str, Empenho] = field(default_factory=dict)
+    # Registry do batch (build_from_batch): validate() de Entidade/Fornecedor memoizado
+    registry: Optional[EntityRegistry] = field(default=None, compare=False, repr=False)
+
+    def validar_dimensao(self, obj):
+        """validate() da Entidade/Fornecedor via registry do batch, quando houver."""
+        return self.registry.validate(obj) if self.registry is not None else obj.validate()
 
     def get_empenho_by_id(self, id_empenho: str) -> Optional[Empenho]:
         """Recupera um empenho pelo ID com complexidade O(1)."""
@@ -96,7 +103,8 @@ class EmpenhoTransaction:
         contratos: List[Contrato],
         entidades_map: Dict[int, Entidade],
         fornecedores_map: Dict[int, Fornecedor],
-        empenhos_por_contrato: Dict[int, List[Empenho]]
+        empenhos_por_contrato: Dict[int, List[Empenho]],
+        registry: Optional[EntityRegistry] = None
     ) -> List[Result["EmpenhoTransaction"]]:
         """
         Batch builder: cria múltiplas EmpenhoTransactions a partir de dados pré-carregados.
@@ -107,21 +115,24 @@ class EmpenhoTransaction:
             entidades_map: Dict[id_entidade -> Entidade]
             fornecedores_map: Dict[id_fornecedor -> Fornecedor]
             empenhos_por_contrato: Dict[id_contrato -> List[Empenho]]
+            registry: EntityRegistry do batch (default: um novo sobre entidades_map/fornecedores_map)
         
         Returns:
             Lista de Result[EmpenhoTransaction], um para cada contrato
         """
         results: List[Result["EmpenhoTransaction"]] = []
+        if registry is None:
+            registry = EntityRegistry(entidades_map, fornecedores_map)
         
         for contrato in contratos:
             # Buscar entidade
-            entidade = entidades_map.get(contrato.id_entidade)
+            entidade = registry.entidade(contrato.id_entidade)
             if not entidade:
                 results.append(Result.err(f"Entidade {contrato.id_entidade} não encontrada"))
                 continue
             
             # Buscar fornecedor
-            fornecedor = fornecedores_map.get(contrato.id_fornecedor)
+            fornecedor = registry.fornecedor(contrato.id_fornecedor)
             if not fornecedor:
                 results.append(Result.err(f"Fornecedor {contrato.id_fornecedor} não encontrado"))
                 continue
@@ -135,7 +146,8 @@ class EmpenhoTransaction:
                     entidade=entidade,
                     fornecedor=fornecedor,
                     contrato=contrato,
-                    empenhos=empenhos_dict
+                    empenhos=empenhos_dict,
+                    registry=registry
                 )
                 results.append(Result.ok(tx))
             except AssertionError as e:
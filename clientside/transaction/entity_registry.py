@@ -0,0 +1,95 @@
+"""
+Registry de entidades do batch: Entidade/Fornecedor validados uma vez.
+
+Um fornecedor compartilhado por 500 contratos do batch era validado 1000 vezes
+(regra_entidade_valida + regra_fornecedor_valido por contrato). O EntityRegistry guarda os
+maps do batch e memoiza o validate() por objeto (identidade); entre batches, o resultado é
+reaproveitado por valor em um LRU limitado do processo (models frozen => hashable).
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from result import Result
+
+_MISS = object()
+
+Dimensao = Union[Entidade, Fornecedor]
+
+
+class ValidationLRU:
+    """validate() por valor do model -> mensagem de erro (None = válido), com no máximo maxsize entradas."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Dimensao, Optional[str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def validate(self, obj: Dimensao) -> Optional[str]:
+        err = self._data.get(obj, _MISS)
+        if err is not _MISS:
+            self.hits += 1
+            self._data.move_to_end(obj)
+            return err
+        self.misses += 1
+        res = obj.validate()
+        err = None if res.is_ok else res.error
+        if self.maxsize > 0:
+            self._data[obj] = err
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return err
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+
+# Compartilhado por todos os batches do processo (cada worker spawn tem o seu)
+VALIDATION_CACHE = ValidationLRU(int(os.getenv("ENTITY_CACHE_SIZE", "4096")))
+
+
+class EntityRegistry:
+    """
+    Entidades e Fornecedores de um batch + resultado do validate() de cada objeto.
+    Consumido por EmpenhoTransaction.build_from_batch; as regras de validade do
+    domain de empenho consultam o registry anexado à transaction.
+    """
+
+    def __init__(self, entidades: Dict[int, Entidade], fornecedores: Dict[int, Fornecedor],
+                 cache: Optional[ValidationLRU] = VALIDATION_CACHE):
+        self.entidades = entidades
+        self.fornecedores = fornecedores
+        self.cache = cache
+        # id(obj) -> (obj, erro): o objeto fica referenciado para o id não ser reaproveitado
+        self._validated: Dict[int, tuple] = {}
+
+    def entidade(self, id_entidade: int) -> Optional[Entidade]:
+        return self.entidades.get(id_entidade)
+
+    def fornecedor(self, id_fornecedor: int) -> Optional[Fornecedor]:
+        return self.fornecedores.get(id_fornecedor)
+
+    def validate(self, obj: Dimensao) -> Result[Dimensao]:
+        """Mesmo Result de obj.validate(), calculado uma vez por objeto no batch."""
+        entry = self._validated.get(id(obj))
+        if entry is None:
+            if self.cache is not None:
+                err = self.cache.validate(obj)
+            else:
+                res = obj.validate()
+                err = None if res.is_ok else res.error
+            entry = self._validated[id(obj)] = (obj, err)
+        err = entry[1]
+        return Result.ok(obj) if err is None else Result.err(err)
+
+    @property
+    def validated(self) -> int:
+        """Objetos distintos validados neste batch."""
+        return len(self._validated)
@@ -10,7 +10,7 @@ Design:
 - Validação delegada ao domain layer (domains/pagamento.py)
 """
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from decimal import Decimal
 import sys
 import os
@@ -103,7 +103,8 @@ class PaymentTransaction:
     @staticmethod
     def build_from_batch(
         liquidacao_transaction: LiquidacaoTransaction,
-        pagamentos_por_empenho: Dict[str, List[Pagamento]]
+        pagamentos_por_empenho: Dict[str, List[Pagamento]],
+        nfe_pagamentos_por_chave: Optional[Dict[str, List[NfePagamento]]] = None
     ) -> Result["PaymentTransaction"]:
         """
         Batch builder: cria PaymentTransaction a partir de dados pré-carregados.
@@ -112,19 +113,28 @@ class PaymentTransaction:
         Args:
             liquidacao_transaction: LiquidacaoTransaction validada
             pagamentos_por_empenho: Dict[id_empenho -> List[Pagamento]]
+            nfe_pagamentos_por_chave: Dict[chave_nfe -> List[NfePagamento]] (7º map do loader).
+                Sem vínculo direto Pagamento -> NFe: cada PagamentoItem recebe os NfePagamentos
+                das NFes liquidadas no seu empenho (mesma tupla para os itens do empenho).
         """
         pagamentos_map: Dict[str, Tuple[PagamentoItem, ...]] = {}
         
-        all_empenho_ids = liquidacao_transaction.itens_liquidados.keys()
+        itens_liquidados = liquidacao_transaction.itens_liquidados
         
-        for id_emp in all_empenho_ids:
+        for id_emp in itens_liquidados.keys():
             pagamentos = pagamentos_por_empenho.get(id_emp, [])
             if pagamentos:
+                nfe_pagamentos = ()
+                if nfe_pagamentos_por_chave:
+                    chaves = dict.fromkeys(item.nfe.chave_nfe for item in itens_liquidados[id_emp].values() if item.nfe)
+                    nfe_pagamentos = tuple(
+                        np_ for chave in chaves for np_ in nfe_pagamentos_por_chave.get(chave, ())
+                    )
                 items = [
                     PagamentoItem(
                         id_pagamento=pag.id_pagamento,
                         pagamento=pag,
-                        nfe_pagamentos=()
+                        nfe_pagamentos=nfe_pagamentos
                     )
                     for pag in pagamentos
                 ]
@@ -134,4 +144,3 @@ class PaymentTransaction:
             liquidacao_transaction=liquidacao_transaction,
             pagamentos_por_empenho=pagamentos_map
         ))
-
@@ -1,21 +1,193 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import pool as pg_pool
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Pool config (process-wide). DB_POOL_ENABLED=0 volta ao modo conexão-por-chamada.
+POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "1") != "0"
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX", "10"))
+# Conexões ociosas há mais que isso passam por um SELECT 1 antes de voltar ao uso
+POOL_HEALTHCHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
+
+
+def _connect_params() -> dict:
+    return dict(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS")
+    )
+
+
+def connect_direct():
+    """Abre uma conexão psycopg2 dedicada, fora do pool."""
+    try:
+        return psycopg2.connect(**_connect_params())
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error while connecting to PostgreSQL: {error}")
+        raise error
+
+
+class PooledConnection:
+    """
+    Proxy de uma conexão do pool.
+    Expõe a API da conexão psycopg2 (cursor, commit, rollback...), mas close()
+    devolve a conexão ao pool em vez de encerrar o socket.
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexões (psycopg2 ThreadedConnectionPool).
+    - acquire() bloqueia quando max_size conexões estão em uso (em vez de PoolError).
+    - Health check no checkout: conexões fechadas são descartadas; conexões ociosas
+      há mais de healthcheck_idle segundos executam SELECT 1.
+    """
+
+    def __init__(self, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 healthcheck_idle: float = POOL_HEALTHCHECK_IDLE_SECONDS, **connect_params):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Pool inválido: min={min_size}, max={max_size}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.healthcheck_idle = healthcheck_idle
+        self._pool = pg_pool.ThreadedConnectionPool(min_size, max_size, **(connect_params or _connect_params()))
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        with self._lock:
+            last = self._last_used.get(id(conn))
+        # Conexão recém-aberta pelo pool, ou usada recentemente: sem round-trip extra
+        if last is None or time.monotonic() - last < self.healthcheck_idle:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self):
+        """Checkout de uma conexão saudável (bloqueante)."""
+        self._slots.acquire()
+        try:
+            for _ in range(self.max_size + 1):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+            raise psycopg2.OperationalError("Pool sem conexões saudáveis disponíveis")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        """Devolve a conexão ao pool (rollback de transação aberta é feito pelo psycopg2)."""
+        try:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn):
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    @contextmanager
+    def connection(self):
+        """Context manager de checkout: with pool.connection() as conn: ..."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Pool compartilhado do processo (recriado após fork, sem tocar nos sockets do pai)."""
+    global _POOL, _POOL_PID
+    pid = os.getpid()
+    if _POOL is None or _POOL_PID != pid:
+        with _POOL_LOCK:
+            if _POOL is None or _POOL_PID != pid:
+                _POOL = ConnectionPool()
+                _POOL_PID = pid
+    return _POOL
+
+
+def close_pool():
+    """Encerra todas as conexões do pool do processo."""
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_PID == os.getpid():
+            _POOL.closeall()
+        _POOL = None
+        _POOL_PID = None
+
+
+@contextmanager
+def pooled_connection():
+    """Checkout do pool compartilhado como context manager."""
+    with get_pool().connection() as conn:
+        yield conn
+
+
 def get_db_connection():
-    """Establishes connection to the PostgreSQL database."""
+    """
+    Establishes connection to the PostgreSQL database.
+    Com pool habilitado retorna uma PooledConnection: close() devolve ao pool.
+    """
+    if not POOL_ENABLED:
+        return connect_direct()
     try:
-        connection = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASS")
-        )
-        return connection
+        pool = get_pool()
+        return PooledConnection(pool, pool.acquire())
     except (Exception, psycopg2.Error) as error:
         print(f"Error while connecting to PostgreSQL: {error}")
         raise error
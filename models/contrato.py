@@ -1,11 +1,13 @@
 from dataclasses import dataclass
 from datetime import date
-from decimal import Decimal
-from typing import Optional, List
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Optional, List
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
-@dataclass
+@dataclass(slots=True)
 class Contrato:
     id_contrato: int
     valor: Decimal
@@ -78,8 +80,34 @@ class Contrato:
             .bind(lambda c: c._validate_fks())
             .bind(lambda c: c._validate_objeto())
             .bind(lambda c: c._validate_valor())
+            .map(lambda c: Contrato(c.id_contrato, to_money(c.valor), c.data, c.objeto, c.id_entidade, c.id_fornecedor))
         )
 
+    HYDRATION_COLUMNS = ("id_contrato", "valor", "data", "objeto", "id_entidade", "id_fornecedor")
+    MAX_VALOR = Decimal("9999999999999.99")  # Numeric(15,2)
+
+    @staticmethod
+    def _build_checked(id_contrato, valor, data, objeto, id_entidade, id_fornecedor) -> Optional["Contrato"]:
+        """create() fundido: mesmas validações (id, fks, objeto, valor) num único check."""
+        try:
+            id_contrato = int(id_contrato) if id_contrato else None
+            if valor is not None and not isinstance(valor, Decimal):
+                valor = Decimal(valor)
+        except (InvalidOperation, TypeError, ValueError):
+            return None
+        if (not id_contrato
+                or not isinstance(id_entidade, int)
+                or not isinstance(id_fornecedor, int)
+                or (objeto and len(objeto) > 255)
+                or valor is None
+                or valor > Contrato.MAX_VALOR):
+            return None
+        return Contrato(id_contrato, to_money(valor), data, objeto, id_entidade, id_fornecedor)
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Contrato"]]:
+        return compile_hydrator(description, Contrato.HYDRATION_COLUMNS, Contrato._build_checked, Contrato.create)
+
     @staticmethod
     def _fetch_raw(id_contrato: int) -> Result[tuple]:
         """Busca o dado cru no banco e retorna (row, description)."""
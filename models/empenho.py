@@ -1,11 +1,13 @@
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import Optional, List
+from typing import Callable, Optional, List
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
-@dataclass
+@dataclass(slots=True)
 class Empenho:
     id_empenho: str
     ano: int
@@ -40,28 +42,40 @@ class Empenho:
                 data_empenho=row["data_empenho"],
                 cpf_cnpj_credor=row.get("cpf_cnpj_credor") or row.get("cpfcnpjcredor"),
                 credor=row["credor"],
-                valor=row["valor"], 
+                valor=to_money(row["valor"]), 
                 id_entidade=row["id_entidade"],
                 id_contrato=row.get("id_contrato")
             )
             return Result.ok(empenho)
         except Exception as e:
             return Result.err(f"Erro ao instanciar Empenho: {str(e)}")
+
+    HYDRATION_COLUMNS = (
+        "id_empenho", "ano", "data_empenho", ("cpf_cnpj_credor", "cpfcnpjcredor"),
+        "credor", "valor", "id_entidade", "id_contrato"
+    )
+
+    @staticmethod
+    def _build_checked(id_empenho, ano, data_empenho, cpf_cnpj_credor, credor, valor, id_entidade, id_contrato) -> Optional["Empenho"]:
+        """Equivalente a from_row sem dict/Result por linha."""
+        return Empenho(id_empenho, ano, data_empenho, cpf_cnpj_credor, credor, to_money(valor), id_entidade, id_contrato)
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Empenho"]]:
+        return compile_hydrator(description, Empenho.HYDRATION_COLUMNS, Empenho._build_checked, Empenho.from_row)
+
 ##talvez haja uma redudancia entre dict(zip) e a função from_row(), analisar se hovuer tempo
     @staticmethod
     def get_by_contract_id(id_contrato: int) -> Result[List["Empenho"]]:
         """Busca TODOS os empenhos vinculados a um contrato."""
+        conn = None
+        cursor = None
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM empenho WHERE id_contrato = %s", (id_contrato,))
             rows = cursor.fetchall()
-            
-            # Captura a description antes de fechar, embora fetchall traga os dados
             description = cursor.description
-            
-            cursor.close()
-            conn.close()
 
             if not rows:
                  return Result.ok([])
@@ -80,6 +94,6 @@ class Empenho:
             
         except Exception as e:
             return Result.err(f"Erro ao buscar Empenhos por contrato: {str(e)}")
-            
-        except Exception as e:
-            return Result.err(f"Erro ao buscar Empenhos por contrato: {str(e)}")
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
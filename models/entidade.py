@@ -1,8 +1,10 @@
 from dataclasses import dataclass
+from typing import Callable, Optional
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Entidade:
     id_entidade: int
     nome: str
@@ -60,6 +62,27 @@ class Entidade:
         except Exception as e:
             return Result.err(f"Erro ao instanciar Entidade: {str(e)}")
 
+    HYDRATION_COLUMNS = ("id_entidade", "nome", "estado", "municipio", "cnpj")
+
+    @staticmethod
+    def _build_checked(id_entidade, nome, estado, municipio, cnpj) -> Optional["Entidade"]:
+        """from_row + validate() fundidos: um único check, sem Result intermediários."""
+        try:
+            id_entidade = int(id_entidade) if id_entidade else None
+        except (TypeError, ValueError):
+            return None
+        if (not id_entidade
+                or (nome and len(nome) > 255)
+                or (estado and len(estado) > 50)
+                or (municipio and len(municipio) > 100)
+                or (cnpj and len(cnpj) > 20)):
+            return None
+        return Entidade(id_entidade, nome, estado, municipio, cnpj)
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Entidade"]]:
+        return compile_hydrator(description, Entidade.HYDRATION_COLUMNS, Entidade._build_checked, Entidade.from_row)
+
     @staticmethod
     def _fetch_raw(id_entidade: int) -> Result[tuple]:
         """Busca o dado cru no banco e retorna (row, description)."""
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
+from typing import Callable, Optional
 
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Fornecedor:
     id_fornecedor: int
     nome: str
@@ -46,6 +48,25 @@ class Fornecedor:
         except Exception as e:
             return Result.err(f"Erro ao instanciar Fornecedor: {str(e)}")
 
+    HYDRATION_COLUMNS = ("id_fornecedor", "nome", "documento")
+
+    @staticmethod
+    def _build_checked(id_fornecedor, nome, documento) -> Optional["Fornecedor"]:
+        """from_row + validate() fundidos: um único check, sem Result intermediários."""
+        try:
+            id_fornecedor = int(id_fornecedor) if id_fornecedor else None
+        except (TypeError, ValueError):
+            return None
+        if (not id_fornecedor
+                or (nome and len(nome) > 255)
+                or (documento and len(documento) > 20)):
+            return None
+        return Fornecedor(id_fornecedor, nome, documento)
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Fornecedor"]]:
+        return compile_hydrator(description, Fornecedor.HYDRATION_COLUMNS, Fornecedor._build_checked, Fornecedor.from_row)
+
     @staticmethod
     def _fetch_raw(id_fornecedor: int) -> Result[tuple]:
         """Busca o dado cru no banco e retorna (row, description)."""
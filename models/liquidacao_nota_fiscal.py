@@ -1,11 +1,13 @@
-from typing import List
+from typing import Callable, List, Optional
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
-@dataclass
+@dataclass(slots=True)
 class LiquidacaoNotaFiscal:
     id_liquidacao_empenhonotafiscal: int
     chave_danfe: str #FK to NFE
@@ -48,13 +50,34 @@ class LiquidacaoNotaFiscal:
                 id_liquidacao_empenhonotafiscal=int(row["id_liquidacao_empenhonotafiscal"]),
                 chave_danfe=row["chave_danfe"],
                 data_emissao=row["data_emissao"],
-                valor=row["valor"],
+                valor=to_money(row["valor"]),
                 id_empenho=str(row["id_empenho"])
             )
             return Result.ok(obj)
         except Exception as e:
             return Result.err(f"Erro ao instanciar LiquidacaoNotaFiscal: {str(e)}")
 
+    HYDRATION_COLUMNS = ("id_liquidacao_empenhonotafiscal", "chave_danfe", "data_emissao", "valor", "id_empenho")
+
+    @staticmethod
+    def _build_checked(id_liquidacao_empenhonotafiscal, chave_danfe, data_emissao, valor, id_empenho) -> Optional["LiquidacaoNotaFiscal"]:
+        """Equivalente a from_row sem dict/Result por linha; só converte quando o driver não entregou o tipo final."""
+        try:
+            if type(id_liquidacao_empenhonotafiscal) is not int:
+                id_liquidacao_empenhonotafiscal = int(id_liquidacao_empenhonotafiscal)
+            if type(id_empenho) is not str:
+                id_empenho = str(id_empenho)
+        except (TypeError, ValueError):
+            return None
+        return LiquidacaoNotaFiscal(id_liquidacao_empenhonotafiscal, chave_danfe, data_emissao, to_money(valor), id_empenho)
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["LiquidacaoNotaFiscal"]]:
+        return compile_hydrator(
+            description, LiquidacaoNotaFiscal.HYDRATION_COLUMNS,
+            LiquidacaoNotaFiscal._build_checked, LiquidacaoNotaFiscal.from_row
+        )
+
     @staticmethod
     def get_by_FK_id_empenho(id_empenho: str) -> Result[List["LiquidacaoNotaFiscal"]]:
         """Fetch all Liquidacoes for an Empenho."""
@@ -0,0 +1,58 @@
+"""
+Money: valor monetário com centavos inteiros exatos.
+
+É um Decimal (mesmo valor, mesmo str/repr, mesma comparação/hash - mensagens e testes
+que comparam com Decimal não mudam) que carrega `.cents: int`. Os hot loops dos domains
+(soma de liquidações/pagamentos, limite de empenho/NFe/contrato) somam e comparam os
+centavos como int nativo em vez de Decimal.quantize a cada item.
+
+A conversão acontece UMA vez, na hidratação dos models (to_money). Só vira Money o
+Decimal finito com no máximo 2 casas: qualquer outro valor (None, int, float, Decimal
+com 3+ casas) segue como está e os domains usam o caminho Decimal para ele.
+"""
+from decimal import Decimal
+from typing import Optional
+
+_new_decimal = Decimal.__new__
+
+
+def _exact_cents(value: Decimal) -> Optional[int]:
+    """Centavos int se o valor for finito e exato em 2 casas; None caso contrário."""
+    if not value.is_finite():
+        return None
+    num, den = value.as_integer_ratio()
+    if 100 % den:
+        return None
+    return num * (100 // den)
+
+
+class Money(Decimal):
+    """Decimal com centavos exatos. Aritmética devolve Decimal comum; use .cents nos hot loops."""
+    __slots__ = ("cents",)
+
+    def __new__(cls, value="0", context=None):
+        self = Decimal.__new__(cls, value, context)
+        cents = _exact_cents(self)
+        if cents is None:
+            raise ValueError(f"Money exige valor finito com no máximo 2 casas decimais: {value!r}")
+        self.cents = cents
+        return self
+
+    @classmethod
+    def from_cents(cls, cents: int) -> "Money":
+        """Money com expoente -2 (mesmo str de quantize_money sobre a soma exata)."""
+        money = _new_decimal(cls, Decimal(cents).scaleb(-2))
+        money.cents = cents
+        return money
+
+
+def to_money(value):
+    """Hidratação: Decimal exato em centavos -> Money; qualquer outro valor é devolvido sem alteração."""
+    if type(value) is not Decimal:
+        return value
+    cents = _exact_cents(value)
+    if cents is None:
+        return value
+    money = _new_decimal(Money, value)
+    money.cents = cents
+    return money
@@ -1,13 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from typing import Callable, Optional
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
 ##validações excessivas de estruruas que ja  são validadas pelo proprio banco. Agrupar validações em uma função Validate_DB_Constraints e desativar as validações, mantendo
 #implementação em código para fins visuais
 
-@dataclass
+@dataclass(slots=True)
 class Nfe:
     id: int
     chave_nfe: str
@@ -78,12 +81,31 @@ class Nfe:
                 numero_nfe=row["numero_nfe"],
                 data_hora_emissao=row["data_hora_emissao"],
                 cnpj_emitente=row["cnpj_emitente"],
-                valor_total_nfe=row["valor_total_nfe"]
+                valor_total_nfe=to_money(row["valor_total_nfe"])
             )
             return obj.validate()
         except Exception as e:
             return Result.err(f"Erro ao instanciar Nfe: {str(e)}")
 
+    HYDRATION_COLUMNS = ("id", "chave_nfe", "numero_nfe", "data_hora_emissao", "cnpj_emitente", "valor_total_nfe")
+
+    @staticmethod
+    def _build_checked(id, chave_nfe, numero_nfe, data_hora_emissao, cnpj_emitente, valor_total_nfe) -> Optional["Nfe"]:
+        """from_row + validate() fundidos: um único check, sem Result intermediários."""
+        try:
+            id = int(id)
+        except (TypeError, ValueError):
+            return None
+        if ((chave_nfe and len(chave_nfe) > 50)
+                or (numero_nfe and len(numero_nfe) > 20)
+                or (cnpj_emitente and len(cnpj_emitente) > 20)):
+            return None
+        return Nfe(id, chave_nfe, numero_nfe, data_hora_emissao, cnpj_emitente, to_money(valor_total_nfe))
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Nfe"]]:
+        return compile_hydrator(description, Nfe.HYDRATION_COLUMNS, Nfe._build_checked, Nfe.from_row)
+
     @staticmethod
     def get_by_chave_nfe_FK(chave_nfe: str) -> Result["Nfe"]:
         return (
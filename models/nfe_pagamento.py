@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import List
+from typing import Callable, List, Optional
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
-@dataclass
+@dataclass(slots=True)
 class NfePagamento:
     id: str
     chave_nfe: str
@@ -13,17 +15,20 @@ class NfePagamento:
 
     @staticmethod
     def _fetch_raw_by_nfe(chave_nfe: str) -> Result[List[dict]]:
+        conn = None
+        cursor = None
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM nfe_pagamento WHERE chave_nfe = %s", (chave_nfe,))
             rows = cursor.fetchall()
             cols = [desc[0] for desc in cursor.description]
-            cursor.close()
-            conn.close()
             return Result.ok([dict(zip(cols, row)) for row in rows])
         except Exception as e:
              return Result.err(f"DB Error fetching NfePagamento: {e}")
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
 
     @staticmethod
     def from_row(row: dict) -> Result["NfePagamento"]:
@@ -32,11 +37,22 @@ class NfePagamento:
                 id=str(row["id"]),
                 chave_nfe=str(row["chave_nfe"]),
                 tipo_pagamento=row["tipo_pagamento"],
-                valor_pagamento=row["valor_pagamento"]
+                valor_pagamento=to_money(row["valor_pagamento"])
             ))
         except Exception as e:
             return Result.err(f"Parse Error NfePagamento: {e}")
 
+    HYDRATION_COLUMNS = ("id", "chave_nfe", "tipo_pagamento", "valor_pagamento")
+
+    @staticmethod
+    def _build_checked(id, chave_nfe, tipo_pagamento, valor_pagamento) -> Optional["NfePagamento"]:
+        """Equivalente a from_row sem dict/Result por linha."""
+        return NfePagamento(str(id), str(chave_nfe), tipo_pagamento, to_money(valor_pagamento))
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["NfePagamento"]]:
+        return compile_hydrator(description, NfePagamento.HYDRATION_COLUMNS, NfePagamento._build_checked, NfePagamento.from_row)
+
     @staticmethod
     def get_by_FK_chave_nfe(chave_nfe: str) -> Result[List["NfePagamento"]]:
         """Fetch FK (List) -> Map Row"""
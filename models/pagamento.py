@@ -1,11 +1,13 @@
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import List
+from typing import Callable, List, Optional
 from result import Result
 from db_connection import get_db_connection
+from models.hydration import compile_hydrator
+from models.money import to_money
 
-@dataclass
+@dataclass(slots=True)
 class Pagamento:
     id_pagamento: str
     id_empenho: str
@@ -14,17 +16,20 @@ class Pagamento:
 
     @staticmethod
     def _fetch_raw_by_empenho(id_empenho: str) -> Result[List[dict]]:
+        conn = None
+        cursor = None
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM pagamento WHERE id_empenho = %s", (id_empenho,))
             rows = cursor.fetchall()
             cols = [desc[0] for desc in cursor.description]
-            cursor.close()
-            conn.close()
             return Result.ok([dict(zip(cols, row)) for row in rows])
         except Exception as e:
              return Result.err(f"DB Error fetching Pagamento: {e}")
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
 
     @staticmethod
     def from_row(row: dict) -> Result["Pagamento"]:
@@ -33,11 +38,22 @@ class Pagamento:
                 id_pagamento=str(row["id_pagamento"]),
                 id_empenho=str(row["id_empenho"]),
                 data_pagamento_emp=row["datapagamentoempenho"],  # DB column name
-                valor=row["valor"]
+                valor=to_money(row["valor"])
             ))
         except Exception as e:
             return Result.err(f"Parse Error Pagamento: {e}")
 
+    HYDRATION_COLUMNS = ("id_pagamento", "id_empenho", "datapagamentoempenho", "valor")
+
+    @staticmethod
+    def _build_checked(id_pagamento, id_empenho, datapagamentoempenho, valor) -> Optional["Pagamento"]:
+        """Equivalente a from_row sem dict/Result por linha."""
+        return Pagamento(str(id_pagamento), str(id_empenho), datapagamentoempenho, to_money(valor))
+
+    @staticmethod
+    def compile_hydrator(description) -> Callable[[tuple], Optional["Pagamento"]]:
+        return compile_hydrator(description, Pagamento.HYDRATION_COLUMNS, Pagamento._build_checked, Pagamento.from_row)
+
     @staticmethod
     def get_by_FK_id_empenho(id_empenho: str) -> Result[List["Pagamento"]]:
         """Fetch FK (List) -> Map Row"""
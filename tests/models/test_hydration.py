@@ -0,0 +1,112 @@
+import unittest
+import gc
+from decimal import Decimal
+from datetime import date, datetime
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from models.hydration import hydrate_all
+
+
+def description(*names):
+    return [(n, None, None, None, None, None, None) for n in names]
+
+
+def legacy(factory, desc, rows):
+    cols = [d[0] for d in desc]
+    out = []
+    for row in rows:
+        res = factory(dict(zip(cols, row)))
+        if res.is_ok:
+            out.append(res.value)
+    return out
+
+
+class TestCompiledHydratorParity(unittest.TestCase):
+    """O hydrator compilado deve produzir exatamente os mesmos objetos que from_row/create."""
+
+    CASES = [
+        (Contrato, Contrato.create, ("id_contrato", "valor", "data", "objeto", "id_entidade", "id_fornecedor"), [
+            (1, Decimal("100.00"), date(2024, 1, 1), "Obj", 1, 2),
+            ("7", "250.5", date(2024, 1, 1), "Obj", 1, 2),                      # conversões
+            (None, Decimal("1"), date(2024, 1, 1), "Obj", 1, 2),               # id obrigatório
+            (2, Decimal("1"), date(2024, 1, 1), "Obj", "1", 2),                # fk não inteira
+            (3, Decimal("1"), date(2024, 1, 1), "x" * 256, 1, 2),              # objeto longo
+            (4, None, date(2024, 1, 1), "Obj", 1, 2),                          # valor obrigatório
+            (5, "abc", date(2024, 1, 1), "Obj", 1, 2),                         # valor inválido
+            (6, Decimal("99999999999999.00"), date(2024, 1, 1), "Obj", 1, 2),  # acima de Numeric(15,2)
+        ]),
+        (Entidade, Entidade.from_row, ("id_entidade", "nome", "estado", "municipio", "cnpj"), [
+            (1, "Prefeitura", "SP", "São Paulo", "0001"),
+            (0, "Prefeitura", "SP", "São Paulo", "0001"),
+            (2, "Prefeitura", "S" * 51, "São Paulo", "0001"),
+            (3, "Prefeitura", "SP", "São Paulo", "9" * 21),
+        ]),
+        (Fornecedor, Fornecedor.from_row, ("id_fornecedor", "nome", "documento"), [
+            (1, "Forn", "111"),
+            ("2", None, None),
+            (3, "N" * 256, "111"),
+            ("x", "Forn", "111"),
+        ]),
+        (Empenho, Empenho.from_row, ("id_empenho", "ano", "data_empenho", "cpfcnpjcredor", "credor", "valor", "id_entidade", "id_contrato"), [
+            ("2024NE1", 2024, date(2024, 1, 5), "111", "Forn", Decimal("10.00"), 1, 7),
+        ]),
+        (LiquidacaoNotaFiscal, LiquidacaoNotaFiscal.from_row, ("id_liquidacao_empenhonotafiscal", "chave_danfe", "data_emissao", "valor", "id_empenho"), [
+            (9, "K1", date(2024, 2, 1), Decimal("5.00"), "2024NE1"),
+            ("10", "K2", date(2024, 2, 1), Decimal("5.00"), 123),
+            ("abc", "K3", date(2024, 2, 1), Decimal("5.00"), "2024NE1"),
+        ]),
+        (Nfe, Nfe.from_row, ("id", "chave_nfe", "numero_nfe", "data_hora_emissao", "cnpj_emitente", "valor_total_nfe"), [
+            (3, "K1", "1", datetime(2024, 1, 30, 10, 15), "111", Decimal("5.00")),
+            (4, "K" * 51, "1", datetime(2024, 1, 30), "111", Decimal("5.00")),
+            (None, "K2", "1", datetime(2024, 1, 30), "111", Decimal("5.00")),
+        ]),
+        (Pagamento, Pagamento.from_row, ("id_pagamento", "id_empenho", "datapagamentoempenho", "valor"), [
+            (1, "2024NE1", date(2024, 3, 1), Decimal("5.00")),
+        ]),
+        (NfePagamento, NfePagamento.from_row, ("id", "chave_nfe", "tipo_pagamento", "valor_pagamento"), [
+            (1, "K1", "PIX", Decimal("5.00")),
+        ]),
+    ]
+
+    def test_parity_with_from_row(self):
+        for model, factory, names, rows in self.CASES:
+            with self.subTest(model=model.__name__):
+                desc = description(*names)
+                self.assertEqual(hydrate_all(rows, model.compile_hydrator(desc)), legacy(factory, desc, rows))
+
+    def test_column_order_comes_from_description(self):
+        desc = description("valor", "id_empenho", "id_pagamento", "datapagamentoempenho")
+        pag = hydrate_all([(Decimal("1.00"), "E1", 5, date(2024, 1, 1))], Pagamento.compile_hydrator(desc))[0]
+
+        self.assertEqual(pag, Pagamento("5", "E1", date(2024, 1, 1), Decimal("1.00")))
+
+    def test_missing_column_falls_back_to_from_row(self):
+        # Sem id_contrato na description, Empenho.from_row usa row.get -> None
+        desc = description("id_empenho", "ano", "data_empenho", "cpf_cnpj_credor", "credor", "valor", "id_entidade")
+        row = ("E1", 2024, date(2024, 1, 5), "111", "Forn", Decimal("1"), 1)
+
+        self.assertEqual(hydrate_all([row], Empenho.compile_hydrator(desc)), legacy(Empenho.from_row, desc, [row]))
+
+    def test_hydrator_is_cached_per_description(self):
+        desc = description("id_fornecedor", "nome", "documento")
+        self.assertIs(Fornecedor.compile_hydrator(desc), Fornecedor.compile_hydrator(list(desc)))
+
+    def test_gc_state_is_restored(self):
+        hydrate_all([(1, "Forn", "111")], Fornecedor.compile_hydrator(description("id_fornecedor", "nome", "documento")))
+        self.assertTrue(gc.isenabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
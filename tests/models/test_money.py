@@ -0,0 +1,101 @@
+import unittest
+import pickle
+from decimal import Decimal
+from datetime import date
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from clientside.domains.subdomains.financial_utils import (
+    quantize_money, sums_match_limit, add_money, money_total, money_match_limit, money_exceeds, money_is_positive,
+)
+
+
+class TestMoney(unittest.TestCase):
+
+    def test_exact_decimal_becomes_money(self):
+        for raw, cents in [("1.50", 150), ("100", 10000), ("-3.2", -320), ("1E+3", 100000), ("0.10000", 10)]:
+            with self.subTest(raw=raw):
+                m = to_money(Decimal(raw))
+                self.assertIs(type(m), Money)
+                self.assertEqual(m.cents, cents)
+                # Mesmo valor/str/repr/hash do Decimal original
+                self.assertEqual(m, Decimal(raw))
+                self.assertEqual(str(m), str(Decimal(raw)))
+                self.assertEqual(repr(m), repr(Decimal(raw)))
+                self.assertEqual(hash(m), hash(Decimal(raw)))
+
+    def test_other_values_pass_through(self):
+        for value in (None, 10, 1.5, Decimal("0.001"), Decimal("NaN"), Decimal("Infinity"), "1.00"):
+            with self.subTest(value=value):
+                self.assertIs(to_money(value), value)
+
+    def test_constructor_rejects_inexact(self):
+        with self.assertRaises(ValueError):
+            Money("0.005")
+
+    def test_pickle_keeps_cents(self):
+        m = pickle.loads(pickle.dumps(to_money(Decimal("7.25"))))
+        self.assertIs(type(m), Money)
+        self.assertEqual(m.cents, 725)
+
+    def test_from_cents_matches_quantize(self):
+        for cents in (0, 5, -5, 12345, 10**15):
+            with self.subTest(cents=cents):
+                self.assertEqual(str(Money.from_cents(cents)), str(quantize_money(Decimal(cents) / 100)))
+
+    def test_hydration_produces_money(self):
+        liq = LiquidacaoNotaFiscal._build_checked(1, "K", date(2024, 1, 1), Decimal("10.50"), "E1")
+        self.assertEqual(liq.valor.cents, 1050)
+        contrato = Contrato.create({"id_contrato": 1, "valor": "99.90", "data": None, "objeto": "x",
+                                    "id_entidade": 1, "id_fornecedor": 1}).value
+        self.assertEqual(contrato.valor.cents, 9990)
+        # a conversão é do create(), não do validador: _validate_valor não troca o valor do model
+        bruto = Contrato(1, Decimal("99.90"), None, "x", 1, 1)
+        self.assertIs(type(bruto._validate_valor().value.valor), Decimal)
+        inexato = LiquidacaoNotaFiscal._build_checked(1, "K", date(2024, 1, 1), Decimal("10.505"), "E1")
+        self.assertIs(type(inexato.valor), Decimal)
+
+
+class TestMoneyArithmetic(unittest.TestCase):
+    """add_money / money_match_limit devem decidir exatamente como sum() + sums_match_limit."""
+
+    VALUES = ["0.01", "10", "10.5", "99.99", "0.005", "1234.567", "-1.00", "0"]
+    LIMITS = [None, "0", "10.5", "110.49", "110.495", "110.50", "1000000"]
+
+    def test_matches_decimal_path(self):
+        for i in range(len(self.VALUES)):
+            parcelas = [Decimal(v) for v in self.VALUES[:i + 1]]
+            for limit_raw in self.LIMITS:
+                limit = None if limit_raw is None else Decimal(limit_raw)
+                for convert in (lambda v: v, to_money):
+                    with self.subTest(parcelas=self.VALUES[:i + 1], limit=limit_raw, money=convert is to_money):
+                        total = 0
+                        for v in parcelas:
+                            total = add_money(total, convert(v))
+                        esperado = sum(parcelas, Decimal(0))
+                        self.assertEqual(money_total(total), esperado)
+                        self.assertEqual(quantize_money(money_total(total)), quantize_money(esperado))
+                        self.assertEqual(money_match_limit(total, convert(limit)), sums_match_limit(esperado, limit))
+                        if limit is not None:
+                            self.assertEqual(money_exceeds(total, convert(limit)), esperado > limit)
+
+    def test_is_positive(self):
+        for raw in self.VALUES:
+            for convert in (lambda v: v, to_money):
+                with self.subTest(raw=raw, money=convert is to_money):
+                    self.assertEqual(money_is_positive(convert(Decimal(raw))), Decimal(raw) > 0)
+
+    def test_int_path_only_with_money(self):
+        self.assertIs(type(add_money(0, to_money(Decimal("1.00")))), int)
+        self.assertIs(type(add_money(0, Decimal("1.001"))), Decimal)
+        self.assertIs(type(add_money(add_money(0, Decimal("1.001")), to_money(Decimal("1.00")))), Decimal)
+
+
+if __name__ == "__main__":
+    unittest.main()
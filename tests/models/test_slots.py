@@ -0,0 +1,65 @@
+import unittest
+import io
+import pickle
+from contextlib import redirect_stdout
+from dataclasses import FrozenInstanceError
+from decimal import Decimal
+from datetime import date, datetime
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from views.etl_empenhos import print_structure
+
+
+class TestSlottedModels(unittest.TestCase):
+
+    def setUp(self):
+        self.instances = [
+            Contrato(1, Decimal("1000.00"), date(2024, 1, 1), "Obj", 1, 2),
+            Entidade(1, "Prefeitura", "SP", "São Paulo", "0001"),
+            Fornecedor(2, "Forn", "111"),
+            Empenho("E1", 2024, date(2024, 1, 5), "111", "Forn", Decimal("10.00"), 1, 1),
+            LiquidacaoNotaFiscal(9, "K1", date(2024, 2, 1), Decimal("5.00"), "E1"),
+            Nfe(3, "K1", "1", datetime(2024, 1, 30), "111", Decimal("5.00")),
+            Pagamento("P1", "E1", date(2024, 3, 1), Decimal("5.00")),
+            NfePagamento("1", "K1", "PIX", Decimal("5.00")),
+        ]
+
+    def test_no_instance_dict(self):
+        for obj in self.instances:
+            with self.subTest(model=type(obj).__name__):
+                self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_dimensions_are_frozen_and_hashable(self):
+        ent = Entidade(1, "Prefeitura", "SP", "São Paulo", "0001")
+        with self.assertRaises(FrozenInstanceError):
+            ent.nome = "Outra"
+        self.assertEqual(len({ent, Entidade(1, "Prefeitura", "SP", "São Paulo", "0001")}), 1)
+
+    def test_pickle_roundtrip(self):
+        for obj in self.instances:
+            with self.subTest(model=type(obj).__name__):
+                self.assertEqual(pickle.loads(pickle.dumps(obj)), obj)
+
+    def test_print_structure_reads_slots(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            print_structure(self.instances[4])
+
+        self.assertIn("chave_danfe: K1", out.getvalue())
+        self.assertIn("id_empenho: E1", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
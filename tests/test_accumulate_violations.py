@@ -0,0 +1,150 @@
+"""
+Modo acumulativo (continue-on-error): todas as regras de todos os estágios em uma passada.
+A primeira violação coletada é o mesmo erro que o caminho fail-fast reporta.
+"""
+import unittest
+from decimal import Decimal
+from datetime import date
+
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.domains.empenho import coletar_empenho_violacoes
+from clientside.domains.subdomains.violations import Violation, avaliar, coletar
+from views.etl_fullpipe import validate_batch, collect_batch_violations, collect_violations
+from tests.test_money_parity import synthetic_dataset
+
+DOC = "12345678000199"
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", DOC)
+
+
+def regra_ok(x):
+    return Result.ok(x)
+
+
+def regra_falha(x):
+    return Result.err(f"falhou {x}")
+
+
+def regra_quebra(x):
+    return x.inexistente
+
+
+class TestColetar(unittest.TestCase):
+
+    def test_all_rules_evaluated(self):
+        violacoes = coletar("empenho", [regra_falha, regra_ok, regra_falha], 1)
+        self.assertEqual(violacoes, [Violation("empenho", "regra_falha", "falhou 1")] * 2)
+
+    def test_exception_becomes_violation(self):
+        v = avaliar("pagamento", regra_quebra, None, ref="E1")
+        self.assertEqual((v.estagio, v.regra, v.ref), ("pagamento", "regra_quebra", "E1"))
+        self.assertIn("não avaliável", v.mensagem)
+        self.assertIsNone(avaliar("pagamento", regra_ok, None))
+
+
+class TestMultiViolation(unittest.TestCase):
+
+    def build(self):
+        contrato = Contrato(1, Decimal("100.00"), date(2024, 1, 10), "Obj", 1, 2)
+        empenhos = {1: [
+            Empenho("E1", 2024, date(2024, 1, 5), "999", "Outro", Decimal("80.00"), 1, 1),   # data, doc e nome
+            Empenho("E2", 2024, date(2024, 1, 12), DOC, "Forn", Decimal("50.00"), 1, 1),     # total > contrato
+        ]}
+        liquidacoes = {
+            "E1": [LiquidacaoNotaFiscal(1, "K1", date(2024, 1, 1), Decimal("90.00"), "E1")],  # > empenho, antes
+            "E2": [LiquidacaoNotaFiscal(2, "K2", date(2024, 1, 20), Decimal("10.00"), "E2"),
+                   LiquidacaoNotaFiscal(3, "SEM", date(2024, 1, 20), Decimal("10.00"), "E2")],
+        }
+        nfes = {
+            "K1": Nfe(1, "K1", "1", date(2024, 1, 1), DOC, Decimal("90.00")),
+            "K2": Nfe(2, "K2", "2", date(2024, 1, 20), DOC, Decimal("5.00")),               # liquidado > NFe
+        }
+        pagamentos = {"E2": [Pagamento("P1", "E2", date(2024, 1, 25), Decimal("-1.00")),
+                             Pagamento("P1", "E2", date(2024, 1, 25), Decimal("500.00"))]}
+        tx = EmpenhoTransaction.build_from_batch([contrato], {1: ENT}, {2: FORN}, empenhos)
+        return tx, liquidacoes, nfes, pagamentos
+
+    def test_collects_across_stages(self):
+        tx, liquidacoes, nfes, pagamentos = self.build()
+        violacoes = collect_violations(tx[0], liquidacoes, nfes, pagamentos)
+        regras = [(v.estagio, v.regra) for v in violacoes]
+        for esperado in [
+            ("empenho", "regra_fornecedor_consistente"),
+            ("empenho", "regra_valor_total_empenhado"),
+            ("empenho", "regra_temporal_empenho"),
+            ("empenho", "regra_nome_fornecedor_consistente"),
+            ("liquidacao", "check_aggregate_rules"),
+            ("liquidacao", "check_liquidation_dates"),
+            ("liquidacao", "check_nfe_rules"),
+            ("liquidacao", "check_nfe_limit"),
+            ("pagamento", "check_pagamento_ids_unique"),
+            ("pagamento", "check_pagamento_not_exceeds_liquidacao"),
+            ("pagamento", "check_total_pago_not_exceeds_contrato"),
+            ("pagamento", "check_pagamento_valor_positivo"),
+        ]:
+            self.assertIn(esperado, regras)
+        outcome = validate_batch(tx, liquidacoes, nfes, pagamentos)[0]
+        self.assertEqual(outcome[:3], ("✗", ".", "."))
+        self.assertEqual(violacoes[0].mensagem, outcome[3])
+
+    def test_item_refs(self):
+        tx, liquidacoes, nfes, pagamentos = self.build()
+        refs = {(v.regra, v.ref) for v in collect_violations(tx[0], liquidacoes, nfes, pagamentos)}
+        self.assertIn(("check_nfe_rules", "3"), refs)
+        self.assertIn(("check_nfe_limit", "K2"), refs)
+
+    def test_build_error_stops_chain(self):
+        contrato = Contrato(1, Decimal("100.00"), date(2024, 1, 1), "Obj", 1, 2)
+        empenhos = {1: [Empenho("E1", 2024, date(2024, 1, 5), DOC, "Forn", Decimal("10.00"), 1, 1)]}
+        tx = EmpenhoTransaction.build_from_batch([contrato], {1: ENT}, {}, empenhos)
+        self.assertEqual(collect_violations(tx[0], {}, {}, {}), [Violation("empenho", "build", tx[0].error)])
+
+    def test_unevaluable_rule_does_not_abort(self):
+        contrato = Contrato(1, Decimal("5.00"), date(2024, 1, 1), "Obj", 1, 2)
+        empenhos = {1: [Empenho("E1", 2024, None, DOC, "Outro", Decimal("10.00"), 1, 1)]}
+        tx = EmpenhoTransaction.build_from_batch([contrato], {1: ENT}, {2: FORN}, empenhos)
+        violacoes = coletar_empenho_violacoes(tx[0].value)
+        self.assertEqual([v.regra for v in violacoes],
+                         ["regra_valor_total_empenhado", "regra_temporal_empenho", "regra_nome_fornecedor_consistente"])
+        self.assertIn("não avaliável (TypeError", violacoes[1].mensagem)
+
+
+class TestParityWithFailFast(unittest.TestCase):
+    """Sobre o dataset sintético de paridade: [] <=> ✓✓✓ e primeira violação == err."""
+
+    def test_first_violation_matches_fail_fast(self):
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                contratos, entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos = \
+                    synthetic_dataset(seed, 300, money=True)
+                txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+                outcomes = validate_batch(txs, liquidacoes, nfes, pagamentos)
+                coletadas = collect_batch_violations(txs, liquidacoes, nfes, pagamentos)
+                com_erro = 0
+                for (e, l, p, err), violacoes in zip(outcomes, coletadas):
+                    if err:
+                        com_erro += 1
+                        self.assertEqual(violacoes[0].mensagem, err)
+                    else:
+                        self.assertEqual((e, l, p, violacoes), ("✓", "✓", "✓", []))
+                self.assertGreater(com_erro, 0)
+                self.assertGreaterEqual(sum(map(len, coletadas)), com_erro)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import asyncio
+import os
+import re
+import sys
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.hydration import hydrate_all
+from utils.async_loader import RELATED_QUERIES, AsyncRelatedLoader, load_related_async
+from utils.dimension_cache import DimensionCache
+from utils.etl_common import batch_load_related_data, RELATED_LOADERS
+
+# tabela -> (colunas, coluna do filtro ANY, linhas)
+TABLES = {
+    "entidade": (("id_entidade", "nome", "estado", "municipio", "cnpj"), 0,
+                 [(1, "E1", "SP", "SP", "1"), (2, "E2", "SP", "SP", "2")]),
+    "fornecedor": (("id_fornecedor", "nome", "documento"), 0, [(1, "F1", "111"), (2, "F2", "222")]),
+    "empenho": (("id_empenho", "ano", "data_empenho", "cpf_cnpj_credor", "credor", "valor", "id_entidade", "id_contrato"), 7,
+                [("E1", 2024, date(2024, 1, 2), "111", "F1", Decimal("10.00"), 1, 1),
+                 ("E2", 2024, date(2024, 1, 3), "111", "F1", Decimal("20.00"), 1, 1),
+                 ("E3", 2024, date(2024, 1, 4), "222", "F2", Decimal("30.00"), 2, 2)]),
+    "liquidacao_nota_fiscal": (("id_liquidacao_empenhonotafiscal", "chave_danfe", "data_emissao", "valor", "id_empenho"), 4,
+                               [(1, "K1", date(2024, 2, 1), Decimal("5.00"), "E1"),
+                                (2, "K1", date(2024, 2, 2), Decimal("5.00"), "E2"),
+                                (3, "K9", date(2024, 2, 3), Decimal("1.00"), "E3")]),
+    "pagamento": (("id_pagamento", "id_empenho", "datapagamentoempenho", "valor"), 1,
+                  [("P1", "E1", date(2024, 3, 1), Decimal("5.00")), ("P3", "E3", date(2024, 3, 1), Decimal("1.00"))]),
+    "nfe": (("id", "chave_nfe", "numero_nfe", "data_hora_emissao", "cnpj_emitente", "valor_total_nfe"), 1,
+            [(1, "K1", "1", date(2024, 1, 30), "111", Decimal("10.00"))]),
+    "nfe_pagamento": (("id", "chave_nfe", "tipo_pagamento", "valor_pagamento"), 1,
+                      [("NP-1", "K1", "01", Decimal("10.00")), ("NP-9", "K9", "01", Decimal("1.00"))]),
+}
+
+
+def select(table, ids):
+    cols, key, rows = TABLES[table]
+    wanted = set(ids)
+    return [(c,) for c in cols], [r for r in rows if r[key] in wanted]
+
+
+class FakeCursor:
+    """Cursor síncrono para o loader classic sobre as mesmas tabelas."""
+
+    def execute(self, query, params=None):
+        self.description, self._rows = select(re.search(r"FROM (\w+)", query).group(1), params[0])
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeFetch:
+    """fetch assíncrono: registra o nível (rodada de gather) de cada query e o pico de concorrência."""
+
+    def __init__(self):
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, table, ids):
+        self.calls.append(table)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+        description, rows = select(table, ids)
+        return hydrate_all(rows, RELATED_QUERIES[table][1].compile_hydrator(description))
+
+
+def contrato(id_contrato, id_entidade, id_fornecedor):
+    return Contrato(id_contrato, Decimal("100.00"), date(2024, 1, 1), "Obj", id_entidade, id_fornecedor)
+
+
+class TestLoadRelatedAsync(unittest.TestCase):
+
+    def contratos(self):
+        return [contrato(1, 1, 1), contrato(2, 2, 2)]
+
+    def test_same_maps_as_classic(self):
+        fetch = FakeFetch()
+        related = asyncio.run(load_related_async(fetch, self.contratos()))
+        self.assertEqual(related, batch_load_related_data(FakeCursor(), self.contratos()))
+        # NfePagamento de chave sem NFe carregada (K9) fica fora, como no classic
+        self.assertEqual(list(related[6]), ["K1"])
+
+    def test_independent_queries_run_concurrently(self):
+        fetch = FakeFetch()
+        asyncio.run(load_related_async(fetch, self.contratos()))
+        self.assertEqual(fetch.peak, 3)
+        self.assertEqual(set(fetch.calls[:3]), {"entidade", "fornecedor", "empenho"})
+        self.assertEqual(set(fetch.calls[3:5]), {"liquidacao_nota_fiscal", "pagamento"})
+        self.assertEqual(set(fetch.calls[5:]), {"nfe", "nfe_pagamento"})
+
+    def test_dependent_queries_skipped_without_ids(self):
+        fetch = FakeFetch()
+        related = asyncio.run(load_related_async(fetch, [contrato(7, 1, 1)]))
+        self.assertEqual(fetch.calls.count("liquidacao_nota_fiscal"), 0)
+        self.assertEqual(related[2:], ({}, {}, {}, {}, {}))
+        self.assertEqual(asyncio.run(load_related_async(fetch, [])), ({},) * 7)
+
+    def test_dimension_cache_fetches_only_unseen_ids(self):
+        cache = DimensionCache()
+        fetch = FakeFetch()
+        asyncio.run(load_related_async(fetch, [contrato(1, 1, 1)], cache))
+        fetch.calls.clear()
+        related = asyncio.run(load_related_async(fetch, [contrato(2, 1, 2)], cache))
+        self.assertNotIn("entidade", fetch.calls)
+        self.assertEqual(fetch.calls.count("fornecedor"), 1)
+        self.assertEqual((set(related[0]), set(related[1])), ({1}, {2}))
+        self.assertEqual(cache.stats()["fornecedor"]["queries"], 2)
+
+
+class TestAsyncLoaderRegistration(unittest.TestCase):
+
+    def test_registered_in_related_loaders(self):
+        self.assertIn("async", RELATED_LOADERS)
+
+    def test_requires_psycopg3(self):
+        with patch.dict(sys.modules, {"psycopg_pool": None}):   # import falha como sem o pacote
+            with self.assertRaises(RuntimeError):
+                AsyncRelatedLoader()
+
+    def test_psycopg3_declared_and_pool_lifecycle(self):
+        with open(os.path.join(project_root, "requirements.txt"), encoding="utf-8") as f:
+            self.assertIn("psycopg[binary,pool]", f.read().split())
+        import psycopg_pool
+        pools = []
+
+        class FakePool:
+            def __init__(self, kwargs, min_size, max_size, open):
+                self.kwargs, self.max_size, self.state = kwargs, max_size, "novo"
+                pools.append(self)
+
+            async def open(self):
+                self.state = "aberto"
+
+            async def close(self):
+                self.state = "fechado"
+
+        with patch.object(psycopg_pool, "AsyncConnectionPool", FakePool):
+            loader = AsyncRelatedLoader(max_size=3, host="db", port=None)
+        self.assertEqual((pools[0].kwargs, pools[0].max_size, pools[0].state), ({"host": "db"}, 3, "aberto"))
+        loader.close()
+        self.assertEqual(pools[0].state, "fechado")
+        self.assertFalse(loader._thread.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import db_connection
+from db_connection import ConnectionPool, PooledConnection
+
+
+class FakeThreadedPool:
+    """Substitui psycopg2 ThreadedConnectionPool: entrega conexões MagicMock."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.idle = []
+        self.closed_conns = []
+        self.opened = 0
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.opened += 1
+        conn = MagicMock()
+        conn.closed = 0
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.closed_conns.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@patch("db_connection.pg_pool.ThreadedConnectionPool", FakeThreadedPool)
+class TestConnectionPool(unittest.TestCase):
+
+    def test_close_returns_connection_to_pool(self):
+        pool = ConnectionPool(min_size=1, max_size=2, host="x")
+        proxy = PooledConnection(pool, pool.acquire())
+        raw = proxy.raw
+
+        proxy.cursor()
+        raw.cursor.assert_called_once()
+
+        proxy.close()
+        proxy.close()  # idempotente
+        self.assertEqual(pool._pool.idle, [raw])
+
+        # Reuso: mesma conexão física, sem novo connect
+        again = pool.acquire()
+        self.assertIs(again, raw)
+        self.assertEqual(pool._pool.opened, 1)
+
+    def test_closed_connection_is_discarded_on_checkout(self):
+        pool = ConnectionPool(min_size=1, max_size=2, host="x")
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.closed = 1
+
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        self.assertIn(conn, pool._pool.closed_conns)
+
+    def test_idle_connection_runs_healthcheck(self):
+        pool = ConnectionPool(min_size=1, max_size=2, healthcheck_idle=0, host="x")
+        conn = pool.acquire()
+        pool.release(conn)
+
+        pool.acquire()
+
+        conn.cursor.return_value.execute.assert_called_with("SELECT 1")
+
+    def test_context_manager_releases_on_error(self):
+        pool = ConnectionPool(min_size=1, max_size=1, host="x")
+        with self.assertRaises(RuntimeError):
+            with pool.connection() as conn:
+                raise RuntimeError("boom")
+
+        # Slot liberado: um novo checkout não bloqueia
+        self.assertIs(pool.acquire(), conn)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            ConnectionPool(min_size=3, max_size=2, host="x")
+
+    def test_pool_is_recreated_after_fork(self):
+        with patch.object(db_connection, "_POOL", None), patch.object(db_connection, "_POOL_PID", None):
+            first = db_connection.get_pool()
+            self.assertIs(db_connection.get_pool(), first)
+            with patch("db_connection.os.getpid", return_value=-1):
+                self.assertIsNot(db_connection.get_pool(), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
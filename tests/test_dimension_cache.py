@@ -0,0 +1,162 @@
+import unittest
+import os
+import re
+import sys
+from decimal import Decimal
+from datetime import date
+from unittest.mock import MagicMock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from utils.dimension_cache import DimensionCache, DimensionTable, merge_dimension_stats
+from utils.etl_common import batch_load_related_data, batch_load_related_data_joined
+
+TABLES = {
+    "entidade": ([("id_entidade",), ("nome",), ("estado",), ("municipio",), ("cnpj",)],
+                 [(i, f"Ent {i}", "SP", "SP", "0001") for i in range(1, 6)]),
+    "fornecedor": ([("id_fornecedor",), ("nome",), ("documento",)],
+                   [(i, f"Forn {i}", "111") for i in range(1, 9)] + [(9, "Inválido", "9" * 21)]),
+}
+
+
+class FakeDimensionCursor:
+    """Responde COUNT(*), SELECT * e SELECT ... = ANY(%s) sobre entidade/fornecedor em memória; demais tabelas vazias."""
+
+    def __init__(self):
+        self.executed = []
+        self.description = None
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        table = re.search(r"FROM (\w+)", query).group(1)
+        cols, rows = TABLES.get(table, ([("id",)], []))
+        self.description = cols
+        if "COUNT(*)" in query:
+            self._rows = [(len(rows),)]
+        elif params:
+            ids = set(params[0])
+            self._rows = [r for r in rows if r[0] in ids]
+        else:
+            self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+    def queries(self, table):
+        return [q for q, _ in self.executed if f"FROM {table}" in q]
+
+
+def contrato(id_contrato, id_entidade, id_fornecedor):
+    return Contrato(id_contrato, Decimal("10.00"), date(2024, 1, 1), "Obj", id_entidade, id_fornecedor)
+
+
+class TestDimensionTable(unittest.TestCase):
+
+    def test_only_unseen_ids_are_fetched(self):
+        table = DimensionTable("fornecedor")
+        fetched = []
+
+        def fetch(ids):
+            fetched.append(sorted(ids))
+            return {i: f"F{i}" for i in ids if i != 3}
+
+        self.assertEqual(table.get_many([1, 2, 3], fetch), {1: "F1", 2: "F2"})
+        self.assertEqual(table.get_many([2, 3, 4], fetch), {2: "F2", 4: "F4"})
+        self.assertEqual(fetched, [[1, 2, 3], [4]])   # 3 ausente também fica em cache
+        self.assertEqual((table.hits, table.misses, table.queries), (2, 4, 2))
+
+    def test_store_fetched_counts_query_and_caches_absent(self):
+        table = DimensionTable("fornecedor")
+        found, missing = table.split([1, 2])
+        table.store_fetched(missing, {1: "F1"})          # loader externo (async) com a própria query
+        self.assertEqual(table.split([1, 2]), ({1: "F1"}, []))
+        table.store([3], {3: "F3"})                      # joined: veio junto da query do batch
+        self.assertEqual((table.hits, table.misses, table.queries), (2, 2, 1))
+
+    def test_lru_bound(self):
+        table = DimensionTable("entidade", maxsize=2)
+        fetch = lambda ids: {i: i for i in ids}
+        table.get_many([1], fetch)
+        table.get_many([2], fetch)
+        table.get_many([1], fetch)      # 1 vira o mais recente
+        table.get_many([3], fetch)      # expulsa 2
+        self.assertEqual(len(table), 2)
+        table.get_many([1, 2], fetch)
+        self.assertEqual((table.hits, table.misses), (2, 4))
+
+    def test_preload_small_table(self):
+        cursor = FakeDimensionCursor()
+        table = DimensionTable("entidade")
+        self.assertTrue(table.preload(cursor, limit=10))
+        fetch = MagicMock()
+        found = table.get_many([1, 5, 42], fetch)
+        fetch.assert_not_called()                       # tabela completa: 42 não existe
+        self.assertEqual(sorted(found), [1, 5])
+        self.assertEqual((table.hits, table.misses), (3, 0))
+
+    def test_preload_skips_large_table(self):
+        table = DimensionTable("fornecedor")
+        self.assertFalse(table.preload(FakeDimensionCursor(), limit=3))
+        self.assertFalse(table.complete)
+        self.assertEqual(len(table), 0)
+
+
+class TestLoadersWithDimensionCache(unittest.TestCase):
+
+    def batches(self):
+        return [[contrato(1, 1, 1), contrato(2, 2, 1)], [contrato(3, 1, 2), contrato(4, 2, 9)], [contrato(5, 1, 1)]]
+
+    def test_classic_queries_only_new_ids(self):
+        cursor = FakeDimensionCursor()
+        cache = DimensionCache()
+        out = [batch_load_related_data(cursor, b, dimensions=cache) for b in self.batches()]
+        sem_cache = [batch_load_related_data(FakeDimensionCursor(), b) for b in self.batches()]
+        self.assertEqual(out, sem_cache)
+        self.assertEqual(len(cursor.queries("entidade")), 1)
+        self.assertEqual(len(cursor.queries("fornecedor")), 2)   # {1} e depois {2, 9}
+        self.assertNotIn(9, out[1][1])                             # linha inválida continua fora
+        self.assertIs(out[0][1][1], out[2][1][1])                  # mesmo objeto entre batches
+        self.assertEqual(cache.stats()["fornecedor"]["misses"], 3)
+        self.assertEqual(cache.stats()["fornecedor"]["hits"], 1)
+
+    def test_classic_preloaded_skips_dimension_queries(self):
+        cursor = FakeDimensionCursor()
+        cache = DimensionCache()
+        self.assertEqual(cache.preload(cursor, limit=100), {"entidade": True, "fornecedor": True})
+        before = len(cursor.executed)
+        for b in self.batches():
+            batch_load_related_data(cursor, b, dimensions=cache)
+        dims = [q for q, _ in cursor.executed[before:] if "entidade" in q or "fornecedor" in q]
+        self.assertEqual(dims, [])
+
+    def test_joined_requests_only_new_ids(self):
+        cache = DimensionCache()
+        payload = ('[{"id_entidade": 1, "nome": "E", "estado": "SP", "municipio": "SP", "cnpj": "1"}]',
+                   '[{"id_fornecedor": 1, "nome": "F", "documento": "111"}]', '[]', '[]', '[]', '[]', '[]')
+        cursor = MagicMock()
+        cursor.fetchone.return_value = payload
+        first = batch_load_related_data_joined(cursor, [contrato(1, 1, 1)], dimensions=cache)
+        cursor.fetchone.return_value = ('[]',) * 7
+        second = batch_load_related_data_joined(cursor, [contrato(2, 1, 1), contrato(3, 1, 7)], dimensions=cache)
+        params = cursor.execute.call_args_list[1][0][1]
+        self.assertEqual((params["entidade_ids"], params["fornecedor_ids"]), ([], [7]))
+        self.assertIs(second[0][1], first[0][1])
+        self.assertEqual(set(second[1]), {1})
+
+    def test_merge_stats(self):
+        a = {"entidade": {"hits": 3, "misses": 1, "queries": 1, "size": 4, "preloaded": True}}
+        b = {"entidade": {"hits": 2, "misses": 2, "queries": 2, "size": 6, "preloaded": False}}
+        self.assertEqual(merge_dimension_stats([a, b]),
+                         {"entidade": {"hits": 5, "misses": 3, "queries": 3, "size": 6, "preloaded": False}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import random
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from collections import defaultdict
+
+# Adjust path
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from clientside.domains.liquidação import Valida, _validate_empenho_rules_single_pass
+from clientside.domains.liquidacao_columnar import valida_batch, flag_batch, build_liquidacao_columns
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+DOC = "12345678000199"
+BASE = date(2023, 1, 1)
+
+ANOMALIAS = [None, None, "excede_empenho", "liq_antes_empenho", "liq_antes_contrato", "sem_nfe", "cnpj",
+             "nfe_depois_liq", "nfe_antes_empenho", "nfe_antes_contrato", "excede_nfe", "datetime_nfe",
+             "inexato", "sem_data"]
+
+
+def make_ctx(rng, id_contrato, anomaly=None):
+    """LiquidacaoTransaction sintética montada pelo build_from_batch real."""
+    data_contrato = BASE + timedelta(days=rng.randint(0, 30))
+    contrato = Contrato(id_contrato, Decimal("1000000.00"), data_contrato, "Obj", 1, 2)
+    forn = Fornecedor(2, "Forn", DOC)
+    empenhos, liqs, nfes = {}, defaultdict(list), {}
+    for e in range(rng.randint(1, 3)):
+        id_emp = f"C{id_contrato}E{e}"
+        data_emp = data_contrato + timedelta(days=rng.randint(0, 10))
+        emp = Empenho(id_emp, 2023, data_emp, DOC, "Forn", Decimal(rng.randint(50000, 500000)) / 100, 1, id_contrato)
+        empenhos[id_emp] = emp
+        for l in range(rng.randint(1, 4)):
+            valor = (emp.valor / 5).quantize(Decimal("0.01"))
+            data_liq = data_emp + timedelta(days=rng.randint(5, 20))
+            chave = f"K{id_contrato}-{e}-{l}"
+            liqs[id_emp].append(LiquidacaoNotaFiscal(id_contrato * 100 + e * 10 + l, chave, data_liq, valor, id_emp))
+            nfes[chave] = Nfe(id_contrato * 100 + e * 10 + l, chave, "1", data_liq - timedelta(days=rng.randint(0, 4)),
+                              DOC, valor)
+
+    # Anomalia aplicada num item aleatório
+    id_emp = rng.choice(list(liqs))
+    pos = rng.randrange(len(liqs[id_emp]))
+    liq = liqs[id_emp][pos]
+    nfe = nfes[liq.chave_danfe]
+    emp = empenhos[id_emp]
+    if anomaly == "excede_empenho":
+        liq.valor = emp.valor
+    elif anomaly == "liq_antes_empenho":
+        liq.data_emissao = emp.data_empenho - timedelta(days=1)
+    elif anomaly == "liq_antes_contrato":
+        liq.data_emissao = data_contrato - timedelta(days=1)
+        emp.data_empenho = None
+    elif anomaly == "sem_nfe":
+        del nfes[liq.chave_danfe]
+    elif anomaly == "cnpj":
+        nfe.cnpj_emitente = "99999999000199"
+    elif anomaly == "nfe_depois_liq":
+        nfe.data_hora_emissao = liq.data_emissao + timedelta(days=2)
+    elif anomaly == "nfe_antes_empenho":
+        nfe.data_hora_emissao = emp.data_empenho - timedelta(days=1)
+    elif anomaly == "nfe_antes_contrato":
+        nfe.data_hora_emissao = data_contrato - timedelta(days=1)
+        emp.data_empenho = None
+    elif anomaly == "excede_nfe":
+        nfe.valor_total_nfe = liq.valor - Decimal("0.01")
+    elif anomaly == "datetime_nfe":
+        nfe.data_hora_emissao = datetime.combine(liq.data_emissao, datetime.min.time()) + timedelta(hours=13)
+    elif anomaly == "inexato":
+        liq.valor = Decimal("0.001")
+    elif anomaly == "sem_data":
+        liq.data_emissao = None
+
+    emp_tx = EmpenhoTransaction(ENT, forn, contrato, empenhos)
+    return LiquidacaoTransaction.build_from_batch(emp_tx, dict(liqs), nfes).value
+
+
+def outcome(res):
+    return ("ok", res.value) if res.is_ok else ("err", res.error)
+
+
+class TestLiquidacaoColumnar(unittest.TestCase):
+
+    def test_parity_random_batch(self):
+        rng = random.Random(42)
+        ctxs = [make_ctx(rng, i, rng.choice(ANOMALIAS)) for i in range(1, 500)]
+        self.assertEqual([outcome(r) for r in valida_batch(ctxs)], [outcome(Valida(c)) for c in ctxs])
+
+    def test_each_anomaly_isolated(self):
+        rng = random.Random(7)
+        for anomaly in ANOMALIAS:
+            with self.subTest(anomaly=anomaly):
+                ctxs = [make_ctx(rng, i, anomaly) for i in range(1, 40)]
+                expected = [outcome(Valida(c)) for c in ctxs]
+                self.assertEqual([outcome(r) for r in valida_batch(ctxs)], expected)
+                if anomaly not in (None, "datetime_nfe", "sem_data", "inexato"):
+                    self.assertTrue(any(kind == "err" for kind, _ in expected))
+
+    def test_first_violating_item_per_empenho(self):
+        rng = random.Random(3)
+        ctxs = [make_ctx(rng, i, rng.choice(ANOMALIAS)) for i in range(1, 200)]
+        for ctx, flags in zip(ctxs, flag_batch(ctxs)):
+            expected = []
+            for emp in ctx.empenho_transaction.empenhos.values():
+                itens = ctx.itens_liquidados.get(emp.id_empenho)
+                if itens:
+                    res = _validate_empenho_rules_single_pass(ctx, emp, list(itens.values()))
+                    if res.is_err:
+                        expected.append((emp.id_empenho, res.error))
+            self.assertEqual([(f.id_empenho, f.error) for f in flags], expected)
+            for f in flags:
+                self.assertIn(f.id_liquidacao, ctx.itens_liquidados[f.id_empenho])
+
+    def test_running_sum_flags_item_that_crosses_limit(self):
+        rng = random.Random(1)
+        ctx = make_ctx(rng, 1)
+        emp = next(iter(ctx.empenho_transaction.empenhos.values()))
+        itens = ctx.itens_liquidados[emp.id_empenho]
+        ids = list(itens)
+        if len(ids) >= 2:
+            segundo = itens[ids[1]].liquidacao
+            segundo.valor = emp.valor  # item 1 cruza o limite; item 0 não
+            flags = flag_batch([ctx])[0]
+            self.assertEqual(flags[0].id_liquidacao, ids[1])
+            self.assertTrue(flags[0].error.startswith("Soma Liquidações"))
+
+    def test_inexact_values_use_scalar_path(self):
+        rng = random.Random(11)
+        ctxs = [make_ctx(rng, i, "inexato") for i in range(1, 10)]
+        _, fallback, _ = build_liquidacao_columns(ctxs)
+        self.assertEqual(fallback, list(range(len(ctxs))))
+        self.assertEqual([outcome(r) for r in valida_batch(ctxs)], [outcome(Valida(c)) for c in ctxs])
+
+    def test_empty_batch(self):
+        self.assertEqual(valida_batch([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
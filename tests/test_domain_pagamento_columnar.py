@@ -0,0 +1,195 @@
+import unittest
+import random
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+
+# Adjust path
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.pagamento import Pagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction, ItemLiquidacao
+from clientside.transaction.transaction_pagamento import PaymentTransaction, PagamentoItem
+from clientside.domains.pagamento import Valida, PAGAMENTO_RULES_REGISTRY
+from clientside.domains.subdomains import rule_registry
+from clientside.domains.pagamento_columnar import valida_batch, build_payment_columns
+from clientside.domains.pagamento import build_validation_fragment, check_total_pago_not_exceeds_contrato
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+BASE = date(2023, 1, 1)
+
+
+def money(rng, lo=1, hi=5000):
+    return Decimal(rng.randint(lo * 100, hi * 100)) / 100
+
+
+def make_tx(rng, id_contrato, anomaly=None):
+    """PaymentTransaction sintética; anomaly força a violação de uma regra específica."""
+    data_contrato = BASE + timedelta(days=rng.randint(0, 30))
+    empenhos, liqs, pags = {}, {}, {}
+    pag_seq = 0
+    for e in range(rng.randint(1, 3)):
+        id_emp = f"C{id_contrato}E{e}"
+        data_emp = data_contrato + timedelta(days=rng.randint(0, 10))
+        empenhos[id_emp] = Empenho(id_emp, 2023, data_emp, "111", "Forn", money(rng), 1, id_contrato)
+        inner = {}
+        for l in range(rng.randint(0, 3)):
+            liq = LiquidacaoNotaFiscal(id_contrato * 100 + e * 10 + l, f"K{id_contrato}{e}{l}",
+                                       data_emp + timedelta(days=rng.randint(1, 20)), money(rng), id_emp)
+            inner[str(liq.id_liquidacao_empenhonotafiscal)] = ItemLiquidacao(liq, None)
+        if inner:
+            liqs[id_emp] = inner
+            total = sum(i.liquidacao.valor for i in inner.values())
+            min_liq = min(i.liquidacao.data_emissao for i in inner.values())
+            items = []
+            for _ in range(rng.randint(0, 2)):
+                pag_seq += 1
+                valor = (total / 4).quantize(Decimal("0.01"))
+                pag = Pagamento(f"P{id_contrato}-{pag_seq}", id_emp, min_liq + timedelta(days=rng.randint(0, 30)), valor)
+                items.append(PagamentoItem(pag.id_pagamento, pag, ()))
+            if items:
+                pags[id_emp] = items
+
+    valor_contrato = Decimal(10_000_000)
+    first = next(iter(pags), None)
+    if anomaly and first:
+        items = pags[first]
+        p0 = items[0].pagamento
+        if anomaly == "sem_liquidacao":
+            pags["ORFAO"] = [PagamentoItem("PX", Pagamento("PX", "ORFAO", p0.data_pagamento_emp, Decimal("1.00")), ())]
+        elif anomaly == "duplicado":
+            items.append(items[0])
+        elif anomaly == "excede_liquidacao":
+            items.append(PagamentoItem("PBIG", Pagamento("PBIG", first, p0.data_pagamento_emp, Decimal("999999.00")), ()))
+        elif anomaly == "excede_contrato":
+            valor_contrato = Decimal("0.01")
+        elif anomaly == "nao_positivo":
+            items.append(PagamentoItem("PZ", Pagamento("PZ", first, p0.data_pagamento_emp, Decimal("0.00")), ()))
+        elif anomaly == "antes_liquidacao":
+            items[0] = PagamentoItem(p0.id_pagamento, Pagamento(p0.id_pagamento, first, date(2023, 1, 2), p0.valor), ())
+        elif anomaly == "futuro":
+            items.append(PagamentoItem("PF", Pagamento("PF", first, date.today() + timedelta(days=5), Decimal("1.00")), ()))
+        elif anomaly == "sem_data":
+            items.append(PagamentoItem("PN", Pagamento("PN", first, None, Decimal("1.00")), ()))
+        elif anomaly == "inexato":
+            items.append(PagamentoItem("PI", Pagamento("PI", first, p0.data_pagamento_emp, Decimal("0.005")), ()))
+        elif anomaly == "datetime":
+            items.append(PagamentoItem("PD", Pagamento("PD", first, datetime(2030, 1, 1), Decimal("1.00")), ()))
+
+    contrato = Contrato(id_contrato, valor_contrato, data_contrato, "Obj", 1, 2)
+    emp_tx = EmpenhoTransaction(ENT, FORN, contrato, empenhos)
+    liq_tx = LiquidacaoTransaction(emp_tx, liqs, {})
+    return PaymentTransaction(liq_tx, {k: tuple(v) for k, v in pags.items()})
+
+
+ANOMALIAS = [None, "sem_liquidacao", "duplicado", "excede_liquidacao", "excede_contrato", "nao_positivo",
+             "antes_liquidacao", "futuro", "sem_data", "inexato"]
+
+
+def outcome(res):
+    return ("ok", res.value) if res.is_ok else ("err", res.error)
+
+
+class TestPagamentoColumnar(unittest.TestCase):
+
+    def assertParity(self, txs):
+        expected = [outcome(Valida(tx)) for tx in txs]
+        got = [outcome(r) for r in valida_batch(txs)]
+        self.assertEqual(got, expected)
+
+    def test_parity_random_batch(self):
+        rng = random.Random(42)
+        txs = [make_tx(rng, i, rng.choice(ANOMALIAS)) for i in range(1, 400)]
+        self.assertParity(txs)
+        # O batch exercita todas as regras
+        errors = {outcome(Valida(tx))[1].split("]")[0] for tx in txs if Valida(tx).is_err}
+        self.assertTrue({"[INCONSISTÊNCIA", "[DUPLICIDADE", "[FRAUDE?", "[INVÁLIDO", "[SUSPEITO"} <= errors)
+
+    def test_each_anomaly_isolated(self):
+        rng = random.Random(7)
+        for anomaly in ANOMALIAS:
+            with self.subTest(anomaly=anomaly):
+                self.assertParity([make_tx(rng, i, anomaly) for i in range(1, 30)])
+
+    def test_rule_order_follows_scalar_list(self):
+        # Contrato que viola regra 4 (duplicidade) e regra 5 (contrato): vence a primeira da lista
+        rng = random.Random(3)
+        tx = make_tx(rng, 1, "duplicado")
+        tx.liquidacao_transaction.empenho_transaction.contrato.valor = Decimal("0.01")
+        if tx.pagamentos_por_empenho:
+            res = valida_batch([tx])[0]
+            self.assertTrue(res.error.startswith("[DUPLICIDADE]"))
+
+    def test_registry_stats_fed_by_masks(self):
+        self.addCleanup(PAGAMENTO_RULES_REGISTRY.reset)
+        self.addCleanup(rule_registry.configure, "fixed")
+        rule_registry.configure("fixed", profile=True)
+        PAGAMENTO_RULES_REGISTRY.reset()
+        rng = random.Random(42)
+        txs = [make_tx(rng, i, rng.choice(ANOMALIAS)) for i in range(1, 200)]
+        self.assertParity(txs)   # Valida escalar do assertParity também mede: só o colunar abaixo
+        PAGAMENTO_RULES_REGISTRY.reset()
+        _, fallback = build_payment_columns(txs)
+        results = valida_batch(txs)
+        stats = PAGAMENTO_RULES_REGISTRY.stats
+        self.assertEqual(set(stats), {r.__name__ for r in PAGAMENTO_RULES_REGISTRY.active})
+        dup = stats["check_pagamento_ids_unique"]
+        self.assertGreater(dup.failures, 0)
+        self.assertTrue(all(st.calls >= len(txs) - len(fallback) and st.total_ns > 0 for st in stats.values()))
+        self.assertTrue(any(r.is_err for r in results))
+
+    def test_adaptive_fast_uses_registry_order(self):
+        self.addCleanup(PAGAMENTO_RULES_REGISTRY.reset)
+        self.addCleanup(rule_registry.configure, "fixed")
+        rng = random.Random(3)
+        tx = make_tx(rng, 1, "duplicado")
+        tx.liquidacao_transaction.empenho_transaction.contrato.valor = Decimal("0.01")
+        if not tx.pagamentos_por_empenho:
+            self.skipTest("sem pagamentos")
+        rule_registry.configure("adaptive-fast")
+        PAGAMENTO_RULES_REGISTRY.reset()
+        # regra do contrato aprendida como a mais seletiva: vai à frente da duplicidade
+        PAGAMENTO_RULES_REGISTRY.merge({"check_total_pago_not_exceeds_contrato": (100, 100, 100)})
+        res = valida_batch([tx])[0]
+        self.assertFalse(res.error.startswith("[DUPLICIDADE]"))
+        self.assertEqual(res.error, check_total_pago_not_exceeds_contrato(build_validation_fragment(tx)).error)
+
+    def test_inexact_values_use_scalar_path(self):
+        rng = random.Random(11)
+        txs = [make_tx(rng, i, "inexato") for i in range(1, 20)]
+        _, fallback = build_payment_columns(txs)
+        self.assertTrue(fallback)
+        self.assertParity(txs)
+
+    def test_datetime_payment_date_matches_scalar_exception(self):
+        rng = random.Random(5)
+        tx = next(t for t in (make_tx(rng, i, "datetime") for i in range(1, 50)) if t.pagamentos_por_empenho)
+        with self.assertRaises(TypeError):
+            Valida(tx)
+        with self.assertRaises(TypeError):
+            valida_batch([tx])
+
+    def test_empty_batch(self):
+        self.assertEqual(valida_batch([]), [])
+
+    def test_unknown_rule_falls_back(self):
+        rng = random.Random(9)
+        txs = [make_tx(rng, i, "nao_positivo") for i in range(1, 10)]
+        rules = PAGAMENTO_RULES_REGISTRY.active + [lambda frag: Result.ok(None)]
+        self.assertEqual([outcome(r) for r in valida_batch(txs, rules)], [outcome(Valida(tx)) for tx in txs])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.entity_registry import EntityRegistry, ValidationLRU
+from clientside.domains.empenho import executar_empenho_rules, regra_entidade_valida, regra_fornecedor_valido
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def contratos(n, id_entidade=1, id_fornecedor=2):
+    return [Contrato(i, Decimal("100.00"), date(2024, 1, 1), "Obj", id_entidade, id_fornecedor) for i in range(1, n + 1)]
+
+
+def empenhos(n):
+    return {i: [Empenho(f"E{i}", 2024, date(2024, 1, 2), "111", "Forn", Decimal("10.00"), 1, i)] for i in range(1, n + 1)}
+
+
+class TestValidationLRU(unittest.TestCase):
+
+    def test_hit_by_value(self):
+        cache = ValidationLRU(8)
+        self.assertIsNone(cache.validate(FORN))
+        self.assertIsNone(cache.validate(Fornecedor(2, "Forn", "111")))  # outro objeto, mesmo valor
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_caches_errors(self):
+        cache = ValidationLRU(8)
+        invalido = Fornecedor(3, "F", "9" * 21)
+        self.assertEqual(cache.validate(invalido), invalido.validate().error)
+        self.assertEqual(cache.validate(invalido), invalido.validate().error)
+        self.assertEqual(cache.hits, 1)
+
+    def test_bounded(self):
+        cache = ValidationLRU(2)
+        a, b, c = (Fornecedor(i, "F", "1") for i in (1, 2, 3))
+        cache.validate(a)
+        cache.validate(b)
+        cache.validate(a)      # a vira o mais recente
+        cache.validate(c)      # expulsa b
+        self.assertEqual(len(cache), 2)
+        cache.validate(a)
+        cache.validate(b)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_zero_size_disables(self):
+        cache = ValidationLRU(0)
+        cache.validate(FORN)
+        cache.validate(FORN)
+        self.assertEqual((cache.misses, len(cache)), (2, 0))
+
+
+class TestEntityRegistry(unittest.TestCase):
+
+    def test_shared_fornecedor_validated_once_per_batch(self):
+        with patch.object(Fornecedor, "validate", autospec=True, side_effect=Fornecedor.validate) as validate:
+            txs = EmpenhoTransaction.build_from_batch(contratos(500), {1: ENT}, {2: FORN}, empenhos(500),
+                                                      registry=EntityRegistry({1: ENT}, {2: FORN}, cache=None))
+            self.assertTrue(all(executar_empenho_rules(tx.value).is_ok for tx in txs))
+        self.assertEqual(validate.call_count, 1)
+        self.assertIs(txs[0].value.registry, txs[-1].value.registry)
+        self.assertEqual(txs[0].value.registry.validated, 2)
+
+    def test_lru_spans_batches(self):
+        cache = ValidationLRU(8)
+        for _ in range(3):
+            # objetos novos a cada batch (re-hidratados), iguais por valor
+            ent, forn = Entidade(1, "Prefeitura", "SP", "SP", "0001"), Fornecedor(2, "Forn", "111")
+            registry = EntityRegistry({1: ent}, {2: forn}, cache=cache)
+            for tx in EmpenhoTransaction.build_from_batch(contratos(5), {}, {}, empenhos(5), registry=registry):
+                executar_empenho_rules(tx.value)
+        self.assertEqual((cache.misses, cache.hits), (2, 4))
+
+    def test_same_errors_as_direct_validate(self):
+        ent = Entidade(1, "X" * 300, "SP", "SP", "0001")
+        forn = Fornecedor(2, "Forn", "9" * 21)
+        tx = EmpenhoTransaction.build_from_batch(contratos(1), {1: ent}, {2: forn}, empenhos(1))[0].value
+        direto = EmpenhoTransaction(ent, forn, tx.contrato, tx.empenhos)
+        self.assertIsNone(direto.registry)
+        for regra in (regra_entidade_valida, regra_fornecedor_valido):
+            self.assertEqual(regra(tx).error, regra(direto).error)
+            self.assertTrue(regra(tx).is_err)
+
+    def test_missing_dimension_errors_unchanged(self):
+        res = EmpenhoTransaction.build_from_batch(contratos(1, id_fornecedor=9), {1: ENT}, {2: FORN}, empenhos(1))
+        self.assertEqual(res[0].error, "Fornecedor 9 não encontrado")
+
+
+if __name__ == "__main__":
+    unittest.main()
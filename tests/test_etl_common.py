@@ -0,0 +1,206 @@
+import unittest
+import sys
+import os
+import threading
+from unittest.mock import MagicMock, patch
+from decimal import Decimal
+from datetime import date, datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.etl_common import batch_load_contratos, stream_contratos, prefetch_batches, batch_load_related_data_joined
+from models.contrato import Contrato
+from models.empenho import Empenho
+from models.money import Money
+
+CONTRATO_COLS = [("id_contrato",), ("valor",), ("data",), ("objeto",), ("id_entidade",), ("id_fornecedor",)]
+
+
+def contrato_row(id_contrato):
+    return (id_contrato, Decimal("100.00"), date(2024, 1, 1), "Objeto", 1, 1)
+
+
+class FakeKeysetCursor:
+    """Cursor fake que responde a 'id_contrato > %s ... LIMIT %s' sobre uma tabela em memória."""
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        self.description = CONTRATO_COLS
+        self.executed = []
+        self._rows = []
+
+    def execute(self, query, params):
+        self.executed.append((query, params))
+        after_id, limit = params[0], params[-1]
+        until_id = params[1] if len(params) == 3 else None
+        ids = [i for i in self.ids if i > after_id and (until_id is None or i <= until_id)]
+        self._rows = [contrato_row(i) for i in ids[:limit]]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class TestKeysetStreaming(unittest.TestCase):
+
+    def test_batch_load_contratos_returns_last_id(self):
+        cursor = FakeKeysetCursor([5, 7, 9, 11])
+        contratos, last_id = batch_load_contratos(cursor, after_id=5, batch_size=2)
+
+        self.assertEqual([c.id_contrato for c in contratos], [7, 9])
+        self.assertEqual(last_id, 9)
+        self.assertNotIn("OFFSET", cursor.executed[0][0])
+
+    def test_batch_load_contratos_empty(self):
+        cursor = FakeKeysetCursor([1, 2])
+        contratos, last_id = batch_load_contratos(cursor, after_id=2, batch_size=10)
+
+        self.assertEqual(contratos, [])
+        self.assertIsNone(last_id)
+
+    def test_stream_contratos_keyset(self):
+        cursor = FakeKeysetCursor(range(1, 8))
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        batches = list(stream_contratos(conn, batch_size=3))
+
+        self.assertEqual([[c.id_contrato for c in b] for b in batches], [[1, 2, 3], [4, 5, 6], [7]])
+        # Cada query parte do último id visto, nunca de um offset
+        self.assertEqual([params[0] for _, params in cursor.executed], [0, 3, 6, 7])
+
+    def test_stream_contratos_range(self):
+        cursor = FakeKeysetCursor(range(1, 20))
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        batches = list(stream_contratos(conn, batch_size=4, after_id=5, until_id=10))
+
+        self.assertEqual([c.id_contrato for b in batches for c in b], [6, 7, 8, 9, 10])
+
+    def test_stream_contratos_server_side(self):
+        named_cursor = MagicMock()
+        named_cursor.description = CONTRATO_COLS
+        named_cursor.fetchmany.side_effect = [
+            [contrato_row(1), contrato_row(2)],
+            [contrato_row(3)],
+            [],
+        ]
+        conn = MagicMock()
+        conn.cursor.return_value = named_cursor
+
+        batches = list(stream_contratos(conn, batch_size=2, server_side=True))
+
+        self.assertEqual([[c.id_contrato for c in b] for b in batches], [[1, 2], [3]])
+        conn.cursor.assert_called_once_with(name="stream_contratos")
+        self.assertEqual(named_cursor.execute.call_count, 1)
+        named_cursor.close.assert_called_once()
+
+
+@patch("utils.etl_common.get_db_connection", return_value=MagicMock())
+class TestPrefetchBatches(unittest.TestCase):
+
+    def test_yields_batches_in_order_with_loaded_data(self, _):
+        batches = [["c1", "c2"], ["c3"], ["c4"]]
+        with patch("utils.etl_common.stream_contratos", return_value=iter(batches)):
+            out = list(prefetch_batches(batch_size=2, depth=1, loader=lambda cur, cs: len(cs)))
+
+        self.assertEqual(out, [(["c1", "c2"], 2), (["c3"], 1), (["c4"], 1)])
+
+    def test_producer_runs_ahead_of_consumer(self, _):
+        loaded = []
+        second_loaded = threading.Event()
+
+        def loader(cursor, contratos):
+            loaded.append(contratos)
+            if len(loaded) == 2:
+                second_loaded.set()
+            return None
+
+        with patch("utils.etl_common.stream_contratos", return_value=iter([["a"], ["b"], ["c"]])):
+            gen = prefetch_batches(depth=2, loader=loader)
+            first = next(gen)
+            # Enquanto o batch 1 é "validado", o batch 2 já foi extraído
+            self.assertTrue(second_loaded.wait(timeout=2))
+            self.assertEqual(first[0], ["a"])
+            gen.close()
+
+    def test_producer_error_is_raised_in_consumer(self, _):
+        def loader(cursor, contratos):
+            raise RuntimeError("db down")
+
+        with patch("utils.etl_common.stream_contratos", return_value=iter([["a"]])):
+            with self.assertRaises(RuntimeError):
+                list(prefetch_batches(loader=loader))
+
+    def test_invalid_depth(self, _):
+        with self.assertRaises(ValueError):
+            next(prefetch_batches(depth=0))
+
+
+class TestJoinedLoader(unittest.TestCase):
+
+    def test_single_round_trip_returns_typed_maps(self):
+        contrato = Contrato(7, Decimal("1000.00"), date(2024, 1, 1), "Obj", 1, 2)
+        payload = (
+            '[{"id_entidade": 1, "nome": "Prefeitura", "estado": "SP", "municipio": "SP", "cnpj": "0001"}]',
+            '[{"id_fornecedor": 2, "nome": "Forn", "documento": "111"}]',
+            '[{"id_empenho": "E1", "ano": 2024, "data_empenho": "2024-01-05", "cpf_cnpj_credor": "111",'
+            ' "credor": "Forn", "valor": 500.10, "id_entidade": 1, "id_contrato": 7}]',
+            '[{"id_liquidacao_empenhonotafiscal": 9, "chave_danfe": "K1", "data_emissao": "2024-02-01",'
+            ' "valor": 250.05, "id_empenho": "E1"}]',
+            '[{"id": 3, "chave_nfe": "K1", "numero_nfe": "1", "data_hora_emissao": "2024-01-30T10:15:00",'
+            ' "cnpj_emitente": "111", "valor_total_nfe": 250.05}]',
+            '[{"id_pagamento": "P1", "id_empenho": "E1", "datapagamentoempenho": "2024-03-01", "valor": 100.00}]',
+            '[{"id": "NP-1", "chave_nfe": "K1", "tipo_pagamento": "01", "valor_pagamento": 250.05}]',
+        )
+        cursor = MagicMock()
+        cursor.fetchone.return_value = payload
+
+        (entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos,
+         nfe_pagamentos) = batch_load_related_data_joined(cursor, [contrato])
+
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertEqual(entidades[1].nome, "Prefeitura")
+        self.assertEqual(fornecedores[2].documento, "111")
+        emp = empenhos[7][0]
+        self.assertEqual(emp.valor, Decimal("500.10"))
+        self.assertIsInstance(emp.valor, Decimal)
+        self.assertEqual(emp.data_empenho, date(2024, 1, 5))
+        self.assertEqual(liquidacoes["E1"][0].data_emissao, date(2024, 2, 1))
+        self.assertEqual(nfes["K1"].data_hora_emissao, datetime(2024, 1, 30, 10, 15))
+        self.assertEqual(pagamentos["E1"][0].valor, Decimal("100.00"))
+        self.assertEqual(pagamentos["E1"][0].data_pagamento_emp, date(2024, 3, 1))
+        self.assertEqual(nfe_pagamentos["K1"][0].valor_pagamento, Decimal("250.05"))
+
+    def test_json_rows_go_through_compiled_checked_builder(self):
+        contrato = Contrato(7, Decimal("1000.00"), date(2024, 1, 1), "Obj", 1, 2)
+        emp_json = ('[{"id_empenho": "E1", "ano": 2024, "data_empenho": "2024-01-05", "cpfcnpjcredor": "111",'
+                    ' "credor": "Forn", "valor": 500.10, "id_entidade": 1, "id_contrato": 7},'
+                    ' {"id_empenho": "E2", "ano": 2024, "data_empenho": "2024-01-06", "cpfcnpjcredor": "222",'
+                    ' "credor": "Outro", "valor": 20.00, "id_entidade": 1, "id_contrato": 7}]')
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ("[]", "[]", emp_json, "[]", "[]", "[]", "[]")
+
+        with patch.object(Empenho, "from_row", wraps=Empenho.from_row) as from_row:
+            empenhos = batch_load_related_data_joined(cursor, [contrato])[2][7]
+        from_row.assert_not_called()
+        self.assertEqual(empenhos, [
+            Empenho("E1", 2024, date(2024, 1, 5), "111", "Forn", Decimal("500.10"), 1, 7),
+            Empenho("E2", 2024, date(2024, 1, 6), "222", "Outro", Decimal("20.00"), 1, 7),
+        ])                                                      # cpfcnpjcredor: nome alternativo resolvido
+        self.assertTrue(all(isinstance(e.valor, Money) for e in empenhos))
+
+    def test_empty_batch_skips_query(self):
+        cursor = MagicMock()
+        self.assertEqual(batch_load_related_data_joined(cursor, []), ({}, {}, {}, {}, {}, {}, {}))
+        cursor.execute.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import os
+import sys
+import tempfile
+from decimal import Decimal
+from datetime import date
+from unittest.mock import MagicMock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from utils.audit_store import AuditStore, rules_fingerprint
+from utils.etl_common import batch_load_fingerprints, load_table_watermark, TABLE_KEYS
+from views.etl_fullpipe import (
+    incremental_loader, validate_incremental, IncrementalBatch, validate_batch, outcome_rules_fingerprint,
+)
+from clientside.domains.subdomains import rule_registry
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def contrato(id_contrato):
+    return Contrato(id_contrato, Decimal("1000.00"), date(2024, 1, 1), "Obj", 1, 2)
+
+
+def empenho(id_contrato, valor="100.00"):
+    return Empenho(f"E{id_contrato}", 2024, date(2024, 1, 2), "111", "Forn", Decimal(valor), 1, id_contrato)
+
+
+class TestAuditStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "audit", "store.sqlite3")
+        self.store = AuditStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_save_and_lookup(self):
+        self.store.save([(1, "h1", "✓", "✓", "✓", ""), (2, "h2", "✗", ".", ".", "erro")])
+        self.assertEqual(self.store.lookup([1, 2, 3]), {1: (1, "h1", "✓", "✓", "✓", ""), 2: (2, "h2", "✗", ".", ".", "erro")})
+        self.store.save([(2, "h2b", "✓", "✓", "✓", "")])
+        self.assertEqual(self.store.lookup([2])[2][1], "h2b")
+
+    def test_lookup_chunks_large_id_lists(self):
+        self.store.save([(i, f"h{i}", "✓", "✓", "✓", "") for i in range(2500)])
+        self.assertEqual(len(self.store.lookup(list(range(3000)))), 2500)
+
+    def test_persists_across_reopen(self):
+        self.store.save([(7, "h", "✓", "✓", "✓", "")])
+        self.store.set_watermark("r1", {"contrato": [1, "7"]})
+        self.store.close()
+        self.store = AuditStore(self.path)
+        self.assertIn(7, self.store.lookup([7]))
+        self.assertEqual(self.store.watermark()["tables"], {"contrato": [1, "7"]})
+
+    def test_prune_unseen_removes_deleted_contracts(self):
+        self.store.save([(i, "h", "✓", "✓", "✓", "") for i in (1, 2, 3)])
+        self.store.mark_seen([1, 3])
+        self.assertEqual(self.store.prune_unseen(), 1)
+        self.assertEqual(sorted(self.store.lookup([1, 2, 3])), [1, 3])
+
+    def test_rules_change_invalidates_outcomes(self):
+        self.store.save([(1, "h", "✓", "✓", "✓", "")])
+        self.store.set_watermark("r1", {})
+        self.assertTrue(self.store.check_rules("r1"))
+        self.assertEqual(self.store.count(), 1)
+        self.assertFalse(self.store.check_rules("r2"))
+        self.assertEqual(self.store.count(), 0)
+
+    def test_outcome_fingerprint_tracks_adaptive_fast(self):
+        self.addCleanup(rule_registry.configure, "fixed")
+        rule_registry.configure("fixed")
+        fixed = outcome_rules_fingerprint()
+        rule_registry.configure("adaptive")          # mesmo erro reportado do fixed: outcomes reaproveitáveis
+        self.assertEqual(outcome_rules_fingerprint(), fixed)
+        rule_registry.configure("adaptive-fast")
+        self.assertNotEqual(outcome_rules_fingerprint(), fixed)
+
+    def test_rules_fingerprint_tracks_sources(self):
+        root = os.path.join(self.tmp.name, "src")
+        os.makedirs(os.path.join(root, "rules"))
+        with open(os.path.join(root, "rules", "a.py"), "w") as f:
+            f.write("X = 1\n")
+        before = rules_fingerprint(root, ("rules",))
+        self.assertEqual(before, rules_fingerprint(root, ("rules",)))
+        with open(os.path.join(root, "rules", "a.py"), "w") as f:
+            f.write("X = 2\n")
+        self.assertNotEqual(before, rules_fingerprint(root, ("rules",)))
+
+
+class TestFingerprintQueries(unittest.TestCase):
+
+    def test_batch_load_fingerprints(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, "a" * 32), (2, "b" * 32)]
+        self.assertEqual(batch_load_fingerprints(cursor, [contrato(1), contrato(2)]), {1: "a" * 32, 2: "b" * 32})
+        self.assertEqual(cursor.execute.call_args[0][1], {"contract_ids": [1, 2]})
+
+    def test_batch_load_fingerprints_empty(self):
+        cursor = MagicMock()
+        self.assertEqual(batch_load_fingerprints(cursor, []), {})
+        cursor.execute.assert_not_called()
+
+    def test_table_watermark(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (10, "99")
+        wm = load_table_watermark(cursor)
+        self.assertEqual(set(wm), set(TABLE_KEYS))
+        self.assertEqual(wm["contrato"], [10, "99"])
+
+
+class TestIncrementalPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.contratos = [contrato(1), contrato(2), contrato(3)]
+        self.cursor = MagicMock()
+        self.cursor.fetchall.return_value = [(1, "h1"), (2, "h2-novo"), (3, "h3")]
+        self.loaded = []
+
+    def load_related(self, cursor, contratos):
+        self.loaded.append([c.id_contrato for c in contratos])
+        emps = {c.id_contrato: [empenho(c.id_contrato)] for c in contratos}
+        return {1: ENT}, {2: FORN}, emps, {}, {}, {}, {}
+
+    def test_only_changed_contracts_are_loaded(self):
+        stored = {1: (1, "h1", "✓", "✓", "✓", ""), 2: (2, "h2", "✓", "✓", "✓", "")}
+        load = incremental_loader(self.load_related, lambda ids: {i: stored[i] for i in ids if i in stored})
+        batch = load(self.cursor, self.contratos)
+        # 2: fingerprint mudou; 3: nunca validado
+        self.assertEqual([c.id_contrato for c in batch.changed], [2, 3])
+        self.assertEqual(self.loaded, [[2, 3]])
+
+    def test_nothing_changed_skips_related_load(self):
+        stored = {i: (i, f"h{i}", "✓", "✓", "✓", "") for i in (1, 2, 3)}
+        self.cursor.fetchall.return_value = [(1, "h1"), (2, "h2"), (3, "h3")]
+        batch = incremental_loader(self.load_related, lambda ids: stored)(self.cursor, self.contratos)
+        self.assertEqual(batch.changed, [])
+        self.assertEqual(self.loaded, [])
+
+    def test_validate_incremental_reuses_and_revalidates(self):
+        stored = {1: (1, "h1", "✗", ".", ".", "erro antigo")}
+        batch = incremental_loader(self.load_related, lambda ids: stored)(self.cursor, self.contratos)
+        outcomes, records = validate_incremental(self.contratos, batch)
+
+        # Contrato 1 reaproveitado tal como armazenado
+        self.assertEqual(outcomes[0], ("✗", ".", ".", "erro antigo"))
+        # Contratos 2 e 3 revalidados: mesmo resultado do caminho completo
+        entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = batch.related
+        txs = EmpenhoTransaction.build_from_batch(self.contratos[1:], entidades, fornecedores, empenhos)
+        self.assertEqual(outcomes[1:], validate_batch(txs, liquidacoes, nfes, pagamentos, nfe_pagamentos=nfe_pagamentos))
+        self.assertEqual([(r[0], r[1]) for r in records], [(2, "h2-novo"), (3, "h3")])
+        self.assertEqual([tuple(r[2:]) for r in records], outcomes[1:])
+
+    def test_missing_fingerprint_forces_revalidation(self):
+        stored = {1: (1, "h1", "✓", "✓", "✓", "")}
+        self.cursor.fetchall.return_value = []
+        batch = incremental_loader(self.load_related, lambda ids: stored)(self.cursor, self.contratos[:1])
+        self.assertEqual([c.id_contrato for c in batch.changed], [1])
+        _, records = validate_incremental(self.contratos[:1], batch)
+        self.assertEqual(records[0][1], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
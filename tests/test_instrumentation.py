@@ -0,0 +1,177 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from models.contrato import Contrato
+from utils.instrumentation import (
+    SPANS, Histogram, Spans, configure, run_profiler, span, spanned, _bucket, _bucket_upper,
+)
+from clientside.domains.subdomains.rule_registry import RuleRegistry
+from clientside.domains.liquidação import LIQUIDACAO_RULES, Valida as ValidaLiquidacao, liquidacao_rules
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from tests.test_money_parity import outcome, synthetic_dataset
+from utils.etl_common import batch_load_related_data
+from views.etl_fullpipe import iter_loaded_batches
+
+
+def exact_percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_buckets_cover_values(self):
+        for ns in list(range(0, 200)) + [10**3, 12345, 10**6 + 7, 3 * 10**9]:
+            b = _bucket(ns)
+            self.assertLessEqual(ns, _bucket_upper(b))
+            self.assertTrue(b == 0 or _bucket_upper(b - 1) < ns)
+
+    def test_percentiles_within_bucket_error(self):
+        rng = random.Random(7)
+        values = [int(rng.lognormvariate(10, 1.5)) for _ in range(20000)]
+        hist = Histogram()
+        for v in values:
+            hist.add(v)
+        for pct in (50, 95, 99):
+            exact = exact_percentile(values, pct)
+            self.assertGreaterEqual(hist.percentile(pct), exact)
+            self.assertLessEqual(hist.percentile(pct), exact * 1.125 + 1)
+        self.assertEqual(hist.percentile(100), max(values))
+        self.assertEqual((hist.count, hist.total_ns), (len(values), sum(values)))
+
+    def test_merge_equals_single_histogram(self):
+        a, b, both = Histogram(), Histogram(), Histogram()
+        for i, v in enumerate(range(1, 5000, 7)):
+            (a if i % 2 else b).add(v)
+            both.add(v)
+        a.merge(b.snapshot())
+        self.assertEqual(a.snapshot(), both.snapshot())
+
+
+class TestSpans(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(configure, SPANS.enabled)
+        self.addCleanup(setattr, SPANS, "histograms", {})
+
+    def test_disabled_records_nothing(self):
+        configure(False)
+        with span("build.empenho"):
+            pass
+        self.assertEqual(SPANS.snapshot(), {})
+        fn = lambda x: x
+        self.assertIs(spanned("extract", fn), fn)
+
+    def test_enabled_span_and_drain(self):
+        configure(True)
+        self.assertEqual(os.environ["PIPELINE_SPANS"], "1")
+        for _ in range(3):
+            with span("valida.pagamento"):
+                pass
+        self.assertEqual(spanned("extract", lambda x: x + 1)(1), 2)
+        drained = SPANS.drain()
+        self.assertEqual({name: snap[1] for name, snap in drained.items()}, {"valida.pagamento": 3, "extract": 1})
+        self.assertEqual(SPANS.snapshot(), {})
+        parent = Spans(enabled=True)
+        parent.merge(drained)
+        parent.merge(drained)
+        self.assertEqual(parent.histograms["valida.pagamento"].count, 6)
+
+    def test_span_records_on_exception(self):
+        configure(True)
+        with self.assertRaises(ValueError):
+            with span("build.liquidacao"):
+                raise ValueError("x")
+        self.assertEqual(SPANS.histograms["build.liquidacao"].count, 1)
+
+    def test_rule_registry_feeds_rule_histograms(self):
+        configure(True)
+
+        def regra_ok(x):
+            return Result.ok(x)
+
+        def regra_falha(x):
+            return Result.err("falhou")
+
+        registry = RuleRegistry("teste", [regra_ok, regra_falha], profile=True)
+        for _ in range(4):
+            registry.run(1)
+        self.assertEqual(SPANS.histograms["rule.teste.regra_ok"].count, 4)
+        self.assertEqual(SPANS.histograms["rule.teste.regra_falha"].count, 4)
+
+    def test_liquidacao_spans_each_rule(self):
+        contratos, entidades, fornecedores, empenhos, liquidacoes, nfes, _ = synthetic_dataset(7, 60, money=True)
+        ctxs = [LiquidacaoTransaction.build_from_batch(tx.value, liquidacoes, nfes).value
+                for tx in EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)]
+        configure(False)
+        self.assertIs(liquidacao_rules(), LIQUIDACAO_RULES)
+        esperado = [outcome(ValidaLiquidacao(ctx)) for ctx in ctxs]
+        configure(True)
+        self.assertEqual([outcome(ValidaLiquidacao(ctx)) for ctx in ctxs], esperado)
+        contagens = {name: h.count for name, h in SPANS.histograms.items()}
+        self.assertEqual(set(contagens), {f"rule.liquidacao.{rule.__name__}" for rule in LIQUIDACAO_RULES})
+        self.assertEqual(contagens["rule.liquidacao.check_integrity_nfe_liquidacao"], len(ctxs))
+        # regras por item: uma medição por liquidação avaliada, não por loop
+        self.assertGreater(contagens["rule.liquidacao.check_aggregate_rules"], len(ctxs))
+
+    def test_classic_loader_sql_and_hydrate_spans(self):
+        configure(True)
+
+        class EmptyCursor:
+            description = [("id_empenho",)]
+
+            def execute(self, query, params=None):
+                pass
+
+            def fetchall(self):
+                return []
+
+        contrato = Contrato(1, Decimal("1.00"), date(2024, 1, 1), "Obj", 1, 2)
+        batches = iter_loaded_batches(None, EmptyCursor(), 10, loader=batch_load_related_data,
+                                      snapshot=_OneBatchSnapshot([contrato]))
+        self.assertEqual(len(list(batches)), 1)
+        names = set(SPANS.histograms)
+        self.assertTrue({"extract", "sql.empenho", "hydrate.empenho", "sql.entidade"} <= names)
+        self.assertNotIn("sql.liquidacao_nota_fiscal", names)   # sem empenhos: query não roda
+
+
+class _OneBatchSnapshot:
+    def __init__(self, contratos):
+        self.contratos = contratos
+
+    def iter_contratos(self, batch_size, after_id=0, until_id=None):
+        yield self.contratos
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_cprofile_dump(self):
+        import pstats
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.prof")
+            with run_profiler("cprofile", path):
+                sorted(range(1000), key=lambda x: -x)
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_none_and_invalid(self):
+        with run_profiler(None):
+            pass
+        with self.assertRaises(ValueError):
+            with run_profiler("perf"):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic import SqliteCursor, SyntheticConfig, SyntheticDataset, load_sqlite
+from clientside.domains.liquidação import coletar_liquidacao_violacoes
+from clientside.domains.empenho import executar_empenho_rules
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from utils.etl_common import batch_load_contratos, batch_load_related_data
+from utils.liquidacao_pushdown import DIALECTS, check_parity, compile_pushdown_query, run_pushdown
+from views.etl_fullpipe import validate_batch
+
+
+def sqlite_cursor(test, **config):
+    conn = load_sqlite(SyntheticDataset(SyntheticConfig(**dict(dict(fornecedores=30, nfe_reuse=0.3), **config))))
+    test.addCleanup(conn.close)
+    return SqliteCursor(conn)
+
+
+def python_path(cursor):
+    """{contrato: status L do fail-fast} e {(contrato, regra, ref): mensagem} do modo acumulativo."""
+    status, mensagens, after_id = {}, {}, 0
+    while True:
+        contratos, after_id = batch_load_contratos(cursor, after_id, 100)
+        if after_id is None:
+            return status, mensagens
+        related = batch_load_related_data(cursor, contratos)
+        txs = EmpenhoTransaction.build_from_batch(contratos, related[0], related[1], related[2])
+        for c, tx, (e, l, p, err) in zip(contratos, txs, validate_batch(txs, related[3], related[4], related[5])):
+            if e != "✓":
+                continue
+            status[c.id_contrato] = l
+            ctx = LiquidacaoTransaction.build_from_batch(executar_empenho_rules(tx.value).value, related[3], related[4])
+            for v in coletar_liquidacao_violacoes(ctx.value):
+                mensagens[(c.id_contrato, v.regra, v.ref)] = v.mensagem
+
+
+class TestLiquidacaoPushdown(unittest.TestCase):
+
+    def test_parity_with_python_domain(self):
+        for rate in (1.0, 0.1):
+            cursor = sqlite_cursor(self, contratos=1200, anomaly_rate=rate)
+            pushdown = run_pushdown(cursor, dialect="sqlite")
+            report = check_parity(cursor, pushdown, batch_size=200)
+            self.assertTrue(report.ok, (report.so_pushdown[:5], report.so_python[:5]))
+            self.assertEqual(report.contratos, 1200)
+            self.assertGreater(report.violacoes, 0)
+
+    def test_clean_dataset_has_no_violations(self):
+        cursor = sqlite_cursor(self, contratos=500, anomaly_rate=0)
+        self.assertEqual(run_pushdown(cursor, dialect="sqlite"), {})
+
+    def test_fail_fast_status_and_messages_match(self):
+        cursor = sqlite_cursor(self, contratos=800, anomaly_rate=0.5)
+        pushdown = run_pushdown(cursor, dialect="sqlite")
+        status, mensagens = python_path(cursor)
+        for id_contrato, l in status.items():
+            self.assertEqual(l == "✗", id_contrato in pushdown, id_contrato)
+        comparadas = 0
+        for id_contrato, vs in pushdown.items():
+            for v in vs:
+                if id_contrato in status and v.regra != "check_aggregate_rules":
+                    self.assertEqual(v.mensagem, mensagens[(id_contrato, v.regra, v.ref)])
+                    comparadas += 1
+        self.assertGreater(comparadas, 0)
+
+    def test_contract_range(self):
+        cursor = sqlite_cursor(self, contratos=600, anomaly_rate=1.0)
+        todos = run_pushdown(cursor, dialect="sqlite")
+        faixa = run_pushdown(cursor, after_id=100, until_id=300, dialect="sqlite")
+        self.assertEqual(faixa, {c: vs for c, vs in todos.items() if 100 < c <= 300})
+        self.assertTrue(faixa)
+
+    def test_dialects(self):
+        self.assertIn("::date", compile_pushdown_query("postgres"))
+        self.assertNotIn("::", compile_pushdown_query("sqlite"))
+        self.assertEqual(compile_pushdown_query("postgres", until=True).count("%s"), 2)
+        self.assertEqual(set(DIALECTS), {"postgres", "sqlite"})
+        with self.assertRaises(ValueError):
+            compile_pushdown_query("mysql")
+
+
+if __name__ == "__main__":
+    unittest.main()
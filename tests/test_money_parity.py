@@ -0,0 +1,152 @@
+"""
+Paridade Money (centavos int) x Decimal: o mesmo dataset sintético, hidratado uma vez com
+to_money e outra com Decimal puro, precisa produzir resultados idênticos (status e texto)
+em todas as regras de Empenho, Liquidação e Pagamento.
+"""
+import unittest
+import random
+from decimal import Decimal
+from datetime import date, timedelta
+from collections import defaultdict
+
+# Adjust path
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from clientside.transaction.transaction_pagamento import PaymentTransaction
+from clientside.domains.empenho import EMPENHO_CONTEXT_RULES
+from clientside.domains.liquidação import _validate_empenho_rules_single_pass, check_nfe_aggregate_limit
+from clientside.domains.pagamento import PAGAMENTO_VALIDATION_RULES, build_validation_fragment
+from views.etl_fullpipe import validate_batch
+
+DOC = "12345678000199"
+
+
+def _valor(rng: random.Random, cents: int) -> Decimal:
+    """Mesmo valor em representações diferentes: 2 casas, sem casas, 1 casa ou (raro) 3 casas."""
+    r = rng.random()
+    if r < 0.05:
+        return Decimal(cents * 10 + rng.randint(1, 9)) / 1000
+    if r < 0.15 and cents % 100 == 0:
+        return Decimal(cents // 100)
+    if r < 0.20 and cents % 10 == 0:
+        return Decimal(cents // 10).scaleb(-1)
+    return Decimal(cents).scaleb(-2)
+
+
+def synthetic_dataset(seed: int, n: int, money: bool):
+    """Maps no formato dos loaders (batch_load_related_data). money=True aplica to_money como a hidratação."""
+    rng = random.Random(seed)
+    conv = to_money if money else (lambda v: v)
+    ent = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+    forn = Fornecedor(2, "Forn", DOC)
+    contratos, empenhos, liquidacoes, nfes, pagamentos = [], defaultdict(list), defaultdict(list), {}, defaultdict(list)
+
+    for c in range(1, n + 1):
+        data_contrato = date(2023, 1, 1) + timedelta(days=rng.randint(0, 60))
+        teto_contrato = rng.randint(10**6, 10**7)
+        contrato = Contrato(c, conv(_valor(rng, teto_contrato)), data_contrato, "Obj", 1, 2)
+        contratos.append(contrato)
+        pago_contrato = 0
+        for e in range(rng.randint(1, 3)):
+            id_emp = f"{c}NE{e}"
+            data_emp = data_contrato + timedelta(days=rng.randint(0, 10))
+            emp_cents = rng.randint(10**5, teto_contrato // 2)
+            empenhos[c].append(Empenho(id_emp, 2023, data_emp, DOC, "Forn", conv(_valor(rng, emp_cents)), 1, c))
+            liq_total = 0
+            for l in range(rng.randint(1, 4)):
+                cents = rng.randint(100, emp_cents // 3)
+                if rng.random() < 0.05:
+                    cents = emp_cents - liq_total + rng.choice((0, 1))  # fecha exatamente no limite ou 1 centavo acima
+                liq_total += cents
+                chave = f"K{c}-{e}-{l}"
+                data_liq = data_emp + timedelta(days=rng.randint(1, 30))
+                liquidacoes[id_emp].append(LiquidacaoNotaFiscal(c * 100 + e * 10 + l, chave, data_liq, conv(_valor(rng, cents)), id_emp))
+                nfe_cents = cents - rng.choice((0, 0, 0, 1))
+                nfes[chave] = Nfe(c * 100 + e * 10 + l, chave, str(l), data_liq, DOC, conv(_valor(rng, nfe_cents)))
+            pago = 0
+            for k in range(rng.randint(0, 3)):
+                cents = rng.randint(1, max(1, liq_total // 3))
+                r = rng.random()
+                if r < 0.05:
+                    cents = liq_total - pago + rng.choice((0, 1))
+                elif r < 0.08:
+                    cents = -cents if rng.random() < 0.5 else 0
+                pago += cents
+                pago_contrato += cents
+                pagamentos[id_emp].append(Pagamento(f"{id_emp}P{k}", id_emp, data_emp + timedelta(days=40), conv(_valor(rng, cents))))
+        if rng.random() < 0.03 and pago_contrato > 0:
+            contrato.valor = conv(_valor(rng, pago_contrato - rng.choice((0, 1))))  # Σ pago no limite do contrato
+
+    return contratos, {1: ent}, {2: forn}, dict(empenhos), dict(liquidacoes), nfes, dict(pagamentos)
+
+
+def outcome(res):
+    return ("ok", None) if res.is_ok else ("err", res.error)
+
+
+def rule_outcomes(dataset):
+    """Resultado de CADA regra (não só da primeira que falha), por contrato e estágio."""
+    contratos, entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos = dataset
+    out = []
+    for tx in EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos):
+        emp_tx = tx.value
+        out.append([outcome(regra(emp_tx)) for regra in EMPENHO_CONTEXT_RULES])
+        liq_tx = LiquidacaoTransaction.build_from_batch(emp_tx, liquidacoes, nfes).value
+        out.append([outcome(_validate_empenho_rules_single_pass(liq_tx, emp, list(itens.values())))
+                    for emp in emp_tx.empenhos.values()
+                    for itens in [liq_tx.itens_liquidados.get(emp.id_empenho)] if itens])
+        out.append(outcome(check_nfe_aggregate_limit(liq_tx)))
+        frag = build_validation_fragment(PaymentTransaction.build_from_batch(liq_tx, pagamentos).value)
+        out.append([outcome(regra(frag)) for regra in PAGAMENTO_VALIDATION_RULES])
+    return out
+
+
+class TestMoneyParity(unittest.TestCase):
+
+    N = 1500
+
+    @classmethod
+    def setUpClass(cls):
+        cls.money = synthetic_dataset(seed=2024, n=cls.N, money=True)
+        cls.decimal = synthetic_dataset(seed=2024, n=cls.N, money=False)
+
+    def test_dataset_uses_both_paths(self):
+        valores = [l.valor for ls in self.money[4].values() for l in ls]
+        self.assertTrue(any(type(v) is Money for v in valores))
+        self.assertTrue(any(type(v) is Decimal for v in valores))
+        self.assertFalse(any(type(l.valor) is Money for ls in self.decimal[4].values() for l in ls))
+
+    def test_every_rule_outcome_identical(self):
+        money, decimal = rule_outcomes(self.money), rule_outcomes(self.decimal)
+        self.assertEqual(money, decimal)
+        # O dataset exercita as regras financeiras nos dois sentidos
+        self.assertTrue(any(isinstance(r, tuple) and r[0] == "err" for r in decimal))
+
+    def test_pipeline_outcomes_identical(self):
+        for engine in ("scalar", "columnar"):
+            with self.subTest(pag_engine=engine):
+                res = []
+                for contratos, entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos in (self.money, self.decimal):
+                    txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+                    res.append(validate_batch(txs, liquidacoes, nfes, pagamentos, engine))
+                self.assertEqual(res[0], res[1])
+                self.assertTrue(any(err for *_, err in res[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+from decimal import Decimal
+from datetime import date
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money
+from models.contrato import Contrato
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from clientside.domains.subdomains.nfe_index import GlobalNfeIndex
+
+FORNECEDORES = {1: Fornecedor(1, "A", "111"), 2: Fornecedor(2, "B", "222")}
+
+
+def batch(usos, nfes=None):
+    """usos: [(id_contrato, id_fornecedor, chave, valor)] -> (contratos, related) no formato do loader."""
+    contratos, empenhos, liquidacoes = {}, {}, {}
+    for n, (id_contrato, id_fornecedor, chave, valor) in enumerate(usos):
+        contratos.setdefault(id_contrato, Contrato(id_contrato, Decimal("1000.00"), date(2024, 1, 1), "Obj", 1, id_fornecedor))
+        id_emp = f"E{id_contrato}"
+        empenhos.setdefault(id_contrato, [Empenho(id_emp, 2024, date(2024, 1, 2), "111", "A", Decimal("500.00"), 1, id_contrato)])
+        liquidacoes.setdefault(id_emp, []).append(
+            LiquidacaoNotaFiscal(id_contrato * 100 + n, chave, date(2024, 2, 1), Money.from_cents(valor), id_emp))
+    nfes = nfes or {}
+    return list(contratos.values()), ({}, FORNECEDORES, empenhos, liquidacoes, nfes, {}, {})
+
+
+def nfe(chave, cents):
+    return Nfe(1, chave, "1", date(2024, 1, 30), "111", Money.from_cents(cents))
+
+
+class TestGlobalNfeIndex(unittest.TestCase):
+
+    def test_cross_contract_over_liquidation_detected_across_batches(self):
+        index = GlobalNfeIndex()
+        nfes = {"K1": nfe("K1", 10000)}
+        self.assertEqual(index.add_batch(*batch([(1, 1, "K1", 6000)], nfes)), [])
+        alerts = index.add_batch(*batch([(2, 1, "K1", 5000)], nfes))
+        self.assertEqual([(a.chave_danfe, a.motivo, a.contratos) for a in alerts], [("K1", "sobre-liquidada", (1, 2))])
+        self.assertIn("excede valor da NFe", alerts[0].mensagem())
+        self.assertIn("110.00", alerts[0].mensagem())
+        # alertado uma vez por motivo
+        self.assertEqual(index.add_batch(*batch([(3, 1, "K1", 100)], nfes)), [])
+        self.assertEqual(index.entries["K1"].n_contratos, 3)
+
+    def test_within_limit_shared_nfe_is_not_alerted(self):
+        index = GlobalNfeIndex()
+        nfes = {"K1": nfe("K1", 10000)}
+        self.assertEqual(index.add_batch(*batch([(1, 1, "K1", 5000), (2, 1, "K1", 5000)], nfes)), [])
+        self.assertEqual(index.compartilhadas(), 1)
+
+    def test_single_contract_over_limit_is_left_to_domain_rule(self):
+        index = GlobalNfeIndex()
+        self.assertEqual(index.add_batch(*batch([(1, 1, "K1", 9000), (1, 1, "K1", 9000)], {"K1": nfe("K1", 10000)})), [])
+        self.assertEqual(index.entries["K1"].n_contratos, 1)
+
+    def test_distinct_suppliers(self):
+        index = GlobalNfeIndex()
+        alerts = index.add_batch(*batch([(1, 1, "K1", 10), (2, 2, "K1", 10)]))   # NFe fora do batch: só reúso
+        self.assertEqual([a.motivo for a in alerts], ["fornecedores distintos"])
+        self.assertEqual(alerts[0].fornecedores, ("111", "222"))
+
+    def test_bounded_keys_evict_single_use_first(self):
+        index = GlobalNfeIndex(max_keys=10)
+        index.add_batch(*batch([(1, 1, "SHARED", 10), (2, 1, "SHARED", 10)]))
+        for c in range(3, 40):
+            index.add_batch(*batch([(c, 1, f"K{c}", 10)]))
+        self.assertLessEqual(len(index), 10)
+        self.assertIn("SHARED", index.entries)
+        self.assertGreater(index.evicted, 0)
+        self.assertEqual(len(index) + index.evicted, 38)
+
+
+if __name__ == "__main__":
+    unittest.main()
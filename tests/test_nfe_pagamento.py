@@ -0,0 +1,181 @@
+import unittest
+import os
+import re
+import sys
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.nfe_pagamento import NfePagamento
+from models.pagamento import Pagamento
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from clientside.transaction.transaction_pagamento import PaymentTransaction
+from clientside.domains.subdomains.nfe_integrity import check_nfe_pagamento_sum, check_nfe_pagamento_consistency
+from clientside.domains.pagamento import (
+    Valida, PAGAMENTO_VALIDATION_RULES, PAGAMENTO_RULES_REGISTRY, check_nfe_pagamento_consistente, set_nfe_pagamento_check,
+    nfe_pagamento_check_enabled,
+)
+from clientside.domains.pagamento_columnar import valida_batch
+from utils.etl_common import batch_load_related_data
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+CONTRATO = Contrato(1, Money.from_cents(10**7), date(2024, 1, 1), "Obj", 1, 2)
+
+
+def nfe(chave, cents):
+    return Nfe(1, chave, "1", date(2024, 1, 30), "111", Money.from_cents(cents))
+
+
+def nfe_pag(id_, chave, cents):
+    return NfePagamento(id_, chave, "01", Money.from_cents(cents))
+
+
+def build_tx(nfe_pagamentos, total_k2=30000):
+    """Empenho E1 liquida K1 duas vezes (parcial) e K2; E2 liquida K3 mas não tem pagamento."""
+    empenhos = {1: [Empenho("E1", 2024, date(2024, 1, 2), "111", "Forn", Money.from_cents(10**6), 1, 1),
+                    Empenho("E2", 2024, date(2024, 1, 2), "111", "Forn", Money.from_cents(10**6), 1, 1)]}
+    liquidacoes = {
+        "E1": [LiquidacaoNotaFiscal(1, "K1", date(2024, 2, 1), Money.from_cents(5000), "E1"),
+               LiquidacaoNotaFiscal(2, "K1", date(2024, 2, 2), Money.from_cents(5000), "E1"),
+               LiquidacaoNotaFiscal(3, "K2", date(2024, 2, 3), Money.from_cents(total_k2), "E1")],
+        "E2": [LiquidacaoNotaFiscal(4, "K3", date(2024, 2, 4), Money.from_cents(100), "E2")],
+    }
+    nfes = {"K1": nfe("K1", 10000), "K2": nfe("K2", total_k2), "K3": nfe("K3", 100)}
+    pagamentos = {"E1": [Pagamento("P1", "E1", date(2024, 3, 1), Money.from_cents(100)),
+                         Pagamento("P2", "E1", date(2024, 3, 2), Money.from_cents(100))]}
+    emp_tx = EmpenhoTransaction.build_from_batch([CONTRATO], {1: ENT}, {2: FORN}, empenhos)[0].value
+    liq_tx = LiquidacaoTransaction.build_from_batch(emp_tx, liquidacoes, nfes).value
+    return PaymentTransaction.build_from_batch(liq_tx, pagamentos, nfe_pagamentos).value
+
+
+class TestNfePagamentoSum(unittest.TestCase):
+
+    def test_sum_matches(self):
+        self.assertTrue(check_nfe_pagamento_sum(nfe("K1", 10000), [nfe_pag("a", "K1", 4000), nfe_pag("b", "K1", 6000)]).is_ok)
+
+    def test_sum_diverges(self):
+        res = check_nfe_pagamento_sum(nfe("K1", 10000), [nfe_pag("a", "K1", 4000)])
+        self.assertEqual(res.error, "[FRAUDE!] Soma NfePagamentos (40.00) ≠ NFe.valor_total (100.00) - NFe: K1")
+
+    def test_without_nfe_pagamentos_passes(self):
+        self.assertTrue(check_nfe_pagamento_sum(nfe("K1", 10000), []).is_ok)
+        self.assertTrue(check_nfe_pagamento_sum(None, [nfe_pag("a", "K1", 1)]).is_ok)
+
+    def test_preloaded_list_skips_database(self):
+        with patch.object(NfePagamento, "get_by_FK_chave_nfe") as fetch:
+            res = check_nfe_pagamento_consistency(nfe("K1", 10000), [nfe_pag("a", "K1", 1)])
+        fetch.assert_not_called()
+        self.assertTrue(res.is_err)
+
+
+class TestPagamentoItemNfePagamentos(unittest.TestCase):
+
+    def test_items_get_nfe_pagamentos_of_their_empenho(self):
+        mapa = {"K1": [nfe_pag("a", "K1", 10000)], "K2": [nfe_pag("b", "K2", 30000)], "K3": [nfe_pag("c", "K3", 100)]}
+        tx = build_tx(mapa)
+        items = tx.pagamentos_por_empenho["E1"]
+        # K1 liquidada duas vezes no empenho entra uma vez; K3 é de E2 (sem pagamento)
+        self.assertEqual([np_.id for np_ in items[0].nfe_pagamentos], ["a", "b"])
+        self.assertIs(items[0].nfe_pagamentos, items[1].nfe_pagamentos)
+
+    def test_without_map_keeps_empty(self):
+        self.assertEqual(build_tx(None).pagamentos_por_empenho["E1"][0].nfe_pagamentos, ())
+
+
+class TestNfePagamentoRule(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(set_nfe_pagamento_check, nfe_pagamento_check_enabled())
+        os.environ.pop("NFE_PAGAMENTO_CHECK", None)
+
+    def divergente(self):
+        return build_tx({"K1": [nfe_pag("a", "K1", 10000)], "K2": [nfe_pag("b", "K2", 100)]})
+
+    def test_off_by_default(self):
+        set_nfe_pagamento_check(False)
+        self.assertIn(check_nfe_pagamento_consistente, PAGAMENTO_VALIDATION_RULES)      # lista estática
+        self.assertNotIn(check_nfe_pagamento_consistente, PAGAMENTO_RULES_REGISTRY.active)
+        self.assertTrue(Valida(self.divergente()).is_ok)
+
+    def test_switched_on_uses_loaded_nfe_pagamentos(self):
+        set_nfe_pagamento_check(True)
+        set_nfe_pagamento_check(True)
+        self.assertEqual(PAGAMENTO_RULES_REGISTRY.active.count(check_nfe_pagamento_consistente), 1)
+        self.assertEqual(PAGAMENTO_VALIDATION_RULES.count(check_nfe_pagamento_consistente), 1)
+        self.assertEqual(os.environ["NFE_PAGAMENTO_CHECK"], "1")
+        with patch.object(NfePagamento, "get_by_FK_chave_nfe") as fetch:
+            res = Valida(self.divergente())
+            ok = Valida(build_tx({"K1": [nfe_pag("a", "K1", 4000), nfe_pag("b", "K1", 6000)]}))
+        fetch.assert_not_called()
+        self.assertIn("Soma NfePagamentos (1.00) ≠ NFe.valor_total (300.00) - NFe: K2", res.error)
+        self.assertTrue(ok.is_ok)
+
+    def test_columnar_engine_same_outcome(self):
+        set_nfe_pagamento_check(True)
+        txs = [self.divergente(), build_tx({})]
+        self.assertEqual([r.is_err for r in valida_batch(txs)], [True, False])
+        self.assertEqual(valida_batch(txs)[0].error, Valida(txs[0]).error)
+
+
+class FakeCursor:
+    """SELECT ... = ANY(%s) sobre tabelas em memória (só as colunas usadas pela hidratação)."""
+
+    TABLES = {
+        "entidade": (("id_entidade", "nome", "estado", "municipio", "cnpj"), [(1, "E", "SP", "SP", "1")]),
+        "fornecedor": (("id_fornecedor", "nome", "documento"), [(2, "F", "111")]),
+        "empenho": (("id_empenho", "ano", "data_empenho", "cpf_cnpj_credor", "credor", "valor", "id_entidade", "id_contrato"),
+                    [("E1", 2024, date(2024, 1, 2), "111", "F", Decimal("10.00"), 1, 1)]),
+        "liquidacao_nota_fiscal": (("id_liquidacao_empenhonotafiscal", "chave_danfe", "data_emissao", "valor", "id_empenho"),
+                                   [(1, "K1", date(2024, 2, 1), Decimal("5.00"), "E1"),
+                                    (2, "K9", date(2024, 2, 1), Decimal("5.00"), "E1")]),
+        "nfe": (("id", "chave_nfe", "numero_nfe", "data_hora_emissao", "cnpj_emitente", "valor_total_nfe"),
+                [(1, "K1", "1", date(2024, 1, 30), "111", Decimal("5.00"))]),
+        "pagamento": (("id_pagamento", "id_empenho", "datapagamentoempenho", "valor"), []),
+        "nfe_pagamento": (("id", "chave_nfe", "tipo_pagamento", "valor_pagamento"),
+                          [("NP-1", "K1", "01", Decimal("2.00")), ("NP-2", "K1", "03", Decimal("3.00")),
+                           ("NP-9", "K9", "01", Decimal("1.00"))]),
+    }
+    KEYS = {"empenho": 7, "liquidacao_nota_fiscal": 4, "nfe": 1, "pagamento": 1, "nfe_pagamento": 1}
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=None):
+        table = re.search(r"FROM (\w+)", query).group(1)
+        self.executed.append(table)
+        cols, rows = self.TABLES[table]
+        wanted = set(params[0])
+        self.description = [(c,) for c in cols]
+        self._rows = [r for r in rows if r[self.KEYS.get(table, 0)] in wanted]
+
+    def fetchall(self):
+        return self._rows
+
+
+class TestClassicLoader(unittest.TestCase):
+
+    def test_nfe_pagamentos_map_in_one_query(self):
+        cursor = FakeCursor()
+        related = batch_load_related_data(cursor, [CONTRATO])
+        self.assertEqual(len(related), 7)
+        self.assertEqual(cursor.executed.count("nfe_pagamento"), 1)
+        # só NFes carregadas: K9 não existe em nfe
+        self.assertEqual({k: [np_.id for np_ in v] for k, v in related[6].items()}, {"K1": ["NP-1", "NP-2"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import io
+import os
+import sys
+import sqlite3
+import tempfile
+from concurrent.futures import Future
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic import SqliteConnection, SqliteCursor, SyntheticConfig, SyntheticDataset, load_sqlite
+from utils.results_sink import read_jsonl
+from views.etl_fullpipe import compute_shards, new_stats, run_full_pipeline, run_parallel_pipeline, run_shard
+
+
+def sparse_contratos(ids):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE contrato (id_contrato INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO contrato VALUES (?)", [(i,) for i in ids])
+    return conn
+
+
+class InlineExecutor:
+    """ProcessPoolExecutor no processo atual: cada submit roda na hora (merge do pai testado sem spawn)."""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.shutdown_args = None
+        InlineExecutor.last = self
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_args = (wait, cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestComputeShards(unittest.TestCase):
+
+    def test_ranges_are_contiguous_and_cover_every_id(self):
+        ids = sorted({(i * 7919) % 100_003 + 1 for i in range(1, 1000)})   # esparsos, fora de ordem na carga
+        conn = sparse_contratos(ids)
+        self.addCleanup(conn.close)
+        for n_shards in (1, 3, 8):
+            with self.subTest(n_shards=n_shards):
+                shards = compute_shards(SqliteCursor(conn), n_shards)
+                self.assertEqual(len(shards), n_shards)
+                self.assertEqual(shards[0][0], ids[0] - 1)
+                self.assertEqual(shards[-1][1], ids[-1])
+                for (_, hi), (lo, _) in zip(shards, shards[1:]):
+                    self.assertEqual(lo, hi)              # (a, b] seguido de (b, c]: sem buraco nem overlap
+                por_shard = [[i for i in ids if lo < i <= hi] for lo, hi in shards]
+                self.assertEqual(sum(por_shard, []), ids)
+                self.assertLessEqual(max(map(len, por_shard)) - min(map(len, por_shard)), 1)   # ntile
+
+    def test_empty_table(self):
+        conn = sparse_contratos([])
+        self.addCleanup(conn.close)
+        self.assertEqual(compute_shards(SqliteCursor(conn), 4), [])
+
+    def test_more_shards_than_contracts(self):
+        conn = sparse_contratos([5, 9])
+        self.addCleanup(conn.close)
+        self.assertEqual(compute_shards(SqliteCursor(conn), 4), [(4, 5), (5, 9)])
+
+
+class TestShardMerge(unittest.TestCase):
+    N = 600
+
+    def setUp(self):
+        self.conn = load_sqlite(SyntheticDataset(SyntheticConfig(contratos=self.N, fornecedores=40, anomaly_rate=0.2)))
+        self.addCleanup(self.conn.close)
+        patcher = patch("views.etl_fullpipe.get_db_connection", side_effect=lambda: SqliteConnection(self.conn))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def run_quiet(self, fn, **kwargs):
+        """Executa o pipeline capturando os argumentos do print_summary (stats, errors, processados, batches)."""
+        with patch("views.etl_fullpipe.print_summary") as summary, redirect_stdout(io.StringIO()):
+            fn(**kwargs)
+        return summary.call_args.args[:4]
+
+    def test_run_shard_counters(self):
+        shards = compute_shards(SqliteCursor(self.conn), 2)
+        parts = [run_shard(shard, batch_size=64, results=True) for shard in shards]
+        self.assertEqual([p["shard"] for p in parts], shards)
+        for part, (lo, hi) in zip(parts, shards):
+            self.assertEqual(part["processed"], hi - lo)
+            self.assertEqual(part["batches"], -(-(hi - lo) // 64))
+            self.assertEqual([r[0] for r in part["results"]], list(range(lo + 1, hi + 1)))
+            self.assertEqual(part["stats"]["emp_ok"] + part["stats"]["emp_err"], part["processed"])
+            self.assertEqual(sum(part["errors"].values()), part["processed"] - part["stats"]["pag_ok"])
+        self.assertEqual(sum(p["processed"] for p in parts), self.N)
+
+    def test_two_shards_merge_to_single_pass(self):
+        sequencial = os.path.join(self.tmp.name, "seq.jsonl")
+        paralelo = os.path.join(self.tmp.name, "par.jsonl")
+        stats, errors, processed, batches = self.run_quiet(
+            run_full_pipeline, batch_size=50, quiet=True, results_path=sequencial)
+        with patch("concurrent.futures.ProcessPoolExecutor", InlineExecutor), \
+                patch("views.etl_fullpipe.close_pool"):
+            p_stats, p_errors, p_processed, p_batches = self.run_quiet(
+                run_parallel_pipeline, workers=2, shards_per_worker=1, batch_size=50, quiet=True,
+                results_path=paralelo)
+        self.assertEqual((p_stats, dict(p_errors), p_processed), (stats, dict(errors), processed))
+        self.assertEqual(processed, self.N)
+        self.assertGreater(sum(errors.values()), 0)
+        self.assertEqual(p_batches, batches)        # 600 = 2 shards de 300 = 6 batches de 50 cada
+        self.assertEqual(sorted(read_jsonl(paralelo), key=lambda r: r["id_contrato"]), read_jsonl(sequencial))
+        self.assertNotEqual(stats, new_stats())
+
+    def test_failed_shard_closes_sink_and_store_and_cancels_pending(self):
+        shards = compute_shards(SqliteCursor(self.conn), 2)
+
+        def shard_fn(shard, *args):
+            if shard != shards[0]:
+                raise ConnectionError("worker perdeu a conexão")
+            return run_shard(shard, 100, results=True)
+
+        store, sink = MagicMock(), MagicMock()
+        with patch("concurrent.futures.ProcessPoolExecutor", InlineExecutor), \
+                patch("views.etl_fullpipe.close_pool"), \
+                patch("views.etl_fullpipe.run_shard", side_effect=shard_fn), \
+                patch("views.etl_fullpipe.open_audit_store", return_value=(store, "regras", {})), \
+                patch("views.etl_fullpipe.open_sink", return_value=sink), \
+                redirect_stdout(io.StringIO()):
+            with self.assertRaises(ConnectionError):
+                run_parallel_pipeline(workers=2, shards_per_worker=1, batch_size=100, quiet=True,
+                                      incremental=True, results_path="par.jsonl")
+        self.assertEqual(InlineExecutor.last.shutdown_args, (False, True))
+        sink.close.assert_called_once()
+        store.close.assert_called_once()
+        store.prune_unseen.assert_not_called()        # run incompleto não poda nem grava marca d'água
+        store.set_watermark.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from decimal import Decimal
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.pagamento import Pagamento
+from utils.results_sink import (
+    RESULT_FIELDS, JsonlSink, ParquetSink, ResultsTable, SqliteSink, contract_result, error_code, open_sink,
+    read_jsonl,
+)
+from views.etl_fullpipe import run_full_pipeline
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def contrato(id_contrato, valor="1000.00"):
+    return Contrato(id_contrato, Decimal(valor), date(2024, 1, 1), "Obj", 1, 2)
+
+
+def related():
+    empenhos = {1: [Empenho("E1", 2024, date(2024, 1, 2), "111", "Forn", Money.from_cents(10000), 1, 1),
+                    Empenho("E2", 2024, date(2024, 1, 2), "111", "Forn", Money.from_cents(5050), 1, 1)]}
+    pagamentos = {"E1": [Pagamento("P1", "E1", date(2024, 3, 1), Money.from_cents(2500)),
+                         Pagamento("P2", "E1", date(2024, 3, 2), Money.from_cents(1))]}
+    return {1: ENT}, {2: FORN}, empenhos, {}, {}, pagamentos, {}
+
+
+class TestContractResult(unittest.TestCase):
+
+    def test_amounts_in_cents(self):
+        row = dict(zip(RESULT_FIELDS, contract_result(contrato(1), ("✓", "✓", "✓", ""), related())))
+        self.assertEqual(row["valor_contrato"], 100000)
+        self.assertEqual((row["total_empenhado"], row["total_liquidado"], row["total_pago"]), (15050, 0, 2501))
+        self.assertEqual((row["estagio_erro"], row["erro_codigo"], row["erro"]), (None, "", ""))
+
+    def test_failed_stage_and_error_code(self):
+        err = "Data do pagamento (2024-01-01) anterior à liquidação (2024-02-01)"
+        row = dict(zip(RESULT_FIELDS, contract_result(contrato(1), ("✓", "✓", "✗", err))))
+        self.assertEqual(row["estagio_erro"], "pagamento")
+        self.assertEqual(row["erro_codigo"], "Data do pagamento")
+        self.assertEqual(error_code(err), err.split("(")[0].strip())
+        # sem grafo carregado (incremental: outcome reaproveitado) os totais ficam vazios
+        self.assertIsNone(row["total_pago"])
+        self.assertEqual(dict(zip(RESULT_FIELDS, contract_result(contrato(1), ("B", ".", ".", "x"))))["estagio_erro"],
+                         "empenho")
+
+
+class TestJsonlSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "out", "results.jsonl")
+
+    def test_buffered_writes(self):
+        sink = JsonlSink(self.path, buffer_rows=3)
+        for i in range(1, 6):
+            sink.write(contract_result(contrato(i), ("✓", "✓", "✓", "")))
+        self.assertEqual(sink.rows, 3)                  # um bloco gravado, 2 linhas pendentes
+        sink.close()
+        rows = read_jsonl(self.path)
+        self.assertEqual([r["id_contrato"] for r in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(set(rows[0]), set(RESULT_FIELDS))
+
+    def test_open_sink_by_extension(self):
+        with open_sink(self.path) as sink:
+            self.assertIsInstance(sink, JsonlSink)
+            sink.write(contract_result(contrato(1), ("✓", "✗", ".", "Soma (1) ≠ NFe")))
+        self.assertEqual(read_jsonl(self.path)[0]["erro"], "Soma (1) ≠ NFe")
+        with self.assertRaises(ValueError):
+            open_sink(self.path, fmt="csv")
+
+    def test_parquet(self):
+        path = os.path.join(self.tmp.name, "results.parquet")
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            with self.assertRaises(RuntimeError):
+                open_sink(path)
+            return
+        with open_sink(path, buffer_rows=2) as sink:
+            self.assertIsInstance(sink, ParquetSink)
+            for i in range(1, 4):
+                sink.write(contract_result(contrato(i), ("✓", "✓", "✓", ""), related()))
+        table = pq.read_table(path)
+        self.assertEqual(table.column("id_contrato").to_pylist(), [1, 2, 3])
+        self.assertEqual(pq.ParquetFile(path).num_row_groups, 2)
+
+
+class TestSqliteResultsTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "out", "contratos.sqlite3")
+
+    def write(self, rows):
+        with open_sink(self.path, buffer_rows=4) as sink:
+            self.assertIsInstance(sink, SqliteSink)
+            sink.write_many(rows)
+        return sink
+
+    def test_summary_pages_and_lookup(self):
+        outcomes = {1: ("✓", "✓", "✓", ""), 2: ("✓", "✗", ".", "Soma (1) excede"), 3: ("✗", ".", ".", "Credor (x)"),
+                    4: ("✓", "✓", "✓", ""), 5: ("✓", "✓", "✗", "Data (y)")}
+        self.assertEqual(self.write(contract_result(contrato(i), o, related()) for i, o in outcomes.items()).rows, 5)
+        with ResultsTable(self.path) as table:
+            resumo = table.summary()
+            self.assertEqual((resumo["contratos"], resumo["ok"]), (5, 2))
+            self.assertEqual(resumo["por_estagio"]["liquidacao"]["contratos"], 1)
+            self.assertEqual(resumo["por_estagio"][None]["total_pago"], 2501)   # related(): só o contrato 1 tem empenhos
+            self.assertIsNotNone(resumo["atualizado_em"])
+            self.assertEqual([r["id_contrato"] for r in table.page(0, 2)], [1, 2])
+            self.assertEqual([r["id_contrato"] for r in table.page(2, 2)], [3, 4])
+            self.assertEqual([r["id_contrato"] for r in table.page(0, 10, situacao="erro")], [2, 3, 5])
+            self.assertEqual([r["id_contrato"] for r in table.page(0, 10, estagio="pagamento")], [5])
+            self.assertEqual(table.count("ok"), 2)
+            self.assertEqual(table.get(3)["erro"], "Credor (x)")
+            self.assertIsNone(table.get(99))
+            self.assertEqual(table.top_errors(1)[0][2], 1)
+            with self.assertRaises(ValueError):
+                table.page(estagio="nfe")
+
+    def test_upsert_keeps_totals_of_reused_outcomes(self):
+        self.write([contract_result(contrato(1), ("✓", "✓", "✓", ""), related()),
+                    contract_result(contrato(2), ("✓", "✓", "✓", ""), related())])
+        # run incremental: contrato 1 revalidado com erro, sem grafo carregado (totais None)
+        self.write([contract_result(contrato(1), ("✓", "✗", ".", "Soma (2) excede"))])
+        with ResultsTable(self.path) as table:
+            linha = table.get(1)
+            self.assertEqual((linha["liq"], linha["estagio_erro"], linha["total_pago"]), ("✗", "liquidacao", 2501))
+            self.assertEqual(table.summary()["contratos"], 2)
+
+    def test_complete_run_prunes_deleted_contracts(self):
+        outcomes = {1: ("✓", "✓", "✓", ""), 2: ("✓", "✗", ".", "Soma (1) excede"), 3: ("✓", "✓", "✓", "")}
+
+        def run(ids, complete=True):
+            with open_sink(self.path, buffer_rows=2) as sink:
+                sink.write_many(contract_result(contrato(i), outcomes[i], related()) for i in ids)
+                if complete:
+                    sink.mark_complete()
+            return sink
+
+        self.assertEqual(run([1, 2, 3]).removed, 0)
+        self.assertEqual(run([1, 3], complete=False).removed, 0)   # run interrompido: nada podado
+        with ResultsTable(self.path) as table:
+            self.assertEqual(table.count(), 3)
+        self.assertEqual(run([1, 3]).removed, 1)                   # contrato 2 apagado do banco
+        with ResultsTable(self.path) as table:
+            self.assertIsNone(table.get(2))
+            self.assertEqual([r["id_contrato"] for r in table.page(0, 10)], [1, 3])
+            resumo = table.summary()
+            self.assertEqual((resumo["contratos"], resumo["ok"]), (2, 2))
+            self.assertNotIn("liquidacao", resumo["por_estagio"])
+            self.assertEqual(table.top_errors(), [])
+
+    def test_missing_table(self):
+        with self.assertRaises(FileNotFoundError):
+            ResultsTable(self.path)
+
+
+class TestFullpipeQuiet(unittest.TestCase):
+
+    def run_pipeline(self, ids=(1, 2), **kwargs):
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (len(ids),)
+        batches = [([contrato(i) for i in ids], related())]
+        out = io.StringIO()
+        with patch("views.etl_fullpipe.get_db_connection", return_value=conn), \
+                patch("views.etl_fullpipe.iter_loaded_batches", return_value=iter(batches)), \
+                redirect_stdout(out):
+            run_full_pipeline(batch_size=2, **kwargs)
+        return out.getvalue()
+
+    def test_quiet_skips_per_contract_log_and_writes_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "r.jsonl")
+            quiet = self.run_pipeline(quiet=True, results_path=path)
+            rows = read_jsonl(path)
+        verbose = self.run_pipeline()
+        self.assertIn("CONTRATO #1", verbose)
+        self.assertNotIn("CONTRATO #", quiet)
+        self.assertNotIn("▶", quiet)
+        self.assertIn("RESUMO FINAL", quiet)
+        self.assertEqual([r["id_contrato"] for r in rows], [1, 2])
+        self.assertEqual(rows[0]["total_pago"], 2501)
+        self.assertEqual(rows[1]["total_empenhado"], 0)
+
+    def test_results_table_drops_contract_deleted_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "contratos.sqlite3")
+            self.run_pipeline(quiet=True, results_path=path)
+            out = self.run_pipeline(ids=(1,), quiet=True, results_path=path)   # contrato 2 apagado do banco
+            with ResultsTable(path) as table:
+                self.assertEqual([r["id_contrato"] for r in table.page(0, 10)], [1])
+                self.assertEqual(table.summary()["contratos"], 1)
+        self.assertIn("1 removidos", out)
+
+    def test_failure_mid_run_still_closes_sink_and_connection(self):
+        def batches():
+            yield [contrato(1), contrato(2)], related()
+            raise ConnectionError("conexão perdida")
+
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (4,)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "r.jsonl")
+            with patch("views.etl_fullpipe.get_db_connection", return_value=conn), \
+                    patch("views.etl_fullpipe.iter_loaded_batches", return_value=batches()), \
+                    patch("views.etl_fullpipe.close_async_loader") as close_async_loader, \
+                    redirect_stdout(io.StringIO()):
+                with self.assertRaises(ConnectionError):
+                    run_full_pipeline(batch_size=2, quiet=True, results_path=path)
+            rows = read_jsonl(path)
+        self.assertEqual([r["id_contrato"] for r in rows], [1, 2])   # buffer do sink descarregado no close
+        conn.cursor.return_value.close.assert_called_once()
+        conn.close.assert_called_once()
+        close_async_loader.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
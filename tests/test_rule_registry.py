@@ -0,0 +1,159 @@
+"""
+RuleRegistry: medição por regra e ordem adaptativa (rejeição por custo).
+No modo adaptive o erro reportado é o mesmo da ordem declarada.
+"""
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from clientside.domains.subdomains import rule_registry
+from clientside.domains.subdomains.rule_registry import RuleRegistry, RuleStats, diff_all
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from views.etl_fullpipe import validate_batch
+from tests.test_money_parity import synthetic_dataset
+
+
+def regra_ok(x):
+    return Result.ok(x)
+
+
+def regra_a(x):
+    return Result.err("erro A")
+
+
+def regra_b(x):
+    return Result.err("erro B")
+
+
+def regra_quebra_sem_a(x):
+    return Result.ok(x["a"])
+
+
+def regra_tem_a(x):
+    return Result.ok(x) if "a" in x else Result.err("sem a")
+
+
+def com_stats(registry, **stats):
+    for name, (calls, failures, total_ns) in stats.items():
+        registry.stats[name] = RuleStats(calls, failures, total_ns)
+    return registry
+
+
+class TestRuleRegistry(unittest.TestCase):
+
+    def test_fixed_without_profile_does_not_measure(self):
+        registry = RuleRegistry("t", [regra_ok, regra_a, regra_b])
+        self.assertEqual(registry.run(1).error, "erro A")
+        self.assertEqual(registry.run(1).error, "erro A")
+        self.assertEqual(registry.stats, {})
+        self.assertEqual(RuleRegistry("t", [regra_ok]).run(7).value, 7)
+
+    def test_profile_counts_calls_and_failures(self):
+        registry = RuleRegistry("t", [regra_ok, regra_a, regra_b], profile=True)
+        for _ in range(3):
+            registry.run(1)
+        self.assertEqual(registry.snapshot()["regra_ok"][:2], (3, 0))
+        self.assertEqual(registry.snapshot()["regra_a"][:2], (3, 3))
+        self.assertNotIn("regra_b", registry.stats)
+        self.assertEqual(registry.stats["regra_a"].failure_rate, 1.0)
+
+    def test_order_by_rejection_per_cost(self):
+        registry = com_stats(RuleRegistry("t", [regra_ok, regra_a, regra_b], mode="adaptive"),
+                             regra_ok=(100, 0, 100_000), regra_a=(100, 10, 5_000_000), regra_b=(100, 50, 100_000))
+        self.assertEqual(registry.order(), [2, 0, 1])
+
+    def test_unmeasured_rules_run_first(self):
+        registry = com_stats(RuleRegistry("t", [regra_ok, regra_a], mode="adaptive"), regra_ok=(10, 0, 10))
+        self.assertEqual(registry.order(), [1, 0])
+
+    def test_adaptive_reports_declared_order_error(self):
+        registry = com_stats(RuleRegistry("t", [regra_ok, regra_a, regra_b], mode="adaptive"),
+                             regra_ok=(100, 0, 100_000), regra_a=(100, 1, 1_000_000), regra_b=(100, 90, 1_000))
+        self.assertEqual(registry.run(1).error, "erro A")
+        # regra_ok só entra porque é anterior a regra_a na ordem declarada
+        self.assertEqual(registry.stats["regra_ok"].calls, 101)
+
+    def test_adaptive_fast_reports_first_found(self):
+        registry = com_stats(RuleRegistry("t", [regra_ok, regra_a, regra_b], mode="adaptive-fast"),
+                             regra_ok=(100, 0, 100_000), regra_a=(100, 1, 1_000_000), regra_b=(100, 90, 1_000))
+        self.assertEqual(registry.run(1).error, "erro B")
+        self.assertEqual(registry.stats["regra_ok"].calls, 100)
+
+    def test_exception_out_of_order_falls_back_to_declared(self):
+        registry = com_stats(RuleRegistry("t", [regra_tem_a, regra_quebra_sem_a], mode="adaptive"),
+                             regra_tem_a=(100, 0, 1_000_000), regra_quebra_sem_a=(100, 50, 1_000))
+        self.assertEqual(registry.run({}).error, "sem a")
+        self.assertTrue(registry.run({"a": 1}).is_ok)
+
+    def test_reorders_periodically(self):
+        registry = RuleRegistry("t", [regra_ok, regra_a], mode="adaptive", reorder_every=4)
+        for _ in range(8):
+            registry.run(1)
+        self.assertEqual(registry.order()[0], 1)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            RuleRegistry("t", [regra_ok], mode="random")
+
+    def test_optional_rule_toggled_by_enabled_set(self):
+        regras = [regra_ok, regra_b, regra_a]
+        registry = RuleRegistry("t", regras, mode="adaptive", optional=("regra_b",))
+        self.assertEqual(registry.active, [regra_ok, regra_a])
+        self.assertEqual(registry.run(1).error, "erro A")
+        registry.enable("regra_b")
+        self.assertEqual((registry.mode, registry.active), ("adaptive", regras))
+        self.assertEqual(registry.run(1).error, "erro B")
+        self.assertEqual(sorted(registry.order()), [0, 1, 2])      # ordem adaptativa recalculada sobre active
+        registry.configure("fixed", enabled=())
+        self.assertFalse(registry.is_enabled("regra_b"))
+        self.assertEqual(registry.rules, tuple(regras))          # lista declarada não muda
+        with self.assertRaises(ValueError):
+            registry.enable("regra_a")                            # só regras opcionais
+        with self.assertRaises(ValueError):
+            RuleRegistry("t", regras, optional=("regra_x",))
+
+    def test_diff_between_snapshots(self):
+        before = {"empenho": {"r": (2, 1, 10)}}
+        after = {"empenho": {"r": (5, 1, 40), "s": (1, 0, 3)}}
+        self.assertEqual(diff_all(after, before), {"empenho": {"r": (3, 0, 30), "s": (1, 0, 3)}})
+
+
+class TestAdaptiveParity(unittest.TestCase):
+    """Pipeline completo no dataset sintético: adaptive == fixed, contrato a contrato."""
+
+    def setUp(self):
+        env = patch.dict(os.environ, {})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(rule_registry.configure, "fixed")
+        for registry in rule_registry.REGISTRIES.values():
+            self.addCleanup(registry.reset)
+
+    def outcomes(self, seed):
+        contratos, entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos = \
+            synthetic_dataset(seed, 300, money=True)
+        txs = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+        return validate_batch(txs, liquidacoes, nfes, pagamentos)
+
+    def test_same_reported_errors(self):
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                rule_registry.configure("fixed")
+                esperado = self.outcomes(seed)
+                rule_registry.configure("adaptive")
+                self.assertEqual(self.outcomes(seed), esperado)
+                self.assertTrue(any(err for *_, err in esperado))
+        self.assertTrue(rule_registry.REGISTRIES["empenho"].stats)
+        self.assertTrue(rule_registry.REGISTRIES["pagamento"].stats)
+        self.assertEqual(os.environ["RULE_ORDER"], "adaptive")
+
+
+if __name__ == "__main__":
+    unittest.main()
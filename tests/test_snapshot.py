@@ -0,0 +1,210 @@
+import unittest
+import os
+import sys
+import tempfile
+from decimal import Decimal
+from datetime import date, datetime, timezone, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from utils.etl_common import TABLE_KEYS
+from utils.snapshot import Snapshot, SnapshotWriter, SnapshotError, SnapshotStale, dump_snapshot
+
+
+def build_graph():
+    """Grafo sintético com entidade/fornecedor/NFe compartilhados e valores de borda."""
+    entidades = {i: Entidade(i, f"Ent {i}", "SP", "São Paulo", f"{i:014d}") for i in (1, 2)}
+    fornecedores = {i: Fornecedor(i, f"Forn {i}", None if i == 3 else f"{i:011d}") for i in (1, 2, 3)}
+    contratos, empenhos, liquidacoes, nfes, pagamentos = [], {}, {}, {}, {}
+    valores = ["100.00", "1E+3", "0.005", "-0.00", "12.5", "7"]
+    for c in range(1, 13):
+        contratos.append(Contrato(c * 10, to_money(Decimal(valores[c % len(valores)])), date(2024, 1, c),
+                                  f"Objeto ção {c}", 1 + c % 2, 1 + c % 3 if c != 7 else 99))
+        if c % 4 == 0:
+            continue  # contrato sem empenhos
+        empenhos[c * 10] = []
+        for e in range(c % 3 + 1):
+            id_emp = f"{c}-{e}"
+            empenhos[c * 10].append(Empenho(id_emp, 2024, date(2024, 2, 1) if e else None, "123", "Credor",
+                                            to_money(Decimal(valores[(c + e) % len(valores)])), 1, c * 10))
+            liquidacoes[id_emp] = [
+                LiquidacaoNotaFiscal(c * 100 + e * 10 + k, f"CH{(c + k) % 5}" if k < 2 else None,
+                                     date(2024, 3, k + 1), to_money(Decimal("33.33")), id_emp)
+                for k in range(3)
+            ]
+            if e != 1:
+                pagamentos[id_emp] = [Pagamento(f"P{id_emp}-{k}", id_emp, date(2024, 4, 1), to_money(Decimal("10.10")))
+                                      for k in range(2)]
+    for k in range(4):  # CH4 sem NFe
+        tz = timezone(timedelta(hours=-3)) if k == 2 else None
+        emissao = None if k == 3 else datetime(2024, 1, k + 1, 13, 45, 7, 1234, tzinfo=tz)
+        nfes[f"CH{k}"] = Nfe(k, f"CH{k}", str(k), emissao, "999", to_money(Decimal("50.00")))
+    # CH0: sem NfePagamento; CH4: NfePagamento de chave sem NFe (fica fora do batch)
+    nfe_pagamentos = {f"CH{k}": [NfePagamento(f"NP-{k}-{j}", f"CH{k}", "01" if j else None,
+                                              to_money(Decimal("25.00" if k != 2 else "0.001")))
+                                 for j in range(k % 3 + 1)]
+                      for k in range(1, 5)}
+    return contratos, (entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos)
+
+
+def classic_load(graph, contratos):
+    """Mesma semântica de batch_load_related_data sobre o grafo em memória."""
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = graph
+    emps = {c.id_contrato: empenhos[c.id_contrato] for c in contratos if c.id_contrato in empenhos}
+    ids = [e.id_empenho for lst in emps.values() for e in lst]
+    liqs = {i: liquidacoes[i] for i in ids if i in liquidacoes}
+    chaves = {l.chave_danfe for lst in liqs.values() for l in lst}
+    return (
+        {c.id_entidade: entidades[c.id_entidade] for c in contratos if c.id_entidade in entidades},
+        {c.id_fornecedor: fornecedores[c.id_fornecedor] for c in contratos if c.id_fornecedor in fornecedores},
+        emps,
+        liqs,
+        {k: v for k, v in nfes.items() if k in chaves},
+        {i: pagamentos[i] for i in ids if i in pagamentos},
+        {k: v for k, v in nfe_pagamentos.items() if k in chaves and k in nfes},
+    )
+
+
+def assert_same_values(test, a, b):
+    """Igualdade + mesmo tipo (Money/Decimal/date/datetime) + mesmo str em cada campo."""
+    test.assertEqual(a, b)
+    for x, y in zip(a.__slots__, b.__slots__):
+        va, vb = getattr(a, x), getattr(b, y)
+        test.assertIs(type(va), type(vb), x)
+        test.assertEqual(str(va), str(vb), x)
+
+
+class TestSnapshotRoundTrip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snap")
+        self.contratos, self.graph = build_graph()
+        self.watermark = {t: [1, "1"] for t in TABLE_KEYS}
+        writer = SnapshotWriter()
+        for start in range(0, len(self.contratos), 5):
+            batch = self.contratos[start:start + 5]
+            writer.add_batch(batch, classic_load(self.graph, batch))
+        writer.save(self.path, self.watermark)
+        self.snapshot = Snapshot(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_manifest(self):
+        rows = self.snapshot.manifest["rows"]
+        self.assertEqual(rows["contrato"], 12)
+        self.assertEqual(rows["entidade"], 2)
+        self.assertEqual(rows["nfe"], 4)
+        self.assertEqual(rows["nfe_pagamento"], 2 + 3 + 1)   # CH1..CH3; CH4 não tem NFe
+        self.assertEqual(self.snapshot.manifest["watermark"], self.watermark)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_columns_are_memory_mapped(self):
+        self.assertIsInstance(self.snapshot.contract_ids, np.memmap)
+
+    def test_iter_contratos(self):
+        batches = list(self.snapshot.iter_contratos(batch_size=5))
+        self.assertEqual([len(b) for b in batches], [5, 5, 2])
+        for got, want in zip([c for b in batches for c in b], self.contratos):
+            assert_same_values(self, got, want)
+
+    def test_iter_contratos_range(self):
+        ids = [c.id_contrato for b in self.snapshot.iter_contratos(4, after_id=30, until_id=90) for c in b]
+        self.assertEqual(ids, [40, 50, 60, 70, 80, 90])
+
+    def test_load_related_matches_classic_loader(self):
+        for batch in ([self.contratos[0]], self.contratos[2:9], self.contratos[::3], self.contratos):
+            expected = classic_load(self.graph, batch)
+            got = self.snapshot.load_related(None, batch)
+            self.assertEqual(got, expected)
+            for got_map, want_map in zip(got, expected):
+                for key, value in want_map.items():
+                    for g, w in zip(got_map[key] if isinstance(value, list) else [got_map[key]],
+                                    value if isinstance(value, list) else [value]):
+                        assert_same_values(self, g, w)
+
+    def test_money_types_preserved(self):
+        _, _, empenhos, liquidacoes, _, _, _ = self.snapshot.load_related(None, self.contratos)
+        valores = {e.id_empenho: e.valor for lst in empenhos.values() for e in lst}
+        self.assertIsInstance(valores["1-0"], Money)        # 1E+3
+        self.assertEqual(str(valores["1-0"]), "1E+3")
+        self.assertNotIsInstance(valores["2-0"], Money)     # 0.005: Decimal inexato
+        self.assertEqual(str(valores["3-0"]), "-0.00")
+        self.assertEqual(liquidacoes["1-0"][0].valor.cents, 3333)
+
+    def test_unknown_and_empty_contracts(self):
+        self.assertEqual(self.snapshot.load_related(None, []), ({}, {}, {}, {}, {}, {}, {}))
+        ghost = Contrato(5, Decimal("1.00"), date(2024, 1, 1), "x", 1, 1)
+        self.assertEqual(self.snapshot.load_related(None, [ghost]), ({}, {}, {}, {}, {}, {}, {}))
+
+    def test_fullpipe_reads_batches_from_snapshot(self):
+        from views.etl_fullpipe import iter_loaded_batches, resolve_loader
+        loader = resolve_loader("classic", self.snapshot)
+        batches = list(iter_loaded_batches(None, None, 5, loader=loader, snapshot=self.snapshot, after_id=20))
+        self.assertEqual([c.id_contrato for c in batches[0][0]], [30, 40, 50, 60, 70])
+        for contratos, related in batches:
+            self.assertEqual(related, classic_load(self.graph, contratos))
+
+    def test_stale_snapshot_refused(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (1, "1")
+        Snapshot.open(self.path, cursor)
+        cursor.fetchone.return_value = (2, "1")
+        with self.assertRaises(SnapshotStale):
+            Snapshot.open(self.path, cursor)
+
+    def test_missing_snapshot(self):
+        with self.assertRaises(SnapshotError):
+            Snapshot(os.path.join(self.tmp.name, "nada"))
+
+
+class TestSnapshotWriter(unittest.TestCase):
+
+    def test_rejects_out_of_order_contracts(self):
+        contratos, graph = build_graph()
+        writer = SnapshotWriter()
+        with self.assertRaises(SnapshotError):
+            writer.add_batch(contratos[::-1], classic_load(graph, contratos))
+
+    def test_rejects_unsupported_value(self):
+        writer = SnapshotWriter()
+        contrato = Contrato(1, 10.5, date(2024, 1, 1), "x", 1, 1)
+        with self.assertRaises(SnapshotError):
+            writer.add_batch([contrato], ({}, {}, {}, {}, {}, {}, {}))
+
+    def test_dump_snapshot_streams_database(self):
+        contratos, graph = build_graph()
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (12, "120")
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        batches = [contratos[:6], contratos[6:]]
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("utils.etl_common.stream_contratos", return_value=iter(batches)), \
+                patch.dict("utils.etl_common.RELATED_LOADERS", {"classic": lambda cur, cs: classic_load(graph, cs)}):
+            path = os.path.join(tmp, "snap")
+            manifest = dump_snapshot(conn, path, batch_size=6)
+            self.assertEqual(manifest["watermark"]["contrato"], [12, "120"])
+            snapshot = Snapshot.open(path, cursor)
+            self.assertEqual(snapshot.load_related(None, contratos), classic_load(graph, contratos))
+        cursor.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
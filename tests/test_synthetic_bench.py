@@ -0,0 +1,152 @@
+import unittest
+import os
+import sys
+from collections import Counter
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic import (
+    ANOMALIES, ANOMALY_STAGE, TABLES, MemoryCursor, SqliteCursor, SyntheticConfig, SyntheticDataset,
+    hydrate_contratos, load_sqlite,
+)
+from benchmarks.bench_loaders import _normalize
+from benchmarks.bench_suite import CONFIG_KEYS, compare, parse_size, run_size
+from clientside.domains.pagamento import nfe_pagamento_check_enabled, set_nfe_pagamento_check
+from clientside.domains.subdomains.nfe_index import GlobalNfeIndex
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from utils.etl_common import batch_load_contratos, batch_load_related_data
+from views.etl_fullpipe import validate_batch
+
+
+def all_rows(dataset, chunk):
+    rows = {table: [] for table in TABLES}
+    for c in dataset.iter_chunks(chunk):
+        for table in TABLES:
+            rows[table].extend(c[table])
+    return rows
+
+
+def run_chain(dataset, batch_size=50):
+    """(contrato, estágio que falhou ou None) + alertas do índice global, via MemoryCursor."""
+    cursor, index = MemoryCursor(), GlobalNfeIndex()
+    stages, alerts = {}, 0
+    for chunk in dataset.iter_chunks(200):
+        cursor.release_chunk()
+        cursor.load_chunk(chunk)
+        for start in range(0, len(chunk["contrato"]), batch_size):
+            contratos = hydrate_contratos(chunk["contrato"][start:start + batch_size])
+            related = batch_load_related_data(cursor, contratos)
+            alerts += len(index.add_batch(contratos, related))
+            txs = EmpenhoTransaction.build_from_batch(contratos, related[0], related[1], related[2])
+            for c, (e, l, p, err) in zip(contratos, validate_batch(txs, related[3], related[4], related[5],
+                                                                     nfe_pagamentos=related[6])):
+                stages[c.id_contrato] = next((s for s, v in zip("ELP", (e, l, p)) if v in ("✗", "B")), None)
+    return stages, alerts
+
+
+class TestSyntheticDataset(unittest.TestCase):
+
+    def test_deterministic_and_chunk_independent(self):
+        config = SyntheticConfig(contratos=600, nfe_reuse=0.2)
+        a = all_rows(SyntheticDataset(config), 100)
+        b = all_rows(SyntheticDataset(config), 600)
+        self.assertEqual(a, b)
+        self.assertEqual(len(a["contrato"]), 600)
+        other = all_rows(SyntheticDataset(SyntheticConfig(contratos=600, nfe_reuse=0.2, seed=7)), 600)
+        self.assertNotEqual(a["empenho"], other["empenho"])
+
+    def test_fornecedor_skew(self):
+        ds = SyntheticDataset(SyntheticConfig(contratos=4000, fornecedores=1000, hot_fornecedor=2000, anomaly_rate=0))
+        all_rows(ds, 1000)
+        self.assertAlmostEqual(ds.contratos_por_fornecedor[1], 2000, delta=150)
+        zipf = SyntheticDataset(SyntheticConfig(contratos=4000, fornecedores=1000, anomaly_rate=0))
+        all_rows(zipf, 1000)
+        self.assertGreater(zipf.contratos_por_fornecedor.most_common(1)[0][1], 20 * 4000 / 1000)
+
+    def test_reused_nfes_are_referenced_across_chunks(self):
+        ds = SyntheticDataset(SyntheticConfig(contratos=1000, fornecedores=20, nfe_reuse=0.3, anomaly_rate=0))
+        chunks = list(ds.iter_chunks(100))
+        self.assertGreater(ds.stats["nfe_reusadas"], 0)
+        emitted = [row[1] for c in chunks for row in c["nfe"]]
+        self.assertEqual(len(emitted), len(set(emitted)))   # cada NFe emitida uma vez só
+        refs = {row[1] for c in chunks for row in c["nfe_ref"]}
+        self.assertTrue(refs and refs <= set(emitted))
+
+    def test_clean_dataset_passes_every_stage(self):
+        ds = SyntheticDataset(SyntheticConfig(contratos=500, fornecedores=30, nfe_reuse=0.3, anomaly_rate=0))
+        stages, alerts = run_chain(ds)
+        self.assertEqual(len(stages), 500)
+        self.assertEqual(Counter(stages.values()), Counter({None: 500}))
+        self.assertEqual(alerts, 0)
+
+    def test_each_anomaly_fails_its_stage(self):
+        self.addCleanup(set_nfe_pagamento_check, nfe_pagamento_check_enabled())
+        set_nfe_pagamento_check(True)
+        ds = SyntheticDataset(SyntheticConfig(contratos=1500, fornecedores=30, nfe_reuse=0.3, anomaly_rate=1.0))
+        stages, alerts = run_chain(ds)
+        self.assertEqual(set(ds.injected), set(ANOMALIES))
+        for c, kind in ds.anomalous.items():
+            self.assertEqual(stages[c], ANOMALY_STAGE[kind], (c, kind))
+        self.assertEqual(alerts, ds.injected["nfe_reuso_excedente"])
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            SyntheticConfig(anomalies=("nao_existe",))
+        with self.assertRaises(ValueError):
+            SyntheticConfig(contratos=10, hot_fornecedor=11)
+
+
+class TestSqliteStandIn(unittest.TestCase):
+
+    def test_keyset_and_loader_match_memory_cursor(self):
+        config = SyntheticConfig(contratos=400, fornecedores=25, nfe_reuse=0.3)
+        conn = load_sqlite(SyntheticDataset(config), chunk_contratos=150)
+        self.addCleanup(conn.close)
+        sqlite_cursor, memory_cursor = SqliteCursor(conn), MemoryCursor()
+        after_id = 0
+        for chunk in SyntheticDataset(config).iter_chunks(150):
+            memory_cursor.load_chunk(chunk)
+            for start in range(0, len(chunk["contrato"]), 50):
+                esperado = hydrate_contratos(chunk["contrato"][start:start + 50])
+                contratos, after_id = batch_load_contratos(sqlite_cursor, after_id, 50)
+                self.assertEqual(contratos, esperado)
+                self.assertEqual(_normalize(batch_load_related_data(sqlite_cursor, contratos)),
+                                 _normalize(batch_load_related_data(memory_cursor, esperado)))
+        self.assertEqual(batch_load_contratos(sqlite_cursor, after_id, 50), ([], None))
+
+    def test_memory_cursor_rejects_unsupported_query(self):
+        with self.assertRaisesRegex(ValueError, "MemoryCursor só responde a '= ANY"):
+            MemoryCursor().execute("SELECT COUNT(*) FROM contrato")
+
+
+class TestBenchSuite(unittest.TestCase):
+    OPTS = dict(backend="memory", batch=100, pag_engine="scalar", dim_cache=False, nfe_index=True,
+                nfe_pagamento_check=False, entidades=10, fornecedores=50, zipf_s=1.1, hot_fornecedor=0,
+                nfe_reuse=0.05, anomaly_rate=0.1, seed=42, tracemalloc=False)
+
+    def setUp(self):
+        self.addCleanup(set_nfe_pagamento_check, nfe_pagamento_check_enabled())
+
+    def test_parse_size(self):
+        self.assertEqual([parse_size(s) for s in ("10000", "10k", "100K", "1M", "1_000")],
+                         [10_000, 10_000, 100_000, 1_000_000, 1_000])
+
+    def test_run_size_is_reproducible_and_compare_flags_changes(self):
+        r1 = run_size(300, dict(self.OPTS))
+        r2 = run_size(300, dict(self.OPTS, backend="sqlite"))
+        self.assertEqual(r1["digest"], r2["digest"])
+        self.assertEqual(sum(r1["estagios"].values()), 300)
+        self.assertEqual(r1["detectadas"], r1["detectaveis"])
+        self.assertLess(r1["detectaveis"], r1["anomalias"])   # nfe_pagamento_divergente: regra desligada
+        baseline = {"config": {k: self.OPTS[k] for k in CONFIG_KEYS},
+                    "results": {"300": dict(r1, contratos_s=r1["contratos_s"] / 2)}}
+        self.assertEqual(compare([r1], baseline, self.OPTS, 0.2), 0)
+        baseline["results"]["300"]["digest"] = "0" * 16
+        self.assertEqual(compare([r1], baseline, self.OPTS, 0.2), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+from decimal import Decimal
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.pagamento import Pagamento
+from utils.etl_common import PaymentGroup, stream_payment_groups, batch_load_contratos_by_ids, PAYMENT_TAIL_QUERY
+from views.etl_tailfirst import iter_tail_batches, validate_tail_batch, total_pago
+
+ENT = Entidade(1, "Prefeitura", "SP", "SP", "0001")
+FORN = Fornecedor(2, "Forn", "111")
+
+
+def group(id_empenho, id_contrato, total="10.00", n=1, excede=False, existe=True):
+    return PaymentGroup(id_empenho, id_contrato, existe, Decimal(total), n, excede)
+
+
+def contrato(id_contrato, valor="1000.00"):
+    return Contrato(id_contrato, Decimal(valor), date(2024, 1, 1), "Obj", 1, 2)
+
+
+def empenho(id_empenho, id_contrato, valor="100.00"):
+    return Empenho(id_empenho, 2024, date(2024, 1, 2), "111", "Forn", Decimal(valor), 1, id_contrato)
+
+
+class TestIterTailBatches(unittest.TestCase):
+
+    def test_distinct_contracts_in_stream_order(self):
+        stream = [[group("E1", 3), group("E2", 1), group("E3", 3)], [group("E4", 2), group("E5", 1)]]
+        self.assertEqual(list(iter_tail_batches(stream, batch_size=2)), [([3, 1], []), ([2], [])])
+
+    def test_floating_groups_reported_with_batch(self):
+        flutuante = group(None, None, existe=False)
+        sem_contrato = group("E9", None)
+        stream = [[group("E1", 1), flutuante, group("E2", 2), sem_contrato]]
+        batches = list(iter_tail_batches(stream, batch_size=10))
+        self.assertEqual(batches, [([1, 2], [flutuante, sem_contrato])])
+
+    def test_only_floating(self):
+        flutuante = group(None, None, existe=False)
+        self.assertEqual(list(iter_tail_batches([[flutuante]])), [([], [flutuante])])
+
+    def test_limit_stops_stream(self):
+        consumed = []
+
+        def stream():
+            for chunk in ([group("E1", 1), group("E2", 2)], [group("E3", 3)], [group("E4", 4)]):
+                consumed.append(chunk)
+                yield chunk
+
+        self.assertEqual(list(iter_tail_batches(stream(), batch_size=2, limit=3)), [([1, 2], []), ([3], [])])
+        self.assertEqual(len(consumed), 2)
+
+    def test_empty_stream(self):
+        self.assertEqual(list(iter_tail_batches([])), [])
+
+
+class TestTailQueries(unittest.TestCase):
+
+    def test_stream_payment_groups_uses_named_cursor(self):
+        cursor = MagicMock()
+        cursor.fetchmany.side_effect = [[("E1", 1, True, Decimal("5.00"), 2, True)], []]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        chunks = list(stream_payment_groups(conn, batch_size=50))
+        conn.cursor.assert_called_once_with(name="stream_payment_groups")
+        cursor.execute.assert_called_once_with(PAYMENT_TAIL_QUERY)
+        self.assertEqual(chunks, [[PaymentGroup("E1", 1, True, Decimal("5.00"), 2, True)]])
+        self.assertTrue(chunks[0][0].excede_empenho)
+        cursor.close.assert_called_once()
+
+    def test_suspicion_order(self):
+        self.assertIn("ORDER BY excede_empenho DESC, pag.total_pago DESC", PAYMENT_TAIL_QUERY)
+
+    def test_load_contratos_by_ids_keeps_requested_order(self):
+        cursor = MagicMock()
+        cursor.description = [("id_contrato",), ("valor",), ("data",), ("objeto",), ("id_entidade",), ("id_fornecedor",)]
+        cursor.fetchall.return_value = [(i, Decimal("1.00"), date(2024, 1, 1), "x", 1, 2) for i in (1, 2, 3)]
+        contratos = batch_load_contratos_by_ids(cursor, [3, 9, 1])
+        self.assertEqual([c.id_contrato for c in contratos], [3, 1])
+
+    def test_load_contratos_by_ids_empty(self):
+        cursor = MagicMock()
+        self.assertEqual(batch_load_contratos_by_ids(cursor, []), [])
+        cursor.execute.assert_not_called()
+
+
+class TestValidateTailBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.contratos = {1: contrato(1), 2: contrato(2, valor="15.00")}
+        self.empenhos = {1: [empenho("E1", 1)], 2: [empenho("E2", 2), empenho("E3", 2)]}
+        self.pagamentos = {
+            "E1": [Pagamento("P1", "E1", date(2024, 2, 1), Decimal("10.00"))],
+            "E2": [Pagamento("P2", "E2", date(2024, 2, 1), Decimal("10.00"))],
+            "E3": [Pagamento("P3", "E3", date(2024, 2, 1), Decimal("10.00"))],
+        }
+
+    def load_related(self, cursor, contratos):
+        ids = {c.id_contrato for c in contratos}
+        emps = {i: v for i, v in self.empenhos.items() if i in ids}
+        emp_ids = {e.id_empenho for v in emps.values() for e in v}
+        return {1: ENT}, {2: FORN}, emps, {}, {}, {k: v for k, v in self.pagamentos.items() if k in emp_ids}, {}
+
+    def test_loads_full_graph_of_touched_contracts(self):
+        with patch("views.etl_tailfirst.batch_load_contratos_by_ids",
+                   side_effect=lambda cur, ids: [self.contratos[i] for i in ids if i in self.contratos]), \
+                patch.dict("utils.etl_common.RELATED_LOADERS", {"classic": self.load_related}):
+            contratos, related, outcomes, missing = validate_tail_batch(MagicMock(), [2, 7, 1])
+        self.assertEqual([c.id_contrato for c in contratos], [2, 1])
+        self.assertEqual(missing, [7])
+        self.assertEqual(len(outcomes), 2)
+        _, _, empenhos, _, _, pagamentos, _ = related
+        # os dois empenhos do contrato 2 entram no total, não só o que o trouxe ao stream
+        self.assertEqual(total_pago(contratos[0], empenhos, pagamentos), Decimal("20.00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
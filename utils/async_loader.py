@@ -0,0 +1,202 @@
+"""
+Loader assíncrono (asyncio) dos dados relacionados - psycopg 3 + psycopg_pool.AsyncConnectionPool.
+
+batch_load_related_data faz 7 round-trips em sequência num único cursor, mas só a cadeia
+liquidação -> NFe depende de resultados anteriores. Aqui as queries independentes vão juntas,
+cada uma numa conexão do pool assíncrono, em 3 níveis de dependência:
+    1. entidade, fornecedor, empenho          (só dependem do batch de contratos)
+    2. liquidacao_nota_fiscal, pagamento      (ids de empenho)
+    3. nfe, nfe_pagamento                     (chaves DANFE das liquidações)
+A latência de extração de um batch passa de ~7 para ~3 round-trips. nfe_pagamento é buscado
+pelas chaves das liquidações (para rodar junto com a nfe) e depois restrito às NFes
+encontradas: os 7 maps são os mesmos do classic.
+
+O pipeline é síncrono: o AsyncRelatedLoader mantém um event loop numa thread daemon, dona do
+pool, e load() bloqueia até o batch estar carregado (compatível com o prefetch). Um loader por
+processo (get_async_loader), recriado após fork. psycopg 3 é opcional (pip install
+"psycopg[binary,pool]"), importado só quando o loader async é usado.
+
+Tamanho do pool: ASYNC_POOL_MAX (default 6: 3 queries simultâneas por nível, com folga para o
+prefetch).
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from db_connection import _connect_params
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from models.hydration import hydrate_all
+from utils.dimension_cache import DimensionCache
+from utils.instrumentation import span
+
+ASYNC_POOL_MAX = int(os.getenv("ASYNC_POOL_MAX", "6"))
+
+# tabela -> (query por ANY(%s), model)
+RELATED_QUERIES = {
+    "entidade": ("SELECT * FROM entidade WHERE id_entidade = ANY(%s)", Entidade),
+    "fornecedor": ("SELECT * FROM fornecedor WHERE id_fornecedor = ANY(%s)", Fornecedor),
+    "empenho": ("SELECT * FROM empenho WHERE id_contrato = ANY(%s)", Empenho),
+    "liquidacao_nota_fiscal": ("SELECT * FROM liquidacao_nota_fiscal WHERE id_empenho = ANY(%s)", LiquidacaoNotaFiscal),
+    "pagamento": ("SELECT * FROM pagamento WHERE id_empenho = ANY(%s)", Pagamento),
+    "nfe": ("SELECT * FROM nfe WHERE chave_nfe = ANY(%s)", Nfe),
+    "nfe_pagamento": ("SELECT * FROM nfe_pagamento WHERE chave_nfe = ANY(%s)", NfePagamento),
+}
+
+# fetch(tabela, ids) -> models hidratados
+Fetch = Callable[[str, list], Awaitable[list]]
+
+
+async def _fetch_if(fetch: Fetch, table: str, ids: list) -> list:
+    return await fetch(table, ids) if ids else []
+
+
+async def _fetch_dimension(fetch: Fetch, table: str, ids: List[int], key: str, dimension=None) -> Dict[int, object]:
+    """Dimensão por id; com cache, só os ids nunca vistos vão ao banco (como DimensionTable.get_many)."""
+    found: Dict[int, object] = {}
+    if dimension is not None:
+        found, ids = dimension.split(ids)
+    if not ids:
+        return found
+    loaded = {getattr(obj, key): obj for obj in await fetch(table, ids)}
+    if dimension is not None:
+        dimension.store_fetched(ids, loaded)
+    found.update(loaded)
+    return found
+
+
+async def load_related_async(fetch: Fetch, contratos: List[Contrato], dimensions: Optional[DimensionCache] = None):
+    """Os 7 maps de batch_load_related_data, com as queries de cada nível em paralelo."""
+    if not contratos:
+        return {}, {}, {}, {}, {}, {}, {}
+
+    entidade_ids = list(set(c.id_entidade for c in contratos))
+    fornecedor_ids = list(set(c.id_fornecedor for c in contratos))
+    entidades_map, fornecedores_map, empenhos = await asyncio.gather(
+        _fetch_dimension(fetch, "entidade", entidade_ids, "id_entidade", dimensions and dimensions.entidade),
+        _fetch_dimension(fetch, "fornecedor", fornecedor_ids, "id_fornecedor", dimensions and dimensions.fornecedor),
+        fetch("empenho", [c.id_contrato for c in contratos]),
+    )
+
+    empenhos_por_contrato: Dict[int, List[Empenho]] = defaultdict(list)
+    for emp in empenhos:
+        empenhos_por_contrato[emp.id_contrato].append(emp)
+    all_empenho_ids = [emp.id_empenho for emp in empenhos]
+
+    liquidacoes, pagamentos = await asyncio.gather(
+        _fetch_if(fetch, "liquidacao_nota_fiscal", all_empenho_ids),
+        _fetch_if(fetch, "pagamento", all_empenho_ids),
+    )
+
+    liquidacoes_por_empenho: Dict[str, List[LiquidacaoNotaFiscal]] = defaultdict(list)
+    for liq in liquidacoes:
+        liquidacoes_por_empenho[liq.id_empenho].append(liq)
+    pagamentos_por_empenho: Dict[str, List[Pagamento]] = defaultdict(list)
+    for pag in pagamentos:
+        pagamentos_por_empenho[pag.id_empenho].append(pag)
+    all_chaves_danfe = list({liq.chave_danfe for liq in liquidacoes if liq.chave_danfe})
+
+    nfes, nfe_pagamentos = await asyncio.gather(
+        _fetch_if(fetch, "nfe", all_chaves_danfe),
+        _fetch_if(fetch, "nfe_pagamento", all_chaves_danfe),
+    )
+
+    nfes_map: Dict[str, Nfe] = {nfe.chave_nfe: nfe for nfe in nfes}
+    nfe_pagamentos_por_chave: Dict[str, List[NfePagamento]] = defaultdict(list)
+    for np_ in nfe_pagamentos:
+        if np_.chave_nfe in nfes_map:
+            nfe_pagamentos_por_chave[np_.chave_nfe].append(np_)
+
+    return (
+        entidades_map,
+        fornecedores_map,
+        dict(empenhos_por_contrato),
+        dict(liquidacoes_por_empenho),
+        nfes_map,
+        dict(pagamentos_por_empenho),
+        dict(nfe_pagamentos_por_chave)
+    )
+
+
+def pool_fetch(pool) -> Fetch:
+    """
+    fetch sobre um AsyncConnectionPool: cada query numa conexão própria do pool. O span
+    sql.<tabela> é o tempo de parede da query (inclui a espera pelas outras do mesmo nível).
+    """
+    async def fetch(table: str, ids: list) -> list:
+        query, model = RELATED_QUERIES[table]
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                with span(f"sql.{table}"):
+                    await cur.execute(query, (ids,))
+                    rows = await cur.fetchall()
+                with span(f"hydrate.{table}"):
+                    return hydrate_all(rows, model.compile_hydrator(cur.description))
+    return fetch
+
+
+class AsyncRelatedLoader:
+    """Event loop em thread própria + AsyncConnectionPool; load() é a ponte síncrona para o pipeline."""
+
+    def __init__(self, max_size: int = ASYNC_POOL_MAX, **connect_params):
+        try:
+            from psycopg_pool import AsyncConnectionPool
+        except ImportError as exc:
+            raise RuntimeError('Loader async requer psycopg 3 (pip install "psycopg[binary,pool]")') from exc
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async_loader", daemon=True)
+        self._thread.start()
+        params = {k: v for k, v in (connect_params or _connect_params()).items() if v is not None}
+
+        async def open_pool():
+            pool = AsyncConnectionPool(kwargs=params, min_size=1, max_size=max_size, open=False)
+            await pool.open()
+            return pool
+        self.pool = self._run(open_pool())
+        self._fetch = pool_fetch(self.pool)
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def load(self, contratos: List[Contrato], dimensions: Optional[DimensionCache] = None):
+        return self._run(load_related_async(self._fetch, contratos, dimensions))
+
+    def close(self):
+        self._run(self.pool.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_LOADER = None
+_LOADER_PID = None
+_LOADER_LOCK = threading.Lock()
+
+
+def get_async_loader() -> AsyncRelatedLoader:
+    """Loader compartilhado do processo (recriado após fork, como o pool de db_connection)."""
+    global _LOADER, _LOADER_PID
+    pid = os.getpid()
+    if _LOADER is None or _LOADER_PID != pid:
+        with _LOADER_LOCK:
+            if _LOADER is None or _LOADER_PID != pid:
+                _LOADER = AsyncRelatedLoader()
+                _LOADER_PID = pid
+    return _LOADER
+
+
+def close_async_loader():
+    global _LOADER, _LOADER_PID
+    with _LOADER_LOCK:
+        if _LOADER is not None and _LOADER_PID == os.getpid():
+            _LOADER.close()
+        _LOADER = None
+        _LOADER_PID = None
@@ -0,0 +1,150 @@
+"""
+Store local da auditoria incremental (SQLite, stdlib).
+
+Persiste, por contrato, o fingerprint do grafo validado e o outcome (e, l, p, err) do
+fullpipe, mais a marca d'água do último run concluído:
+    - rules: hash do código das regras (domains, transactions, models). Se o código mudou,
+      nenhum outcome armazenado vale mais e o store é esvaziado.
+    - tables: snapshot {tabela: [linhas, max id]} do banco tirado no INÍCIO do run (mudanças
+      durante o run aparecem no próximo). Só informativo: o schema não tem coluna de
+      modificação e UPDATE in-place não altera linhas nem max id, então o snapshot não prova
+      que uma faixa de contratos ficou intacta. O fingerprint do grafo (CONTRACT_FINGERPRINT_QUERY)
+      roda para TODOS os contratos a cada run e decide a revalidação; o ganho do incremental é
+      não transferir, hidratar nem validar o grafo dos contratos inalterados.
+    - finished_at: epoch do fim do run.
+
+Caminho padrão: AUDIT_STORE_PATH (env) ou .audit/fullpipe.sqlite3 na raiz do projeto.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../"))
+
+DEFAULT_PATH = os.getenv("AUDIT_STORE_PATH", os.path.join(project_root, ".audit", "fullpipe.sqlite3"))
+
+# Código cujo comportamento define o outcome de um contrato
+RULE_SOURCES = ("clientside/domains", "clientside/transaction", "models")
+
+# (id_contrato, fingerprint, e, l, p, err)
+AuditRecord = Tuple[int, str, str, str, str, str]
+
+
+def rules_fingerprint(root: str = project_root, sources: Tuple[str, ...] = RULE_SOURCES) -> str:
+    """sha256 dos .py das regras (caminho relativo + conteúdo), em ordem estável."""
+    digest = hashlib.sha256()
+    for source in sources:
+        base = os.path.join(root, source)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for name in sorted(filenames):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AuditStore:
+    """
+    Outcomes por contrato + marca d'água. Um único escritor (o processo pai do fullpipe);
+    a conexão é compartilhável entre threads (lookup roda na thread de prefetch), serializada por lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contrato_audit (
+                id_contrato INTEGER PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                e TEXT NOT NULL, l TEXT NOT NULL, p TEXT NOT NULL, err TEXT NOT NULL,
+                validated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TEMP TABLE IF NOT EXISTS seen (id_contrato INTEGER PRIMARY KEY);
+        """)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "AuditStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── outcomes ────────────────────────────────────────────────────────────
+
+    def lookup(self, ids: List[int]) -> Dict[int, AuditRecord]:
+        """Registros armazenados dos ids pedidos (ausentes = nunca validados)."""
+        out: Dict[int, AuditRecord] = {}
+        with self._lock:
+            for start in range(0, len(ids), 900):  # limite de parâmetros do SQLite
+                chunk = ids[start:start + 900]
+                rows = self._conn.execute(
+                    f"SELECT id_contrato, fingerprint, e, l, p, err FROM contrato_audit "
+                    f"WHERE id_contrato IN ({','.join('?' * len(chunk))})", chunk)
+                for row in rows:
+                    out[row[0]] = row
+        return out
+
+    def save(self, records: Iterable[AuditRecord]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO contrato_audit (id_contrato, fingerprint, e, l, p, err, validated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*r, now) for r in records])
+
+    def mark_seen(self, ids: Iterable[int]):
+        """Registra os contratos presentes no banco neste run (ver prune_unseen)."""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (id_contrato) VALUES (?)", ((i,) for i in ids))
+
+    def prune_unseen(self) -> int:
+        """Remove contratos que não apareceram no run (apagados do banco). Só após um run completo."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM contrato_audit WHERE id_contrato NOT IN (SELECT id_contrato FROM seen)")
+            self._conn.execute("DELETE FROM seen")
+        return cur.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM contrato_audit").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM contrato_audit")
+
+    # ── marca d'água ────────────────────────────────────────────────────────
+
+    def watermark(self) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_watermark(self, rules: str, tables: Dict[str, list]):
+        value = json.dumps({"rules": rules, "tables": tables, "finished_at": time.time()})
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (value,))
+
+    def check_rules(self, rules: str) -> bool:
+        """
+        Confere a versão das regras do último run. Se mudou, os outcomes armazenados são
+        descartados (tudo será revalidado). Retorna True se os outcomes continuam válidos.
+        """
+        wm = self.watermark()
+        if wm is not None and wm.get("rules") == rules:
+            return True
+        self.clear()
+        return False
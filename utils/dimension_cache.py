@@ -0,0 +1,150 @@
+"""
+Cache de dimensões (entidade, fornecedor) entre batches.
+
+Algumas centenas de órgãos e fornecedores cobrem a maior parte dos contratos, mas os
+loaders buscavam e hidratavam as mesmas linhas a cada batch. O DimensionCache guarda as
+dimensões já vistas e só consulta o banco pelos ids nunca vistos:
+    - preload: tabela com até preload_limit linhas é carregada inteira no início do run;
+      id ausente dela é ausente no banco (nenhuma query por batch);
+    - LRU: tabela maior mantém até maxsize ids (incluindo os ausentes/inválidos, para não
+      serem consultados de novo).
+Contadores hits/misses por tabela. Os objetos cacheados são os mesmos entre batches
+(models frozen), o que também alimenta o LRU de validação do EntityRegistry.
+
+Tamanhos: DIM_PRELOAD_LIMIT (default 50000 linhas) e DIM_CACHE_SIZE (default 100000 ids).
+"""
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.hydration import hydrate_all
+
+PRELOAD_LIMIT = int(os.getenv("DIM_PRELOAD_LIMIT", "50000"))
+CACHE_SIZE = int(os.getenv("DIM_CACHE_SIZE", "100000"))
+
+# tabela -> (model, coluna chave)
+DIMENSIONS = {
+    "entidade": (Entidade, "id_entidade"),
+    "fornecedor": (Fornecedor, "id_fornecedor"),
+}
+
+_ABSENT = None  # id consultado e não encontrado (ou linha inválida): também é cacheado
+_MISS = object()
+
+
+class DimensionTable:
+    """Uma dimensão: preload completo ou LRU limitado de id -> model (ou None)."""
+
+    def __init__(self, table: str, maxsize: int = CACHE_SIZE):
+        self.table = table
+        self.model, self.key = DIMENSIONS[table]
+        self.maxsize = maxsize
+        self.complete = False   # True após preload: o cache é a tabela inteira
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+        self._data: "OrderedDict[int, Optional[object]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def preload(self, cursor, limit: int = PRELOAD_LIMIT) -> bool:
+        """Carrega a tabela inteira se tiver até limit linhas. Retorna se carregou."""
+        cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+        if cursor.fetchone()[0] > limit:
+            return False
+        cursor.execute(f"SELECT * FROM {self.table}")
+        self.queries += 1
+        self._data = OrderedDict(
+            (getattr(obj, self.key), obj)
+            for obj in hydrate_all(cursor.fetchall(), self.model.compile_hydrator(cursor.description))
+        )
+        self.complete = True
+        return True
+
+    def split(self, ids: Iterable[int]):
+        """(map dos ids em cache, ids nunca vistos). Atualiza hits/misses e a recência do LRU."""
+        found: Dict[int, object] = {}
+        missing: List[int] = []
+        data = self._data
+        for id_ in ids:
+            obj = data.get(id_, _MISS)
+            if obj is not _MISS:
+                self.hits += 1
+                if not self.complete:
+                    data.move_to_end(id_)
+                if obj is not _ABSENT:
+                    found[id_] = obj
+            elif self.complete:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing.append(id_)
+        return found, missing
+
+    def store(self, requested: Iterable[int], loaded: Dict[int, object]):
+        """Guarda o resultado da query dos ids requested (os não retornados ficam como ausentes)."""
+        if self.complete or self.maxsize <= 0:
+            return
+        data = self._data
+        for id_ in requested:
+            data[id_] = loaded.get(id_, _ABSENT)
+            data.move_to_end(id_)
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def store_fetched(self, requested: Iterable[int], loaded: Dict[int, object]):
+        """store() do resultado de uma query própria desta dimensão (conta em queries)."""
+        self.queries += 1
+        self.store(requested, loaded)
+
+    def get_many(self, ids: Iterable[int], fetch: Callable[[List[int]], Dict[int, object]]) -> Dict[int, object]:
+        """Map id -> model dos ids pedidos; fetch(ids) só é chamado para os nunca vistos."""
+        found, missing = self.split(ids)
+        if missing:
+            loaded = fetch(missing)
+            self.store_fetched(missing, loaded)
+            found.update(loaded)
+        return found
+
+
+class DimensionCache:
+    """Entidades e fornecedores compartilhados entre os batches de um run."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.tables = {table: DimensionTable(table, maxsize) for table in DIMENSIONS}
+        self.entidade = self.tables["entidade"]
+        self.fornecedor = self.tables["fornecedor"]
+
+    def preload(self, cursor, limit: int = PRELOAD_LIMIT) -> Dict[str, bool]:
+        return {table: t.preload(cursor, limit) for table, t in self.tables.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {table: {"hits": t.hits, "misses": t.misses, "queries": t.queries, "size": len(t),
+                        "preloaded": t.complete}
+                for table, t in self.tables.items()}
+
+
+def merge_dimension_stats(parts: Iterable[Dict[str, Dict[str, int]]]) -> Dict[str, Dict[str, int]]:
+    """Soma os stats() de vários caches (um por worker); preloaded só se todos pré-carregaram."""
+    merged: Dict[str, Dict[str, int]] = {}
+    for part in parts:
+        for table, st in part.items():
+            acc = merged.setdefault(table, {"hits": 0, "misses": 0, "queries": 0, "size": 0, "preloaded": True})
+            for key in ("hits", "misses", "queries"):
+                acc[key] += st[key]
+            acc["size"] = max(acc["size"], st["size"])
+            acc["preloaded"] = acc["preloaded"] and st["preloaded"]
+    return merged
+
+
+def print_dimension_stats(stats: Dict[str, Dict[str, int]]):
+    print("\n  🗂️  CACHE DE DIMENSÕES:")
+    for table, st in stats.items():
+        lookups = st["hits"] + st["misses"]
+        rate = 100 * st["hits"] / lookups if lookups else 0.0
+        modo = "preload" if st["preloaded"] else "LRU"
+        print(f"     {table:<11} {modo:<8} {st['size']:>7} em cache | hits {st['hits']:>8} | misses {st['misses']:>7} "
+              f"| {rate:5.1f}% | {st['queries']} queries")
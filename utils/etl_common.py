@@ -1,5 +1,11 @@
-from typing import Dict, List
+import json
+import queue
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Iterator, NamedTuple, Optional, Tuple
 from collections import defaultdict
+from db_connection import get_db_connection
 from models.contrato import Contrato
 from models.entidade import Entidade
 from models.fornecedor import Fornecedor
@@ -7,103 +13,227 @@ from models.empenho import Empenho
 from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
 from models.nfe import Nfe
 from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+from models.hydration import hydrate_all
+from utils.dimension_cache import DimensionCache
+from utils.instrumentation import span
 
-def batch_load_contratos(cursor, offset: int, batch_size: int = 100) -> List[Contrato]:
-    """Carrega um batch de contratos com offset."""
-    cursor.execute(f"SELECT * FROM contrato ORDER BY id_contrato LIMIT {batch_size} OFFSET {offset}")
+def _hydrate_contratos(rows, description) -> List[Contrato]:
+    return hydrate_all(rows, Contrato.compile_hydrator(description))
+
+
+def batch_load_contratos(cursor, after_id: int = 0, batch_size: int = 100, until_id: Optional[int] = None) -> Tuple[List[Contrato], Optional[int]]:
+    """
+    Carrega um batch de contratos via keyset pagination (id_contrato > after_id).
+    Custo constante por batch (index scan), ao contrário de LIMIT/OFFSET que re-escaneia as linhas puladas.
+    Retorna (contratos, last_id) - last_id vem da linha crua, para que linhas inválidas não travem a paginação.
+    """
+    if until_id is None:
+        cursor.execute(
+            "SELECT * FROM contrato WHERE id_contrato > %s ORDER BY id_contrato LIMIT %s",
+            (after_id, batch_size)
+        )
+    else:
+        cursor.execute(
+            "SELECT * FROM contrato WHERE id_contrato > %s AND id_contrato <= %s ORDER BY id_contrato LIMIT %s",
+            (after_id, until_id, batch_size)
+        )
     rows = cursor.fetchall()
+    if not rows:
+        return [], None
     cols = [d[0] for d in cursor.description]
-    contratos = []
-    for row in rows:
-        res = Contrato.create(dict(zip(cols, row)))
-        if res.is_ok:
-            contratos.append(res.value)
-    return contratos
+    last_id = rows[-1][cols.index("id_contrato")]
+    return _hydrate_contratos(rows, cursor.description), last_id
+
+
+def stream_contratos(conn, batch_size: int = 100, server_side: bool = False,
+                     after_id: int = 0, until_id: Optional[int] = None) -> Iterator[List[Contrato]]:
+    """
+    Generator de batches de Contrato ordenados por id_contrato.
+
+    - server_side=False: keyset pagination (uma query indexada por batch).
+    - server_side=True: uma única query em named cursor (server-side), consumida via fetchmany.
+      O cursor nomeado fica aberto na transação corrente; a mesma conexão pode
+      continuar sendo usada para os loads relacionados.
+
+    Batches vazios (todas linhas inválidas) não são emitidos.
+    """
+    if server_side:
+        cursor = conn.cursor(name="stream_contratos")
+        cursor.itersize = batch_size
+        try:
+            if until_id is None:
+                cursor.execute("SELECT * FROM contrato WHERE id_contrato > %s ORDER BY id_contrato", (after_id,))
+            else:
+                cursor.execute(
+                    "SELECT * FROM contrato WHERE id_contrato > %s AND id_contrato <= %s ORDER BY id_contrato",
+                    (after_id, until_id)
+                )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                contratos = _hydrate_contratos(rows, cursor.description)
+                if contratos:
+                    yield contratos
+        finally:
+            cursor.close()
+        return
+
+    cursor = conn.cursor()
+    try:
+        last_id = after_id
+        while True:
+            contratos, last_id = batch_load_contratos(cursor, last_id, batch_size, until_id)
+            if last_id is None:
+                break
+            if contratos:
+                yield contratos
+    finally:
+        cursor.close()
+
+
+def batch_load_contratos_by_ids(cursor, contract_ids: List[int]) -> List[Contrato]:
+    """Contratos dos ids pedidos, na ordem dos ids (ids inexistentes ou linhas inválidas ficam de fora)."""
+    if not contract_ids:
+        return []
+    cursor.execute("SELECT * FROM contrato WHERE id_contrato = ANY(%s)", (list(contract_ids),))
+    by_id = {c.id_contrato: c for c in _hydrate_contratos(cursor.fetchall(), cursor.description)}
+    return [by_id[i] for i in contract_ids if i in by_id]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TAIL STREAM - pagamentos agrupados por empenho, dinheiro suspeito primeiro
+# ═══════════════════════════════════════════════════════════════════════════
+
+class PaymentGroup(NamedTuple):
+    """Pagamentos de um id_empenho, agregados no servidor."""
+    id_empenho: Optional[str]
+    id_contrato: Optional[int]   # None: empenho inexistente ou sem contrato
+    empenho_existe: bool
+    total_pago: Decimal
+    n_pagamentos: int
+    excede_empenho: bool         # total pago > valor do empenho
+
+
+# Ordem de suspeita: pago acima do empenhado primeiro, depois o maior volume pago.
+PAYMENT_TAIL_QUERY = """
+    WITH pag AS (
+        SELECT id_empenho, SUM(valor) AS total_pago, COUNT(*) AS n_pagamentos
+        FROM pagamento
+        GROUP BY id_empenho
+    )
+    SELECT pag.id_empenho, e.id_contrato, e.id_empenho IS NOT NULL AS empenho_existe,
+           pag.total_pago, pag.n_pagamentos, COALESCE(pag.total_pago > e.valor, FALSE) AS excede_empenho
+    FROM pag
+    LEFT JOIN empenho e ON e.id_empenho = pag.id_empenho
+    ORDER BY excede_empenho DESC, pag.total_pago DESC NULLS LAST, pag.id_empenho
+"""
+
+
+def stream_payment_groups(conn, batch_size: int = 1000) -> Iterator[List[PaymentGroup]]:
+    """
+    Generator de PaymentGroup em ordem de suspeita (PAYMENT_TAIL_QUERY), via named cursor
+    (server-side) consumido com fetchmany: a agregação fica no banco e só um batch de grupos
+    por vez trafega. A mesma conexão continua disponível para os loads do batch.
+    """
+    cursor = conn.cursor(name="stream_payment_groups")
+    cursor.itersize = batch_size
+    try:
+        cursor.execute(PAYMENT_TAIL_QUERY)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [PaymentGroup(*row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def _select(cursor, table: str, model, query: str, params) -> list:
+    """execute + fetchall + hidratação, com spans sql.<tabela> / hydrate.<tabela>."""
+    with span(f"sql.{table}"):
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    with span(f"hydrate.{table}"):
+        return hydrate_all(rows, model.compile_hydrator(cursor.description))
+
+
+def _fetch_entidades(cursor, entidade_ids: List[int]) -> Dict[int, Entidade]:
+    return {
+        ent.id_entidade: ent
+        for ent in _select(cursor, "entidade", Entidade,
+                           f"SELECT * FROM entidade WHERE id_entidade = ANY(%s)", (entidade_ids,))
+    }
+
+
+def _fetch_fornecedores(cursor, fornecedor_ids: List[int]) -> Dict[int, Fornecedor]:
+    return {
+        forn.id_fornecedor: forn
+        for forn in _select(cursor, "fornecedor", Fornecedor,
+                            f"SELECT * FROM fornecedor WHERE id_fornecedor = ANY(%s)", (fornecedor_ids,))
+    }
 
 
-def batch_load_related_data(cursor, contratos: List[Contrato]):
+def batch_load_related_data(cursor, contratos: List[Contrato], dimensions: Optional[DimensionCache] = None):
     """
     Carrega dados relacionados para um batch de contratos.
-    Retorna dicts indexados para O(1) lookup.
+    Retorna 7 dicts indexados para O(1) lookup: entidades, fornecedores, empenhos (por contrato),
+    liquidações e pagamentos (por empenho), NFes e NfePagamentos (por chave_nfe).
+    dimensions: cache de entidade/fornecedor entre batches - só os ids nunca vistos são consultados.
     """
     if not contratos:
-        return {}, {}, {}, {}, {}, {}
+        return {}, {}, {}, {}, {}, {}, {}
     
     contract_ids = [c.id_contrato for c in contratos]
     entidade_ids = list(set(c.id_entidade for c in contratos))
     fornecedor_ids = list(set(c.id_fornecedor for c in contratos))
     
-    # ENTIDADES
-    cursor.execute(f"SELECT * FROM entidade WHERE id_entidade = ANY(%s)", (entidade_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    entidades_map: Dict[int, Entidade] = {}
-    for row in rows:
-        res = Entidade.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            entidades_map[res.value.id_entidade] = res.value
-    
-    # FORNECEDORES
-    cursor.execute(f"SELECT * FROM fornecedor WHERE id_fornecedor = ANY(%s)", (fornecedor_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    fornecedores_map: Dict[int, Fornecedor] = {}
-    for row in rows:
-        res = Fornecedor.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            fornecedores_map[res.value.id_fornecedor] = res.value
+    # ENTIDADES / FORNECEDORES
+    if dimensions is None:
+        entidades_map = _fetch_entidades(cursor, entidade_ids)
+        fornecedores_map = _fetch_fornecedores(cursor, fornecedor_ids)
+    else:
+        entidades_map = dimensions.entidade.get_many(entidade_ids, lambda ids: _fetch_entidades(cursor, ids))
+        fornecedores_map = dimensions.fornecedor.get_many(fornecedor_ids, lambda ids: _fetch_fornecedores(cursor, ids))
     
     # EMPENHOS
-    cursor.execute(f"SELECT * FROM empenho WHERE id_contrato = ANY(%s)", (contract_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
     empenhos_por_contrato: Dict[int, List[Empenho]] = defaultdict(list)
     all_empenho_ids = []
-    for row in rows:
-        res = Empenho.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            emp = res.value
-            empenhos_por_contrato[emp.id_contrato].append(emp)
-            all_empenho_ids.append(emp.id_empenho)
+    for emp in _select(cursor, "empenho", Empenho,
+                       f"SELECT * FROM empenho WHERE id_contrato = ANY(%s)", (contract_ids,)):
+        empenhos_por_contrato[emp.id_contrato].append(emp)
+        all_empenho_ids.append(emp.id_empenho)
     
     # LIQUIDAÇÕES (por empenho)
     liquidacoes_por_empenho: Dict[str, List[LiquidacaoNotaFiscal]] = defaultdict(list)
     all_chaves_danfe = []
     if all_empenho_ids:
-        cursor.execute(f"SELECT * FROM liquidacao_nota_fiscal WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = LiquidacaoNotaFiscal.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                liq = res.value
-                liquidacoes_por_empenho[liq.id_empenho].append(liq)
-                if liq.chave_danfe:
-                    all_chaves_danfe.append(liq.chave_danfe)
+        for liq in _select(cursor, "liquidacao_nota_fiscal", LiquidacaoNotaFiscal,
+                           f"SELECT * FROM liquidacao_nota_fiscal WHERE id_empenho = ANY(%s)", (all_empenho_ids,)):
+            liquidacoes_por_empenho[liq.id_empenho].append(liq)
+            if liq.chave_danfe:
+                all_chaves_danfe.append(liq.chave_danfe)
     
     # NFEs
     nfes_map: Dict[str, Nfe] = {}
     if all_chaves_danfe:
-        cursor.execute(f"SELECT * FROM nfe WHERE chave_nfe = ANY(%s)", (all_chaves_danfe,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = Nfe.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                nfe = res.value
-                nfes_map[nfe.chave_nfe] = nfe
+        for nfe in _select(cursor, "nfe", Nfe, f"SELECT * FROM nfe WHERE chave_nfe = ANY(%s)", (all_chaves_danfe,)):
+            nfes_map[nfe.chave_nfe] = nfe
+    
+    # NFE_PAGAMENTOS (por chave das NFes carregadas)
+    nfe_pagamentos_por_chave: Dict[str, List[NfePagamento]] = defaultdict(list)
+    if nfes_map:
+        for np_ in _select(cursor, "nfe_pagamento", NfePagamento,
+                           f"SELECT * FROM nfe_pagamento WHERE chave_nfe = ANY(%s)", (list(nfes_map),)):
+            nfe_pagamentos_por_chave[np_.chave_nfe].append(np_)
     
     # PAGAMENTOS
     pagamentos_por_empenho: Dict[str, List[Pagamento]] = defaultdict(list)
     if all_empenho_ids:
-        cursor.execute(f"SELECT * FROM pagamento WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = Pagamento.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                pag = res.value
-                pagamentos_por_empenho[pag.id_empenho].append(pag)
+        for pag in _select(cursor, "pagamento", Pagamento,
+                           f"SELECT * FROM pagamento WHERE id_empenho = ANY(%s)", (all_empenho_ids,)):
+            pagamentos_por_empenho[pag.id_empenho].append(pag)
     
     return (
         entidades_map,
@@ -111,5 +241,294 @@ def batch_load_related_data(cursor, contratos: List[Contrato]):
         dict(empenhos_por_contrato),
         dict(liquidacoes_por_empenho),
         nfes_map,
-        dict(pagamentos_por_empenho)
+        dict(pagamentos_por_empenho),
+        dict(nfe_pagamentos_por_chave)
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# JOINED LOADER - grafo do batch em 1 round-trip (CTE + json_agg)
+# ═══════════════════════════════════════════════════════════════════════════
+
+JOINED_RELATED_QUERY = """
+    WITH emp AS (
+        SELECT * FROM empenho WHERE id_contrato = ANY(%(contract_ids)s)
+    ),
+    liq AS (
+        SELECT l.* FROM liquidacao_nota_fiscal l
+        WHERE l.id_empenho IN (SELECT id_empenho FROM emp)
+    ),
+    nf AS (
+        SELECT n.* FROM nfe n
+        WHERE n.chave_nfe IN (SELECT chave_danfe FROM liq WHERE chave_danfe IS NOT NULL)
+    )
+    SELECT
+        (SELECT COALESCE(json_agg(e), '[]'::json) FROM entidade e WHERE e.id_entidade = ANY(%(entidade_ids)s))::text,
+        (SELECT COALESCE(json_agg(f), '[]'::json) FROM fornecedor f WHERE f.id_fornecedor = ANY(%(fornecedor_ids)s))::text,
+        (SELECT COALESCE(json_agg(emp), '[]'::json) FROM emp)::text,
+        (SELECT COALESCE(json_agg(liq), '[]'::json) FROM liq)::text,
+        (SELECT COALESCE(json_agg(nf), '[]'::json) FROM nf)::text,
+        (SELECT COALESCE(json_agg(p), '[]'::json) FROM pagamento p
+            WHERE p.id_empenho IN (SELECT id_empenho FROM emp))::text,
+        (SELECT COALESCE(json_agg(np), '[]'::json) FROM nfe_pagamento np
+            WHERE np.chave_nfe IN (SELECT chave_nfe FROM nf))::text
+"""
+
+# Colunas temporais por tabela: JSON as entrega como string ISO, restauradas para date/datetime
+_TEMPORAL_COLUMNS = {
+    "empenho": ("data_empenho",),
+    "liquidacao_nota_fiscal": ("data_emissao",),
+    "nfe": ("data_hora_emissao",),
+    "pagamento": ("datapagamentoempenho",),
+}
+
+
+def _parse_temporal(value):
+    """'YYYY-MM-DD' -> date; timestamp ISO -> datetime (mesmo tipo que o psycopg2 entregaria)."""
+    if not isinstance(value, str):
+        return value
+    if len(value) == 10:
+        return date.fromisoformat(value)
+    return datetime.fromisoformat(value)
+
+
+def _json_rows(payload: str, table: str) -> List[dict]:
+    # parse_float=Decimal: numeric chega como literal JSON e não pode virar float
+    rows = json.loads(payload, parse_float=Decimal)
+    for col in _TEMPORAL_COLUMNS.get(table, ()):
+        for row in rows:
+            if col in row:
+                row[col] = _parse_temporal(row[col])
+    return rows
+
+
+def batch_load_related_data_joined(cursor, contratos: List[Contrato], dimensions: Optional[DimensionCache] = None):
+    """
+    Alternativa a batch_load_related_data: o grafo inteiro do batch
+    (entidade, fornecedor, empenho, liquidação, NFe, pagamento, nfe_pagamento) vem em UMA query.
+    As dependências (liquidação -> NFe -> nfe_pagamento, empenho -> pagamento) são resolvidas no
+    servidor via CTE. Retorna os mesmos 7 maps indexados.
+    dimensions: a query só pede as entidades/fornecedores nunca vistos pelo cache.
+    """
+    if not contratos:
+        return {}, {}, {}, {}, {}, {}, {}
+
+    entidade_ids = list(set(c.id_entidade for c in contratos))
+    fornecedor_ids = list(set(c.id_fornecedor for c in contratos))
+    entidades_map: Dict[int, Entidade] = {}
+    fornecedores_map: Dict[int, Fornecedor] = {}
+    if dimensions is not None:
+        entidades_map, entidade_ids = dimensions.entidade.split(entidade_ids)
+        fornecedores_map, fornecedor_ids = dimensions.fornecedor.split(fornecedor_ids)
+
+    with span("sql.joined"):
+        cursor.execute(JOINED_RELATED_QUERY, {
+            "contract_ids": [c.id_contrato for c in contratos],
+            "entidade_ids": entidade_ids,
+            "fornecedor_ids": fornecedor_ids,
+        })
+        payload = cursor.fetchone()
+    with span("hydrate.joined"):
+        return _hydrate_joined(payload, entidades_map, fornecedores_map, entidade_ids, fornecedor_ids, dimensions)
+
+
+def _hydrate_json(payload: str, table: str, model) -> list:
+    """
+    Linhas json_agg -> modelos pelo mesmo hydrator compilado do caminho por tuplas (_build_checked).
+    json_agg(row) serializa todas as linhas com as chaves na ordem das colunas: a primeira linha
+    faz as vezes de cursor.description.
+    """
+    rows = _json_rows(payload, table)
+    if not rows:
+        return []
+    hydrator = model.compile_hydrator([(name,) for name in rows[0]])
+    return hydrate_all((tuple(row.values()) for row in rows), hydrator)
+
+
+def _hydrate_joined(payload, entidades_map, fornecedores_map, entidade_ids, fornecedor_ids, dimensions):
+    """Payload json_agg do JOINED_RELATED_QUERY -> 7 maps (entidades/fornecedores novos vão para o cache)."""
+    ent_json, forn_json, emp_json, liq_json, nfe_json, pag_json, nfe_pag_json = payload
+
+    entidades_novas = {e.id_entidade: e for e in _hydrate_json(ent_json, "entidade", Entidade)}
+    fornecedores_novos = {f.id_fornecedor: f for f in _hydrate_json(forn_json, "fornecedor", Fornecedor)}
+    if dimensions is not None:
+        dimensions.entidade.store(entidade_ids, entidades_novas)
+        dimensions.fornecedor.store(fornecedor_ids, fornecedores_novos)
+    entidades_map.update(entidades_novas)
+    fornecedores_map.update(fornecedores_novos)
+
+    empenhos_por_contrato: Dict[int, List[Empenho]] = defaultdict(list)
+    for emp in _hydrate_json(emp_json, "empenho", Empenho):
+        empenhos_por_contrato[emp.id_contrato].append(emp)
+
+    liquidacoes_por_empenho: Dict[str, List[LiquidacaoNotaFiscal]] = defaultdict(list)
+    for liq in _hydrate_json(liq_json, "liquidacao_nota_fiscal", LiquidacaoNotaFiscal):
+        liquidacoes_por_empenho[liq.id_empenho].append(liq)
+
+    nfes_map: Dict[str, Nfe] = {nfe.chave_nfe: nfe for nfe in _hydrate_json(nfe_json, "nfe", Nfe)}
+
+    pagamentos_por_empenho: Dict[str, List[Pagamento]] = defaultdict(list)
+    for pag in _hydrate_json(pag_json, "pagamento", Pagamento):
+        pagamentos_por_empenho[pag.id_empenho].append(pag)
+
+    nfe_pagamentos_por_chave: Dict[str, List[NfePagamento]] = defaultdict(list)
+    for np in _hydrate_json(nfe_pag_json, "nfe_pagamento", NfePagamento):
+        nfe_pagamentos_por_chave[np.chave_nfe].append(np)
+
+    return (
+        entidades_map,
+        fornecedores_map,
+        dict(empenhos_por_contrato),
+        dict(liquidacoes_por_empenho),
+        nfes_map,
+        dict(pagamentos_por_empenho),
+        dict(nfe_pagamentos_por_chave)
+    )
+
+
+def batch_load_related_data_async(cursor, contratos: List[Contrato], dimensions: Optional[DimensionCache] = None):
+    """
+    Mesmos 7 maps de batch_load_related_data com as queries independentes em paralelo (asyncio,
+    pool assíncrono do processo - utils.async_loader). O cursor do chamador não é usado.
+    """
+    from utils.async_loader import get_async_loader
+    return get_async_loader().load(contratos, dimensions)
+
+
+RELATED_LOADERS = {
+    "classic": batch_load_related_data,
+    "joined": batch_load_related_data_joined,
+    "async": batch_load_related_data_async,
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FINGERPRINT / WATERMARK - detecção de mudança para a auditoria incremental
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Chave de cada tabela do dicionário de dados (para o snapshot linhas/max id)
+TABLE_KEYS = {
+    "contrato": "id_contrato",
+    "entidade": "id_entidade",
+    "fornecedor": "id_fornecedor",
+    "empenho": "id_empenho",
+    "liquidacao_nota_fiscal": "id_liquidacao_empenhonotafiscal",
+    "nfe": "id",
+    "pagamento": "id_pagamento",
+    "nfe_pagamento": "id",
+}
+
+
+def load_table_watermark(cursor) -> Dict[str, List]:
+    """Snapshot {tabela: [linhas, max id]} - muda com qualquer INSERT/DELETE (não com UPDATE in-place)."""
+    watermark = {}
+    for table, key in TABLE_KEYS.items():
+        cursor.execute(f"SELECT COUNT(*), MAX({key})::text FROM {table}")
+        count, max_id = cursor.fetchone()
+        watermark[table] = [count, max_id]
+    return watermark
+
+
+# md5 do grafo de cada contrato (mesmas tabelas/relações do JOINED_RELATED_QUERY), calculado no
+# servidor: só os contratos cujo hash mudou precisam ter os dados relacionados transferidos.
+# Agregações ordenadas pela chave: o hash não depende da ordem física das linhas.
+CONTRACT_FINGERPRINT_QUERY = """
+    WITH emp AS (
+        SELECT * FROM empenho WHERE id_contrato = ANY(%(contract_ids)s)
+    ),
+    liq AS (
+        SELECT l.*, emp.id_contrato AS id_contrato_emp
+        FROM liquidacao_nota_fiscal l JOIN emp ON emp.id_empenho = l.id_empenho
     )
+    SELECT c.id_contrato, md5(concat_ws('|',
+        row_to_json(c)::text,
+        (SELECT row_to_json(e)::text FROM entidade e WHERE e.id_entidade = c.id_entidade),
+        (SELECT row_to_json(f)::text FROM fornecedor f WHERE f.id_fornecedor = c.id_fornecedor),
+        (SELECT COALESCE(json_agg(emp ORDER BY emp.id_empenho), '[]'::json)::text
+            FROM emp WHERE emp.id_contrato = c.id_contrato),
+        (SELECT COALESCE(json_agg(liq ORDER BY liq.id_liquidacao_empenhonotafiscal), '[]'::json)::text
+            FROM liq WHERE liq.id_contrato_emp = c.id_contrato),
+        (SELECT COALESCE(json_agg(n ORDER BY n.id), '[]'::json)::text FROM nfe n
+            WHERE n.chave_nfe IN (SELECT chave_danfe FROM liq WHERE liq.id_contrato_emp = c.id_contrato)),
+        (SELECT COALESCE(json_agg(p ORDER BY p.id_pagamento), '[]'::json)::text FROM pagamento p
+            WHERE p.id_empenho IN (SELECT id_empenho FROM emp WHERE emp.id_contrato = c.id_contrato)),
+        (SELECT COALESCE(json_agg(np ORDER BY np.id), '[]'::json)::text FROM nfe_pagamento np
+            WHERE np.chave_nfe IN (SELECT chave_danfe FROM liq WHERE liq.id_contrato_emp = c.id_contrato))
+    ))
+    FROM contrato c
+    WHERE c.id_contrato = ANY(%(contract_ids)s)
+"""
+
+
+def batch_load_fingerprints(cursor, contratos: List[Contrato]) -> Dict[int, str]:
+    """{id_contrato: md5 do grafo} para o batch, em 1 round-trip (só hashes trafegam)."""
+    if not contratos:
+        return {}
+    cursor.execute(CONTRACT_FINGERPRINT_QUERY, {"contract_ids": [c.id_contrato for c in contratos]})
+    return {id_contrato: digest for id_contrato, digest in cursor.fetchall()}
+
+_PREFETCH_DONE = object()
+
+
+class _PrefetchError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch_batches(batch_size: int = 100, depth: int = 2, server_side: bool = False,
+                     after_id: int = 0, until_id: Optional[int] = None,
+                     loader: Callable = None) -> Iterator[Tuple[List[Contrato], tuple]]:
+    """
+    Producer/consumer: uma thread de background (com conexão própria do pool) faz
+    stream_contratos + loader(cursor, contratos) e enfileira (contratos, related)
+    numa fila limitada a `depth` batches. O consumidor valida o batch k enquanto o
+    banco já responde o batch k+1.
+
+    Erros do producer são re-levantados no consumidor. Se o consumidor abandonar o
+    generator, a thread é sinalizada e encerra no próximo put.
+    """
+    if depth < 1:
+        raise ValueError(f"depth deve ser >= 1 (recebido: {depth})")
+    loader = loader or batch_load_related_data
+    batches: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            for contratos in stream_contratos(conn, batch_size, server_side=server_side,
+                                              after_id=after_id, until_id=until_id):
+                if not put((contratos, loader(cursor, contratos))):
+                    return
+            put(_PREFETCH_DONE)
+        except BaseException as e:
+            put(_PrefetchError(e))
+        finally:
+            if cursor: cursor.close()
+            if conn: conn.close()
+
+    producer = threading.Thread(target=produce, name="prefetch_batches", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _PREFETCH_DONE:
+                break
+            if isinstance(item, _PrefetchError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        producer.join()
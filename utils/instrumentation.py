@@ -0,0 +1,239 @@
+"""
+Spans de instrumentação do pipeline (histogramas de latência por etapa)
+
+O resumo do fullpipe só tinha tempo total por batch. Com os spans ligados (env PIPELINE_SPANS
+ou configure()), cada etapa instrumentada acumula um histograma de duração:
+    sql.<tabela> / hydrate.<tabela>   extração e hidratação nos loaders (por query)
+    extract                           loader inteiro do batch (classic/joined/async/snapshot)
+    build.<estágio>                   build_from_batch de cada transaction
+    valida.<estágio>                  Valida de cada domain (por contrato; columnar por batch)
+    rule.<registry>.<regra>           cada regra dos RuleRegistry e da Liquidação (liquidacao_rules)
+Desligado, span() devolve um context manager vazio compartilhado (custo de uma chamada).
+
+Histograma: buckets logarítmicos com 8 sub-buckets por oitava (erro relativo < 12.5% nos
+percentis), memória fixa por etapa e merge exato entre workers. Cada thread grava etapas
+próprias (prefetch: sql/hydrate/extract; principal: build/valida/rule), então não há lock.
+
+run_profiler(): cProfile (.prof, ler com python -m pstats / snakeviz) ou pyinstrument (.html,
+dependência opcional) em volta do run inteiro.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+SPANS_ENV = "PIPELINE_SPANS"
+PROFILERS = ("cprofile", "pyinstrument")
+
+_SUB_BITS = 3                      # 2**3 = 8 sub-buckets por oitava
+_LINEAR = 1 << (_SUB_BITS + 1)     # abaixo de 16 ns: bucket exato
+
+
+def _bucket(ns: int) -> int:
+    if ns < _LINEAR:
+        return max(ns, 0)
+    e = ns.bit_length() - 1
+    return _LINEAR + (e - _SUB_BITS - 1) * (1 << _SUB_BITS) + ((ns >> (e - _SUB_BITS)) & ((1 << _SUB_BITS) - 1))
+
+
+def _bucket_upper(b: int) -> int:
+    """Maior valor (ns) do bucket b."""
+    if b < _LINEAR:
+        return b
+    e, sub = divmod(b - _LINEAR, 1 << _SUB_BITS)
+    e += _SUB_BITS + 1
+    return (((1 << _SUB_BITS) + sub + 1) << (e - _SUB_BITS)) - 1
+
+
+class Histogram:
+    """Durações (ns) de uma etapa."""
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int):
+        b = _bucket(ns)
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, pct: float) -> int:
+        """Limite superior do bucket que contém o percentil (nunca acima do máximo observado)."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank:
+                return min(_bucket_upper(b), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self) -> Tuple[Dict[int, int], int, int, int]:
+        return dict(self.counts), self.count, self.total_ns, self.max_ns
+
+    def merge(self, snapshot: Tuple[Dict[int, int], int, int, int]):
+        counts, count, total_ns, max_ns = snapshot
+        for b, n in counts.items():
+            self.counts[b] = self.counts.get(b, 0) + n
+        self.count += count
+        self.total_ns += total_ns
+        self.max_ns = max(self.max_ns, max_ns)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.add(time.perf_counter_ns() - self.start)
+        return False
+
+
+class Spans:
+    """Histogramas por nome de etapa do processo."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str) -> Histogram:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms.setdefault(name, Histogram())
+        return hist
+
+    def span(self, name: str):
+        return _Span(self.histogram(name)) if self.enabled else _NOOP
+
+    def record(self, name: str, ns: int):
+        if self.enabled:
+            self.histogram(name).add(ns)
+
+    def snapshot(self) -> Dict[str, tuple]:
+        return {name: h.snapshot() for name, h in list(self.histograms.items()) if h.count}
+
+    def drain(self) -> Dict[str, tuple]:
+        """snapshot() e zera (worker: cada shard devolve só o que mediu)."""
+        snap = self.snapshot()
+        self.histograms = {}
+        return snap
+
+    def merge(self, snapshot: Dict[str, tuple]):
+        for name, snap in snapshot.items():
+            self.histogram(name).merge(snap)
+
+
+SPANS = Spans(enabled=os.getenv(SPANS_ENV, "") not in ("", "0"))
+
+
+def span(name: str):
+    """with span("build.liquidacao"): ...  - no-op com os spans desligados."""
+    return SPANS.span(name)
+
+
+def spans_enabled() -> bool:
+    return SPANS.enabled
+
+
+def configure(enabled: bool):
+    """Liga/desliga os spans e exporta no ambiente (workers spawn herdam)."""
+    os.environ[SPANS_ENV] = "1" if enabled else ""
+    SPANS.enabled = enabled
+
+
+def spanned(name: str, fn):
+    """fn envolvida por span(name) (ou a própria fn com os spans desligados)."""
+    if not SPANS.enabled:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with SPANS.span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _fmt_ns(ns: float) -> str:
+    if ns >= 1e9:
+        return f"{ns / 1e9:.2f}s"
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f}ms"
+    return f"{ns / 1e3:.1f}µs"
+
+
+def print_span_stats(spans: Spans = None):
+    """Tabela por etapa: chamadas, tempo total, p50/p95/p99 e máximo."""
+    spans = spans or SPANS
+    hists = {name: h for name, h in spans.histograms.items() if h.count}
+    if not hists:
+        return
+    print(f"\n  ⏱️  SPANS (por etapa):")
+    print(f"     {'etapa':<52} {'chamadas':>9} {'total':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'máx':>9}")
+    for name in sorted(hists):
+        h = hists[name]
+        print(f"     {name:<52} {h.count:>9} {_fmt_ns(h.total_ns):>9} {_fmt_ns(h.percentile(50)):>9} "
+              f"{_fmt_ns(h.percentile(95)):>9} {_fmt_ns(h.percentile(99)):>9} {_fmt_ns(h.max_ns):>9}")
+
+
+@contextmanager
+def run_profiler(kind: Optional[str], path: Optional[str] = None):
+    """
+    Perfil do bloco inteiro: kind "cprofile" grava path (default profile.prof, pstats) e
+    "pyinstrument" grava path (default profile.html). kind None: não faz nada.
+    """
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"Profiler inválido: {kind} (use {', '.join(PROFILERS)})")
+    if kind == "cprofile":
+        import cProfile
+        path = path or "profile.prof"
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"  🔬 cProfile: {path} (python -m pstats {path})")
+        return
+    try:
+        from pyinstrument import Profiler
+    except ImportError as exc:
+        raise RuntimeError("Profiler pyinstrument não instalado (pip install pyinstrument) - ou use cprofile") from exc
+    path = path or "profile.html"
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        print(f"  🔬 pyinstrument: {path}")
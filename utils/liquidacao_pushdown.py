@@ -0,0 +1,353 @@
+"""
+Push-down das regras de Liquidação: check_liquidation_dates, check_nfe_rules,
+check_aggregate_rules e check_nfe_limit compiladas em UMA query set-based executada no banco.
+
+O caminho Python carrega todas as liquidações/NFes de cada batch para avaliar comparações de
+data e somas. Aqui o banco faz a junção contrato -> empenho -> liquidação -> NFe e devolve só
+as violações (contrato, regra, motivo, item, valores/datas para a mensagem):
+    check_aggregate_rules   soma corrente por empenho (SUM() OVER, ordem id_liquidacao) acima
+                            do valor do empenho - primeira liquidação que estoura, uma por empenho
+    check_liquidation_dates liquidação anterior ao empenho / ao contrato (primeira que falha)
+    check_nfe_rules         NFe ausente, CNPJ do emitente != documento do fornecedor, datas da
+                            NFe (<= liquidação, >= empenho, >= contrato), na ordem do domain
+    check_nfe_limit         GROUP BY contrato, chave ... HAVING soma > valor da NFe
+Mesma semântica de NULL do domain (data ausente não viola; valor ausente do limite vale 0).
+
+Diferenças conhecidas, não cobertas pela paridade:
+    - o push-down avalia todos os contratos da faixa; o Python só chega à Liquidação se o
+      Empenho passou (check_parity compara só esses);
+    - a liquidação em que a soma corrente estoura depende da ordem das linhas: o Python usa a
+      ordem em que o banco devolveu, o push-down id_liquidacao (a paridade compara o empenho).
+
+compile_pushdown_query(dialect): "postgres" (produção) ou "sqlite" (stand-in do
+benchmarks/synthetic.py: datas ISO em texto, dinheiro comparado em centavos).
+check_parity(): roda o domain Python (loader classic + build_from_batch + Valida de Empenho
++ coletar_liquidacao_violacoes) na mesma faixa de contratos e confere violação a violação.
+
+Uso: python3 utils/liquidacao_pushdown.py [--after ID] [--until ID] [--limit N] [--check]
+"""
+import sys
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from result import Result
+from models.contrato import Contrato
+from clientside.domains.empenho import executar_empenho_rules
+from clientside.domains.liquidação import coletar_liquidacao_violacoes
+from clientside.domains.subdomains.violations import Violation
+from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from utils.etl_common import batch_load_contratos, batch_load_related_data
+
+# (regra do domain, trecho da mensagem do Result.err, motivo) - ordem de avaliação do domain
+MOTIVOS = (
+    ("check_aggregate_rules", "excede Valor Empenho", "soma_excede_empenho"),
+    ("check_liquidation_dates", "anterior ao Empenho", "liq_antes_empenho"),
+    ("check_liquidation_dates", "anterior ao Contrato", "liq_antes_contrato"),
+    ("check_nfe_rules", "sem NFe associada", "nfe_ausente"),
+    ("check_nfe_rules", "CNPJ Emitente", "nfe_cnpj_divergente"),
+    ("check_nfe_rules", "NFe <= Liquidação", "nfe_apos_liquidacao"),
+    ("check_nfe_rules", "NFe >= Empenho", "nfe_antes_empenho"),
+    ("check_nfe_rules", "antes da data do contrato", "nfe_antes_contrato"),
+    ("check_nfe_limit", "excede valor da NFe", "soma_excede_nfe"),
+)
+DIALECTS = {
+    # date(expr): data de um timestamp; money(expr): valor comparável; cents(expr): centavos de saída
+    "postgres": {
+        "date": "({})::date",
+        "money": "{}",
+        "cents": "ROUND(({}) * 100)::bigint",
+    },
+    "sqlite": {
+        "date": "date({})",
+        "money": "CAST(ROUND(({}) * 100) AS INTEGER)",
+        "cents": "CAST(ROUND(({}) * 100) AS INTEGER)",
+    },
+}
+
+_PUSHDOWN_QUERY = """
+WITH c AS (
+    SELECT c.id_contrato, c.data AS data_contrato, f.documento
+    FROM contrato c
+    LEFT JOIN fornecedor f ON f.id_fornecedor = c.id_fornecedor
+    WHERE {contract_filter}
+),
+item AS (
+    SELECT c.id_contrato, e.id_empenho, l.id_liquidacao_empenhonotafiscal AS id_liq, l.data_emissao,
+           e.data_empenho, c.data_contrato, c.documento, n.chave_nfe, n.cnpj_emitente,
+           {date_nfe} AS data_nfe,
+           {liq_valor} AS valor, {emp_valor} AS valor_empenho, {nfe_valor} AS valor_nfe,
+           SUM({liq_valor}) OVER (
+               PARTITION BY c.id_contrato, e.id_empenho ORDER BY l.id_liquidacao_empenhonotafiscal
+               ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS soma_corrente,
+           {liq_cents} AS valor_cents, {emp_cents} AS valor_empenho_cents, {nfe_cents} AS valor_nfe_cents,
+           SUM({liq_cents}) OVER (
+               PARTITION BY c.id_contrato, e.id_empenho ORDER BY l.id_liquidacao_empenhonotafiscal
+               ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS soma_corrente_cents
+    FROM c
+    JOIN empenho e ON e.id_contrato = c.id_contrato
+    JOIN liquidacao_nota_fiscal l ON l.id_empenho = e.id_empenho
+    LEFT JOIN nfe n ON n.chave_nfe = l.chave_danfe
+),
+estouro AS (
+    SELECT item.*, ROW_NUMBER() OVER (PARTITION BY id_contrato, id_empenho ORDER BY id_liq) AS ordem
+    FROM item
+    WHERE soma_corrente > COALESCE(valor_empenho, 0)
+)
+SELECT id_contrato, 'check_aggregate_rules' AS regra, 'soma_excede_empenho' AS motivo, id_empenho,
+       CAST(id_liq AS TEXT) AS ref, soma_corrente_cents AS valor_cents, valor_empenho_cents AS limite_cents,
+       NULL AS data_item, NULL AS data_alvo, NULL AS texto, NULL AS texto_alvo
+FROM estouro WHERE ordem = 1
+UNION ALL
+SELECT id_contrato, 'check_liquidation_dates',
+       CASE WHEN data_emissao < data_empenho THEN 'liq_antes_empenho' ELSE 'liq_antes_contrato' END,
+       id_empenho, CAST(id_liq AS TEXT), NULL, NULL, data_emissao,
+       CASE WHEN data_emissao < data_empenho THEN data_empenho ELSE data_contrato END, NULL, NULL
+FROM item
+WHERE data_emissao < data_empenho OR data_emissao < data_contrato
+UNION ALL
+SELECT id_contrato, 'check_nfe_rules',
+       CASE WHEN chave_nfe IS NULL THEN 'nfe_ausente'
+            WHEN cnpj_emitente IS DISTINCT FROM documento THEN 'nfe_cnpj_divergente'
+            WHEN data_nfe > data_emissao THEN 'nfe_apos_liquidacao'
+            WHEN data_nfe < data_empenho THEN 'nfe_antes_empenho'
+            ELSE 'nfe_antes_contrato' END,
+       id_empenho, CAST(id_liq AS TEXT), NULL, NULL, data_nfe,
+       CASE WHEN data_nfe > data_emissao THEN data_emissao
+            WHEN data_nfe < data_empenho THEN data_empenho
+            ELSE data_contrato END,
+       cnpj_emitente, documento
+FROM item
+WHERE chave_nfe IS NULL
+   OR cnpj_emitente IS DISTINCT FROM documento
+   OR data_nfe > data_emissao OR data_nfe < data_empenho OR data_nfe < data_contrato
+UNION ALL
+SELECT id_contrato, 'check_nfe_limit', 'soma_excede_nfe', NULL, chave_nfe,
+       SUM(valor_cents), MAX(valor_nfe_cents), NULL, NULL, NULL, NULL
+FROM item
+WHERE chave_nfe IS NOT NULL
+GROUP BY id_contrato, chave_nfe
+HAVING SUM(valor) > COALESCE(MAX(valor_nfe), 0)
+ORDER BY 1, 2, 5
+"""
+
+
+def compile_pushdown_query(dialect: str = "postgres", until: bool = False) -> str:
+    """SQL do push-down; filtro id_contrato > %s (e <= %s com until), como batch_load_contratos."""
+    if dialect not in DIALECTS:
+        raise ValueError(f"Dialeto inválido: {dialect} (use {', '.join(DIALECTS)})")
+    d = DIALECTS[dialect]
+    return _PUSHDOWN_QUERY.format(
+        contract_filter="c.id_contrato > %s" + (" AND c.id_contrato <= %s" if until else ""),
+        date_nfe=d["date"].format("n.data_hora_emissao"),
+        liq_valor=d["money"].format("l.valor"),
+        emp_valor=d["money"].format("e.valor"),
+        nfe_valor=d["money"].format("n.valor_total_nfe"),
+        liq_cents=d["cents"].format("l.valor"),
+        emp_cents=d["cents"].format("e.valor"),
+        nfe_cents=d["cents"].format("n.valor_total_nfe"),
+    )
+
+
+def _as_date(value) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+
+
+def _fmt_cents(cents: Optional[int]):
+    return None if cents is None else Decimal(cents).scaleb(-2)
+
+
+class PushdownViolation(NamedTuple):
+    id_contrato: int
+    regra: str
+    motivo: str
+    id_empenho: Optional[str]
+    ref: str                      # id da liquidação (chave DANFE em check_nfe_limit)
+    valor_cents: Optional[int]
+    limite_cents: Optional[int]
+    data_item: Optional[date]
+    data_alvo: Optional[date]
+    texto: Optional[str]
+    texto_alvo: Optional[str]
+
+    @property
+    def mensagem(self) -> str:
+        """Texto no formato do Result.err da regra Python equivalente."""
+        m = self.motivo
+        if m == "soma_excede_empenho":
+            return (f"Soma Liquidações ({_fmt_cents(self.valor_cents)}) excede Valor Empenho "
+                    f"({_fmt_cents(self.limite_cents)}) - ID Emp: {self.id_empenho}")
+        if m == "liq_antes_empenho":
+            return f"Liquidação ({self.data_item}) anterior ao Empenho ({self.data_alvo}) - ID Emp: {self.id_empenho}"
+        if m == "liq_antes_contrato":
+            return f"Liquidação ({self.data_item}) anterior ao Contrato ({self.data_alvo})"
+        if m == "nfe_ausente":
+            return f"Liquidação ({self.ref}) sem NFe associada ou não encontrada. Regra: Obrigatório."
+        if m == "nfe_cnpj_divergente":
+            return f"CNPJ Emitente NFe ({self.texto}) diverge do Fornecedor Contrato ({self.texto_alvo})"
+        if m == "nfe_apos_liquidacao":
+            return f"Violação Regra NFe <= Liquidação: NFe ({self.data_item}) vs Alvo ({self.data_alvo})"
+        if m == "nfe_antes_empenho":
+            return f"Violação Regra NFe >= Empenho: NFe ({self.data_item}) vs Alvo ({self.data_alvo})"
+        if m == "nfe_antes_contrato":
+            return f"NFe emitida ({self.data_item}) antes da data do contrato ({self.data_alvo})"
+        return (f"Soma das Liquidações ({_fmt_cents(self.valor_cents)}) excede valor da NFe {self.ref} "
+                f"({_fmt_cents(self.limite_cents)})")
+
+
+def run_pushdown(cursor, after_id: int = 0, until_id: Optional[int] = None,
+                 dialect: str = "postgres") -> Dict[int, List[PushdownViolation]]:
+    """Violações de Liquidação por contrato na faixa (after_id, until_id], calculadas no banco."""
+    params = (after_id,) if until_id is None else (after_id, until_id)
+    cursor.execute(compile_pushdown_query(dialect, until_id is not None), params)
+    out: Dict[int, List[PushdownViolation]] = defaultdict(list)
+    for row in cursor.fetchall():
+        v = PushdownViolation(*row)
+        v = v._replace(id_contrato=int(v.id_contrato), data_item=_as_date(v.data_item), data_alvo=_as_date(v.data_alvo),
+                       id_empenho=None if v.id_empenho is None else str(v.id_empenho))
+        out[v.id_contrato].append(v)
+    return dict(out)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARIDADE COM O DOMAIN PYTHON
+# ═══════════════════════════════════════════════════════════════════════════
+
+# (contrato, regra, motivo, ref) - ref da soma por empenho é o id do empenho (ver docstring)
+ParityKey = Tuple[int, str, str, str]
+
+
+def motivo_python(v: Violation) -> str:
+    for regra, trecho, motivo in MOTIVOS:
+        if v.regra == regra and trecho in v.mensagem:
+            return motivo
+    return "nao_avaliavel"
+
+
+def pushdown_keys(violacoes: Iterable[PushdownViolation]) -> Set[ParityKey]:
+    return {(v.id_contrato, v.regra, v.motivo, v.id_empenho if v.regra == "check_aggregate_rules" else v.ref)
+            for v in violacoes}
+
+
+def python_keys(contratos: List[Contrato], related) -> Tuple[Set[int], Set[ParityKey]]:
+    """
+    (contratos que chegam à Liquidação no Python, chaves das violações de Liquidação deles):
+    build_from_batch + regras de Empenho, depois coletar_liquidacao_violacoes.
+    """
+    entidades, fornecedores, empenhos, liquidacoes, nfes, _, _ = related
+    liq_empenho = {str(liq.id_liquidacao_empenhonotafiscal): str(id_emp)
+                   for id_emp, liqs in liquidacoes.items() for liq in liqs}
+    avaliados, keys = set(), set()
+    for contrato, tx in zip(contratos, EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)):
+        emp = tx.bind(executar_empenho_rules)
+        if emp.is_err:
+            continue
+        ctx = LiquidacaoTransaction.build_from_batch(emp.value, liquidacoes, nfes)
+        if ctx.is_err:
+            continue
+        avaliados.add(contrato.id_contrato)
+        for v in coletar_liquidacao_violacoes(ctx.value):
+            motivo = motivo_python(v)
+            ref = liq_empenho.get(v.ref, v.ref) if v.regra == "check_aggregate_rules" else v.ref
+            keys.add((contrato.id_contrato, v.regra, motivo, ref))
+    return avaliados, keys
+
+
+class ParityReport(NamedTuple):
+    contratos: int
+    avaliados: int                 # contratos que chegam à Liquidação no Python
+    violacoes: int                 # violações do push-down nesses contratos
+    so_pushdown: List[ParityKey]
+    so_python: List[ParityKey]
+
+    @property
+    def ok(self) -> bool:
+        return not self.so_pushdown and not self.so_python
+
+
+def check_parity(cursor, pushdown: Dict[int, List[PushdownViolation]], batch_size: int = 500,
+                 after_id: int = 0, until_id: Optional[int] = None) -> ParityReport:
+    """Roda o domain Python na mesma faixa (keyset, loader classic) e compara com o push-down."""
+    total, avaliados, py_keys = 0, set(), set()
+    while True:
+        contratos, last_id = batch_load_contratos(cursor, after_id, batch_size, until_id)
+        if last_id is None:
+            break
+        after_id = last_id
+        total += len(contratos)
+        batch_avaliados, batch_keys = python_keys(contratos, batch_load_related_data(cursor, contratos))
+        avaliados |= batch_avaliados
+        py_keys |= batch_keys
+    pd_keys = pushdown_keys(v for c, vs in pushdown.items() if c in avaliados for v in vs)
+    return ParityReport(total, len(avaliados), len(pd_keys), sorted(pd_keys - py_keys), sorted(py_keys - pd_keys))
+
+
+def print_pushdown(pushdown: Dict[int, List[PushdownViolation]], limit: Optional[int] = None):
+    """Resumo por motivo + violações por contrato (limit: só os N primeiros contratos)."""
+    por_motivo = Counter(v.motivo for vs in pushdown.values() for v in vs)
+    print(f"\n  🔎 Push-down Liquidação: {len(pushdown):,} contratos com violação, "
+          f"{sum(por_motivo.values()):,} violações")
+    for motivo, n in por_motivo.most_common():
+        print(f"     {motivo:<24} {n:>9,}")
+    for i, (id_contrato, vs) in enumerate(sorted(pushdown.items())):
+        if limit is not None and i >= limit:
+            print(f"     ... (+{len(pushdown) - limit:,} contratos)")
+            break
+        print(f"  ▶ C{id_contrato}")
+        for v in vs:
+            print(f"     ✗ [{v.regra}] {v.ref}: {v.mensagem}")
+
+
+def print_parity(report: ParityReport, limit: int = 20):
+    print(f"\n  ⚖️  Paridade push-down × Python: {report.contratos:,} contratos, "
+          f"{report.avaliados:,} chegam à Liquidação, {report.violacoes:,} violações no push-down")
+    if report.ok:
+        print("     ✅ Mesmas violações (contrato, regra, motivo, item)")
+        return
+    for nome, keys in (("só no push-down", report.so_pushdown), ("só no Python", report.so_python)):
+        if keys:
+            print(f"     ❌ {len(keys):,} {nome}:")
+            for key in keys[:limit]:
+                print(f"        {key}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import get_db_connection
+
+    p = argparse.ArgumentParser(description="Regras de Liquidação executadas no banco (push-down)")
+    p.add_argument("--after", type=int, default=0, help="id_contrato > AFTER")
+    p.add_argument("--until", type=int, default=None, help="id_contrato <= UNTIL")
+    p.add_argument("--limit", type=int, default=50, help="Contratos listados (0 = só o resumo)")
+    p.add_argument("--check", action="store_true", help="Confere com o domain Python na mesma faixa")
+    p.add_argument("--batch", "-b", type=int, default=500, help="Batch do domain Python no --check")
+    args = p.parse_args()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        start = time.time()
+        resultado = run_pushdown(cursor, args.after, args.until)
+        print(f"\n  ⏱️  Push-down: {time.time() - start:.2f}s")
+        print_pushdown(resultado, args.limit)
+        if args.check:
+            start = time.time()
+            report = check_parity(cursor, resultado, args.batch, args.after, args.until)
+            print(f"\n  ⏱️  Domain Python: {time.time() - start:.2f}s")
+            print_parity(report)
+            if not report.ok:
+                sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,382 @@
+"""
+Sink de resultados por contrato (JSONL / Parquet) para o fullpipe e o tail-first.
+
+O log por contrato (log_contrato_estrutura + linha de status) formata dezenas de linhas por
+contrato e, em escala, o terminal vira o gargalo. O sink grava uma linha por contrato com
+o outcome e os montantes, em escrita bufferizada: as linhas se acumulam em memória e vão
+para o arquivo em blocos de buffer_rows (um write por bloco no JSONL, um row group por
+bloco no Parquet).
+
+Campos (RESULT_FIELDS):
+    id_contrato
+    emp, liq, pag           status por estágio ("✓", "✗", "B" build error, "." não executado)
+    estagio_erro            primeiro estágio com ✗/B ("empenho" | "liquidacao" | "pagamento" | None)
+    erro_codigo             chave de agrupamento do erro (a mesma do TOP ERROS do resumo)
+    erro                    mensagem completa ("" se passou)
+    valor_contrato, total_empenhado, total_liquidado, total_pago
+                            centavos (int, arredondados a 2 casas); None quando o grafo do
+                            contrato não foi carregado (incremental: outcome reaproveitado)
+
+Formato pela extensão do caminho (.jsonl / .parquet / .sqlite3) ou explícito. Parquet requer
+pyarrow (opcional, importado só quando usado).
+
+SQLite (SqliteSink / ResultsTable): tabela materializada contrato_resultado lida pelo dashboard
+(views/dataview.py) sem rodar o pipeline. Ao contrário dos arquivos, é atualizada in-place
+(upsert por id_contrato, com atualizado_em = epoch do flush): runs parciais/incrementais só
+tocam os seus contratos e totais None não apagam os do run anterior. Run completo (o fullpipe
+chama mark_complete() ao fim do keyspace): no close() as linhas de contratos não vistos no run
+(apagados do banco) são removidas, como AuditStore.prune_unseen. No close() o sink também
+recalcula os agregados (resumo_estagio, resumo_erro): o resumo do dashboard é O(estágios),
+não uma varredura da tabela, e reflete o último run concluído. WAL: o dashboard lê enquanto
+o pipeline grava. Caminho padrão: RESULTS_DB_PATH (env) ou .results/contratos.sqlite3.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from clientside.domains.subdomains.financial_utils import add_money, money_total, quantize_money
+
+RESULT_FIELDS = ("id_contrato", "emp", "liq", "pag", "estagio_erro", "erro_codigo", "erro",
+                 "valor_contrato", "total_empenhado", "total_liquidado", "total_pago")
+
+DEFAULT_BUFFER_ROWS = 5000
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../"))
+
+DEFAULT_TABLE_PATH = os.getenv("RESULTS_DB_PATH", os.path.join(project_root, ".results", "contratos.sqlite3"))
+
+SQLITE_EXTENSIONS = (".sqlite3", ".sqlite", ".db")
+
+ESTAGIOS = ("empenho", "liquidacao", "pagamento")
+
+ResultRow = Tuple
+
+
+def error_code(err: str) -> str:
+    """Mesma chave de agrupamento de accumulate_stats (texto antes do primeiro '(', até 40 chars)."""
+    return err.split("(")[0].strip()[:40] if err else ""
+
+
+def _ensure_dir(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+def _cents(valor) -> Optional[int]:
+    if valor is None:
+        return None
+    return int(quantize_money(money_total(valor)).scaleb(2))
+
+
+def contract_result(contrato, outcome: Sequence[str], related: Optional[tuple] = None) -> ResultRow:
+    """
+    Linha do sink para um contrato. related: maps do loader do batch (montantes somados
+    sobre os empenhos do contrato); None deixa os totais vazios.
+    """
+    e, l, p, err = outcome
+    estagio = next((nome for nome, st in (("empenho", e), ("liquidacao", l), ("pagamento", p))
+                    if st in ("✗", "B")), None)
+    totais = (None, None, None)
+    if related is not None:
+        _, _, empenhos, liquidacoes, _, pagamentos, _ = related
+        emp_total = liq_total = pag_total = 0
+        for emp in empenhos.get(contrato.id_contrato, ()):
+            if emp.valor is not None:
+                emp_total = add_money(emp_total, emp.valor)
+            for liq in liquidacoes.get(emp.id_empenho, ()):
+                if liq.valor is not None:
+                    liq_total = add_money(liq_total, liq.valor)
+            for pag in pagamentos.get(emp.id_empenho, ()):
+                if pag.valor is not None:
+                    pag_total = add_money(pag_total, pag.valor)
+        totais = (_cents(emp_total), _cents(liq_total), _cents(pag_total))
+    return (contrato.id_contrato, e, l, p, estagio, error_code(err), err, _cents(contrato.valor), *totais)
+
+
+class JsonlSink:
+    """Uma linha JSON por contrato; linhas acumuladas e gravadas em bloco a cada buffer_rows."""
+
+    removed = 0
+
+    def __init__(self, path: str, buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._pending: List[str] = []
+        _ensure_dir(path)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, row: ResultRow):
+        self._pending.append(json.dumps(dict(zip(RESULT_FIELDS, row)), ensure_ascii=False))
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def write_many(self, rows: Iterable[ResultRow]):
+        for row in rows:
+            self.write(row)
+
+    def mark_complete(self):
+        """O run cobriu todo o keyspace; arquivos são reescritos a cada run, nada a podar."""
+
+    def flush(self):
+        if self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self.rows += len(self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink(JsonlSink):
+    """Colunar (pyarrow): cada flush vira um row group; o arquivo só é válido após close()."""
+
+    def __init__(self, path: str, buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Formato parquet requer pyarrow (pip install pyarrow) - ou use .jsonl") from exc
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._pending: List[ResultRow] = []
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id_contrato", pa.int64()), ("emp", pa.string()), ("liq", pa.string()), ("pag", pa.string()),
+            ("estagio_erro", pa.string()), ("erro_codigo", pa.string()), ("erro", pa.string()),
+            ("valor_contrato", pa.int64()), ("total_empenhado", pa.int64()),
+            ("total_liquidado", pa.int64()), ("total_pago", pa.int64()),
+        ])
+        _ensure_dir(path)
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, row: ResultRow):
+        self._pending.append(row)
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            columns = {name: [row[i] for row in self._pending] for i, name in enumerate(RESULT_FIELDS)}
+            self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+            self.rows += len(self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+_TOTAIS = ("valor_contrato", "total_empenhado", "total_liquidado", "total_pago")
+
+_UPSERT = (
+    f"INSERT INTO contrato_resultado ({', '.join(RESULT_FIELDS)}, atualizado_em) "
+    f"VALUES ({', '.join('?' * (len(RESULT_FIELDS) + 1))}) "
+    "ON CONFLICT (id_contrato) DO UPDATE SET "
+    + ", ".join(f"{f} = excluded.{f}" for f in RESULT_FIELDS[1:] if f not in _TOTAIS) + ", "
+    + ", ".join(f"{f} = COALESCE(excluded.{f}, {f})" for f in _TOTAIS)
+    + ", atualizado_em = excluded.atualizado_em"
+)
+
+
+class SqliteSink(JsonlSink):
+    """
+    Upsert em contrato_resultado: cada flush é uma transação (executemany). Os ids gravados
+    ficam na tabela temporária seen; após mark_complete(), close() remove os demais.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH, buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._pending: List[ResultRow] = []
+        self._complete = False
+        if path != ":memory:":
+            _ensure_dir(path)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS contrato_resultado (
+                id_contrato INTEGER PRIMARY KEY,
+                emp TEXT NOT NULL, liq TEXT NOT NULL, pag TEXT NOT NULL,
+                estagio_erro TEXT, erro_codigo TEXT NOT NULL, erro TEXT NOT NULL,
+                valor_contrato INTEGER, total_empenhado INTEGER, total_liquidado INTEGER, total_pago INTEGER,
+                atualizado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS contrato_resultado_estagio ON contrato_resultado (estagio_erro, id_contrato);
+            CREATE TABLE IF NOT EXISTS resumo_estagio (
+                estagio TEXT PRIMARY KEY,          -- '' = contratos íntegros
+                contratos INTEGER NOT NULL,
+                total_empenhado INTEGER NOT NULL, total_liquidado INTEGER NOT NULL, total_pago INTEGER NOT NULL,
+                atualizado_em REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS resumo_erro (
+                estagio TEXT NOT NULL, erro_codigo TEXT NOT NULL, contratos INTEGER NOT NULL,
+                PRIMARY KEY (estagio, erro_codigo)
+            );
+            CREATE TEMP TABLE seen (id_contrato INTEGER PRIMARY KEY);
+        """)
+
+    def write(self, row: ResultRow):
+        self._pending.append(row)
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(_UPSERT, [(*row, now) for row in self._pending])
+                self._conn.executemany("INSERT OR IGNORE INTO temp.seen (id_contrato) VALUES (?)",
+                                       ((row[0],) for row in self._pending))
+            self.rows += len(self._pending)
+            self._pending = []
+
+    def mark_complete(self):
+        """Run completo: close() poda os contratos que não apareceram (ver prune_unseen)."""
+        self._complete = True
+
+    def prune_unseen(self) -> int:
+        """Remove contratos não gravados neste run (apagados do banco). Só após um run completo."""
+        with self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM contrato_resultado WHERE id_contrato NOT IN (SELECT id_contrato FROM temp.seen)")
+        self.removed = cur.rowcount
+        return self.removed
+
+    def refresh_summary(self):
+        """Recalcula resumo_estagio / resumo_erro a partir de contrato_resultado (uma transação)."""
+        with self._conn:
+            self._conn.execute("DELETE FROM resumo_estagio")
+            self._conn.execute("DELETE FROM resumo_erro")
+            self._conn.execute(
+                "INSERT INTO resumo_estagio SELECT COALESCE(estagio_erro, ''), COUNT(*), "
+                "COALESCE(SUM(total_empenhado), 0), COALESCE(SUM(total_liquidado), 0), COALESCE(SUM(total_pago), 0), "
+                "MAX(atualizado_em) FROM contrato_resultado GROUP BY estagio_erro")
+            self._conn.execute(
+                "INSERT INTO resumo_erro SELECT estagio_erro, erro_codigo, COUNT(*) FROM contrato_resultado "
+                "WHERE estagio_erro IS NOT NULL GROUP BY estagio_erro, erro_codigo")
+
+    def close(self):
+        self.flush()
+        if self._complete:
+            self.prune_unseen()
+        self.refresh_summary()
+        self._conn.close()
+
+
+SINKS: Dict[str, type] = {
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+    "sqlite": SqliteSink,
+}
+
+
+def open_sink(path: str, fmt: Optional[str] = None, buffer_rows: int = DEFAULT_BUFFER_ROWS):
+    """Abre o sink; fmt None: pela extensão do arquivo (default jsonl)."""
+    if fmt is None:
+        fmt = ("parquet" if path.endswith(".parquet")
+               else "sqlite" if path.endswith(SQLITE_EXTENSIONS) else "jsonl")
+    if fmt not in SINKS:
+        raise ValueError(f"Formato de resultados inválido: {fmt} (use {', '.join(SINKS)})")
+    return SINKS[fmt](path, buffer_rows)
+
+
+def read_jsonl(path: str) -> List[dict]:
+    """Linhas de um arquivo do JsonlSink (testes / inspeção)."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ResultsTable:
+    """
+    Leitura da tabela do SqliteSink (somente leitura): resumo agregado, páginas por keyset
+    (id_contrato > after_id, via índice (estagio_erro, id_contrato)) e lookup por contrato.
+    Filtro situacao: None (todos), "ok" ou "erro"; estagio: um de ESTAGIOS (implica "erro").
+    """
+
+    COLUMNS = RESULT_FIELDS + ("atualizado_em",)
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Tabela de resultados não encontrada: {path} (rode o fullpipe com --results)")
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "ResultsTable":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _filter(situacao: Optional[str], estagio: Optional[str]) -> Tuple[str, list]:
+        if estagio is not None:
+            if estagio not in ESTAGIOS:
+                raise ValueError(f"Estágio inválido: {estagio} (use {', '.join(ESTAGIOS)})")
+            return "estagio_erro = ?", [estagio]
+        if situacao is None:
+            return "1 = 1", []
+        if situacao not in ("ok", "erro"):
+            raise ValueError(f"Situação inválida: {situacao} (use ok ou erro)")
+        return ("estagio_erro IS NULL" if situacao == "ok" else "estagio_erro IS NOT NULL"), []
+
+    def summary(self) -> dict:
+        """
+        Contratos e montantes (centavos) por estágio de erro (None = íntegros) + fim do último
+        run; lido dos agregados gravados no close() do sink.
+        """
+        por_estagio, atualizado_em = {}, None
+        for estagio, n, emp, liq, pag, quando in self._conn.execute(
+                "SELECT estagio, contratos, total_empenhado, total_liquidado, total_pago, atualizado_em "
+                "FROM resumo_estagio"):
+            por_estagio[estagio or None] = {"contratos": n, "total_empenhado": emp,
+                                            "total_liquidado": liq, "total_pago": pag}
+            atualizado_em = max(atualizado_em or quando, quando)
+        return {
+            "contratos": sum(v["contratos"] for v in por_estagio.values()),
+            "ok": por_estagio.get(None, {}).get("contratos", 0),
+            "por_estagio": por_estagio,
+            "atualizado_em": atualizado_em,
+        }
+
+    def top_errors(self, n: int = 10) -> List[Tuple[str, str, int]]:
+        """(estagio_erro, erro_codigo, contratos) mais frequentes."""
+        return self._conn.execute(
+            "SELECT estagio, erro_codigo, contratos FROM resumo_erro ORDER BY contratos DESC, estagio, erro_codigo "
+            "LIMIT ?", (n,)).fetchall()
+
+    def count(self, situacao: Optional[str] = None, estagio: Optional[str] = None) -> int:
+        """Contratos no filtro, pelos agregados (mesmo filtro de page())."""
+        self._filter(situacao, estagio)
+        por_estagio = self.summary()["por_estagio"]
+        if estagio is not None:
+            return por_estagio.get(estagio, {}).get("contratos", 0)
+        return sum(v["contratos"] for e, v in por_estagio.items()
+                   if situacao is None or (e is None) == (situacao == "ok"))
+
+    def page(self, after_id: int = 0, limit: int = 50, situacao: Optional[str] = None,
+             estagio: Optional[str] = None) -> List[dict]:
+        """Próximos `limit` contratos com id_contrato > after_id, em ordem de id."""
+        where, params = self._filter(situacao, estagio)
+        rows = self._conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM contrato_resultado "
+            f"WHERE {where} AND id_contrato > ? ORDER BY id_contrato LIMIT ?", (*params, after_id, limit))
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def get(self, id_contrato: int) -> Optional[dict]:
+        row = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM contrato_resultado WHERE id_contrato = ?",
+                                 (id_contrato,)).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
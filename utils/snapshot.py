@@ -0,0 +1,531 @@
+"""
+Snapshot colunar em disco do grafo carregado pelo fullpipe.
+
+Em desenvolvimento e auditorias repetidas o mesmo dado volta do Postgres a cada run via
+batch_load_related_data. O snapshot guarda os contratos + os 7 maps indexados (entidades,
+fornecedores, empenhos, liquidações, NFes, pagamentos, NfePagamentos) em arquivos .npy por coluna; a
+leitura usa np.load(mmap_mode="r"): nada é lido até um batch pedir suas linhas, e só
+essas linhas são decodificadas em models.
+
+Layout (um diretório):
+    manifest.json                      versão, watermark do banco, linhas por tabela
+    <tabela>.<campo>.<parte>.npy       colunas (ver _ColumnWriter)
+    contrato.{ent_row,forn_row,emp_start,emp_end}.npy   relações por índice de linha (-1 = ausente)
+    empenho.{liq_start,liq_end,pag_start,pag_end}.npy   (empenhos agrupados por contrato,
+    liquidacao_nota_fiscal.nfe_row.npy                   liquidações/pagamentos por empenho,
+    nfe.{np_start,np_end}.npy                            NfePagamentos por NFe)
+
+Invalidação: o manifest guarda load_table_watermark (linhas + max id de cada tabela) do
+momento do dump; Snapshot.open(path, cursor) recusa (SnapshotStale) se o banco mudou.
+
+Uso: python3 utils/snapshot.py [--out .snapshot] [-b 500]   (make snapshot)
+"""
+import os
+import sys
+import json
+import time
+import shutil
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.money import Money, to_money
+from models.hydration import gc_paused
+from models.contrato import Contrato
+from models.entidade import Entidade
+from models.fornecedor import Fornecedor
+from models.empenho import Empenho
+from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
+from models.nfe import Nfe
+from models.pagamento import Pagamento
+from models.nfe_pagamento import NfePagamento
+
+FORMAT_VERSION = 2
+DEFAULT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(project_root, ".snapshot"))
+
+INT, STR, MONEY, TEMPORAL = "int", "str", "money", "temporal"
+
+# tabela -> (model, ((campo, tipo), ...)) na ordem do construtor do model
+TABLES = {
+    "contrato": (Contrato, (("id_contrato", INT), ("valor", MONEY), ("data", TEMPORAL), ("objeto", STR),
+                            ("id_entidade", INT), ("id_fornecedor", INT))),
+    "entidade": (Entidade, (("id_entidade", INT), ("nome", STR), ("estado", STR), ("municipio", STR), ("cnpj", STR))),
+    "fornecedor": (Fornecedor, (("id_fornecedor", INT), ("nome", STR), ("documento", STR))),
+    "empenho": (Empenho, (("id_empenho", STR), ("ano", INT), ("data_empenho", TEMPORAL), ("cpf_cnpj_credor", STR),
+                          ("credor", STR), ("valor", MONEY), ("id_entidade", INT), ("id_contrato", INT))),
+    "liquidacao_nota_fiscal": (LiquidacaoNotaFiscal, (("id_liquidacao_empenhonotafiscal", INT), ("chave_danfe", STR),
+                                                      ("data_emissao", TEMPORAL), ("valor", MONEY), ("id_empenho", STR))),
+    "nfe": (Nfe, (("id", INT), ("chave_nfe", STR), ("numero_nfe", STR), ("data_hora_emissao", TEMPORAL),
+                  ("cnpj_emitente", STR), ("valor_total_nfe", MONEY))),
+    "pagamento": (Pagamento, (("id_pagamento", STR), ("id_empenho", STR), ("data_pagamento_emp", TEMPORAL), ("valor", MONEY))),
+    "nfe_pagamento": (NfePagamento, (("id", STR), ("chave_nfe", STR), ("tipo_pagamento", STR), ("valor_pagamento", MONEY))),
+}
+
+RELATIONS = {
+    "contrato": ("ent_row", "forn_row", "emp_start", "emp_end"),
+    "empenho": ("liq_start", "liq_end", "pag_start", "pag_end"),
+    "liquidacao_nota_fiscal": ("nfe_row",),
+    "nfe": ("np_start", "np_end"),
+}
+
+# kind das colunas MONEY / TEMPORAL
+_NULL, _VALUE, _RAW = 0, 1, 2
+_DATETIME = 3  # TEMPORAL: datetime naive (value = microssegundos desde 0001-01-01); _VALUE = date (ordinal)
+_US_PER_DAY = 86_400_000_000
+
+
+class SnapshotError(Exception):
+    """Valor sem codificação no snapshot, ou arquivo inválido."""
+
+
+class SnapshotStale(SnapshotError):
+    """O banco mudou (linhas / max id) desde o dump: o snapshot não representa mais os dados."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESCRITA
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _ColumnWriter:
+    """
+    Acumula os valores de um campo e os converte em chunks NumPy a cada flush.
+    Partes gravadas por tipo:
+        INT       values (int64), null (bool)
+        STR       data (uint8, utf-8 concatenado), offsets (int64, n+1), null (bool)
+        MONEY     kind (int8), coef (int64), exp (int8), raw (STR)  -> Decimal(coef).scaleb(exp)
+        TEMPORAL  kind (int8), value (int64), raw (STR)             -> date / datetime naive
+    raw (texto) cobre o que não cabe na forma compacta (ex.: datetime com fuso, -0.00).
+    null e raw só são gravados se a coluna tiver algum nulo / valor raw.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.pending: list = []
+        self.chunks: Dict[str, list] = {}
+        self.raw = _ColumnWriter(STR) if kind in (MONEY, TEMPORAL) else None
+
+    def _push(self, part: str, array: np.ndarray):
+        self.chunks.setdefault(part, []).append(array)
+
+    def flush(self):
+        values, self.pending = self.pending, []
+        encode = getattr(self, f"_encode_{self.kind}")
+        encode(values)
+        if self.raw is not None:
+            self.raw.flush()
+
+    def _encode_int(self, values):
+        null = [v is None for v in values]
+        for v in values:
+            if v is not None and type(v) is not int:
+                raise SnapshotError(f"Coluna int com valor {v!r}")
+        self._push("values", np.array([0 if v is None else v for v in values], dtype=np.int64))
+        self._push("null", np.array(null, dtype=bool))
+
+    def _encode_str(self, values):
+        encoded = []
+        for v in values:
+            if v is not None and type(v) is not str:
+                raise SnapshotError(f"Coluna str com valor {v!r}")
+            encoded.append(b"" if v is None else v.encode())
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        self._push("data", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        self._push("lengths", lengths)
+        self._push("null", np.array([v is None for v in values], dtype=bool))
+
+    def _encode_money(self, values):
+        kinds, coefs, exps = [], [], []
+        for v in values:
+            kind, coef, exp, raw = _NULL, 0, 0, None
+            if v is not None:
+                if not isinstance(v, Decimal):
+                    raise SnapshotError(f"Coluna monetária com valor {v!r}")
+                kind, raw = _RAW, str(v)
+                if v.is_finite():
+                    exp = v.as_tuple().exponent
+                    coef = int(v.scaleb(-exp))
+                    if -2**63 <= coef < 2**63 and -128 <= exp < 128 and str(Decimal(coef).scaleb(exp)) == raw:
+                        kind, raw = _VALUE, None
+                    else:
+                        coef, exp = 0, 0
+            kinds.append(kind)
+            coefs.append(coef)
+            exps.append(exp)
+            self.raw.pending.append(raw)
+        self._push("kind", np.array(kinds, dtype=np.int8))
+        self._push("coef", np.array(coefs, dtype=np.int64))
+        self._push("exp", np.array(exps, dtype=np.int8))
+
+    def _encode_temporal(self, values):
+        kinds, out = [], []
+        for v in values:
+            kind, value, raw = _NULL, 0, None
+            if type(v) is date:
+                kind, value = _VALUE, v.toordinal()
+            elif type(v) is datetime:
+                if v.tzinfo is None:
+                    kind = _DATETIME
+                    value = v.toordinal() * _US_PER_DAY + ((v.hour * 60 + v.minute) * 60 + v.second) * 1_000_000 + v.microsecond
+                else:
+                    kind, raw = _RAW, v.isoformat()
+            elif v is not None:
+                raise SnapshotError(f"Coluna temporal com valor {v!r}")
+            kinds.append(kind)
+            out.append(value)
+            self.raw.pending.append(raw)
+        self._push("kind", np.array(kinds, dtype=np.int8))
+        self._push("value", np.array(out, dtype=np.int64))
+
+    def save(self, path: str, prefix: str, optional: bool = False):
+        """optional (coluna raw): nada é gravado se todos os valores forem nulos."""
+        arrays = {part: np.concatenate(chunks) for part, chunks in self.chunks.items()}
+        if optional and arrays["null"].all():
+            return
+        for part, array in arrays.items():
+            if part == "null" and not array.any():
+                continue
+            if part == "lengths":
+                part, array = "offsets", np.concatenate(([0], np.cumsum(array))).astype(np.int64)
+            np.save(os.path.join(path, f"{prefix}.{part}.npy"), array)
+        if self.raw is not None:
+            self.raw.save(path, f"{prefix}.raw", optional=True)
+
+
+class _TableWriter:
+    def __init__(self, table: str):
+        self.table = table
+        self.model, self.fields = TABLES[table]
+        self.columns = {name: _ColumnWriter(kind) for name, kind in self.fields}
+        self.relations = {name: [] for name in RELATIONS.get(table, ())}
+        self.rows = 0
+
+    def append(self, obj) -> int:
+        for name, _ in self.fields:
+            self.columns[name].pending.append(getattr(obj, name))
+        self.rows += 1
+        return self.rows - 1
+
+    def flush(self):
+        for col in self.columns.values():
+            col.flush()
+
+    def save(self, path: str):
+        self.flush()  # garante ao menos um chunk (tabela vazia)
+        for name, col in self.columns.items():
+            col.save(path, f"{self.table}.{name}")
+        for name, values in self.relations.items():
+            np.save(os.path.join(path, f"{self.table}.{name}.npy"), np.array(values, dtype=np.int64))
+
+
+class SnapshotWriter:
+    """Recebe (contratos, related) batch a batch, na ordem de id_contrato, e grava o snapshot."""
+
+    def __init__(self):
+        self.tables = {name: _TableWriter(name) for name in TABLES}
+        self._rows_by_key: Dict[Tuple[str, object], int] = {}
+        self._last_id: Optional[int] = None
+
+    def _intern(self, table: str, key, obj) -> int:
+        """Entidade/fornecedor/NFe: uma linha por chave, compartilhada entre contratos."""
+        if obj is None:
+            return -1
+        row = self._rows_by_key.get((table, key))
+        if row is None:
+            row = self._rows_by_key[(table, key)] = self.tables[table].append(obj)
+        return row
+
+    def _intern_nfe(self, chave: str, nfe: Optional[Nfe], nfe_pagamentos: Dict[str, List[NfePagamento]]) -> int:
+        """NFe internada como as demais; ao ganhar linha, grava também a faixa dos seus NfePagamentos."""
+        t = self.tables
+        rows = t["nfe"].rows
+        row = self._intern("nfe", chave, nfe)
+        if t["nfe"].rows > rows:
+            t["nfe"].relations["np_start"].append(t["nfe_pagamento"].rows)
+            for np_ in nfe_pagamentos.get(chave, []):
+                t["nfe_pagamento"].append(np_)
+            t["nfe"].relations["np_end"].append(t["nfe_pagamento"].rows)
+        return row
+
+    def add_batch(self, contratos: List[Contrato], related: tuple):
+        entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+        t = self.tables
+        for contrato in contratos:
+            if self._last_id is not None and contrato.id_contrato <= self._last_id:
+                raise SnapshotError("Contratos fora de ordem de id_contrato")
+            self._last_id = contrato.id_contrato
+            t["contrato"].append(contrato)
+            rel = t["contrato"].relations
+            rel["ent_row"].append(self._intern("entidade", contrato.id_entidade, entidades.get(contrato.id_entidade)))
+            rel["forn_row"].append(self._intern("fornecedor", contrato.id_fornecedor, fornecedores.get(contrato.id_fornecedor)))
+            rel["emp_start"].append(t["empenho"].rows)
+            for emp in empenhos.get(contrato.id_contrato, []):
+                t["empenho"].append(emp)
+                emp_rel = t["empenho"].relations
+                emp_rel["liq_start"].append(t["liquidacao_nota_fiscal"].rows)
+                for liq in liquidacoes.get(emp.id_empenho, []):
+                    t["liquidacao_nota_fiscal"].append(liq)
+                    nfe = nfes.get(liq.chave_danfe) if liq.chave_danfe else None
+                    t["liquidacao_nota_fiscal"].relations["nfe_row"].append(
+                        self._intern_nfe(liq.chave_danfe, nfe, nfe_pagamentos))
+                emp_rel["liq_end"].append(t["liquidacao_nota_fiscal"].rows)
+                emp_rel["pag_start"].append(t["pagamento"].rows)
+                for pag in pagamentos.get(emp.id_empenho, []):
+                    t["pagamento"].append(pag)
+                emp_rel["pag_end"].append(t["pagamento"].rows)
+            rel["emp_end"].append(t["empenho"].rows)
+        for table in t.values():
+            table.flush()
+
+    def save(self, path: str, watermark: Dict[str, list]):
+        """Grava num diretório temporário e troca pelo destino (um snapshot nunca fica pela metade)."""
+        tmp = f"{path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for table in self.tables.values():
+            table.save(tmp)
+        manifest = {
+            "version": FORMAT_VERSION,
+            "created_at": time.time(),
+            "watermark": watermark,
+            "rows": {name: table.rows for name, table in self.tables.items()},
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+
+def dump_snapshot(conn, path: str = DEFAULT_PATH, batch_size: int = 500, loader: str = "classic") -> dict:
+    """Percorre o banco inteiro (keyset streaming + loader do fullpipe) e grava o snapshot. Retorna o manifest."""
+    from utils.etl_common import stream_contratos, load_table_watermark, RELATED_LOADERS
+
+    cursor = conn.cursor()
+    try:
+        watermark = load_table_watermark(cursor)
+        writer = SnapshotWriter()
+        for contratos in stream_contratos(conn, batch_size):
+            writer.add_batch(contratos, RELATED_LOADERS[loader](cursor, contratos))
+        writer.save(path, watermark)
+    finally:
+        cursor.close()
+    return Snapshot(path).manifest
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LEITURA (memory-mapped)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _money(coef: int, exp: int):
+    """Decimal(coef) * 10**exp, já como Money quando exato em centavos (mesmo resultado de to_money)."""
+    value = Decimal(coef).scaleb(exp)
+    if exp >= -2:
+        cents = coef * 10 ** (exp + 2)
+    else:
+        cents, rest = divmod(coef, 10 ** (-2 - exp))
+        if rest:
+            return value
+    money = Decimal.__new__(Money, value)
+    money.cents = cents
+    return money
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatena as faixas [start, end) num único vetor de índices (sem loop Python)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(ends, dtype=np.int64) - starts
+    before = np.cumsum(lengths) - lengths
+    return np.repeat(starts - before, lengths) + np.arange(lengths.sum(), dtype=np.int64)
+
+
+class Snapshot:
+    """Snapshot aberto: colunas mapeadas sob demanda, decodificação só das linhas pedidas."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        manifest_path = os.path.join(path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            raise SnapshotError(f"Snapshot não encontrado em {path} (rode: make snapshot)")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise SnapshotError(f"Versão de snapshot {self.manifest.get('version')} != {FORMAT_VERSION}")
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_PATH, cursor=None) -> "Snapshot":
+        """Abre o snapshot; com cursor, confere a watermark contra o banco (SnapshotStale se divergir)."""
+        snapshot = cls(path)
+        if cursor is not None:
+            from utils.etl_common import load_table_watermark
+            current = load_table_watermark(cursor)
+            stale = sorted(t for t, wm in snapshot.manifest["watermark"].items() if current.get(t) != wm)
+            if stale:
+                raise SnapshotStale(f"Snapshot desatualizado: {', '.join(stale)} mudaram desde o dump")
+        return snapshot
+
+    def _array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return array
+
+    def _nulls(self, prefix: str, idx: np.ndarray) -> list:
+        """Máscara de nulos das linhas idx (coluna sem arquivo .null não tem nulos)."""
+        name = f"{prefix}.null"
+        if name not in self._arrays and not os.path.exists(os.path.join(self.path, f"{name}.npy")):
+            return [False] * len(idx)
+        return self._array(name)[idx].tolist()
+
+    # ── decodificação de colunas ────────────────────────────────────────────
+
+    def _decode_str(self, prefix: str, idx: np.ndarray) -> list:
+        offsets, data = self._array(f"{prefix}.offsets"), self._array(f"{prefix}.data")
+        starts, ends = offsets[idx].tolist(), offsets[idx + 1].tolist()
+        nulls = self._nulls(prefix, idx)
+        if not starts:
+            return []
+        base = min(starts)
+        blob = data[base:max(ends)].tobytes()
+        return [None if n else blob[s - base:e - base].decode() for s, e, n in zip(starts, ends, nulls)]
+
+    def _decode_int(self, prefix: str, idx: np.ndarray) -> list:
+        values, null = self._array(f"{prefix}.values")[idx].tolist(), self._nulls(prefix, idx)
+        return [None if n else v for v, n in zip(values, null)]
+
+    def _decode_money(self, prefix: str, idx: np.ndarray) -> list:
+        kinds = self._array(f"{prefix}.kind")[idx].tolist()
+        coefs = self._array(f"{prefix}.coef")[idx].tolist()
+        exps = self._array(f"{prefix}.exp")[idx].tolist()
+        raws = self._decode_str(f"{prefix}.raw", idx) if _RAW in kinds else None
+        out = []
+        for i, (kind, coef, exp) in enumerate(zip(kinds, coefs, exps)):
+            if kind == _VALUE:
+                out.append(_money(coef, exp))
+            elif kind == _RAW:
+                out.append(to_money(Decimal(raws[i])))
+            else:
+                out.append(None)
+        return out
+
+    def _decode_temporal(self, prefix: str, idx: np.ndarray) -> list:
+        kinds = self._array(f"{prefix}.kind")[idx].tolist()
+        values = self._array(f"{prefix}.value")[idx].tolist()
+        raws = self._decode_str(f"{prefix}.raw", idx) if _RAW in kinds else None
+        out = []
+        for i, (kind, value) in enumerate(zip(kinds, values)):
+            if kind == _VALUE:
+                out.append(date.fromordinal(value))
+            elif kind == _DATETIME:
+                days, us = divmod(value, _US_PER_DAY)
+                seconds, micro = divmod(us, 1_000_000)
+                minutes, second = divmod(seconds, 60)
+                hour, minute = divmod(minutes, 60)
+                d = date.fromordinal(days)
+                out.append(datetime(d.year, d.month, d.day, hour, minute, second, micro))
+            elif kind == _RAW:
+                out.append(datetime.fromisoformat(raws[i]))
+            else:
+                out.append(None)
+        return out
+
+    def rows(self, table: str, idx: np.ndarray) -> list:
+        """Models das linhas idx da tabela (na ordem de idx), com o GC pausado como na hidratação."""
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(idx) == 0:
+            return []
+        model, fields = TABLES[table]
+        with gc_paused():
+            columns = [getattr(self, f"_decode_{kind}")(f"{table}.{name}", idx) for name, kind in fields]
+            return [model(*values) for values in zip(*columns)]
+
+    # ── API do pipeline ─────────────────────────────────────────────────────
+
+    @property
+    def contract_ids(self) -> np.ndarray:
+        return self._array("contrato.id_contrato.values")
+
+    def iter_contratos(self, batch_size: int = 100, after_id: int = 0,
+                       until_id: Optional[int] = None) -> Iterator[List[Contrato]]:
+        """Equivalente a stream_contratos: batches de Contrato por id_contrato em (after_id, until_id]."""
+        ids = self.contract_ids
+        lo = int(np.searchsorted(ids, after_id, side="right"))
+        hi = len(ids) if until_id is None else int(np.searchsorted(ids, until_id, side="right"))
+        for start in range(lo, hi, batch_size):
+            yield self.rows("contrato", np.arange(start, min(start + batch_size, hi)))
+
+    def load_related(self, cursor, contratos: List[Contrato]):
+        """Mesmos 7 maps de batch_load_related_data, lidos do snapshot (cursor ignorado)."""
+        if not contratos:
+            return {}, {}, {}, {}, {}, {}, {}
+        ids = self.contract_ids
+        wanted = np.array([c.id_contrato for c in contratos], dtype=np.int64)
+        pos = np.searchsorted(ids, wanted)
+        pos = pos[(pos < len(ids)) & (ids[np.minimum(pos, len(ids) - 1)] == wanted)]
+
+        def unique_rows(rows: np.ndarray) -> np.ndarray:
+            rows = rows[rows >= 0]
+            _, first = np.unique(rows, return_index=True)
+            return rows[np.sort(first)]
+
+        entidades = {e.id_entidade: e for e in self.rows("entidade", unique_rows(self._array("contrato.ent_row")[pos]))}
+        fornecedores = {f.id_fornecedor: f for f in self.rows("fornecedor", unique_rows(self._array("contrato.forn_row")[pos]))}
+
+        emp_idx = _ranges(self._array("contrato.emp_start")[pos], self._array("contrato.emp_end")[pos])
+        empenhos: Dict[int, List[Empenho]] = {}
+        emp_rows = []
+        seen_emp = set()
+        for row, emp in zip(emp_idx.tolist(), self.rows("empenho", emp_idx)):
+            empenhos.setdefault(emp.id_contrato, []).append(emp)
+            if emp.id_empenho not in seen_emp:
+                seen_emp.add(emp.id_empenho)
+                emp_rows.append(row)
+        emp_rows = np.array(emp_rows, dtype=np.int64)
+
+        liq_idx = _ranges(self._array("empenho.liq_start")[emp_rows], self._array("empenho.liq_end")[emp_rows])
+        liquidacoes: Dict[str, List[LiquidacaoNotaFiscal]] = {}
+        for liq in self.rows("liquidacao_nota_fiscal", liq_idx):
+            liquidacoes.setdefault(liq.id_empenho, []).append(liq)
+
+        nfe_rows = unique_rows(self._array("liquidacao_nota_fiscal.nfe_row")[liq_idx])
+        nfes = {n.chave_nfe: n for n in self.rows("nfe", nfe_rows)}
+
+        np_idx = _ranges(self._array("nfe.np_start")[nfe_rows], self._array("nfe.np_end")[nfe_rows])
+        nfe_pagamentos: Dict[str, List[NfePagamento]] = {}
+        for np_ in self.rows("nfe_pagamento", np_idx):
+            nfe_pagamentos.setdefault(np_.chave_nfe, []).append(np_)
+
+        pag_idx = _ranges(self._array("empenho.pag_start")[emp_rows], self._array("empenho.pag_end")[emp_rows])
+        pagamentos: Dict[str, List[Pagamento]] = {}
+        for pag in self.rows("pagamento", pag_idx):
+            pagamentos.setdefault(pag.id_empenho, []).append(pag)
+
+        return entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import get_db_connection
+
+    p = argparse.ArgumentParser(description="Dump do grafo do fullpipe para um snapshot colunar (mmap)")
+    p.add_argument("--out", "-o", default=DEFAULT_PATH, help=f"Diretório do snapshot (default: {DEFAULT_PATH})")
+    p.add_argument("--batch", "-b", type=int, default=500)
+    p.add_argument("--loader", choices=("classic", "joined"), default="classic")
+    args = p.parse_args()
+
+    start = time.time()
+    conn = get_db_connection()
+    try:
+        manifest = dump_snapshot(conn, args.out, args.batch, args.loader)
+    finally:
+        conn.close()
+    size = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out))
+    print(f"\n📸 Snapshot gravado em {args.out} ({size / 2**20:.1f} MiB, {time.time() - start:.1f}s)")
+    for table, rows in manifest["rows"].items():
+        print(f"   {table:<24} {rows:>10,} linhas")
@@ -3,9 +3,9 @@ import plotly.express as px
 import pandas as pd
 import sys
 import os
-import time
-from collections import defaultdict
-from typing import Dict, List, Any
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
 
 # Ensure project root is in sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,240 +13,46 @@ project_root = os.path.abspath(os.path.join(current_dir, "../"))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from result import Result
-from db_connection import get_db_connection
-from models.contrato import Contrato
-from models.entidade import Entidade
-from models.fornecedor import Fornecedor
-from models.empenho import Empenho
-from models.liquidacao_nota_fiscal import LiquidacaoNotaFiscal
-from models.nfe import Nfe
-from models.pagamento import Pagamento
-
-from clientside.transaction.empenho_transaction import EmpenhoTransaction
-from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
-from clientside.transaction.transaction_pagamento import PaymentTransaction
-from clientside.domains.empenho import executar_empenho_rules as ValidaEmpenho
-from clientside.domains.liquidação import Valida as ValidaLiquidacao
-from clientside.domains.pagamento import Valida as ValidaPagamento
+from utils.results_sink import DEFAULT_TABLE_PATH, ESTAGIOS, ResultsTable
 
 # ==========================================
-# SUPER PERFORMANCE BATCH LOADERS (From/Based on etl_fullpipe.py)
+# LEITURA DA TABELA DE RESULTADOS
 # ==========================================
+# O pipeline roda em batch, fora do dashboard (make fullpipe-results): uma linha por contrato
+# em contrato_resultado (utils.results_sink.SqliteSink). Aqui só leitura: resumo agregado e
+# páginas por keyset - nenhuma validação roda no processo da UI.
 
-def batch_load_contratos(cursor, limit: int = 200, offset: int = 0) -> List[Contrato]:
-    """Carrega um batch de contratos."""
-    cursor.execute(f"SELECT * FROM contrato ORDER BY id_contrato LIMIT {limit} OFFSET {offset}")
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    contratos = []
-    for row in rows:
-        res = Contrato.create(dict(zip(cols, row)))
-        if res.is_ok:
-            contratos.append(res.value)
-    return contratos
-
-def batch_load_related_data(cursor, contratos: List[Contrato]):
-    """
-    Carrega dados relacionados para um batch de contratos.
-    Retorna dicts indexados para O(1) lookup.
-    """
-    if not contratos:
-        return {}, {}, {}, {}, {}, {}
-    
-    contract_ids = [c.id_contrato for c in contratos]
-    entidade_ids = list(set(c.id_entidade for c in contratos))
-    fornecedor_ids = list(set(c.id_fornecedor for c in contratos))
-    
-    # ENTIDADES
-    cursor.execute(f"SELECT * FROM entidade WHERE id_entidade = ANY(%s)", (entidade_ids,))
-    entidades_map = {row[0]: Entidade.from_row(dict(zip([d[0] for d in cursor.description], row))).value 
-                     for row in cursor.fetchall() if Entidade.from_row(dict(zip([d[0] for d in cursor.description], row))).is_ok}
-    
-    # FORNECEDORES
-    cursor.execute(f"SELECT * FROM fornecedor WHERE id_fornecedor = ANY(%s)", (fornecedor_ids,))
-    fornecedores_map = {row[0]: Fornecedor.from_row(dict(zip([d[0] for d in cursor.description], row))).value 
-                        for row in cursor.fetchall() if Fornecedor.from_row(dict(zip([d[0] for d in cursor.description], row))).is_ok}
-    
-    # EMPENHOS
-    cursor.execute(f"SELECT * FROM empenho WHERE id_contrato = ANY(%s)", (contract_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    empenhos_por_contrato = defaultdict(list)
-    all_empenho_ids = []
-    for row in rows:
-        res = Empenho.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            emp = res.value
-            empenhos_por_contrato[emp.id_contrato].append(emp)
-            all_empenho_ids.append(emp.id_empenho)
-            
-    # LIQUIDAÇÕES & NFEs & PAGAMENTOS (Lazy Logic but Batched)
-    liquidacoes_por_empenho = defaultdict(list)
-    all_chaves_danfe = []
-    pagamentos_por_empenho = defaultdict(list)
-    nfes_map = {}
+ESTAGIO_LABEL = {"empenho": "Empenho", "liquidacao": "Liquidação", "pagamento": "Pagamento"}
+SITUACOES = {"Todos": None, "Com erro": "erro", "Íntegros": "ok"}
+PAGE_SIZES = (25, 50, 100, 200)
 
-    if all_empenho_ids:
-        # LIQUIDAÇÕES
-        cursor.execute(f"SELECT * FROM liquidacao_nota_fiscal WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = LiquidacaoNotaFiscal.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                liq = res.value
-                liquidacoes_por_empenho[liq.id_empenho].append(liq)
-                if liq.chave_danfe:
-                    all_chaves_danfe.append(liq.chave_danfe)
 
-        # PAGAMENTOS
-        cursor.execute(f"SELECT * FROM pagamento WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = Pagamento.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                pag = res.value
-                pagamentos_por_empenho[pag.id_empenho].append(pag)
-                
-    # NFES
-    if all_chaves_danfe:
-        cursor.execute(f"SELECT * FROM nfe WHERE chave_nfe = ANY(%s)", (all_chaves_danfe,))
-        nfes_map = {row[1]: Nfe.from_row(dict(zip([d[0] for d in cursor.description], row))).value
-                    for row in cursor.fetchall() if Nfe.from_row(dict(zip([d[0] for d in cursor.description], row))).is_ok}
+@st.cache_resource(show_spinner=False)
+def open_results_table(path: str) -> ResultsTable:
+    """Conexão somente leitura reaproveitada entre reruns (cada leitura vê a tabela atual)."""
+    return ResultsTable(path)
 
-    return (
-        entidades_map,
-        fornecedores_map,
-        dict(empenhos_por_contrato),
-        dict(liquidacoes_por_empenho),
-        nfes_map,
-        dict(pagamentos_por_empenho)
-    )
 
+def reais(cents: Optional[int]) -> str:
+    return "-" if cents is None else f"R$ {Decimal(cents).scaleb(-2):,.2f}"
 
-# ==========================================
-# UTIL
-# ==========================================
-def obj_to_dict(obj: Any) -> Any:
-    if isinstance(obj, list):
-        return [obj_to_dict(item) for item in obj]
-    if hasattr(obj, "__dataclass_fields__") or hasattr(obj, "__dict__"):
-        attrs = {}
-        if hasattr(obj, "__dict__"):
-            attrs = obj.__dict__
-        elif hasattr(obj, "__dataclass_fields__"):
-            from dataclasses import fields
-            attrs = {f.name: getattr(obj, f.name) for f in fields(obj)}
-        clean_attrs = {}
-        for k, v in attrs.items():
-            if k.startswith('_'): continue
-            clean_attrs[k] = obj_to_dict(v)
-        return clean_attrs
-    return obj
 
+def quando(epoch: Optional[float]) -> str:
+    return "-" if epoch is None else datetime.fromtimestamp(epoch).strftime("%d/%m/%Y %H:%M:%S")
 
-# ==========================================
-# PIPELINE EXECUTION
-# ==========================================
-@st.cache_data(ttl=600, show_spinner=False)
-def load_and_process_data_optimized(batch_size: int = 200):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 0. Get Total Count
-    cursor.execute("SELECT COUNT(*) FROM contrato")
-    total_contratos = cursor.fetchone()[0]
-    
-    processed_results = []
-    offset = 0
-    
-    progress_bar = st.progress(0, text="Iniciando processamento em batch...")
-    
-    while offset < total_contratos:
-        remaining = total_contratos - offset
-        current_batch_size = min(batch_size, remaining)
-        
-        # Update progress (arithmetic operations per user request)
-        pct = min(offset / total_contratos, 1.0)
-        progress_bar.progress(pct, text=f"Processando contratos {offset+1} a {offset+current_batch_size} de {total_contratos}...")
-
-        # 1. Batch Load
-        contratos = batch_load_contratos(cursor, limit=current_batch_size, offset=offset) # Modified helper needed
-        (entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos) = batch_load_related_data(cursor, contratos)
-        
-        # 2. Batch Build (In-Memory!)
-        tx_results = EmpenhoTransaction.build_from_batch(
-            contratos, entidades, fornecedores, empenhos
-        )
-        
-        for contrato, emp_res in zip(contratos, tx_results):
-            status = "OK"
-            error_msg = None
-            stage = "Empenho"
-            final_obj = None
-            
-            # Empenho Stage
-            if emp_res.is_err:
-                status = "ERRO"
-                error_msg = emp_res.error
-            else:
-                val_emp = ValidaEmpenho(emp_res.value)
-                if val_emp.is_err:
-                    status = "ERRO"
-                    error_msg = val_emp.error
-                else:
-                    final_obj = val_emp.value
-                    stage = "Liquidação"
-                    
-                    # Liquidacao Stage (Batch Optimized)
-                    liq_tx_res = LiquidacaoTransaction.build_from_batch(val_emp.value, liquidacoes, nfes)
-                    
-                    if liq_tx_res.is_err:
-                        status = "ERRO"
-                        error_msg = liq_tx_res.error
-                    else:
-                        val_liq = ValidaLiquidacao(liq_tx_res.value)
-                        if val_liq.is_err:
-                            status = "ERRO"
-                            error_msg = val_liq.error
-                        else:
-                            final_obj = val_liq.value
-                            stage = "Pagamento"
-                            
-                            # Pagamento Stage (Batch Optimized)
-                            pay_tx_res = PaymentTransaction.build_from_batch(val_liq.value, pagamentos)
-                            
-                            if pay_tx_res.is_err:
-                                status = "ERRO"
-                                error_msg = pay_tx_res.error
-                                final_obj = val_liq.value # Fallback
-                            else:
-                                val_pay = ValidaPagamento(pay_tx_res.value)
-                                if val_pay.is_err:
-                                    status = "ERRO"
-                                    error_msg = val_pay.error
-                                    final_obj = pay_tx_res.value # Fallback
-                                else:
-                                    status = "OK"
-                                    final_obj = val_pay.value
 
-            processed_results.append({
-                "id": contrato.id_contrato,
-                "status": status,
-                "error": error_msg,
-                "stage": stage,
-                "object": final_obj,
-                "valor": getattr(contrato, "valor_contrato", 0) or 0
-            })
-            
-        offset += current_batch_size
-    
-    progress_bar.empty()
-    cursor.close()
-    conn.close()
-    return processed_results
+def page_frame(rows) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "Contrato": r["id_contrato"],
+        "E": r["emp"], "L": r["liq"], "P": r["pag"],
+        "Estágio": ESTAGIO_LABEL.get(r["estagio_erro"], "-"),
+        "Erro": r["erro_codigo"],
+        "Contrato (R$)": reais(r["valor_contrato"]),
+        "Empenhado": reais(r["total_empenhado"]),
+        "Liquidado": reais(r["total_liquidado"]),
+        "Pago": reais(r["total_pago"]),
+        "Atualizado": quando(r["atualizado_em"]),
+    } for r in rows])
 
 
 # ==========================================
@@ -255,70 +61,92 @@ def load_and_process_data_optimized(batch_size: int = 200):
 st.set_page_config(page_title="Inova - Auditoria", layout="wide")
 st.title("📊 Inova Dataview - Auditoria Contínua")
 
-if st.button("🔄 Recarregar Dados (Real-Time)"):
-    st.cache_data.clear()
-    st.rerun()
+if not os.path.exists(DEFAULT_TABLE_PATH):
+    st.warning(f"Tabela de resultados não encontrada em `{DEFAULT_TABLE_PATH}`. "
+               "Gere com `make fullpipe-results` (pipeline em batch, fora do dashboard).")
+    st.stop()
 
-with st.spinner("🚀 Processando pipeline OTIMIZADO (Batch Processing)..."):
-    data = load_and_process_data_optimized(batch_size=200)
+table = open_results_table(DEFAULT_TABLE_PATH)
 
-total = len(data)
-ok_list = [d for d in data if d["status"] == "OK"]
-err_list = [d for d in data if d["status"] == "ERRO"]
+if st.button("🔄 Recarregar Dados"):
+    st.rerun()
 
-col1, col2, col3 = st.columns(3)
-col1.metric("Contratos Analisados", total)
-col2.metric("✅ Contratos Íntegros", len(ok_list))
-col3.metric("🚨 Contratos com Anomalias", len(err_list))
+resumo = table.summary()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Contratos Analisados", f"{resumo['contratos']:,}")
+col2.metric("✅ Contratos Íntegros", f"{resumo['ok']:,}")
+col3.metric("🚨 Contratos com Anomalias", f"{resumo['contratos'] - resumo['ok']:,}")
+col4.metric("🕒 Última Atualização", quando(resumo["atualizado_em"]))
+
+col_chart, col_top = st.columns(2)
+with col_chart:
+    por_estagio = pd.DataFrame([{"Estágio": ESTAGIO_LABEL[e], "Contratos": resumo["por_estagio"][e]["contratos"]}
+                                for e in ESTAGIOS if e in resumo["por_estagio"]])
+    if not por_estagio.empty:
+        st.plotly_chart(px.bar(por_estagio, x="Estágio", y="Contratos", title="Contratos reprovados por estágio"),
+                        use_container_width=True)
+with col_top:
+    st.subheader("Top Erros")
+    st.dataframe(pd.DataFrame([{"Estágio": ESTAGIO_LABEL.get(e, e), "Erro": codigo, "Contratos": n}
+                               for e, codigo, n in table.top_errors(10)]),
+                 hide_index=True, use_container_width=True)
 
 st.markdown("---")
-
-tab_err, tab_ok = st.tabs(["🚨 Contratos com Erro (Auditoria)", "✅ Contratos OK (Estrutura)"])
-
-with tab_err:
-    st.header("Auditoria de Erros")
-    if not err_list:
-        st.success("Nenhuma anomalia detectada nesta amostra!")
-    else:
-        col_list, col_detail = st.columns([1, 2])
-        with col_list:
-            selected_err_id = st.selectbox(
-                "Selecione Contrato para Auditar:",
-                options=[d["id"] for d in err_list],
-                format_func=lambda x: f"Contrato #{x}"
-            )
-        selected_err_item = next((d for d in err_list if d["id"] == selected_err_id), None)
-        with col_detail:
-            if selected_err_item:
-                st.error(f"**Falha Detectada no Estágio: {selected_err_item['stage']}**")
-                st.markdown(f"""
-                <div style="padding:15px; border-left: 5px solid #ff4b4b; background-color: #f0f2f6;">
-                    <h3>🛑 Resultado da Validação</h3>
-                    <p style="font-size:16px; font-family:monospace;">{selected_err_item['error']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                if selected_err_item["object"]:
-                     with st.expander("Ver estado parcial do objeto (Debug)"):
-                         st.json(obj_to_dict(selected_err_item["object"]))
-
-with tab_ok:
-    st.header("Estrutura Interna (Validada)")
-    if not ok_list:
-        st.warning("Nenhum contrato completo encontrado.")
-    else:
-        col_list_ok, col_detail_ok = st.columns([1, 2])
-        with col_list_ok:
-             selected_ok_id = st.selectbox(
-                "Selecione Contrato Válido:",
-                options=[d["id"] for d in ok_list],
-                format_func=lambda x: f"Contrato #{x}"
-            )
-        selected_ok_item = next((d for d in ok_list if d["id"] == selected_ok_id), None)
-        with col_detail_ok:
-            if selected_ok_item:
-                st.success(f"**Contrato #{selected_ok_item['id']} Integrity Check Passed**")
-                st.markdown("Abaixo a visualização da **Estrutura em Memória** completa do objeto transacional:")
-                st.json(obj_to_dict(selected_ok_item["object"]))
+st.header("Contratos")
+
+col_sit, col_est, col_size = st.columns(3)
+situacao = SITUACOES[col_sit.radio("Situação", list(SITUACOES), horizontal=True)]
+estagio = None
+if situacao == "erro":
+    escolha = col_est.selectbox("Estágio", ["Todos", *ESTAGIOS], format_func=lambda e: ESTAGIO_LABEL.get(e, e))
+    estagio = None if escolha == "Todos" else escolha
+page_size = col_size.selectbox("Por página", PAGE_SIZES, index=1)
+
+# Paginação keyset: pilha com o after_id de cada página visitada (reinicia ao trocar o filtro)
+filtro = (situacao, estagio, page_size)
+if st.session_state.get("filtro") != filtro:
+    st.session_state["filtro"] = filtro
+    st.session_state["paginas"] = [0]
+paginas = st.session_state["paginas"]
+
+rows = table.page(paginas[-1], page_size, situacao, estagio)
+total = table.count(situacao, estagio)
+
+col_prev, col_info, col_next = st.columns([1, 4, 1])
+if col_prev.button("◀ Anterior", disabled=len(paginas) == 1):
+    paginas.pop()
+    st.rerun()
+if col_next.button("Próxima ▶", disabled=len(rows) < page_size):
+    paginas.append(rows[-1]["id_contrato"])
+    st.rerun()
+col_info.caption(f"Página {len(paginas)} de {max(1, -(-total // page_size)):,} - {total:,} contratos")
+
+if not rows:
+    st.success("Nenhum contrato neste filtro.")
+else:
+    st.dataframe(page_frame(rows), hide_index=True, use_container_width=True)
+
+    selecionado = st.selectbox("Selecione Contrato para Auditar:", [r["id_contrato"] for r in rows],
+                               format_func=lambda x: f"Contrato #{x}")
+    item = table.get(selecionado)
+    if item:
+        if item["estagio_erro"]:
+            st.error(f"**Falha Detectada no Estágio: {ESTAGIO_LABEL[item['estagio_erro']]}**")
+            st.markdown(f"""
+            <div style="padding:15px; border-left: 5px solid #ff4b4b; background-color: #f0f2f6;">
+                <h3>🛑 Resultado da Validação</h3>
+                <p style="font-size:16px; font-family:monospace;">{item['erro']}</p>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            st.success(f"**Contrato #{item['id_contrato']} Integrity Check Passed**")
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Contrato", reais(item["valor_contrato"]))
+        m2.metric("Empenhado", reais(item["total_empenhado"]))
+        m3.metric("Liquidado", reais(item["total_liquidado"]))
+        m4.metric("Pago", reais(item["total_pago"]))
+        st.caption(f"E:{item['emp']} L:{item['liq']} P:{item['pag']} | validado em {quando(item['atualizado_em'])}")
 
 st.markdown("---")
 st.caption("Sistema Inova - Módulo de Auditoria Automatizada | Powered by Python Agentic Framework")
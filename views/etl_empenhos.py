@@ -15,7 +15,7 @@ from result import Result
 from models.contrato import Contrato
 from clientside.transaction.empenho_transaction import EmpenhoTransaction
 from clientside.domains.empenho import executar_empenho_rules
-from utils.etl_common import batch_load_contratos, batch_load_related_data
+from utils.etl_common import stream_contratos, batch_load_related_data
 
 def print_structure(obj, indent=0):
     """
@@ -99,13 +99,10 @@ def run_pipeline(batch_size: int = 100):
     total_processed = 0
     batch_num = 0
 
-    while True:
+    for contratos in stream_contratos(conn, batch_size):
         batch_num += 1
         # Extract
         print(f"\n--- [E]XTRACT Batch {batch_num} ---")
-        contratos = batch_load_contratos(cursor, offset, batch_size)
-        if not contratos:
-            break
         
         print(f"📦 Extracted {len(contratos)} contracts.")
 
@@ -131,7 +128,7 @@ def run_pipeline(batch_size: int = 100):
              L_validate_and_log(global_idx, emp_result.value)
 
         total_processed += len(contratos)
-        offset += batch_size
+        offset += len(contratos)
         
         # Optional: Ask user or just process all if it's a full run. 
         # The prompt implies processing ALL so we continue.
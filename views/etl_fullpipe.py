@@ -1,11 +1,14 @@
 """
 ETL Full Pipeline - Batch Loading Optimizado COMPLETO
-7 queries em vez de N*10+ queries (N = numero de contratos)
+8 queries em vez de N*10+ queries (N = numero de contratos)
+(2 queries por batch com --loader joined)
 """
 import sys
 import os
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from collections import defaultdict
+from dataclasses import dataclass
+from functools import partial
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../"))
@@ -13,7 +16,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from result import Result
-from db_connection import get_db_connection
+from db_connection import get_db_connection, close_pool
 from models.contrato import Contrato
 from models.entidade import Entidade
 from models.fornecedor import Fornecedor
@@ -27,10 +30,30 @@ from clientside.transaction.transaction_pagamento import PaymentTransaction
 from clientside.domains.empenho import executar_empenho_rules as ValidaEmpenho
 from clientside.domains.liquidação import Valida as ValidaLiquidacao
 from clientside.domains.pagamento import Valida as ValidaPagamento
+from clientside.domains.pagamento import set_nfe_pagamento_check, nfe_pagamento_check_enabled
+from clientside.domains.empenho import coletar_empenho_violacoes
+from clientside.domains.liquidação import coletar_liquidacao_violacoes
+from clientside.domains.pagamento import coletar_pagamento_violacoes
+from clientside.domains.subdomains.violations import Violation
+from clientside.domains.subdomains.rule_registry import (
+    RULE_MODES, configure as configure_rules, profiling_enabled, reports_first_found, print_rule_stats, snapshot_all, diff_all, merge_all,
+)
+from utils.etl_common import (
+    stream_contratos, prefetch_batches, RELATED_LOADERS, batch_load_fingerprints, load_table_watermark,
+)
+from utils.audit_store import AuditStore, DEFAULT_PATH as AUDIT_STORE_PATH, rules_fingerprint
+from utils.snapshot import Snapshot, DEFAULT_PATH as SNAPSHOT_PATH
+from utils.instrumentation import (
+    SPANS, PROFILERS, span, spanned, spans_enabled, configure as configure_spans, print_span_stats, run_profiler,
+)
+from clientside.domains.subdomains.nfe_index import GlobalNfeIndex, print_nfe_alerts, print_nfe_index_summary
+from utils.dimension_cache import DimensionCache, print_dimension_stats, merge_dimension_stats
+from utils.results_sink import open_sink, contract_result
+from utils.async_loader import close_async_loader
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# BATCH LOADERS - 7 queries para carregar TUDO
+# BATCH LOADERS - 8 queries para carregar TUDO
 # ═══════════════════════════════════════════════════════════════════════════
 
 def log_contrato_estrutura(contrato: Contrato, entidade: Entidade = None, 
@@ -98,119 +121,335 @@ def log_contrato_estrutura(contrato: Contrato, entidade: Entidade = None,
     print("\n")
 
 
-def batch_load_contratos(cursor, offset: int, batch_size: int = 100) -> List[Contrato]:
-    """Carrega um batch de contratos com offset."""
-    cursor.execute(f"SELECT * FROM contrato ORDER BY id_contrato LIMIT {batch_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    contratos = []
-    for row in rows:
-        res = Contrato.create(dict(zip(cols, row)))
-        if res.is_ok:
-            contratos.append(res.value)
-    return contratos
+# ═══════════════════════════════════════════════════════════════════════════
+# PIPELINE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def new_stats() -> Dict[str, int]:
+    return {"emp_ok": 0, "emp_err": 0, "liq_ok": 0, "liq_err": 0, "pag_ok": 0, "pag_err": 0}
+
 
+PAG_ENGINES = ("scalar", "columnar")
 
-def batch_load_related_data(cursor, contratos: List[Contrato]):
+
+def _validate_ate_pagamento(emp_result: Result, liquidacoes, nfes, pagamentos, nfe_pagamentos=None):
     """
-    Carrega dados relacionados para um batch de contratos.
-    Retorna dicts indexados para O(1) lookup.
+    Empenho → Liquidação → build do Pagamento.
+    Retorna (e, l, p, err, pag_tx): pag_tx é a PaymentTransaction pronta para o Valida
+    (None se a cadeia parou antes).
     """
-    if not contratos:
-        return {}, {}, {}, {}, {}, {}
-    
-    contract_ids = [c.id_contrato for c in contratos]
-    entidade_ids = list(set(c.id_entidade for c in contratos))
-    fornecedor_ids = list(set(c.id_fornecedor for c in contratos))
+    e, l, p = ".", ".", "."
+    err = ""
     
-    # ENTIDADES
-    cursor.execute(f"SELECT * FROM entidade WHERE id_entidade = ANY(%s)", (entidade_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    entidades_map: Dict[int, Entidade] = {}
-    for row in rows:
-        res = Entidade.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            entidades_map[res.value.id_entidade] = res.value
-    
-    # FORNECEDORES
-    cursor.execute(f"SELECT * FROM fornecedor WHERE id_fornecedor = ANY(%s)", (fornecedor_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    fornecedores_map: Dict[int, Fornecedor] = {}
-    for row in rows:
-        res = Fornecedor.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            fornecedores_map[res.value.id_fornecedor] = res.value
-    
-    # EMPENHOS
-    cursor.execute(f"SELECT * FROM empenho WHERE id_contrato = ANY(%s)", (contract_ids,))
-    rows = cursor.fetchall()
-    cols = [d[0] for d in cursor.description]
-    empenhos_por_contrato: Dict[int, List[Empenho]] = defaultdict(list)
-    all_empenho_ids = []
-    for row in rows:
-        res = Empenho.from_row(dict(zip(cols, row)))
-        if res.is_ok:
-            emp = res.value
-            empenhos_por_contrato[emp.id_contrato].append(emp)
-            all_empenho_ids.append(emp.id_empenho)
-    
-    # LIQUIDAÇÕES (por empenho)
-    liquidacoes_por_empenho: Dict[str, List[LiquidacaoNotaFiscal]] = defaultdict(list)
-    all_chaves_danfe = []
-    if all_empenho_ids:
-        cursor.execute(f"SELECT * FROM liquidacao_nota_fiscal WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = LiquidacaoNotaFiscal.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                liq = res.value
-                liquidacoes_por_empenho[liq.id_empenho].append(liq)
-                if liq.chave_danfe:
-                    all_chaves_danfe.append(liq.chave_danfe)
-    
-    # NFEs
-    nfes_map: Dict[str, Nfe] = {}
-    if all_chaves_danfe:
-        cursor.execute(f"SELECT * FROM nfe WHERE chave_nfe = ANY(%s)", (all_chaves_danfe,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = Nfe.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                nfe = res.value
-                nfes_map[nfe.chave_nfe] = nfe
-    
-    # PAGAMENTOS
-    pagamentos_por_empenho: Dict[str, List[Pagamento]] = defaultdict(list)
-    if all_empenho_ids:
-        cursor.execute(f"SELECT * FROM pagamento WHERE id_empenho = ANY(%s)", (all_empenho_ids,))
-        rows = cursor.fetchall()
-        cols = [d[0] for d in cursor.description]
-        for row in rows:
-            res = Pagamento.from_row(dict(zip(cols, row)))
-            if res.is_ok:
-                pag = res.value
-                pagamentos_por_empenho[pag.id_empenho].append(pag)
-    
-    return (
-        entidades_map,
-        fornecedores_map,
-        dict(empenhos_por_contrato),
-        dict(liquidacoes_por_empenho),
-        nfes_map,
-        dict(pagamentos_por_empenho)
-    )
+    if emp_result.is_err:
+        return "B", l, p, emp_result.error, None
+
+    with span("valida.empenho"):
+        emp_v = ValidaEmpenho(emp_result.value)
+    if emp_v.is_err:
+        return "✗", l, p, emp_v.error, None
+    e = "✓"
+
+    # BATCH BUILD para Liquidação
+    with span("build.liquidacao"):
+        liq = LiquidacaoTransaction.build_from_batch(
+            emp_v.value, liquidacoes, nfes
+        )
+    if liq.is_err:
+        return e, "B", p, liq.error, None
+
+    with span("valida.liquidacao"):
+        liq_v = ValidaLiquidacao(liq.value)
+    if liq_v.is_err:
+        return e, "✗", p, liq_v.error, None
+    l = "✓"
+
+    # BATCH BUILD para Pagamento
+    with span("build.pagamento"):
+        pag = PaymentTransaction.build_from_batch(
+            liq_v.value, pagamentos, nfe_pagamentos
+        )
+    if pag.is_err:
+        return e, l, "B", pag.error, None
+
+    return e, l, p, err, pag.value
+
+
+def _status_pagamento(e: str, l: str, pag_v: Result):
+    if pag_v.is_err:
+        return e, l, "✗", pag_v.error
+    return e, l, "✓", ""
+
+
+def validate_contrato(emp_result: Result, liquidacoes, nfes, pagamentos, nfe_pagamentos=None):
+    """
+    Executa a cadeia Empenho → Liquidação → Pagamento de um contrato.
+    Retorna (e, l, p, err): status por estágio ("✓", "✗", "B" build error, "." não executado).
+    """
+    e, l, p, err, pag_tx = _validate_ate_pagamento(emp_result, liquidacoes, nfes, pagamentos, nfe_pagamentos)
+    if pag_tx is None:
+        return e, l, p, err
+    with span("valida.pagamento"):
+        pag_v = ValidaPagamento(pag_tx)
+    return _status_pagamento(e, l, pag_v)
+
+
+def validate_batch(tx_results: List[Result], liquidacoes, nfes, pagamentos, pag_engine: str = "scalar",
+                   nfe_pagamentos=None):
+    """
+    validate_contrato para o batch inteiro: lista de (e, l, p, err) na ordem de tx_results.
+    nfe_pagamentos: 7º map do loader (chave_nfe -> NfePagamentos), entregue aos PagamentoItem.
+    pag_engine="columnar": o estágio de Pagamento de todos os contratos que chegaram até ele
+    roda de uma vez no engine vetorial (clientside.domains.pagamento_columnar).
+    """
+    if pag_engine == "scalar":
+        return [validate_contrato(r, liquidacoes, nfes, pagamentos, nfe_pagamentos) for r in tx_results]
+
+    from clientside.domains.pagamento_columnar import valida_batch
+    staged = [_validate_ate_pagamento(r, liquidacoes, nfes, pagamentos, nfe_pagamentos) for r in tx_results]
+    pendentes = [i for i, st in enumerate(staged) if st[4] is not None]
+    outcomes = [st[:4] for st in staged]
+    with span("valida.pagamento.columnar"):
+        pag_results = valida_batch([staged[i][4] for i in pendentes])
+    for i, pag_v in zip(pendentes, pag_results):
+        e, l = staged[i][0], staged[i][1]
+        outcomes[i] = _status_pagamento(e, l, pag_v)
+    return outcomes
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# PIPELINE
+# ACUMULATIVO (--accumulate) - todas as violações de todos os estágios
+# ═══════════════════════════════════════════════════════════════════════════
+
+def collect_violations(emp_result: Result, liquidacoes, nfes, pagamentos, nfe_pagamentos=None) -> List[Violation]:
+    """
+    Modo acumulativo de validate_contrato: avalia todas as regras dos três estágios sobre os
+    agregados já construídos, sem parar no primeiro erro. Só uma falha de build interrompe
+    (o estágio seguinte não tem agregado). Contrato sem violações -> [].
+    A primeira violação é a mesma que validate_contrato reporta em `err`.
+    """
+    if emp_result.is_err:
+        return [Violation("empenho", "build", emp_result.error)]
+    violacoes = coletar_empenho_violacoes(emp_result.value)
+
+    liq = LiquidacaoTransaction.build_from_batch(emp_result.value, liquidacoes, nfes)
+    if liq.is_err:
+        return violacoes + [Violation("liquidacao", "build", liq.error)]
+    violacoes += coletar_liquidacao_violacoes(liq.value)
+
+    pag = PaymentTransaction.build_from_batch(liq.value, pagamentos, nfe_pagamentos)
+    if pag.is_err:
+        return violacoes + [Violation("pagamento", "build", pag.error)]
+    return violacoes + coletar_pagamento_violacoes(pag.value)
+
+
+def collect_batch_violations(tx_results: List[Result], liquidacoes, nfes, pagamentos,
+                             nfe_pagamentos=None) -> List[List[Violation]]:
+    """collect_violations para o batch inteiro, na ordem de tx_results."""
+    return [collect_violations(r, liquidacoes, nfes, pagamentos, nfe_pagamentos) for r in tx_results]
+
+
+def print_violations(violacoes: List[Violation]):
+    for v in violacoes:
+        ref = f" [{v.ref}]" if v.ref else ""
+        print(f"      ✗ {v.estagio}/{v.regra}{ref}: {v.mensagem}")
+
+
+def print_violation_summary(por_regra: Dict[str, int], contratos_com_violacao: int, total: int):
+    print(f"   🧾 Acumulativo: {sum(por_regra.values())} violações em {contratos_com_violacao}/{total} contratos")
+    for regra, count in sorted(por_regra.items(), key=lambda x: -x[1]):
+        print(f"     [{count:5d}x] {regra}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INCREMENTAL (--incremental) - só revalida contratos cujo grafo mudou
 # ═══════════════════════════════════════════════════════════════════════════
 
-def run_full_pipeline(batch_size: int = 100):
-    """Pipeline completo que processa TODOS os contratos em batches."""
+@dataclass
+class IncrementalBatch:
+    """Saída do incremental_loader para um batch de contratos."""
+    fingerprints: Dict[int, str]   # id_contrato -> md5 do grafo (CONTRACT_FINGERPRINT_QUERY)
+    stored: Dict[int, tuple]       # id_contrato -> AuditRecord do último run
+    changed: List[Contrato]        # contratos novos ou com fingerprint diferente
+    related: tuple                 # 7 maps, carregados só para `changed`
+
+
+def incremental_loader(load_related: Callable, lookup: Callable[[List[int]], Dict[int, tuple]]) -> Callable:
+    """
+    Envolve um loader de RELATED_LOADERS: 1 query de fingerprints para o batch, consulta ao
+    store e carga dos dados relacionados apenas dos contratos cujo grafo mudou.
+    """
+    def load(cursor, contratos: List[Contrato]) -> IncrementalBatch:
+        fingerprints = batch_load_fingerprints(cursor, contratos)
+        stored = lookup([c.id_contrato for c in contratos])
+        changed = [c for c in contratos
+                   if c.id_contrato not in stored or stored[c.id_contrato][1] != fingerprints.get(c.id_contrato)]
+        related = load_related(cursor, changed) if changed else ({}, {}, {}, {}, {}, {}, {})
+        return IncrementalBatch(fingerprints, stored, changed, related)
+    return load
+
+
+def validate_incremental(contratos: List[Contrato], batch: IncrementalBatch, pag_engine: str = "scalar"):
+    """
+    Outcomes (e, l, p, err) na ordem de `contratos`: os alterados passam pela cadeia
+    Empenho → Liquidação → Pagamento; os demais reaproveitam o outcome armazenado.
+    Retorna (outcomes, registros novos para o store).
+    """
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = batch.related
+    with span("build.empenho"):
+        tx_results = EmpenhoTransaction.build_from_batch(batch.changed, entidades, fornecedores, empenhos)
+    outcomes_changed = validate_batch(tx_results, liquidacoes, nfes, pagamentos, pag_engine, nfe_pagamentos)
+    fresh = {c.id_contrato: outcome for c, outcome in zip(batch.changed, outcomes_changed)}
+    records = [(id_contrato, batch.fingerprints.get(id_contrato, ""), *outcome) for id_contrato, outcome in fresh.items()]
+    outcomes = [fresh[c.id_contrato] if c.id_contrato in fresh else tuple(batch.stored[c.id_contrato][2:])
+                for c in contratos]
+    return outcomes, records
+
+
+def outcome_rules_fingerprint() -> str:
+    """
+    Fingerprint do código das regras + configuração que muda os outcomes sem mudar o código:
+    regra opcional ligada/desligada e adaptive-fast (reporta a 1ª violação achada, não a declarada).
+    """
+    return (rules_fingerprint()
+            + ("+nfe_pagamento" if nfe_pagamento_check_enabled() else "")
+            + ("+adaptive-fast" if reports_first_found() else ""))
+
+
+def open_audit_store(cursor, store_path: str = AUDIT_STORE_PATH):
+    """
+    Abre o store, descarta os outcomes se as regras mudaram e reporta o delta da marca d'água
+    (informativo: não pula fingerprints - ver utils.audit_store).
+    Retorna (store, rules, tables) - rules/tables viram a nova marca d'água em close_audit_store.
+    """
+    store = AuditStore(store_path)
+    rules = outcome_rules_fingerprint()
+    tables = load_table_watermark(cursor)
+    previous = store.watermark()
+    if not store.check_rules(rules):
+        motivo = "primeiro run" if previous is None else "regras alteradas desde o último run"
+        print(f"🔄 Incremental: {motivo} - revalidação completa")
+    else:
+        delta = [f"{t} {previous['tables'][t][0]}→{cur[0]}" for t, cur in tables.items()
+                 if previous["tables"].get(t) != cur]
+        print(f"🔄 Incremental: {store.count()} contratos no store | "
+              + (f"linhas: {', '.join(delta)}" if delta else "sem inserções/remoções desde o último run"))
+    return store, rules, tables
+
+
+def close_audit_store(store: AuditStore, rules: str, tables: Dict[str, list]) -> int:
+    """Fim de run completo: remove do store contratos apagados do banco e grava a marca d'água."""
+    removed = store.prune_unseen()
+    store.set_watermark(rules, tables)
+    store.close()
+    return removed
+
+
+def resolve_loader(loader: str, snapshot: Snapshot = None, store: AuditStore = None,
+                   dimensions: DimensionCache = None) -> Callable:
+    """
+    loader(cursor, contratos) do run: snapshot (se aberto) ou RELATED_LOADERS (com o cache de
+    dimensões, se houver), envolvido pelo incremental.
+    """
+    if snapshot is not None:
+        load_related = snapshot.load_related
+    elif dimensions is not None:
+        load_related = partial(RELATED_LOADERS[loader], dimensions=dimensions)
+    else:
+        load_related = RELATED_LOADERS[loader]
+    return incremental_loader(load_related, store.lookup) if store is not None else load_related
+
+
+def print_incremental_summary(revalidated: int, total: int, removed: int):
+    print(f"   ♻️  Incremental: {revalidated} revalidados, {total - revalidated} reaproveitados do store, "
+          f"{removed} removidos")
+
+
+def accumulate_stats(stats: Dict[str, int], errors: Dict[str, int], e: str, l: str, p: str, err: str):
+    if e == "✓": stats["emp_ok"] += 1
+    elif e != ".": stats["emp_err"] += 1
+    if l == "✓": stats["liq_ok"] += 1
+    elif l != ".": stats["liq_err"] += 1
+    if p == "✓": stats["pag_ok"] += 1
+    elif p != ".": stats["pag_err"] += 1
+    
+    if err:
+        errors[err.split("(")[0].strip()[:40]] += 1
+
+
+def print_summary(stats: Dict[str, int], errors: Dict[str, int], total_processed: int, batch_num: int, total_time: float):
+    print(f"\n{'='*80}")
+    print(f"📊 RESUMO FINAL")
+    print(f"{'='*80}")
+    print(f"  Total contratos: {total_processed}")
+    print(f"  Batches:         {batch_num}")
+    print(f"\n  ✓ EMP:{stats['emp_ok']:4d}  LIQ:{stats['liq_ok']:4d}  PAG:{stats['pag_ok']:4d}")
+    print(f"  ✗ EMP:{stats['emp_err']:4d}  LIQ:{stats['liq_err']:4d}  PAG:{stats['pag_err']:4d}")
+    print(f"\n  ⏱️  Total: {total_time:.2f}s ({total_processed/total_time:.1f} contratos/s)")
+    
+    if errors:
+        print(f"\n  🔴 TOP ERROS:")
+        for err, count in sorted(errors.items(), key=lambda x: -x[1])[:5]:
+            print(f"     [{count:4d}x] {err}")
+    print(f"{'='*80}\n")
+
+
+def print_results_summary(sink):
+    print(f"   💾 Resultados: {sink.rows} contratos em {sink.path}"
+          + (f" ({sink.removed} removidos: apagados do banco)" if sink.removed else ""))
+
+
+def iter_loaded_batches(conn, cursor, batch_size: int, server_side: bool = False, prefetch: int = 0,
+                        after_id: int = 0, until_id: int = None, loader: str = "classic",
+                        snapshot: Snapshot = None):
+    """
+    Gera (contratos, related) por batch.
+    prefetch=0: extração inline na conexão do chamador.
+    prefetch=N: thread de background extrai até N batches à frente (fila limitada).
+    loader: "classic" (7 queries), "joined" (1 round-trip) ou "async" (3 níveis em paralelo) - ver
+    utils.etl_common.RELATED_LOADERS -,
+    ou um callable loader(cursor, contratos) (ex.: incremental_loader). Cada chamada do loader
+    é o span "extract".
+    snapshot: contratos lidos do snapshot mapeado (utils.snapshot) em vez do banco; prefetch e
+    server_side não se aplicam (a leitura é local).
+    """
+    load_related = spanned("extract", loader if callable(loader) else RELATED_LOADERS[loader])
+    if snapshot is not None:
+        for contratos in snapshot.iter_contratos(batch_size, after_id=after_id, until_id=until_id):
+            yield contratos, load_related(cursor, contratos)
+        return
+    if prefetch > 0:
+        yield from prefetch_batches(batch_size, depth=prefetch, server_side=server_side,
+                                    after_id=after_id, until_id=until_id,
+                                    loader=load_related)
+        return
+    for contratos in stream_contratos(conn, batch_size, server_side=server_side,
+                                      after_id=after_id, until_id=until_id):
+        yield contratos, load_related(cursor, contratos)
+
+
+def run_full_pipeline(batch_size: int = 100, server_side: bool = False, prefetch: int = 0, loader: str = "classic",
+                      pag_engine: str = "scalar", incremental: bool = False, store_path: str = AUDIT_STORE_PATH,
+                      snapshot_path: str = None, accumulate: bool = False, dim_cache: bool = False,
+                      nfe_index: bool = False, nfe_index_max_keys: int = None,
+                      results_path: str = None, quiet: bool = False):
+    """
+    Pipeline completo que processa TODOS os contratos em batches (keyset streaming).
+    incremental=True: só contratos cujo grafo mudou desde o último run são carregados e revalidados
+    (os demais reaproveitam o outcome do store local - utils.audit_store).
+    snapshot_path: lê contratos e dados relacionados do snapshot colunar (make snapshot) em vez
+    do banco; recusado se o banco mudou desde o dump.
+    accumulate=True: além do outcome fail-fast, lista todas as violações de cada contrato
+    (collect_violations) sobre os mesmos dados carregados.
+    dim_cache=True: entidade/fornecedor em cache entre batches (utils.dimension_cache), com
+    preload das tabelas pequenas.
+    nfe_index=True: índice global chave_danfe -> contratos/fornecedores/soma liquidada,
+    alimentado batch a batch; reúso de NFe entre contratos é alertado na mesma passada.
+    results_path: uma linha por contrato (status, erro, montantes) em JSONL/Parquet/SQLite
+    (utils.results_sink), gravada em blocos; na tabela SQLite, run concluído remove os contratos
+    apagados do banco.
+    quiet=True: sem log por contrato/batch (log_contrato_estrutura, status, progresso); só o resumo.
+    """
     import time
     start = time.time()
     
@@ -223,130 +462,411 @@ def run_full_pipeline(batch_size: int = 100):
     print(f"\n{'='*80}")
     print(f"🚀 FULLPIPE - Processando TODOS os {total_contratos} contratos")
     print(f"   Batch size: {batch_size}")
+    if prefetch:
+        print(f"   Prefetch:   {prefetch} batch(es)")
+    snapshot = Snapshot.open(snapshot_path, cursor) if snapshot_path else None
+    if snapshot:
+        print(f"   Snapshot:   {snapshot_path}")
+    dimensions = None
+    if dim_cache and not snapshot:
+        dimensions = DimensionCache()
+        preloaded = [table for table, ok in dimensions.preload(cursor).items() if ok]
+        print(f"   Dimensões:  cache {'(preload: ' + ', '.join(preloaded) + ')' if preloaded else 'LRU'}")
     print(f"{'='*80}\n")
     
-    stats = {"emp_ok": 0, "emp_err": 0, "liq_ok": 0, "liq_err": 0, "pag_ok": 0, "pag_err": 0}
+    store = None
+    revalidated = 0
+    if incremental:
+        store, rules, tables = open_audit_store(cursor, store_path)
+    loader = resolve_loader(loader, snapshot, store, dimensions)
+    index = GlobalNfeIndex(nfe_index_max_keys) if nfe_index else None
+    sink = open_sink(results_path) if results_path else None
+    
+    stats = new_stats()
     errors = defaultdict(int)
+    violacoes_por_regra: Dict[str, int] = defaultdict(int)
+    contratos_com_violacao = 0
     offset = 0
     total_processed = 0
     batch_num = 0
     
-    while True:
-        batch_num += 1
+    try:
         batch_start = time.time()
+        for contratos, related in iter_loaded_batches(conn, cursor, batch_size, server_side, prefetch, loader=loader,
+                                                      snapshot=snapshot):
+            batch_num += 1
         
-        # Carregar batch de contratos
-        contratos = batch_load_contratos(cursor, offset, batch_size)
-        if not contratos:
-            break
+            if not quiet:
+                print(f"\n{'─'*80}")
+                print(f"📦 BATCH {batch_num}: contratos {offset+1} a {offset+len(contratos)}")
+                print(f"{'─'*80}")
         
-        print(f"\n{'─'*80}")
-        print(f"📦 BATCH {batch_num}: contratos {offset+1} a {offset+len(contratos)}")
-        print(f"{'─'*80}")
+            if incremental:
+                outcomes, records = validate_incremental(contratos, related, pag_engine)
+                store.save(records)
+                store.mark_seen(c.id_contrato for c in contratos)
+                revalidated += len(records)
+                fresh = {r[0] for r in records}
+                related = related.related
         
-        # Carregar dados relacionados
-        (entidades, fornecedores, empenhos, 
-         liquidacoes, nfes, pagamentos) = batch_load_related_data(cursor, contratos)
+            # Dados relacionados (carregados inline ou pelo prefetch)
+            (entidades, fornecedores, empenhos, 
+             liquidacoes, nfes, pagamentos, nfe_pagamentos) = related
         
-        # BUILD BATCH
-        tx_results = EmpenhoTransaction.build_from_batch(
-            contratos, entidades, fornecedores, empenhos
-        )
+            if not incremental:
+                # BUILD BATCH
+                with span("build.empenho"):
+                    tx_results = EmpenhoTransaction.build_from_batch(
+                        contratos, entidades, fornecedores, empenhos
+                    )
+                outcomes = validate_batch(tx_results, liquidacoes, nfes, pagamentos, pag_engine, nfe_pagamentos)
+                if accumulate:
+                    violacoes_batch = collect_batch_violations(tx_results, liquidacoes, nfes, pagamentos, nfe_pagamentos)
         
-        for i, (contrato, emp_result) in enumerate(zip(contratos, tx_results), 1):
-            # Logar estrutura completa do contrato
-            log_contrato_estrutura(
-                contrato,
-                entidades.get(contrato.id_entidade),
-                fornecedores.get(contrato.id_fornecedor),
-                empenhos.get(contrato.id_contrato, []),
-                liquidacoes,
-                nfes,
-                pagamentos
-            )
-            
-            e, l, p = ".", ".", "."
-            err = ""
+            for i, (contrato, (e, l, p, err)) in enumerate(zip(contratos, outcomes), 1):
+                total_idx = offset + i
+                if incremental and contrato.id_contrato not in fresh:
+                    accumulate_stats(stats, errors, e, l, p, err)
+                    if sink:
+                        sink.write(contract_result(contrato, (e, l, p, err)))
+                    if not quiet:
+                        print(f"  ▶ [{total_idx:4d}/{total_contratos}] C{contrato.id_contrato:4d} | E:{e} L:{l} P:{p} (inalterado)")
+                    continue
             
-            if emp_result.is_err:
-                e, err = "B", emp_result.error
-            else:
-                emp_v = ValidaEmpenho(emp_result.value)
-                if emp_v.is_err:
-                    e, err = "✗", emp_v.error
-                else:
-                    e = "✓"
-                    # BATCH BUILD para Liquidação
-                    liq = LiquidacaoTransaction.build_from_batch(
-                        emp_v.value, liquidacoes, nfes
+                if not quiet:
+                    # Logar estrutura completa do contrato
+                    log_contrato_estrutura(
+                        contrato,
+                        entidades.get(contrato.id_entidade),
+                        fornecedores.get(contrato.id_fornecedor),
+                        empenhos.get(contrato.id_contrato, []),
+                        liquidacoes,
+                        nfes,
+                        pagamentos
                     )
-                    if liq.is_err:
-                        l, err = "B", liq.error
-                    else:
-                        liq_v = ValidaLiquidacao(liq.value)
-                        if liq_v.is_err:
-                            l, err = "✗", liq_v.error
-                        else:
-                            l = "✓"
-                            # BATCH BUILD para Pagamento
-                            pag = PaymentTransaction.build_from_batch(
-                                liq_v.value, pagamentos
-                            )
-                            if pag.is_err:
-                                p, err = "B", pag.error
-                            else:
-                                pag_v = ValidaPagamento(pag.value)
-                                if pag_v.is_err:
-                                    p, err = "✗", pag_v.error
-                                else:
-                                    p = "✓"
             
-            # Stats
-            if e == "✓": stats["emp_ok"] += 1
-            elif e != ".": stats["emp_err"] += 1
-            if l == "✓": stats["liq_ok"] += 1
-            elif l != ".": stats["liq_err"] += 1
-            if p == "✓": stats["pag_ok"] += 1
-            elif p != ".": stats["pag_err"] += 1
+                accumulate_stats(stats, errors, e, l, p, err)
+                if sink:
+                    sink.write(contract_result(contrato, (e, l, p, err), related))
             
-            if err:
-                errors[err.split("(")[0].strip()[:40]] += 1
-            
-            total_idx = offset + i
-            print(f"  ▶ [{total_idx:4d}/{total_contratos}] C{contrato.id_contrato:4d} | E:{e} L:{l} P:{p}")
+                if not quiet:
+                    print(f"  ▶ [{total_idx:4d}/{total_contratos}] C{contrato.id_contrato:4d} | E:{e} L:{l} P:{p}")
+                if accumulate and violacoes_batch[i - 1]:
+                    contratos_com_violacao += 1
+                    for v in violacoes_batch[i - 1]:
+                        violacoes_por_regra[f"{v.estagio}/{v.regra}"] += 1
+                    if not quiet:
+                        print_violations(violacoes_batch[i - 1])
+        
+            if index is not None:
+                print_nfe_alerts(index.add_batch(contratos, related))
         
-        batch_time = time.time() - batch_start
-        total_processed += len(contratos)
-        print(f"\n  ✅ Batch {batch_num} concluído em {batch_time:.2f}s ({len(contratos)/batch_time:.1f} contratos/s)")
-        print(f"     Progresso: {total_processed}/{total_contratos} ({100*total_processed/total_contratos:.1f}%)")
+            batch_time = time.time() - batch_start
+            total_processed += len(contratos)
+            if not quiet:
+                print(f"\n  ✅ Batch {batch_num} concluído em {batch_time:.2f}s ({len(contratos)/batch_time:.1f} contratos/s)")
+                print(f"     Progresso: {total_processed}/{total_contratos} ({100*total_processed/total_contratos:.1f}%)")
         
-        offset += batch_size
+            offset += len(contratos)
+            batch_start = time.time()
+        if sink:
+            sink.mark_complete()
+    finally:
+        cursor.close()
+        conn.close()
+        close_async_loader()
+        if sink:
+            sink.close()
+    
+    # RESUMO FINAL
+    print_summary(stats, errors, total_processed, batch_num, time.time() - start)
+    if accumulate:
+        print_violation_summary(violacoes_por_regra, contratos_com_violacao, total_processed)
+    if incremental:
+        print_incremental_summary(revalidated, total_processed, close_audit_store(store, rules, tables))
+    if index is not None:
+        print_nfe_index_summary(index)
+    if dimensions:
+        print_dimension_stats(dimensions.stats())
+    if sink:
+        print_results_summary(sink)
+    if profiling_enabled():
+        print_rule_stats()
+    if spans_enabled():
+        print_span_stats()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARALLEL (--workers N) - sharding do keyspace id_contrato
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_shards(cursor, n_shards: int) -> List[Tuple[int, int]]:
+    """
+    Divide contrato em n_shards faixas (after_id, until_id] com contagem ~igual (ntile).
+    Faixas por contagem e não por intervalo de id: ids esparsos não desbalanceiam os workers.
+    Faixas contíguas: cada uma começa no fim da anterior, então ids que caem no vão entre dois
+    shards (ex.: inseridos durante o run) também pertencem a um deles.
+    """
+    cursor.execute("""
+        SELECT MIN(id_contrato), MAX(id_contrato)
+        FROM (
+            SELECT id_contrato, ntile(%s) OVER (ORDER BY id_contrato) AS shard
+            FROM contrato
+        ) s
+        GROUP BY shard
+        ORDER BY shard
+    """, (n_shards,))
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    bounds = [rows[0][0] - 1] + [hi for _, hi in rows]
+    return list(zip(bounds, bounds[1:]))
+
+
+_WORKER_DIMENSIONS: Optional[DimensionCache] = None
+
+
+def worker_dimensions(cursor) -> DimensionCache:
+    """Cache de dimensões do processo worker: criado (e pré-carregado) no primeiro shard, reusado nos seguintes."""
+    global _WORKER_DIMENSIONS
+    if _WORKER_DIMENSIONS is None:
+        _WORKER_DIMENSIONS = DimensionCache()
+        _WORKER_DIMENSIONS.preload(cursor)
+    return _WORKER_DIMENSIONS
+
+
+def run_shard(shard: Tuple[int, int], batch_size: int = 100, prefetch: int = 0, loader: str = "classic",
+              pag_engine: str = "scalar", store_path: str = None, snapshot_path: str = None,
+              dim_cache: bool = False, results: bool = False) -> dict:
+    """
+    Worker: processa a faixa (after_id, until_id] com conexão própria (pool do processo filho).
+    Retorna contadores parciais para merge no processo pai.
+    store_path (modo incremental): o worker só LÊ o store; os registros revalidados e os ids
+    vistos voltam para o pai, único escritor.
+    snapshot_path: snapshot já conferido pelo pai; o worker só o mapeia.
+    rule_stats: medição das regras só deste shard (o registry do processo segue aprendendo).
+    spans: histogramas do shard (SPANS.drain), mergeados pelo pai.
+    dim_cache: cache de dimensões do processo (worker_dimensions), compartilhado entre os shards do worker.
+    results: devolve as linhas do sink (contract_result) do shard; o pai é o único escritor do arquivo.
+    """
+    after_id, until_id = shard
+    rule_stats_before = snapshot_all()
+    stats = new_stats()
+    errors: Dict[str, int] = defaultdict(int)
+    processed = 0
+    batches = 0
+    records: List[tuple] = []
+    seen: List[int] = []
+    rows: List[tuple] = []
     
+    store = AuditStore(store_path) if store_path else None
+    snapshot = Snapshot(snapshot_path) if snapshot_path else None
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    dimensions = worker_dimensions(cursor) if dim_cache and not snapshot else None
+    loader = resolve_loader(loader, snapshot, store, dimensions)
+    try:
+        for contratos, related in iter_loaded_batches(conn, cursor, batch_size, prefetch=prefetch,
+                                                      after_id=after_id, until_id=until_id, loader=loader,
+                                                      snapshot=snapshot):
+            batches += 1
+            if store:
+                outcomes, batch_records = validate_incremental(contratos, related, pag_engine)
+                records.extend(batch_records)
+                seen.extend(c.id_contrato for c in contratos)
+                fresh = {r[0] for r in batch_records}
+                batch = related
+                related = batch.related
+            else:
+                (entidades, fornecedores, empenhos,
+                 liquidacoes, nfes, pagamentos, nfe_pagamentos) = related
+                with span("build.empenho"):
+                    tx_results = EmpenhoTransaction.build_from_batch(
+                        contratos, entidades, fornecedores, empenhos
+                    )
+                outcomes = validate_batch(tx_results, liquidacoes, nfes, pagamentos, pag_engine, nfe_pagamentos)
+            for e, l, p, err in outcomes:
+                accumulate_stats(stats, errors, e, l, p, err)
+            if results:
+                rows.extend(contract_result(c, outcome, related if not store or c.id_contrato in fresh else None)
+                            for c, outcome in zip(contratos, outcomes))
+            processed += len(contratos)
+    finally:
+        cursor.close()
+        conn.close()
+        if store:
+            store.close()
+    
+    return {"shard": shard, "stats": stats, "errors": dict(errors), "processed": processed, "batches": batches,
+            "records": records, "seen": seen, "results": rows, "spans": SPANS.drain(), "rule_stats": diff_all(snapshot_all(), rule_stats_before),
+            "dim_stats": (os.getpid(), dimensions.stats()) if dimensions else None}
+
+
+def run_parallel_pipeline(workers: int, batch_size: int = 100, shards_per_worker: int = 4, prefetch: int = 0,
+                          loader: str = "classic", pag_engine: str = "scalar", incremental: bool = False,
+                          store_path: str = AUDIT_STORE_PATH, snapshot_path: str = None, dim_cache: bool = False,
+                          results_path: str = None, quiet: bool = False):
+    """
+    Fullpipe multi-processo: o keyspace de contratos é fatiado em workers*shards_per_worker
+    faixas, distribuídas dinamicamente entre os processos; contadores são mergeados ao final.
+    Logs por contrato são omitidos (saída intercalada de N processos); quiet omite também o
+    progresso por shard. results_path: linhas dos shards gravadas pelo pai, na ordem de conclusão.
+    """
+    import time
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    start = time.time()
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM contrato")
+    total_contratos = cursor.fetchone()[0]
+    shards = compute_shards(cursor, workers * shards_per_worker)
+    store = None
+    revalidated = 0
+    if incremental:
+        store, rules, tables = open_audit_store(cursor, store_path)
+    if snapshot_path:
+        Snapshot.open(snapshot_path, cursor)
     cursor.close()
     conn.close()
+    # Conexões do pai não devem atravessar para os filhos
+    close_pool()
     
-    # RESUMO FINAL
-    total_time = time.time() - start
     print(f"\n{'='*80}")
-    print(f"📊 RESUMO FINAL")
-    print(f"{'='*80}")
-    print(f"  Total contratos: {total_processed}")
-    print(f"  Batches:         {batch_num}")
-    print(f"\n  ✓ EMP:{stats['emp_ok']:4d}  LIQ:{stats['liq_ok']:4d}  PAG:{stats['pag_ok']:4d}")
-    print(f"  ✗ EMP:{stats['emp_err']:4d}  LIQ:{stats['liq_err']:4d}  PAG:{stats['pag_err']:4d}")
-    print(f"\n  ⏱️  Total: {total_time:.2f}s ({total_processed/total_time:.1f} contratos/s)")
-    
-    if errors:
-        print(f"\n  🔴 TOP ERROS:")
-        for err, count in sorted(errors.items(), key=lambda x: -x[1])[:5]:
-            print(f"     [{count:4d}x] {err}")
+    print(f"🚀 FULLPIPE PARALELO - {total_contratos} contratos em {len(shards)} shards / {workers} workers")
+    print(f"   Batch size: {batch_size}")
     print(f"{'='*80}\n")
+    
+    stats = new_stats()
+    errors: Dict[str, int] = defaultdict(int)
+    total_processed = 0
+    batch_num = 0
+    
+    dim_stats_por_worker: Dict[int, dict] = {}
+    sink = open_sink(results_path) if results_path else None
+    
+    ctx = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    completed = False
+    try:
+        futures = [executor.submit(run_shard, shard, batch_size, prefetch, loader, pag_engine,
+                                   store_path if incremental else None, snapshot_path, dim_cache, sink is not None)
+                   for shard in shards]
+        for future in as_completed(futures):
+            part = future.result()
+            if store:
+                store.save(part["records"])
+                store.mark_seen(part["seen"])
+                revalidated += len(part["records"])
+            for k, v in part["stats"].items():
+                stats[k] += v
+            for err, count in part["errors"].items():
+                errors[err] += count
+            merge_all(part["rule_stats"])
+            SPANS.merge(part["spans"])
+            if part["dim_stats"]:
+                pid, dim_stats = part["dim_stats"]
+                dim_stats_por_worker[pid] = dim_stats  # contadores acumulados do worker: vale o último
+            if sink:
+                sink.write_many(part["results"])
+            total_processed += part["processed"]
+            batch_num += part["batches"]
+            after_id, until_id = part["shard"]
+            if not quiet:
+                print(f"  ✅ Shard C{after_id + 1}..C{until_id}: {part['processed']} contratos "
+                      f"| Progresso: {total_processed}/{total_contratos}")
+        if sink:
+            sink.mark_complete()
+        completed = True
+    finally:
+        # Shard com erro: cancela os pendentes em vez de esperar o resto do keyspace antes de propagar
+        executor.shutdown(wait=completed, cancel_futures=not completed)
+        if sink:
+            sink.close()
+        if store and not completed:
+            store.close()
+    
+    print_summary(stats, errors, total_processed, batch_num, time.time() - start)
+    if incremental:
+        print_incremental_summary(revalidated, total_processed, close_audit_store(store, rules, tables))
+    if dim_stats_por_worker:
+        print_dimension_stats(merge_dimension_stats(dim_stats_por_worker.values()))
+    if sink:
+        print_results_summary(sink)
+    if profiling_enabled():
+        print_rule_stats()
+    if spans_enabled():
+        print_span_stats()
 
 
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser()
     p.add_argument("--batch", "-b", type=int, default=100, help="Tamanho do batch (default: 100)")
+    p.add_argument("--server-side", action="store_true", help="Stream de contratos via named cursor (server-side)")
+    p.add_argument("--workers", "-w", type=int, default=1, help="Processos paralelos (default: 1 = sequencial)")
+    p.add_argument("--prefetch", "-p", type=int, default=0,
+                   help="Batches extraídos à frente por uma thread de background (default: 0 = desligado)")
+    p.add_argument("--loader", choices=sorted(RELATED_LOADERS), default="classic",
+                   help="Extração dos dados relacionados: classic (7 queries), joined (1 round-trip) ou "
+                        "async (queries independentes em paralelo, psycopg 3)")
+    p.add_argument("--pag-engine", choices=PAG_ENGINES, default="scalar",
+                   help="Validação de Pagamento: scalar (Valida por contrato) ou columnar (batch vetorizado, NumPy)")
+    p.add_argument("--incremental", action="store_true",
+                   help="Só revalida contratos cujo grafo mudou desde o último run (fingerprint de todo contrato no "
+                        "banco + store local)")
+    p.add_argument("--audit-store", default=AUDIT_STORE_PATH,
+                   help=f"Arquivo SQLite do modo incremental (default: {AUDIT_STORE_PATH})")
+    p.add_argument("--snapshot", nargs="?", const=SNAPSHOT_PATH, default=None,
+                   help=f"Lê o grafo do snapshot colunar mapeado em vez do banco (default: {SNAPSHOT_PATH})")
+    p.add_argument("--accumulate", action="store_true",
+                   help="Lista todas as violações de todos os estágios por contrato (sem parar no primeiro erro)")
+    p.add_argument("--nfe-index", action="store_true",
+                   help="Índice global de NFe durante o run: alerta reúso entre contratos (sobre-liquidação / fornecedores)")
+    p.add_argument("--nfe-index-max-keys", type=int, default=None,
+                   help="Limite de chaves do índice de NFe (default: sem limite)")
+    p.add_argument("--dim-cache", action="store_true",
+                   help="Entidade/fornecedor em cache entre batches (preload das tabelas pequenas, LRU nas demais)")
+    p.add_argument("--rule-order", choices=RULE_MODES, default=os.getenv("RULE_ORDER", "fixed"),
+                   help="Ordem das regras de Empenho/Pagamento: fixed (declarada), adaptive (rejeição/custo, "
+                        "mesmo erro reportado) ou adaptive-fast (reporta a primeira violação encontrada)")
+    p.add_argument("--rule-stats", action="store_true",
+                   help="Mede tempo e taxa de rejeição por regra e imprime a tabela no resumo")
+    p.add_argument("--nfe-pagamento-check", action="store_true", default=nfe_pagamento_check_enabled(),
+                   help="Liga a regra Σ NfePagamento = NFe.valor_total no Pagamento (NfePagamentos do batch, "
+                        "sem query por NFe; env NFE_PAGAMENTO_CHECK=1)")
+    p.add_argument("--spans", action="store_true", default=spans_enabled(),
+                   help="Histogramas p50/p95/p99 por etapa (sql/hydrate/extract, build, valida, regra) no resumo "
+                        "(env PIPELINE_SPANS=1)")
+    p.add_argument("--profile", choices=PROFILERS, default=None,
+                   help="Perfil do run inteiro: cprofile (.prof) ou pyinstrument (.html, requer pyinstrument)")
+    p.add_argument("--profile-out", default=None, metavar="PATH",
+                   help="Arquivo do perfil (default: profile.prof / profile.html)")
+    p.add_argument("--results", default=None, metavar="PATH",
+                   help="Grava uma linha por contrato (status, erro, montantes) em PATH (.jsonl, .parquet ou .sqlite3 - "
+                        "a tabela que o dashboard lê)")
+    p.add_argument("--quiet", "-q", action="store_true",
+                   help="Sem log por contrato/batch (estrutura, status, progresso): só o resumo final")
     args = p.parse_args()
-    run_full_pipeline(batch_size=args.batch)
-
+    configure_spans(args.spans)
+    configure_rules(args.rule_order, args.rule_stats or args.spans)
+    set_nfe_pagamento_check(args.nfe_pagamento_check)
+    if args.accumulate and (args.incremental or args.workers > 1):
+        p.error("--accumulate roda no pipeline sequencial completo (sem --incremental / --workers)")
+    if args.nfe_index and (args.incremental or args.workers > 1):
+        p.error("--nfe-index precisa de todos os contratos em um processo (sem --incremental / --workers)")
+    with run_profiler(args.profile, args.profile_out):
+        if args.workers > 1:
+            run_parallel_pipeline(workers=args.workers, batch_size=args.batch, prefetch=args.prefetch,
+                                  loader=args.loader, pag_engine=args.pag_engine,
+                                  incremental=args.incremental, store_path=args.audit_store,
+                                  snapshot_path=args.snapshot, dim_cache=args.dim_cache,
+                                  results_path=args.results, quiet=args.quiet)
+        else:
+            run_full_pipeline(batch_size=args.batch, server_side=args.server_side, prefetch=args.prefetch,
+                              loader=args.loader, pag_engine=args.pag_engine,
+                              incremental=args.incremental, store_path=args.audit_store,
+                              snapshot_path=args.snapshot, accumulate=args.accumulate, dim_cache=args.dim_cache,
+                              nfe_index=args.nfe_index, nfe_index_max_keys=args.nfe_index_max_keys,
+                              results_path=args.results, quiet=args.quiet)
@@ -16,7 +16,7 @@ from models.contrato import Contrato
 from clientside.transaction.empenho_transaction import EmpenhoTransaction
 from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
 from clientside.domains.liquidação import Valida
-from utils.etl_common import batch_load_contratos, batch_load_related_data
+from utils.etl_common import stream_contratos, batch_load_related_data
 from views.etl_empenhos import print_structure
 
 def run_pipeline(batch_size: int = 100):
@@ -32,12 +32,9 @@ def run_pipeline(batch_size: int = 100):
     offset = 0
     batch_num = 0
 
-    while True:
+    for contratos in stream_contratos(conn, batch_size):
         batch_num += 1
         print(f"\n--- [E]XTRACT Batch {batch_num} ---")
-        contratos = batch_load_contratos(cursor, offset, batch_size)
-        if not contratos:
-            break
         
         print(f"📦 Extracted {len(contratos)} contracts.")
 
@@ -91,7 +88,7 @@ def run_pipeline(batch_size: int = 100):
              else:
                   print(f"   🚫 [L] Invalid #{global_idx}: {val_res.error}")
         
-        offset += batch_size
+        offset += len(contratos)
 
     cursor.close()
     conn.close()
@@ -16,7 +16,7 @@ from clientside.transaction.empenho_transaction import EmpenhoTransaction
 from clientside.transaction.transaction_liquidacao import LiquidacaoTransaction
 from clientside.transaction.transaction_pagamento import PaymentTransaction
 from clientside.domains.pagamento import Valida
-from utils.etl_common import batch_load_contratos, batch_load_related_data
+from utils.etl_common import stream_contratos, batch_load_related_data
 from views.etl_empenhos import print_structure
 
 def run_pipeline(batch_size: int = 100):
@@ -32,12 +32,9 @@ def run_pipeline(batch_size: int = 100):
     offset = 0
     batch_num = 0
 
-    while True:
+    for contratos in stream_contratos(conn, batch_size):
         batch_num += 1
         print(f"\n--- [E]XTRACT Batch {batch_num} ---")
-        contratos = batch_load_contratos(cursor, offset, batch_size)
-        if not contratos:
-            break
         
         print(f"📦 Extracted {len(contratos)} contracts.")
 
@@ -90,7 +87,7 @@ def run_pipeline(batch_size: int = 100):
             
             print(f"   [V] Processed #{global_idx}")
 
-        offset += batch_size
+        offset += len(contratos)
 
     cursor.close()
     conn.close()
@@ -27,7 +27,7 @@ def run_structure_dump():
     # 1. EXTRACT
     print("--- [E]XTRACT Phase (Sample 3) ---")
     # Load just 3 contracts for dumping
-    contratos = batch_load_contratos(cursor, offset=0, batch_size=3)
+    contratos, _ = batch_load_contratos(cursor, after_id=0, batch_size=3)
     
     if not contratos:
         print("❌ No contracts found.")
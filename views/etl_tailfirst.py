@@ -0,0 +1,198 @@
+"""
+ETL Tail-First - validação a partir do pagamento (tailback approach, ver README)
+
+O fullpipe percorre todos os contratos da cabeça (contrato) até a cauda (pagamento).
+Aqui a ordem é invertida: os pagamentos são agregados por id_empenho no banco e
+consumidos em ordem de suspeita (pago acima do empenhado, depois maior volume pago);
+só os contratos tocados por esses pagamentos têm o grafo carregado e validado.
+Contratos sem pagamento nunca são lidos, e --limit N audita só o dinheiro mais suspeito.
+
+Pagamentos sem empenho (ou de empenho sem contrato) não têm cadeia para validar e
+são reportados como flutuantes.
+"""
+import sys
+import os
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from collections import defaultdict
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../"))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from db_connection import get_db_connection
+from models.contrato import Contrato
+from clientside.transaction.empenho_transaction import EmpenhoTransaction
+from utils.etl_common import (
+    stream_payment_groups, batch_load_contratos_by_ids, PaymentGroup, RELATED_LOADERS,
+)
+from utils.results_sink import open_sink, contract_result
+from utils.instrumentation import (
+    PROFILERS, span, spans_enabled, configure as configure_spans, print_span_stats, run_profiler,
+)
+from clientside.domains.subdomains.rule_registry import configure as configure_rules
+from utils.async_loader import close_async_loader
+from views.etl_fullpipe import (
+    validate_batch, new_stats, accumulate_stats, print_summary, print_results_summary, PAG_ENGINES,
+)
+
+
+def iter_tail_batches(groups: Iterable[List[PaymentGroup]], batch_size: int = 100,
+                      limit: Optional[int] = None) -> Iterator[Tuple[List[int], List[PaymentGroup]]]:
+    """
+    Converte o stream de PaymentGroup em batches de até batch_size contratos distintos, na
+    ordem em que aparecem (a mais suspeita); contrato já emitido não volta. Cada item é
+    (ids de contrato, grupos flutuantes vistos desde o batch anterior). limit: máximo de
+    contratos emitidos no total.
+    """
+    seen: Set[int] = set()
+    pending: List[int] = []
+    floating: List[PaymentGroup] = []
+    for chunk in groups:
+        for group in chunk:
+            if group.id_contrato is None:
+                floating.append(group)
+            elif group.id_contrato not in seen:
+                seen.add(group.id_contrato)
+                pending.append(group.id_contrato)
+                if len(pending) == batch_size:
+                    yield pending, floating
+                    pending, floating = [], []
+            if limit is not None and len(seen) >= limit:
+                break
+        if limit is not None and len(seen) >= limit:
+            break
+    if pending or floating:
+        yield pending, floating
+
+
+def total_pago(contrato: Contrato, empenhos: Dict[int, list], pagamentos: Dict[str, list]) -> Decimal:
+    return sum((pag.valor for emp in empenhos.get(contrato.id_contrato, [])
+                for pag in pagamentos.get(emp.id_empenho, [])), Decimal(0))
+
+
+def validate_tail_batch(cursor, contract_ids: List[int], loader: str = "classic", pag_engine: str = "scalar"):
+    """
+    Carrega os contratos (na ordem de suspeita) e o grafo completo de cada um - a regra de
+    total pago x contrato precisa de todos os pagamentos do contrato, não só do empenho
+    que o trouxe - e roda a cadeia Empenho → Liquidação → Pagamento.
+    Retorna (contratos, related, outcomes, ids de contrato inexistentes).
+    """
+    contratos = batch_load_contratos_by_ids(cursor, contract_ids)
+    found = {c.id_contrato for c in contratos}
+    missing = [i for i in contract_ids if i not in found]
+    with span("extract"):
+        related = RELATED_LOADERS[loader](cursor, contratos)
+    entidades, fornecedores, empenhos, liquidacoes, nfes, pagamentos, nfe_pagamentos = related
+    with span("build.empenho"):
+        tx_results = EmpenhoTransaction.build_from_batch(contratos, entidades, fornecedores, empenhos)
+    outcomes = validate_batch(tx_results, liquidacoes, nfes, pagamentos, pag_engine, nfe_pagamentos)
+    return contratos, related, outcomes, missing
+
+
+def print_floating(floating: List[PaymentGroup]):
+    sem_empenho = [g for g in floating if not g.empenho_existe]
+    sem_contrato = [g for g in floating if g.empenho_existe]
+    for titulo, grupos in (("empenho inexistente", sem_empenho), ("empenho sem contrato", sem_contrato)):
+        if grupos:
+            total = sum((g.total_pago for g in grupos if g.total_pago is not None), Decimal(0))
+            print(f"   🪂 Flutuantes ({titulo}): {sum(g.n_pagamentos for g in grupos)} pagamentos "
+                  f"em {len(grupos)} empenho(s), R$ {total:,.2f}")
+
+
+def run_tail_pipeline(batch_size: int = 100, loader: str = "classic", pag_engine: str = "scalar",
+                      limit: Optional[int] = None, results_path: Optional[str] = None, quiet: bool = False):
+    """
+    Auditoria tail-first: contratos com pagamento, do dinheiro mais suspeito para o menos.
+    limit: audita só os N primeiros contratos da fila de suspeita.
+    results_path: uma linha por contrato, na ordem de suspeita (utils.results_sink).
+    quiet=True: sem linha por contrato/batch; só o resumo.
+    """
+    import time
+    start = time.time()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM contrato")
+    total_contratos = cursor.fetchone()[0]
+    print(f"\n{'='*80}")
+    print(f"🔙 TAIL-FIRST - pagamentos agrupados por empenho, dinheiro suspeito primeiro")
+    print(f"   Contratos no banco: {total_contratos} | Batch size: {batch_size}"
+          + (f" | Limite: {limit}" if limit else ""))
+    print(f"{'='*80}\n")
+
+    stats = new_stats()
+    errors: Dict[str, int] = defaultdict(int)
+    floating: List[PaymentGroup] = []
+    missing: List[int] = []
+    total_processed = 0
+    batch_num = 0
+    sink = open_sink(results_path) if results_path else None
+
+    try:
+        for contract_ids, batch_floating in iter_tail_batches(stream_payment_groups(conn, batch_size * 4),
+                                                               batch_size, limit):
+            floating.extend(batch_floating)
+            if not contract_ids:
+                continue
+            batch_num += 1
+            contratos, related, outcomes, batch_missing = validate_tail_batch(cursor, contract_ids, loader, pag_engine)
+            missing.extend(batch_missing)
+            _, _, empenhos, _, _, pagamentos, _ = related
+            if not quiet:
+                print(f"\n📦 BATCH {batch_num}: {len(contratos)} contratos")
+            for contrato, (e, l, p, err) in zip(contratos, outcomes):
+                total_processed += 1
+                accumulate_stats(stats, errors, e, l, p, err)
+                if sink:
+                    sink.write(contract_result(contrato, (e, l, p, err), related))
+                if quiet:
+                    continue
+                pago = total_pago(contrato, empenhos, pagamentos)
+                print(f"  ▶ [{total_processed:4d}] C{contrato.id_contrato:4d} | pago R$ {pago:>14,.2f} | "
+                      f"E:{e} L:{l} P:{p}" + (f" | {err}" if err else ""))
+    finally:
+        cursor.close()
+        conn.close()
+        close_async_loader()
+        if sink:
+            sink.close()
+
+    print_summary(stats, errors, total_processed, batch_num, time.time() - start)
+    if limit is None:
+        print(f"   ⏭️  Contratos sem pagamento (não carregados): {total_contratos - total_processed}")
+    if missing:
+        print(f"   👻 Empenhos apontando para contratos inexistentes: {len(missing)} contrato(s)")
+    print_floating(floating)
+    if sink:
+        print_results_summary(sink)
+    if spans_enabled():
+        print_span_stats()
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Auditoria tail-first (a partir dos pagamentos)")
+    p.add_argument("--batch", "-b", type=int, default=100, help="Contratos por batch (default: 100)")
+    p.add_argument("--limit", "-n", type=int, default=None,
+                   help="Audita só os N contratos mais suspeitos (default: todos com pagamento)")
+    p.add_argument("--loader", choices=sorted(RELATED_LOADERS), default="classic",
+                   help="Extração dos dados relacionados: classic (7 queries), joined (1 round-trip) ou "
+                        "async (queries independentes em paralelo, psycopg 3)")
+    p.add_argument("--pag-engine", choices=PAG_ENGINES, default="scalar",
+                   help="Validação de Pagamento: scalar ou columnar (NumPy)")
+    p.add_argument("--results", default=None, metavar="PATH",
+                   help="Grava uma linha por contrato (status, erro, montantes) em PATH (.jsonl, .parquet ou .sqlite3)")
+    p.add_argument("--quiet", "-q", action="store_true", help="Sem linha por contrato/batch: só o resumo final")
+    p.add_argument("--spans", action="store_true", default=spans_enabled(),
+                   help="Histogramas p50/p95/p99 por etapa no resumo (env PIPELINE_SPANS=1)")
+    p.add_argument("--profile", choices=PROFILERS, default=None, help="Perfil do run: cprofile ou pyinstrument")
+    p.add_argument("--profile-out", default=None, metavar="PATH", help="Arquivo do perfil")
+    args = p.parse_args()
+    configure_spans(args.spans)
+    if args.spans:
+        configure_rules(os.getenv("RULE_ORDER", "fixed"), True)
+    with run_profiler(args.profile, args.profile_out):
+        run_tail_pipeline(batch_size=args.batch, loader=args.loader, pag_engine=args.pag_engine, limit=args.limit,
+                          results_path=args.results, quiet=args.quiet)